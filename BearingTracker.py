@@ -0,0 +1,183 @@
+####### WRITTEN TO TRACK THE OBJECT IN AZIMUTH AND ELEVATION INSTEAD OF PIXELS #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# THE PID LOOPS WORK ON THE ERROR IN PIXELS, SO EVERY MOVEMENT OF THE PTU LOOKS LIKE A MOVEMENT OF THE OBJECT AND
+# THE LOOP OSCILLATES. BearingTracker TURNS EVERY DETECTION INTO AN ABSOLUTE BEARING (AZIMUTH AND ELEVATION IN
+# DEGREES) WITH THE CAMERA MODEL AND THE PAN AND TILT OF THE PTU WHEN THE FRAME WAS CAPTURED (PTU.position_at),
+# AND FILTERS THE BEARING WITH A CONSTANT VELOCITY KALMAN FILTER. THE STATE DOES NOT DEPEND ON WHERE THE CAMERA
+# POINTS, AND THE PTU IS SENT TO THE PREDICTED BEARING WITH ABSOLUTE PP AND TP COMMANDS.
+
+# AZIMUTH IS THE PAN ANGLE, ELEVATION IS POSITIVE ABOVE THE HORIZON OF THE PTU. A POSITIVE TILT MOVES THE CAMERA
+# DOWN, AS IN THE PID LOOPS, CHANGE TILT_UP FOR A PTU THAT TILTS UP WITH POSITIVE POSITIONS.
+
+#     camera = CameraModel.from_fov(W, H, 60)
+#     tracker = BearingTracker(camera)
+#     pan, tilt = ptu.position_at(capture_time)
+#     if tracker.update(capture_time, detector.detections["bounding_box"], pan, tilt):
+#         pan, tilt = tracker.ptu_target(time.monotonic() + latency)
+#         ptu.move_x_to_degrees(pan); ptu.move_y_to_degrees(tilt)
+
+import numpy as np
+
+# SIGN OF THE TILT THAT MOVES THE CAMERA UP
+TILT_UP = -1
+
+class CameraModel:
+    # PINHOLE CAMERA, focal_length IN PIXELS, (cx, cy) THE PRINCIPAL POINT, ON THE AXES OF THE PTU
+    def __init__(self, width, height, focal_length, cx=None, cy=None):
+        self.width = width
+        self.height = height
+        self.focal_length = focal_length
+        self.cx = width / 2 if cx is None else cx
+        self.cy = height / 2 if cy is None else cy
+
+    # FROM THE HORIZONTAL FIELD OF VIEW IN DEGREES
+    @classmethod
+    def from_fov(cls, width, height, fov):
+        return cls(width, height, width / 2 / np.tan(np.radians(fov) / 2))
+
+    # ABSOLUTE AZIMUTH AND ELEVATION IN DEGREES OF A PIXEL, THE CAMERA POINTING AT (azimuth, elevation)
+    def pixel_to_bearing(self, x, y, azimuth, elevation):
+        right = x - self.cx
+        up = self.cy - y
+        e = np.radians(elevation)
+        # RAY OF THE PIXEL ROTATED BY THE ELEVATION OF THE CAMERA, (right, forward, up)
+        forward = self.focal_length * np.cos(e) - up * np.sin(e)
+        up = self.focal_length * np.sin(e) + up * np.cos(e)
+        return (azimuth + np.degrees(np.arctan2(right, forward)),
+                np.degrees(np.arctan2(up, np.hypot(right, forward))))
+
+    # PIXEL OF AN ABSOLUTE BEARING, THE CAMERA POINTING AT (azimuth, elevation), E.G. TO DRAW THE PREDICTION
+    def bearing_to_pixel(self, target_azimuth, target_elevation, azimuth, elevation):
+        a = np.radians(target_azimuth - azimuth)
+        t = np.radians(target_elevation)
+        e = np.radians(elevation)
+        right = np.cos(t) * np.sin(a)
+        forward = np.cos(t) * np.cos(a)
+        up = np.sin(t)
+        # ROTATE BACK BY THE ELEVATION OF THE CAMERA
+        depth = forward * np.cos(e) + up * np.sin(e)
+        up = up * np.cos(e) - forward * np.sin(e)
+        return (self.cx + self.focal_length * right / depth, self.cy - self.focal_length * up / depth)
+
+# AZIMUTH AND ELEVATION OF THE CAMERA FROM THE PAN AND TILT OF THE PTU IN DEGREES, AND BACK
+def ptu_to_bearing(pan, tilt):
+    return pan, TILT_UP * tilt
+
+def bearing_to_ptu(azimuth, elevation):
+    return azimuth, TILT_UP * elevation
+
+class BearingTracker:
+    # camera: CameraModel of the frames
+    # pixel_noise: standard deviation of the center of a detection in pixels
+    # acceleration_noise: standard deviation of the angular acceleration of the object in degrees per second squared
+    # gate: detections further than this many standard deviations from the prediction are ignored
+    # max_coast: seconds the track is predicted without a detection before it is lost
+    def __init__(self, camera, pixel_noise=5.0, acceleration_noise=20.0, gate=4.0, max_coast=1.0):
+        self.camera = camera
+        # MEASUREMENT NOISE IN DEGREES, A PIXEL IS ABOUT 1 / focal_length RADIANS
+        self.measurement_noise = np.degrees(pixel_noise / camera.focal_length) ** 2
+        self.acceleration_noise = acceleration_noise
+        self.gate = gate
+        self.max_coast = max_coast
+        self.reset()
+
+    # FORGET THE TRACK
+    def reset(self):
+        # [azimuth, elevation, azimuth rate, elevation rate] IN DEGREES AND DEGREES PER SECOND
+        self.state = None
+        self.covariance = None
+        self.time = None
+        self.last_update = None
+        # LAST RANGE OF THE OBJECT IN METERS FROM THE LASER RANGER AND ITS TIME
+        self.range = None
+        self.range_time = None
+
+    @property
+    def tracking(self):
+        return self.state is not None
+
+    def _predict(self, t):
+        dt = t - self.time
+        if dt <= 0:
+            return self.state, self.covariance
+        F = np.eye(4)
+        F[0, 2] = F[1, 3] = dt
+        # WHITE ACCELERATION NOISE
+        q = self.acceleration_noise ** 2
+        block = q * np.array([[dt ** 4 / 4, dt ** 3 / 2], [dt ** 3 / 2, dt ** 2]])
+        Q = np.zeros((4, 4))
+        Q[np.ix_([0, 2], [0, 2])] = block
+        Q[np.ix_([1, 3], [1, 3])] = block
+        return F @ self.state, F @ self.covariance @ F.T + Q
+
+    # BEARING OF THE CENTER OF EVERY BOX (ymin, xmin, ymax, xmax IN PIXELS), THE PTU AT (pan, tilt)
+    def bearings(self, boxes, pan, tilt):
+        azimuth, elevation = ptu_to_bearing(pan, tilt)
+        return [self.camera.pixel_to_bearing((xmin + xmax) / 2, (ymin + ymax) / 2, azimuth, elevation)
+                for ymin, xmin, ymax, xmax in boxes]
+
+    # UPDATE THE TRACK WITH THE DETECTIONS OF A FRAME CAPTURED AT TIME t (time.monotonic) WITH THE PTU AT
+    # (pan, tilt), boxes MAY BE EMPTY OR NONE. RETURNS THE BEARING USED, NONE IF NO DETECTION MATCHED THE TRACK
+    def update(self, t, boxes, pan, tilt):
+        measurements = self.bearings(boxes, pan, tilt) if boxes is not None else []
+
+        if self.state is None:
+            if not measurements:
+                return None
+            # A NEW TRACK STARTS ON THE DETECTION CLOSEST TO THE CENTER OF THE FRAME
+            azimuth, elevation = ptu_to_bearing(pan, tilt)
+            measurement = min(measurements, key=lambda m: np.hypot(m[0] - azimuth, m[1] - elevation))
+            self.state = np.array([measurement[0], measurement[1], 0.0, 0.0])
+            # THE VELOCITY IS NOT KNOWN YET
+            self.covariance = np.diag([self.measurement_noise, self.measurement_noise, 30.0 ** 2, 30.0 ** 2])
+            self.time = self.last_update = t
+            return measurement
+
+        state, covariance = self._predict(t)
+        self.state, self.covariance, self.time = state, covariance, max(t, self.time)
+
+        # THE DETECTION CLOSEST TO THE PREDICTION, BY THE MAHALANOBIS DISTANCE
+        H = np.eye(2, 4)
+        S = H @ covariance @ H.T + self.measurement_noise * np.eye(2)
+        S_inv = np.linalg.inv(S)
+        best = None
+        for measurement in measurements:
+            innovation = np.asarray(measurement) - H @ state
+            distance = np.sqrt(innovation @ S_inv @ innovation)
+            if distance < self.gate and (best is None or distance < best[0]):
+                best = (distance, innovation, measurement)
+
+        if best is None:
+            if t - self.last_update > self.max_coast:
+                self.reset()
+            return None
+
+        _, innovation, measurement = best
+        K = covariance @ H.T @ S_inv
+        self.state = state + K @ innovation
+        self.covariance = (np.eye(4) - K @ H) @ covariance
+        self.last_update = t
+        return measurement
+
+    # ATTACH A RANGE MEASURED AT TIME t TO THE TRACK, IGNORED IF THERE IS NO TRACK
+    def add_range(self, t, distance):
+        if self.state is None:
+            return False
+        self.range = distance
+        self.range_time = t
+        return True
+
+    # PREDICTED (AZIMUTH, ELEVATION, AZIMUTH RATE, ELEVATION RATE) AT TIME t, NONE IF THERE IS NO TRACK
+    def predict(self, t):
+        if self.state is None:
+            return None
+        return tuple(self._predict(t)[0])
+
+    # PAN AND TILT THAT POINT THE CAMERA AT THE PREDICTED BEARING AT TIME t, NONE IF THERE IS NO TRACK
+    def ptu_target(self, t):
+        prediction = self.predict(t)
+        if prediction is None:
+            return None
+        return bearing_to_ptu(prediction[0], prediction[1])
@@ -0,0 +1,158 @@
+####### WRITTEN TO CACHE THE DETECTIONS OF THE OBJECT DETECTION MODEL ON DISK #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# THE DETECTIONS OF AN IMAGE ARE STORED UNDER THE HASH OF THE IMAGE FILE CONTENT AND THE HASH OF THE
+# SAVED MODEL (saved_model.pb AND THE VARIABLES), SO A CHANGED IMAGE OR A RE-EXPORTED MODEL IS A MISS.
+# ALL DETECTIONS RETURNED BY THE MODEL ARE STORED, NOT ONLY THE ONES ABOVE A THRESHOLD, SO RE-SCORING
+# AT ANOTHER THRESHOLD DOES NOT NEED THE MODEL.
+
+# ONE FILE PER IMAGE, <key>.det:
+# 4 bytes magic "DET1", uint32 number of detections N,
+# N x 4 float32 boxes (ymin, xmin, ymax, xmax normalized), N float32 scores, N int32 classes
+
+# THE CACHE IS LIMITED TO max_size_mb, THE LEAST RECENTLY USED FILES ARE REMOVED FIRST.
+# THE MODIFICATION TIME OF A FILE IS SET ON EVERY HIT, SO THE ORDER IS KEPT BETWEEN RUNS.
+
+from collections import OrderedDict
+from threading import Lock
+import hashlib
+import os
+import struct
+import numpy as np
+
+_MAGIC = b"DET1"
+_HEADER = struct.Struct("<4sI")
+_SUFFIX = ".det"
+
+def hash_file(path, hasher=None, chunk_size=1 << 20):
+    hasher = hasher if hasher is not None else hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher
+
+def model_fingerprint(saved_model_path):
+    # saved_model.pb HOLDS THE GRAPH, variables/ THE WEIGHTS, assets/ (E.G. VOCABULARIES) ARE NOT USED BY THE DETECTION MODELS
+    hasher = hashlib.sha256()
+    paths = [os.path.join(saved_model_path, "saved_model.pb")]
+    variables_path = os.path.join(saved_model_path, "variables")
+    if os.path.isdir(variables_path):
+        paths += sorted(os.path.join(variables_path, name) for name in os.listdir(variables_path))
+    for path in paths:
+        if os.path.isfile(path):
+            hasher.update(os.path.relpath(path, saved_model_path).encode())
+            hash_file(path, hasher)
+    return hasher.hexdigest()
+
+def encode_detections(detections):
+    boxes = np.ascontiguousarray(detections["detection_boxes"], dtype="<f4").reshape(-1, 4)
+    scores = np.ascontiguousarray(detections["detection_scores"], dtype="<f4")
+    classes = np.ascontiguousarray(detections["detection_classes"], dtype="<i4")
+    return _HEADER.pack(_MAGIC, len(scores)) + boxes.tobytes() + scores.tobytes() + classes.tobytes()
+
+def decode_detections(data):
+    magic, num_of_detections = _HEADER.unpack_from(data)
+    if magic != _MAGIC or len(data) != _HEADER.size + num_of_detections * 24:
+        raise ValueError("Not a detection cache entry.")
+    offset = _HEADER.size
+    boxes = np.frombuffer(data, dtype="<f4", count=num_of_detections * 4, offset=offset).reshape(-1, 4)
+    offset += boxes.nbytes
+    scores = np.frombuffer(data, dtype="<f4", count=num_of_detections, offset=offset)
+    offset += scores.nbytes
+    classes = np.frombuffer(data, dtype="<i4", count=num_of_detections, offset=offset)
+    return {
+        "detection_boxes": boxes.astype(np.float32),
+        "detection_scores": scores.astype(np.float32),
+        "detection_classes": classes.astype(np.int64),
+    }
+
+class DetectionCache:
+    # cache_path: folder of the cache files, created if it does not exist, can be shared by several models
+    # saved_model_path: path to the saved model folder, only its files are hashed, the model is not loaded
+    # max_size_mb: maximum size of all files in the cache folder
+    def __init__(self, cache_path, saved_model_path, max_size_mb=512):
+        self.cache_path = cache_path
+        self.max_size = int(max_size_mb * (1 << 20))
+        self.model_fingerprint = model_fingerprint(saved_model_path)
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        # IMAGE PATH -> (SIZE, MODIFICATION TIME, CONTENT HASH), SO AN IMAGE IS HASHED ONCE PER RUN
+        self._image_hashes = {}
+
+        if not os.path.exists(cache_path):
+            os.makedirs(cache_path)
+
+        # FILE NAME -> SIZE, FROM THE LEAST TO THE MOST RECENTLY USED
+        entries = []
+        for entry in os.scandir(cache_path):
+            if entry.name.endswith(_SUFFIX) and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        self._entries = OrderedDict((name, size) for _, name, size in sorted(entries))
+        self.size = sum(self._entries.values())
+        with self._lock:
+            self._evict()
+
+    def key(self, img_path):
+        stat = os.stat(img_path)
+        cached = self._image_hashes.get(img_path)
+        if cached is None or cached[:2] != (stat.st_size, stat.st_mtime_ns):
+            cached = (stat.st_size, stat.st_mtime_ns, hash_file(img_path).hexdigest())
+            self._image_hashes[img_path] = cached
+        return hashlib.sha256((self.model_fingerprint + cached[2]).encode()).hexdigest()
+
+    def _path(self, name):
+        return os.path.join(self.cache_path, name)
+
+    def contains(self, img_path):
+        name = self.key(img_path) + _SUFFIX
+        with self._lock:
+            return name in self._entries
+
+    # RETURNS THE DETECTIONS OF THE IMAGE, NONE IF THEY ARE NOT IN THE CACHE
+    def get(self, img_path):
+        name = self.key(img_path) + _SUFFIX
+        with self._lock:
+            if name not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+        try:
+            with open(self._path(name), "rb") as f:
+                detections = decode_detections(f.read())
+            os.utime(self._path(name))
+        except (OSError, ValueError, struct.error):
+            # REMOVED BY ANOTHER PROCESS OR A BROKEN FILE, RUN THE MODEL AGAIN
+            with self._lock:
+                self.size -= self._entries.pop(name, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return detections
+
+    def put(self, img_path, detections):
+        name = self.key(img_path) + _SUFFIX
+        data = encode_detections(detections)
+        # WRITE TO A TEMPORARY FILE FIRST, A CRASH DOES NOT LEAVE A HALF WRITTEN ENTRY
+        tmp_path = self._path(name + ".{}.tmp".format(os.getpid()))
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(name))
+
+        with self._lock:
+            self.size += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self._evict()
+
+    def _evict(self):
+        # REMOVE THE LEAST RECENTLY USED FILES UNTIL THE CACHE FITS, THE NEWEST FILE IS ALWAYS KEPT
+        while self.size > self.max_size and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(self._path(name))
+            except OSError:
+                pass
@@ -0,0 +1,131 @@
+####### WRITTEN TO TEST THE DETECTION CACHE #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+from DetectionCache import DetectionCache, encode_detections, decode_detections
+from detect_image import detect_batch
+import tensorflow as tf
+import numpy as np
+import unittest
+import tempfile
+import os
+
+def make_detections(num_of_detections, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "detection_boxes": rng.uniform(0, 1, (num_of_detections, 4)).astype(np.float32),
+        "detection_scores": rng.uniform(0, 1, num_of_detections).astype(np.float32),
+        "detection_classes": rng.integers(1, 5, num_of_detections).astype(np.int64),
+    }
+
+# A MODEL THAT RETURNS TWO DETECTIONS PER IMAGE OF THE BATCH AND COUNTS THE IMAGES IT RAN ON
+class FakeModel:
+    def __init__(self):
+        self.num_of_images = 0
+
+    def __call__(self, img_tensor):
+        batch_size = img_tensor.shape[0]
+        self.num_of_images += batch_size
+        return {
+            "detection_boxes": tf.fill((batch_size, 2, 4), 0.5),
+            "detection_scores": tf.fill((batch_size, 2), 0.9),
+            "detection_classes": tf.ones((batch_size, 2)),
+            "num_detections": tf.fill((batch_size,), 2.0),
+        }
+
+class DetectionCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.model_path = os.path.dirname(self._write("model/saved_model.pb", b"graph"))
+        self.cache_path = os.path.join(self.directory.name, "cache")
+        self.images = [self._write("images/{}.jpg".format(idx), "image {}".format(idx).encode()) for idx in range(3)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write(self, name, data):
+        path = os.path.join(self.directory.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def _loader(self, model):
+        calls = []
+        def load_model():
+            calls.append(1)
+            return model
+        return load_model, calls
+
+    def test_encode_decode(self):
+        detections = make_detections(5)
+        decoded = decode_detections(encode_detections(detections))
+        for key in detections:
+            np.testing.assert_array_equal(decoded[key], detections[key])
+        self.assertEqual(decode_detections(encode_detections(make_detections(0)))["detection_boxes"].shape, (0, 4))
+        with self.assertRaises(ValueError):
+            decode_detections(encode_detections(detections)[:-1])
+
+    def test_hit_and_miss_after_a_change(self):
+        cache = DetectionCache(self.cache_path, self.model_path)
+        self.assertIsNone(cache.get(self.images[0]))
+        cache.put(self.images[0], make_detections(3))
+        np.testing.assert_array_equal(cache.get(self.images[0])["detection_scores"], make_detections(3)["detection_scores"])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # A CHANGED IMAGE IS A MISS
+        self._write("images/0.jpg", b"another image")
+        self.assertIsNone(cache.get(self.images[0]))
+
+        # A RE-EXPORTED MODEL IS A MISS, THE SAME MODEL IS STILL A HIT AFTER A RESTART
+        cache.put(self.images[1], make_detections(3))
+        self.assertIsNotNone(DetectionCache(self.cache_path, self.model_path).get(self.images[1]))
+        self._write("model/variables/variables.index", b"new weights")
+        self.assertIsNone(DetectionCache(self.cache_path, self.model_path).get(self.images[1]))
+
+    def test_least_recently_used_are_evicted(self):
+        entry_size = len(encode_detections(make_detections(10)))
+        cache = DetectionCache(self.cache_path, self.model_path, max_size_mb=2.5 * entry_size / (1 << 20))
+        cache.put(self.images[0], make_detections(10))
+        cache.put(self.images[1], make_detections(10))
+        # 0 IS USED AGAIN, SO 1 IS THE LEAST RECENTLY USED ONE
+        self.assertIsNotNone(cache.get(self.images[0]))
+        cache.put(self.images[2], make_detections(10))
+
+        self.assertLessEqual(cache.size, 2.5 * entry_size)
+        self.assertEqual(len(os.listdir(self.cache_path)), 2)
+        self.assertIsNotNone(cache.get(self.images[0]))
+        self.assertIsNone(cache.get(self.images[1]))
+        self.assertIsNotNone(cache.get(self.images[2]))
+
+    def test_broken_entry_runs_the_model(self):
+        cache = DetectionCache(self.cache_path, self.model_path)
+        images = [np.zeros((4, 4, 3), np.uint8)] * 3
+        model = FakeModel()
+        load_model, calls = self._loader(model)
+        detect_batch(load_model, self.images, images, cache)
+        self.assertEqual(model.num_of_images, 3)
+
+        # ALL IN THE CACHE, THE MODEL IS NOT LOADED
+        load_model, calls = self._loader(None)
+        self.assertEqual(len(detect_batch(load_model, self.images, images, cache)), 3)
+        self.assertEqual(calls, [])
+
+        # A BROKEN AND A REMOVED ENTRY, ONLY THOSE TWO IMAGES ARE GIVEN TO THE MODEL
+        with open(os.path.join(self.cache_path, cache.key(self.images[0]) + ".det"), "wb") as f:
+            f.write(b"DET1 broken")
+        os.remove(os.path.join(self.cache_path, cache.key(self.images[2]) + ".det"))
+        model = FakeModel()
+        load_model, calls = self._loader(model)
+        detections = detect_batch(load_model, self.images, images, cache)
+        self.assertEqual(model.num_of_images, 2)
+        self.assertEqual(len(calls), 1)
+        for image_detections in detections:
+            np.testing.assert_allclose(image_detections["detection_scores"], [0.9, 0.9])
+        # AND THEY ARE CACHED AGAIN
+        self.assertIsNotNone(cache.get(self.images[0]))
+        self.assertIsNotNone(cache.get(self.images[2]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,17 +1,24 @@
 from object_detection.utils import label_map_util
+from Telemetry import Telemetry
 import tensorflow as tf
 import numpy as np
 import cv2
 
 class Detector:
-    def __init__(self, saved_model_path, label_map_path, min_score):
+    # detect_fn: an already loaded model, e.g. a client of an InferenceService shared by
+    # several cameras, if not given the saved model is loaded from saved_model_path
+    def __init__(self, saved_model_path, label_map_path, min_score, telemetry=None, detect_fn=None):
         self.saved_model_path = saved_model_path
         self.label_map_path = label_map_path
         self.min_score = min_score
+        # TIMES THE INFERENCE AND THE POST-PROCESSING, DISABLED IF NOT GIVEN
+        self.telemetry = telemetry if telemetry is not None else Telemetry()
 
         # LOAD SAVED MODEL AND BUILD THE DETECTION FUNCTION
-        print("Loading the saved model, and building a detection function.")
-        self.detect_fn = tf.saved_model.load(self.saved_model_path)
+        if detect_fn is None:
+            print("Loading the saved model, and building a detection function.")
+            detect_fn = tf.saved_model.load(self.saved_model_path)
+        self.detect_fn = detect_fn
 
         # LOAD LABEL MAP DATA FOR PLOTTING
         # LABEL MAP INDEX NUMBERS CORRESPONDS TO CLASS NAMES
@@ -47,18 +54,24 @@ class Detector:
         #frame_tensor = frame_tensor[tf.newaxis, ...]
 
         # GET OBJECTS DETECTED IN THAT FRAME
-        detections = self.detect_fn(frame_tensor)
+        with self.telemetry.stage("inference"):
+            detections = self.detect_fn(frame_tensor)
 
+        with self.telemetry.stage("postprocess") as stage:
+            self._postprocess(frame, frame_arr, detections)
+            stage.fields["object_detected"] = self.object_detected
+
+    # KEEP THE HIGH SCORED DETECTIONS OF THE FRAME
+    def _postprocess(self, frame, frame_arr, detections):
         # ALL OUTPUTS IN DETECTIONS ARE BATCHES
         # CONVERT THOSE INTO NUMPY ARRAYS
         # TAKE THE FIRST ELEMENT AND REMOVE THE REST(BATCHES)
-        num_of_detections = int(detections.pop("num_detections"))
+        num_of_detections = int(detections.pop("num_detections")[0])
         detections = {key: value[0, :num_of_detections].numpy() for key, value in detections.items()}
         detections["num_detections"] = num_of_detections
 
         # ONLY HIGH SCORED OBJECTS SHOULD STAY IN THE ARRAY
         new_arr = detections["detection_scores"] > self.min_score
-        print(new_arr)
         if True in new_arr:
             self.object_detected = True
             # Select elements with True at corresponding value in bool array
@@ -71,20 +84,21 @@ class Detector:
                 "raw_detection_boxes",
                 "detection_multiclass_scores",
             ]
+            # MODELS EXPORTED WITH THE fixed_shape_image_tensor INPUT TYPE ONLY RETURN THE BOXES, SCORES AND CLASSES
             for key in keys:
-                self.detections[key] = detections[key][new_arr]    
+                if key in detections:
+                    self.detections[key] = detections[key][new_arr]
                 
             # GET FRAME WIDTH AND HEIGHT
             (H, W) = frame.shape[:2]
             
-            # bounding box: ymin, xmin, ymax, xmax
-            self.detections["bounding_box"] = detections["detection_boxes"] * [H, W, H, W]
+            # bounding box: ymin, xmin, ymax, xmax, ONLY OF THE HIGH SCORED OBJECTS
+            self.detections["bounding_box"] = self.detections["detection_boxes"] * [H, W, H, W]
 
             # CONVERT INDICES INTO CLASS NAMES
-            self.detections["detection_classes_names"] = np.array([self.category_index[int(class_idx)]["name"] for class_idx in detections["detection_classes"]])
+            self.detections["detection_classes_names"] = np.array([self.category_index[int(class_idx)]["name"] for class_idx in self.detections["detection_classes"]])
 
             # CONVERT FROM BGR TO RGB
-            self.RGB_arr = cv2.cvtColor(frame_arr, cv2.COLOR_BGR2RGB)
+            self.RGB_arr = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         else:
-            print("object is lost!")
             self.object_detected = False
\ No newline at end of file
@@ -0,0 +1,171 @@
+####### WRITTEN TO RUN THE OBJECT DETECTION MODEL IN SEPARATE PROCESSES #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# TENSORFLOW, THE OPENCV TRACKERS, NUMPY AND THE PID/PTU CODE SHARE ONE PYTHON INTERPRETER (AND ITS GIL)
+# IN THE LOOPS. DetectorProcess RUNS THE Detector IN A POOL OF WORKER PROCESSES INSTEAD, SO THE CAPTURE,
+# THE TRACKER AND THE CONTROL LOOP KEEP THE MAIN PROCESS FOR THEMSELVES.
+# FRAMES ARE NOT PICKLED: EVERY WORKER HAS ITS OWN SLOT IN A SHARED MEMORY BLOCK, THE FRAME IS COPIED INTO
+# THE SLOT AND ONLY THE SLOT INDEX AND THE FRAME SIZE ARE SENT TO THE WORKER. ONLY THE (SMALL) DETECTIONS
+# ARE SENT BACK.
+
+# IT CAN BE USED IN PLACE OF A Detector:
+#     detector = DetectorProcess(saved_model_path, label_map_path, 0.5)
+#     detector.get_detections(frame)
+# OR WITH SEVERAL FRAMES IN FLIGHT:
+#     ticket = detector.submit(frame)   # None if all the workers are busy
+#     ticket, detections = detector.get_result()
+# NEEDS PYTHON 3.8+ FOR multiprocessing.shared_memory
+
+from multiprocessing import shared_memory
+import multiprocessing as mp
+from collections import deque
+from Telemetry import Telemetry
+import numpy as np
+import queue
+
+# KEYS OF Detector.detections SENT BACK FROM THE WORKERS
+RESULT_KEYS = ["detection_boxes", "detection_classes", "detection_scores", "bounding_box", "detection_classes_names"]
+
+def _worker(worker_idx, saved_model_path, label_map_path, min_score, shm_name, slot_size, num_threads, requests, results):
+    # EVERYTHING THAT USES TENSORFLOW IS IMPORTED IN THE WORKER
+    import tensorflow as tf
+    if num_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    from Detector import Detector
+
+    # THE PARENT OWNS THE SHARED MEMORY AND UNLINKS IT IN close()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    slot = np.ndarray((slot_size,), dtype=np.uint8, buffer=shm.buf, offset=worker_idx * slot_size)
+    frame = None
+
+    detector = Detector(saved_model_path, label_map_path, min_score)
+    results.put((worker_idx, None, None))
+
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        ticket, shape = request
+        frame = slot[:int(np.prod(shape))].reshape(shape)
+        try:
+            detector.get_detections(frame)
+            detections = None
+            if detector.object_detected:
+                detections = {key: detector.detections[key] for key in RESULT_KEYS}
+            results.put((worker_idx, ticket, detections))
+        except Exception as e:
+            results.put((worker_idx, ticket, e))
+
+    del frame, slot
+    shm.close()
+
+class DetectorProcess:
+    # num_of_workers: number of processes running the model, each loads its own copy of the model
+    # max_frame_shape: biggest frame (height, width, channels) that can be given to the detector
+    # num_threads: tensorflow threads used by every worker, 0 lets tensorflow decide
+    def __init__(self, saved_model_path, label_map_path, min_score, num_of_workers = 1, max_frame_shape = (1080, 1920, 3), num_threads = 0, telemetry = None):
+        self.saved_model_path = saved_model_path
+        self.label_map_path = label_map_path
+        self.min_score = min_score
+        self.num_of_workers = num_of_workers
+        self.slot_size = int(np.prod(max_frame_shape))
+        self.telemetry = telemetry if telemetry is not None else Telemetry()
+
+        # SAME ATTRIBUTES AS A Detector
+        self.object_detected = False
+        self.detections = {key: None for key in RESULT_KEYS}
+
+        # ONE SLOT PER WORKER
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slot_size * num_of_workers)
+        self.slots = [np.ndarray((self.slot_size,), dtype=np.uint8, buffer=self.shm.buf, offset=idx * self.slot_size) for idx in range(num_of_workers)]
+
+        # spawn instead of fork, forking a process that already runs tensorflow or opencv threads is not safe
+        context = mp.get_context("spawn")
+        self.results = context.Queue()
+        self.requests = [context.Queue() for _ in range(num_of_workers)]
+        self.workers = [
+            context.Process(target=_worker, args=(idx, saved_model_path, label_map_path, min_score, self.shm.name, self.slot_size, num_threads, self.requests[idx], self.results), daemon=True)
+            for idx in range(num_of_workers)
+        ]
+        print("Starting {} detector process(es).".format(num_of_workers))
+        for worker in self.workers:
+            worker.start()
+
+        self.idle_workers = deque()
+        self.next_ticket = 0
+        self.in_flight = 0
+
+        # WAIT UNTIL ALL THE WORKERS LOADED THE MODEL
+        num_of_ready_workers = 0
+        while num_of_ready_workers < num_of_workers:
+            try:
+                worker_idx, _, _ = self.results.get(timeout=1.0)
+                self.idle_workers.append(worker_idx)
+                num_of_ready_workers += 1
+            except queue.Empty:
+                if not all(worker.is_alive() for worker in self.workers):
+                    self.close()
+                    raise RuntimeError("A detector process exited before loading the model!")
+
+    def _get(self, timeout):
+        worker_idx, ticket, detections = self.results.get(timeout=timeout)
+        if ticket is not None:
+            self.idle_workers.append(worker_idx)
+            self.in_flight -= 1
+        if isinstance(detections, Exception):
+            raise RuntimeError("Detector process {} failed: {}".format(worker_idx, detections))
+        return ticket, detections
+
+    # GIVE A FRAME TO AN IDLE WORKER, RETURNS A TICKET OR NONE IF ALL THE WORKERS ARE BUSY
+    def submit(self, frame):
+        if not self.idle_workers:
+            return None
+        if frame.size > self.slot_size:
+            raise ValueError("Frame of shape {} does not fit into a slot of {} bytes, increase max_frame_shape.".format(frame.shape, self.slot_size))
+        worker_idx = self.idle_workers.popleft()
+        np.copyto(self.slots[worker_idx][:frame.size].reshape(frame.shape), frame)
+        ticket = self.next_ticket
+        self.next_ticket += 1
+        self.in_flight += 1
+        self.requests[worker_idx].put((ticket, frame.shape))
+        return ticket
+
+    # WAIT FOR THE NEXT FINISHED FRAME, RETURNS (TICKET, DETECTIONS), DETECTIONS IS NONE IF NOTHING WAS DETECTED
+    # RETURNS (NONE, NONE) IF NO FRAME IS IN FLIGHT OR NO FRAME FINISHED BEFORE THE TIMEOUT
+    def get_result(self, timeout = None):
+        if self.in_flight == 0:
+            return None, None
+        try:
+            return self._get(timeout)
+        except queue.Empty:
+            return None, None
+
+    # SAME AS Detector.get_detections, BLOCKS UNTIL THE FRAME IS PROCESSED
+    def get_detections(self, frame):
+        with self.telemetry.stage("inference"):
+            # FINISH THE FRAMES ALREADY IN FLIGHT FIRST
+            while not self.idle_workers:
+                self.get_result()
+            ticket = self.submit(frame)
+            result_ticket, detections = self.get_result()
+            while result_ticket != ticket:
+                result_ticket, detections = self.get_result()
+
+        self.update(detections)
+
+    # SET object_detected AND detections FROM THE RESULT OF A WORKER
+    def update(self, detections):
+        self.object_detected = detections is not None
+        if detections is not None:
+            self.detections = detections
+
+    def close(self):
+        for requests in self.requests:
+            requests.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.slots = []
+        self.shm.close()
+        self.shm.unlink()
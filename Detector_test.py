@@ -0,0 +1,102 @@
+####### WRITTEN TO TEST THAT ONLY THE HIGH SCORED DETECTIONS LEAVE THE DETECTOR #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+from BearingTracker import BearingTracker, CameraModel
+from MotionGate import MotionGate
+from Detector import Detector
+import tensorflow as tf
+import numpy as np
+import unittest
+import tempfile
+import os
+
+LABEL_MAP = """
+item {
+  id: 1
+  name: 'drone'
+}
+item {
+  id: 2
+  name: 'bird'
+}
+"""
+
+# A MODEL THAT ALWAYS RETURNS THE SAME DETECTIONS, SORTED BY SCORE LIKE THE EXPORTED MODELS
+# scores CAN BE A FUNCTION OF THE FRAME TENSOR
+def fake_model(boxes, scores, classes):
+    def detect_fn(frame_tensor):
+        return {
+            "detection_boxes": tf.constant([boxes], dtype=tf.float32),
+            "detection_scores": tf.constant([scores(frame_tensor) if callable(scores) else scores], dtype=tf.float32),
+            "detection_classes": tf.constant([classes], dtype=tf.float32),
+            "num_detections": tf.constant([len(boxes)], dtype=tf.float32),
+        }
+    return detect_fn
+
+class DetectorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.label_map_path = os.path.join(self.directory.name, "label_map.pbtxt")
+        with open(self.label_map_path, "w") as label_map_file:
+            label_map_file.write(LABEL_MAP)
+        self.frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        # A HIGH SCORED DRONE IN THE TOP LEFT, A LOW SCORED BOX ON THE CENTER OF THE FRAME
+        self.boxes = [[0.1, 0.1, 0.2, 0.2], [0.45, 0.45, 0.55, 0.55], [0.8, 0.8, 0.9, 0.9]]
+        self.scores = [0.9, 0.3, 0.01]
+        self.classes = [1, 2, 2]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_low_scored_boxes_are_removed(self):
+        detector = Detector(None, self.label_map_path, 0.5, detect_fn=fake_model(self.boxes, self.scores, self.classes))
+        detector.get_detections(self.frame)
+
+        self.assertTrue(detector.object_detected)
+        np.testing.assert_allclose(detector.detections["bounding_box"], [[48, 64, 96, 128]])
+        self.assertEqual(list(detector.detections["detection_classes_names"]), ["drone"])
+        self.assertEqual(len(detector.detections["detection_boxes"]), len(detector.detections["detection_scores"]))
+
+    def test_low_scored_box_never_reaches_the_bearing_tracker(self):
+        detector = Detector(None, self.label_map_path, 0.5, detect_fn=fake_model(self.boxes, self.scores, self.classes))
+        detector.get_detections(self.frame)
+
+        boxes = []
+        tracker = BearingTracker(CameraModel.from_fov(640, 480, 60))
+        update = tracker.update
+        def record(t, frame_boxes, pan, tilt):
+            boxes.extend(frame_boxes)
+            return update(t, frame_boxes, pan, tilt)
+        tracker.update = record
+
+        # THE TRACK STARTS ON THE DETECTION CLOSEST TO THE CENTER, IT HAS TO BE THE DRONE
+        bearing = tracker.update(0.0, detector.detections["bounding_box"], 0.0, 0.0)
+        np.testing.assert_allclose(boxes, [[48, 64, 96, 128]])
+        expected = tracker.camera.pixel_to_bearing(96, 72, 0.0, 0.0)
+        np.testing.assert_allclose(bearing, expected)
+
+    def test_low_scored_boxes_are_removed_from_a_region(self):
+        # NOTHING ON THE FULL FRAME, THE DETECTIONS ON THE REGION AROUND THE MOTION
+        scores = lambda frame_tensor: self.scores if frame_tensor.shape[1] < 480 else [0.0, 0.0, 0.0]
+        detector = MotionGate(Detector(None, self.label_map_path, 0.5, detect_fn=fake_model(self.boxes, scores, self.classes)),
+                              roi=True, min_roi_size=200, refresh_interval=0)
+        detector.get_detections(self.frame)
+        self.assertFalse(detector.object_detected)
+
+        frame = self.frame.copy()
+        frame[200:240, 300:340] = 255
+        detector.get_detections(frame)
+        self.assertEqual(detector.num_of_roi, 1)
+        self.assertTrue(detector.object_detected)
+
+        # THE REGION IS 200 x 200 PIXELS AROUND THE CHANGED PIXELS
+        y0, x0 = 120, 220
+        np.testing.assert_allclose(detector.detections["bounding_box"], [[y0 + 20, x0 + 20, y0 + 40, x0 + 40]], atol=1e-3)
+        np.testing.assert_allclose(detector.detections["detection_boxes"] * [480, 640, 480, 640],
+                                   detector.detections["bounding_box"], atol=1e-3)
+        self.assertEqual(list(detector.detections["detection_classes_names"]), ["drone"])
+
+if __name__ == "__main__":
+    unittest.main()
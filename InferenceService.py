@@ -0,0 +1,164 @@
+####### WRITTEN TO SHARE ONE OBJECT DETECTION MODEL BETWEEN SEVERAL CAMERAS #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# THE MODEL IS LOADED ONCE AND RUN BY A SINGLE WORKER THREAD. EVERY CAMERA (CHANNEL) GETS A CLIENT
+# THAT CAN BE USED AS THE detect_fn OF A Detector. A CHANNEL CAN ONLY HAVE ONE FRAME WAITING AT A TIME,
+# AND THE WORKER TAKES THE WAITING FRAMES OF THE CHANNELS IN ROUND-ROBIN ORDER, SO A BUSY CHANNEL
+# CANNOT STARVE THE OTHERS. FRAMES WITH THE SAME SIZE ARE STACKED INTO ONE BATCH IF THE MODEL ALLOWS IT.
+
+from threading import Condition, Thread, Event
+import tensorflow as tf
+import time
+
+# MODELS EXPORTED WITH THE image_tensor INPUT TYPE ONLY ACCEPT A BATCH OF ONE IMAGE
+# RETURNS NONE IF THE MODEL ACCEPTS ANY BATCH SIZE
+def max_batch_size(detect_fn):
+    try:
+        return detect_fn.signatures["serving_default"].inputs[0].shape[0]
+    except (AttributeError, KeyError, IndexError):
+        return 1
+
+class _Request:
+    __slots__ = ("frame_tensor", "detections", "done")
+
+    def __init__(self, frame_tensor):
+        self.frame_tensor = frame_tensor
+        self.detections = None
+        self.done = Event()
+
+class InferenceClient:
+    # CALLED LIKE THE detect_fn OF A SAVED MODEL, BLOCKS UNTIL THE SERVICE RAN THE MODEL ON THE FRAME
+    def __init__(self, service, channel_name):
+        self.service = service
+        self.channel_name = channel_name
+
+    def __call__(self, frame_tensor):
+        return self.service.detect(self.channel_name, frame_tensor)
+
+class InferenceService:
+    # saved_model_path: path to the saved model folder
+    # batch_size: maximum number of frames given to the model at once
+    def __init__(self, saved_model_path, batch_size = 4):
+        self.saved_model_path = saved_model_path
+
+        print("Loading the saved model, and building a detection function.")
+        self.detect_fn = tf.saved_model.load(self.saved_model_path)
+
+        supported_batch_size = max_batch_size(self.detect_fn)
+        if supported_batch_size is not None and batch_size > supported_batch_size:
+            print("The saved model only accepts batches of {} image(s), batch size is set to {}.".format(supported_batch_size, supported_batch_size))
+            batch_size = supported_batch_size
+        self.batch_size = batch_size
+
+        # channel name -> waiting request, at most one per channel
+        self.pending = {}
+        # channels in round-robin order
+        self.channel_names = []
+        self.next_channel = 0
+        self.condition = Condition()
+        self.running = False
+        self.worker = None
+
+        # metrics
+        self.num_of_batches = 0
+        self.num_of_frames = 0
+        self.inference_time = 0.0
+
+    def client(self, channel_name):
+        with self.condition:
+            if channel_name not in self.channel_names:
+                self.channel_names.append(channel_name)
+        return InferenceClient(self, channel_name)
+
+    def start(self):
+        self.running = True
+        self.worker = Thread(target=self._run, name="inference-service", daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.worker is not None:
+            self.worker.join()
+            self.worker = None
+
+    # RAISES A RuntimeError IF THE SERVICE IS NOT RUNNING, A FRAME SUBMITTED AFTER stop() WOULD NEVER BE PROCESSED
+    def detect(self, channel_name, frame_tensor):
+        request = _Request(frame_tensor)
+        with self.condition:
+            if not self.running:
+                raise RuntimeError("Inference service is not running, the frame of channel {} is not processed!".format(channel_name))
+            if channel_name in self.pending:
+                raise RuntimeError("Channel {} already has a frame waiting for the detector!".format(channel_name))
+            self.pending[channel_name] = request
+            self.condition.notify()
+        request.done.wait()
+        if request.detections is None:
+            raise RuntimeError("Inference service could not run the detector on the frame of channel {}!".format(channel_name))
+        return request.detections
+
+    # TAKE THE WAITING REQUESTS IN ROUND-ROBIN ORDER STARTING AFTER THE LAST SERVED CHANNEL,
+    # ONLY FRAMES WITH THE SAME SHAPE AS THE FIRST ONE GO INTO THE BATCH
+    def _next_batch(self):
+        batch = []
+        num_of_channels = len(self.channel_names)
+        for offset in range(num_of_channels):
+            idx = (self.next_channel + offset) % num_of_channels
+            request = self.pending.get(self.channel_names[idx])
+            if request is None:
+                continue
+            if batch and request.frame_tensor.shape != batch[0][1].frame_tensor.shape:
+                continue
+            batch.append((self.channel_names[idx], request))
+            if len(batch) == self.batch_size:
+                break
+        if batch:
+            last_idx = self.channel_names.index(batch[-1][0])
+            self.next_channel = (last_idx + 1) % num_of_channels
+            for channel_name, _ in batch:
+                del self.pending[channel_name]
+        return [request for _, request in batch]
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.pending:
+                    self.condition.wait()
+                if not self.running:
+                    break
+                batch = self._next_batch()
+
+            start = time.perf_counter()
+            try:
+                if len(batch) == 1:
+                    batch[0].detections = self.detect_fn(batch[0].frame_tensor)
+                else:
+                    detections = self.detect_fn(tf.concat([request.frame_tensor for request in batch], axis=0))
+                    # GIVE EVERY CHANNEL ITS OWN SLICE OF THE BATCH, STILL WITH A BATCH DIMENSION OF ONE
+                    for idx, request in enumerate(batch):
+                        request.detections = {key: value[idx:idx + 1] for key, value in detections.items()}
+            except Exception as e:
+                # THE CHANNELS OF THIS BATCH GET AN ERROR, THE SERVICE KEEPS RUNNING FOR THE OTHERS
+                print("Running the detector failed: {}".format(e))
+            finally:
+                for request in batch:
+                    request.done.set()
+            self.inference_time += time.perf_counter() - start
+            self.num_of_batches += 1
+            self.num_of_frames += len(batch)
+
+        # RELEASE THE CHANNELS STILL WAITING
+        with self.condition:
+            for request in self.pending.values():
+                request.done.set()
+            self.pending.clear()
+
+    def get_metrics(self):
+        return {
+            "frames": self.num_of_frames,
+            "batches": self.num_of_batches,
+            "mean_batch_size": self.num_of_frames / self.num_of_batches if self.num_of_batches else 0.0,
+            "mean_batch_time_ms": 1000 * self.inference_time / self.num_of_batches if self.num_of_batches else 0.0,
+        }
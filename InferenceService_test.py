@@ -0,0 +1,73 @@
+####### WRITTEN TO TEST THE SHARED INFERENCE SERVICE #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+from InferenceService import InferenceService
+from threading import Thread
+from unittest import mock
+import tensorflow as tf
+import unittest
+import time
+
+# A MODEL THAT TAKES A WHILE AND RETURNS ONE DETECTION PER FRAME OF THE BATCH
+def slow_model(frame_tensor):
+    time.sleep(0.01)
+    batch_size = frame_tensor.shape[0]
+    return {"detection_scores": tf.ones((batch_size, 1)), "num_detections": tf.ones((batch_size,))}
+
+def make_service(batch_size=4):
+    with mock.patch("InferenceService.tf.saved_model.load", return_value=slow_model):
+        return InferenceService("saved_model", batch_size)
+
+class InferenceServiceTest(unittest.TestCase):
+
+    def test_detect(self):
+        service = make_service()
+        service.start()
+        detections = service.client("north")(tf.zeros((1, 8, 8, 3)))
+        service.stop()
+        self.assertEqual(detections["detection_scores"].shape, (1, 1))
+
+    def test_detect_after_stop_raises(self):
+        service = make_service()
+        service.start()
+        service.stop()
+        errors = []
+        def late_channel():
+            try:
+                service.client("north")(tf.zeros((1, 8, 8, 3)))
+            except RuntimeError as e:
+                errors.append(e)
+        # A LATE FRAME MUST NOT WAIT FOR A WORKER THAT IS GONE
+        thread = Thread(target=late_channel, daemon=True)
+        thread.start()
+        thread.join(timeout=2.0)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(errors), 1)
+
+    def test_stop_while_channels_submit(self):
+        service = make_service()
+        client_names = ["north", "south", "east"]
+        errors = {}
+        def channel(name):
+            client = service.client(name)
+            try:
+                while True:
+                    client(tf.zeros((1, 8, 8, 3)))
+            except RuntimeError as e:
+                errors[name] = e
+        service.start()
+        threads = [Thread(target=channel, args=(name,), daemon=True) for name in client_names]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        service.stop()
+        # EVERY CHANNEL GETS AN ERROR INSTEAD OF WAITING FOREVER, ALSO THE ONES SUBMITTING AFTER THE LAST DRAIN
+        for thread in threads:
+            thread.join(timeout=2.0)
+            self.assertFalse(thread.is_alive())
+        self.assertEqual(sorted(errors), sorted(client_names))
+        self.assertFalse(service.pending)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+####### WRITTEN TO SKIP THE OBJECT DETECTION MODEL ON FRAMES WITHOUT MOTION #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# WHILE THE PTU IS STANDING STILL AND THE SKY IS EMPTY, EVERY FRAME LOOKS LIKE THE PREVIOUS ONE AND RUNNING
+# THE MODEL ON IT IS WASTED CPU TIME. MotionGate LOOKS FOR CHANGED PIXELS ON A DOWNSAMPLED GRAYSCALE FRAME
+# FIRST, AND RUNS THE DETECTOR ONLY IF SOMETHING CHANGED:
+#     "diff" - ABSOLUTE DIFFERENCE WITH THE PREVIOUS FRAME, THE PREVIOUS FRAME IS SHIFTED BY THE KNOWN
+#              PTU MOVEMENT FIRST, SO A PANNING CAMERA DOES NOT LOOK LIKE MOTION
+#     "mog2" - OPENCV MOG2 BACKGROUND SUBTRACTOR, IGNORES CLOUDS AND NOISE BETTER, BUT ITS BACKGROUND
+#              CANNOT BE SHIFTED, IT IS LEARNED AGAIN AFTER EVERY PTU MOVEMENT
+# THE DETECTOR STILL RUNS ON EVERY FRAME WHILE AN OBJECT IS DETECTED (A HOVERING DRONE DOES NOT MOVE), AND
+# ON EVERY refresh_interval-TH FRAME, SO A STATIC OBJECT THAT WAS MISSED IS FOUND EVENTUALLY.
+# WITH roi=True ONLY THE REGION AROUND THE CHANGED PIXELS IS GIVEN TO THE DETECTOR, THE BOXES ARE MAPPED
+# BACK TO THE FULL FRAME. MODELS EXPORTED WITH fixed_shape_image_tensor ONLY ACCEPT FRAMES OF THEIR FIXED INPUT
+# SHAPE AND NEED roi=False.
+
+# IT CAN BE USED IN PLACE OF A Detector OR A DetectorProcess:
+#     detector = MotionGate(Detector(saved_model_path, label_map_path, 0.5))
+#     detector.get_detections(frame)
+#     detector.ptu_moved(pan_degrees, tilt_degrees)   # AFTER EVERY PTU MOVEMENT
+
+import numpy as np
+import cv2
+
+METHODS = ["diff", "mog2"]
+
+class MotionGate:
+    # detector: a Detector or a DetectorProcess
+    # method: "diff" or "mog2"
+    # scale: the frames are resized by this factor before looking for motion
+    # threshold: minimum change of a pixel (0-255) for "diff", variance threshold for "mog2"
+    # min_area: minimum area of a changed region in pixels of the full frame
+    # refresh_interval: the detector runs at least once every refresh_interval frames, 0 disables it
+    # roi: run the detector only on the region around the changed pixels
+    # roi_margin: the region is enlarged by this fraction of its size on every side
+    # min_roi_size: minimum width and height of the region in pixels, about the input size of the model
+    # pixels_per_degree: pixels the scene moves for one degree of the PTU, frame width / horizontal field of
+    #                    view. If not given every PTU movement is treated as motion
+    def __init__(self, detector, method="diff", scale=0.25, threshold=25, min_area=64, refresh_interval=30,
+                 roi=False, roi_margin=0.5, min_roi_size=320, pixels_per_degree=None):
+        if method not in METHODS:
+            raise ValueError("Unknown motion method {}, choose one of {}".format(method, METHODS))
+        self.detector = detector
+        self.telemetry = detector.telemetry
+        self.method = method
+        self.scale = scale
+        self.threshold = threshold
+        self.min_area = min_area
+        self.refresh_interval = refresh_interval
+        self.roi = roi
+        self.roi_margin = roi_margin
+        self.min_roi_size = min_roi_size
+        self.pixels_per_degree = pixels_per_degree
+
+        self.object_detected = False
+        self.detections = detector.detections
+
+        # NUMBER OF FRAMES THE DETECTOR RAN ON, FULL FRAMES AND REGIONS, AND SKIPPED
+        self.num_of_full = 0
+        self.num_of_roi = 0
+        self.num_of_skipped = 0
+        self.reset()
+
+    # FORGET THE BACKGROUND, THE DETECTOR RUNS ON THE NEXT FRAME
+    def reset(self):
+        self.prev_small = None
+        self.subtractor = None
+        if self.method == "mog2":
+            self.subtractor = cv2.createBackgroundSubtractorMOG2(history=100, varThreshold=self.threshold, detectShadows=False)
+        self.background_known = False
+        # SHIFT OF THE SCENE SINCE THE LAST FRAME IN PIXELS OF THE FULL FRAME (x, y)
+        self.shift = np.zeros(2)
+        self.frames_since_inference = 0
+        self.needs_inference = True
+
+    # CALL AFTER EVERY MOVEMENT COMMAND SENT TO THE PTU, IN DEGREES AS GIVEN TO move_x_by_degrees AND
+    # move_y_by_degrees. A POSITIVE PAN MOVES THE SCENE TO THE LEFT OF THE FRAME, A POSITIVE TILT MOVES IT UP.
+    def ptu_moved(self, pan_degrees, tilt_degrees):
+        if pan_degrees == 0 and tilt_degrees == 0:
+            return
+        if self.pixels_per_degree is None or self.method == "mog2":
+            self.needs_inference = True
+            self.background_known = False
+        else:
+            self.shift -= np.array([pan_degrees, tilt_degrees]) * self.pixels_per_degree
+
+    # CHANGED REGIONS OF THE FRAME AS (x, y, w, h) IN PIXELS OF THE FULL FRAME
+    def find_motion(self, frame):
+        small = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        small = cv2.GaussianBlur(small, (5, 5), 0)
+
+        background_known, self.background_known = self.background_known, True
+        if self.method == "mog2":
+            # AN UNKNOWN BACKGROUND IS REPLACED BY THE FRAME
+            mask = self.subtractor.apply(small, learningRate=-1 if background_known else 1)
+            if not background_known:
+                return []
+        else:
+            prev_small, self.prev_small = self.prev_small, small
+            if not background_known:
+                self.shift[:] = 0
+                return []
+            if self.shift.any():
+                # MOVE THE PREVIOUS FRAME WITH THE SCENE, THE NEWLY VISIBLE BORDER IS NOT COMPARED
+                (h, w) = small.shape
+                shift_matrix = np.float32([[1, 0, self.shift[0] * self.scale], [0, 1, self.shift[1] * self.scale]])
+                prev_small = cv2.warpAffine(prev_small, shift_matrix, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+                valid = cv2.warpAffine(np.full((h, w), 255, np.uint8), shift_matrix, (w, h), flags=cv2.INTER_NEAREST)
+                small = cv2.bitwise_and(small, valid)
+                prev_small = cv2.bitwise_and(prev_small, valid)
+            _, mask = cv2.threshold(cv2.absdiff(small, prev_small), self.threshold, 255, cv2.THRESH_BINARY)
+        self.shift[:] = 0
+
+        mask = cv2.dilate(mask, None, iterations=2)
+        num_of_labels, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+        min_area = self.min_area * self.scale * self.scale
+        # LABEL 0 IS THE BACKGROUND
+        return [tuple(int(round(value / self.scale)) for value in stat[:4])
+                for stat in stats[1:num_of_labels] if stat[cv2.CC_STAT_AREA] >= min_area]
+
+    # REGION AROUND ALL THE CHANGED REGIONS, (x0, y0, x1, y1), NONE IF IT IS NOT MUCH SMALLER THAN THE FRAME
+    def _roi(self, regions, frame_shape):
+        (H, W) = frame_shape[:2]
+        x0 = min(x for x, y, w, h in regions)
+        y0 = min(y for x, y, w, h in regions)
+        x1 = max(x + w for x, y, w, h in regions)
+        y1 = max(y + h for x, y, w, h in regions)
+
+        # ENLARGE BY THE MARGIN AND UP TO THE MINIMUM SIZE, AROUND THE CENTER OF THE REGION
+        size_x = max((x1 - x0) * (1 + 2 * self.roi_margin), self.min_roi_size)
+        size_y = max((y1 - y0) * (1 + 2 * self.roi_margin), self.min_roi_size)
+        if size_x * size_y > 0.5 * W * H:
+            return None
+        center_x, center_y = (x0 + x1) / 2, (y0 + y1) / 2
+        x0 = int(np.clip(center_x - size_x / 2, 0, max(W - size_x, 0)))
+        y0 = int(np.clip(center_y - size_y / 2, 0, max(H - size_y, 0)))
+        return x0, y0, min(x0 + int(size_x), W), min(y0 + int(size_y), H)
+
+    def get_detections(self, frame):
+        with self.telemetry.stage("gate") as stage:
+            regions = self.find_motion(frame)
+            self.frames_since_inference += 1
+            # RUN ON THE FULL FRAME IF THE BACKGROUND IS NOT KNOWN, WHILE AN OBJECT IS DETECTED, OR TO REFRESH
+            full = (self.needs_inference or self.object_detected
+                    or (self.refresh_interval and self.frames_since_inference >= self.refresh_interval))
+            roi = None
+            if not full and regions:
+                roi = self._roi(regions, frame.shape) if self.roi else None
+                full = roi is None
+            stage.fields.update(regions = len(regions), full = bool(full), roi = roi)
+
+        if not full and roi is None:
+            self.num_of_skipped += 1
+            self.object_detected = False
+            return
+
+        self.needs_inference = False
+        self.frames_since_inference = 0
+        if full:
+            self.num_of_full += 1
+            self.detector.get_detections(frame)
+        else:
+            self.num_of_roi += 1
+            x0, y0, x1, y1 = roi
+            self.detector.get_detections(np.ascontiguousarray(frame[y0:y1, x0:x1]))
+        self.object_detected = self.detector.object_detected
+        self.detections = self.detector.detections
+
+        if roi is not None and self.object_detected:
+            # FROM THE REGION TO THE FULL FRAME, THE DETECTIONS ARE ALREADY FILTERED BY min_score
+            (H, W) = frame.shape[:2]
+            self.detections["detection_boxes"] = (self.detections["detection_boxes"] * [y1 - y0, x1 - x0, y1 - y0, x1 - x0]
+                                                  + [y0, x0, y0, x0]) / [H, W, H, W]
+            self.detections["bounding_box"] = self.detections["detection_boxes"] * [H, W, H, W]
+
+    # STOPS THE WORKERS OF A DetectorProcess
+    def close(self):
+        self.detector.close()
@@ -0,0 +1,212 @@
+####### WRITTEN TO TUNE THE PID GAINS OF THE TRACKING LOOPS FROM THE RESPONSE OF THE PTU #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# THE TRACKING LOOPS MOVE THE PTU BY u = kP * e + kI * sum(e) + kD * (e - previous e) DEGREES ON EVERY FRAME,
+# e IS THE ERROR IN PIXELS. THE RIGHT GAINS DEPEND ON THE LENS, THE RESOLUTION, THE FRAME RATE AND THE LATENCY
+# OF THE CAMERA, SO THEY ARE MEASURED WITH A STATIC TARGET IN THE FRAME INSTEAD OF GUESSED:
+# 1. RELAY TEST (ASTROM-HAGGLUND): ON EVERY FRAME THE PTU IS MOVED BY +relay OR -relay DEGREES TOWARDS THE TARGET.
+#    THE ERROR OSCILLATES AROUND THE CENTER, ITS AMPLITUDE a AND PERIOD Tu GIVE THE ULTIMATE GAIN
+#    Ku = 4 * relay / (pi * a), THE PROPORTIONAL GAIN THE LOOP OSCILLATES WITH.
+# 2. EVERY ZIEGLER-NICHOLS RULE IN RULES TURNS Ku AND Tu INTO GAINS.
+# 3. STEP TEST: THE PTU IS MOVED step DEGREES AWAY FROM THE TARGET AND THE LOOP BRINGS IT BACK WITH THE GAINS,
+#    THE OVERSHOOT (FRACTION OF THE STEP) AND THE SETTLING TIME (UNTIL THE ERROR STAYS WITHIN band PIXELS) ARE
+#    MEASURED FROM THE VIDEO.
+# 4. THE GAINS THAT SETTLE FIRST WITHOUT OVERSHOOTING MORE THAN max_overshoot ARE KEPT. IF ALL GAINS OVERSHOOT MORE,
+#    THE ONES THAT SETTLE FIRST ARE RETURNED WITH within_max_overshoot FALSE AND A WARNING IS PRINTED, OR A
+#    RuntimeError IS RAISED WITH strict.
+# THE GAINS ARE SAVED PER CAMERA PROFILE (E.G. "webcam-640x480") IN A JSON FILE AND LOADED BY THE TRACKING SCRIPTS.
+
+# EVERY AXIS IS TUNED ON ITS OWN WITH TWO FUNCTIONS:
+#     measure() - READS THE NEXT FRAME, RETURNS (time.monotonic, ERROR IN PIXELS) OR NONE IF THE TARGET WAS NOT FOUND
+#     move(u)   - MOVES THE PTU BY u DEGREES, A POSITIVE u DECREASES A POSITIVE ERROR (AS IN THE LOOPS)
+#     tuner = PIDTuner(measure, move)
+#     result = tuner.tune()
+#     save_gains("pid_gains.json", "webcam-640x480", {"x": result["gains"], ...})
+
+from datetime import datetime
+import numpy as np
+import json
+import os
+
+GAINS_PATH = "pid_gains.json"
+
+# ZIEGLER-NICHOLS RULES, kP AS A FRACTION OF Ku, THE INTEGRAL AND DERIVATIVE TIMES AS FRACTIONS OF Tu
+RULES = {
+    "p": (0.5, None, None),
+    "pi": (0.45, 1 / 1.2, None),
+    "pid": (0.6, 0.5, 0.125),
+    "some_overshoot": (0.33, 0.5, 1 / 3),
+    "no_overshoot": (0.2, 0.5, 1 / 3),
+}
+
+# kP, kI, kD FOR THE LOOPS FROM THE ULTIMATE GAIN (DEGREES PER PIXEL) AND THE ULTIMATE PERIOD IN FRAMES
+def ziegler_nichols(ultimate_gain, ultimate_period, rule="pid"):
+    if rule not in RULES:
+        raise ValueError("Unknown tuning rule {}, choose from {}".format(rule, list(RULES)))
+    kp_ratio, integral_ratio, derivative_ratio = RULES[rule]
+    kp = kp_ratio * ultimate_gain
+    # THE LOOPS SUM AND DIFFERENTIATE THE ERROR PER FRAME
+    ki = kp / (integral_ratio * ultimate_period) if integral_ratio else 0.0
+    kd = kp * derivative_ratio * ultimate_period if derivative_ratio else 0.0
+    return [round(float(kp), 6), round(float(ki), 6), round(float(kd), 6)]
+
+# OVERSHOOT AS A FRACTION OF THE FIRST ERROR AND THE INDEX AFTER WHICH THE ERROR STAYS WITHIN band, NONE IF IT DOES NOT
+def step_metrics(errors, band):
+    errors = np.asarray(errors, dtype=float)
+    initial = errors[0]
+    overshoot = max(0.0, -np.min(errors * np.sign(initial))) / abs(initial) if initial else 0.0
+    outside = np.nonzero(np.abs(errors) > band)[0]
+    if len(outside) == 0:
+        return overshoot, 0
+    if outside[-1] == len(errors) - 1:
+        return overshoot, None
+    return overshoot, int(outside[-1] + 1)
+
+class PIDTuner:
+    # measure, move: see above
+    # relay: degrees the PTU is moved on every frame of the relay test
+    # hysteresis: pixels around the center the relay does not switch in, above the noise of the error
+    # band: pixels the error has to stay within to be settled, also the errors the loops ignore
+    # max_misses: frames in a row without the target before the tuning is given up
+    def __init__(self, measure, move, relay=0.5, hysteresis=5.0, band=10.0, max_misses=10):
+        self.measure = measure
+        self.move = move
+        self.relay = relay
+        self.hysteresis = hysteresis
+        self.band = band
+        self.max_misses = max_misses
+
+    def _measure(self):
+        for _ in range(self.max_misses):
+            measurement = self.measure()
+            if measurement is not None:
+                return measurement
+        raise RuntimeError("The target was not found on {} frames in a row.".format(self.max_misses))
+
+    # RETURNS (ULTIMATE GAIN, ULTIMATE PERIOD IN FRAMES, ULTIMATE PERIOD IN SECONDS, AMPLITUDE IN PIXELS)
+    def relay_test(self, cycles=4, max_frames=600):
+        direction = 1
+        switches = []
+        errors = []
+        times = []
+        for frame in range(max_frames):
+            t, error = self._measure()
+            errors.append(error)
+            times.append(t)
+            if error > self.hysteresis and direction < 0 or error < -self.hysteresis and direction > 0:
+                direction = -direction
+                switches.append(frame)
+            self.move(direction * self.relay)
+            # THE FIRST TWO SWITCHES ARE THE TRANSIENT, A CYCLE HAS TWO SWITCHES
+            if len(switches) >= 2 * cycles + 3:
+                break
+        if len(switches) < 5:
+            raise RuntimeError("The error did not oscillate within {} frames, increase the relay.".format(max_frames))
+        start = switches[2]
+        periods = np.diff(switches[2::2])
+        period_seconds = np.diff(np.array(times)[switches[2::2]])
+        amplitude = (np.max(errors[start:]) - np.min(errors[start:])) / 2
+        # THE HYSTERESIS DELAYS THE SWITCHES
+        amplitude = np.sqrt(max(amplitude ** 2 - self.hysteresis ** 2, 1e-9))
+        ultimate_gain = 4 * self.relay / (np.pi * amplitude)
+        return ultimate_gain, float(np.mean(periods)), float(np.mean(period_seconds)), float(amplitude)
+
+    # BRING THE TARGET TO THE CENTER WITH A PROPORTIONAL GAIN, UNTIL IT STAYS WITHIN band FOR still_frames
+    def center(self, kp, max_frames=300, still_frames=5):
+        still = 0
+        for _ in range(max_frames):
+            _, error = self._measure()
+            if abs(error) <= self.band:
+                still += 1
+                if still >= still_frames:
+                    return
+            else:
+                still = 0
+                self.move(round(kp * error, 3))
+        raise RuntimeError("The target could not be centered within {} frames.".format(max_frames))
+
+    # CENTERS THE TARGET, MOVES THE PTU step DEGREES AWAY FROM IT, THEN BRINGS IT BACK WITH THE GAINS LIKE THE LOOPS
+    # RETURNS {"overshoot", "settling_frames", "settling_time", "errors"}, THE SETTLING IS NONE IF IT DID NOT SETTLE
+    # center_gain: proportional gain used to center the target, kP of the gains if not given
+    def step_test(self, gains, step=3.0, max_frames=150, wait_frames=30, center_gain=None):
+        self.center(center_gain if center_gain is not None else gains[0])
+        self.move(-step)
+        # WAIT UNTIL THE PTU STOPPED AFTER THE STEP, THE FIRST FRAMES DO NOT SHOW THE MOVEMENT YET
+        for _ in range(wait_frames):
+            self._measure()
+
+        kp, ki, kd = gains
+        integral = 0
+        previous = None
+        errors = []
+        times = []
+        for _ in range(max_frames):
+            t, error = self._measure()
+            errors.append(error)
+            times.append(t)
+            integral = integral + error
+            differential = error - previous if previous is not None else 0
+            previous = error
+            u = round(kp * error + ki * integral + kd * differential, 3)
+            # THE LOOPS IGNORE SMALL ERRORS
+            if error ** 2 > self.band ** 2:
+                self.move(u)
+        if abs(errors[0]) <= self.band:
+            raise RuntimeError("The step of {} degrees moved the target less than {} pixels, increase the step.".format(step, self.band))
+        overshoot, settling_frames = step_metrics(errors, self.band)
+        return {
+            "overshoot": float(overshoot),
+            "settling_frames": settling_frames,
+            "settling_time": times[settling_frames] - times[0] if settling_frames is not None else None,
+            "errors": errors,
+        }
+
+    # RELAY TEST, STEP TESTS OF THE GAINS OF EVERY RULE, RETURNS THE BEST ONE
+    # {"gains", "rule", "ultimate_gain", "ultimate_period", "overshoot", "settling_time", "within_max_overshoot", "candidates"}
+    # strict: raise instead of returning gains that overshoot more than max_overshoot
+    def tune(self, rules=("no_overshoot", "some_overshoot", "pi", "pid", "p"), max_overshoot=0.1, step=3.0, strict=False, **relay_args):
+        ultimate_gain, period_frames, period_seconds, amplitude = self.relay_test(**relay_args)
+        print("Relay test: ultimate gain {:.4f} degrees per pixel, period {:.1f} frames ({:.2f} s), amplitude {:.1f} pixels".format(
+            ultimate_gain, period_frames, period_seconds, amplitude))
+
+        candidates = []
+        for i, rule in enumerate(rules):
+            gains = ziegler_nichols(ultimate_gain, period_frames, rule)
+            # ALTERNATE THE DIRECTION OF THE STEPS, THE PTU DOES NOT DRIFT AWAY
+            response = self.step_test(gains, step if i % 2 == 0 else -step, center_gain = ziegler_nichols(ultimate_gain, period_frames, "no_overshoot")[0])
+            candidates.append({"rule": rule, "gains": gains, "overshoot": response["overshoot"],
+                               "settling_time": response["settling_time"]})
+            print("{:>15} {} overshoot {:.2f} settling time {}".format(rule, gains, response["overshoot"],
+                  "{:.2f} s".format(response["settling_time"]) if response["settling_time"] is not None else "-"))
+
+        settled = [c for c in candidates if c["settling_time"] is not None]
+        if not settled:
+            raise RuntimeError("None of the gains settled, check the target and increase max_frames.")
+        good = [c for c in settled if c["overshoot"] <= max_overshoot]
+        if not good:
+            message = "None of the gains overshot less than {:.2f}, the least overshoot was {:.2f}.".format(
+                max_overshoot, min(c["overshoot"] for c in settled))
+            if strict:
+                raise RuntimeError(message)
+            print("WARNING: {} The gains that settle first are returned.".format(message))
+        best = min(good or settled, key=lambda c: (c["settling_time"], c["overshoot"]))
+        return dict(best, ultimate_gain=float(ultimate_gain), ultimate_period=period_seconds,
+                    within_max_overshoot=bool(good), candidates=candidates)
+
+# GAINS OF A CAMERA PROFILE, {"x": [kP, kI, kD], "y": [kP, kI, kD], ...} OR NONE IF IT WAS NOT TUNED
+def load_gains(path, profile):
+    if not os.path.exists(path):
+        return None
+    with open(path) as gains_file:
+        return json.load(gains_file).get(profile)
+
+# SAVE THE GAINS OF A CAMERA PROFILE, THE OTHER PROFILES AND THE AXES NOT IN gains ARE KEPT
+def save_gains(path, profile, gains):
+    profiles = {}
+    if os.path.exists(path):
+        with open(path) as gains_file:
+            profiles = json.load(gains_file)
+    profiles[profile] = dict(profiles.get(profile, {}), **gains, tuned=datetime.now().isoformat(timespec="seconds"))
+    with open(path, "w") as gains_file:
+        json.dump(profiles, gains_file, indent=4)
@@ -0,0 +1,82 @@
+####### WRITTEN TO TEST THE PID TUNER AGAINST A SIMULATED PTU #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+from PIDTuner import PIDTuner, ziegler_nichols, step_metrics
+import contextlib
+import unittest
+import io
+
+# THE PTU SEEN BY THE CAMERA: THE PTU MOVES TO THE COMMANDED POSITION AT ONCE, THE NEXT FRAME SHOWS IT WITHOUT A
+# delay, OTHERWISE delay FRAMES LATER, THE TARGET IS AT 0 DEGREES AND ppd PIXELS ARE ONE DEGREE
+class SimulatedPTU:
+    def __init__(self, ppd=10.0, delay=0, fps=30.0):
+        self.ppd = ppd
+        self.fps = fps
+        self.commanded = 0.0
+        self.seen = [0.0] * delay
+        self.frame = 0
+
+    def move(self, u):
+        self.commanded += u
+
+    def measure(self):
+        self.frame += 1
+        self.seen.append(self.commanded)
+        return self.frame / self.fps, -self.seen.pop(0) * self.ppd
+
+def tune(ptu, **tune_args):
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        result = PIDTuner(ptu.measure, ptu.move).tune(**tune_args)
+    return result, output.getvalue()
+
+class PIDTunerTest(unittest.TestCase):
+
+    def test_ziegler_nichols(self):
+        self.assertEqual(ziegler_nichols(1.0, 10.0, "p"), [0.5, 0.0, 0.0])
+        self.assertEqual(ziegler_nichols(1.0, 10.0, "pi"), [0.45, 0.054, 0.0])
+        self.assertEqual(ziegler_nichols(1.0, 10.0, "pid"), [0.6, 0.12, 0.75])
+        self.assertEqual(ziegler_nichols(0.5, 4.0, "some_overshoot"), [0.165, 0.0825, 0.22])
+        self.assertEqual(ziegler_nichols(0.5, 4.0, "no_overshoot"), [0.1, 0.05, 0.133333])
+        with self.assertRaises(ValueError):
+            ziegler_nichols(1.0, 10.0, "pd")
+
+    def test_step_metrics(self):
+        self.assertEqual(step_metrics([100, 50, -20, 5, 0], 10), (0.2, 3))
+        self.assertEqual(step_metrics([-100, 40, -5], 10), (0.4, 2))
+        self.assertEqual(step_metrics([100, 50, 20], 10), (0.0, None))
+        self.assertEqual(step_metrics([5, -2, 1], 10), (0.4, 0))
+
+    def test_step_test_of_a_simulated_ptu(self):
+        # 3 DEGREES ARE 30 PIXELS, kP = 0.15 MOVES THE PTU 4.5 DEGREES, THE ERRORS ARE 30, -15, 7.5 AND STAY THERE
+        ptu = SimulatedPTU()
+        response = PIDTuner(ptu.measure, ptu.move).step_test([0.15, 0.0, 0.0], step=3.0, max_frames=10)
+        self.assertEqual(response["errors"][:4], [30.0, -15.0, 7.5, 7.5])
+        self.assertAlmostEqual(response["overshoot"], 0.5)
+        self.assertEqual(response["settling_frames"], 2)
+        self.assertAlmostEqual(response["settling_time"], 2 / ptu.fps)
+
+        # kP = 0.1 IS ONE DEGREE PER 10 PIXELS, THE PTU IS BACK ON THE TARGET ON THE NEXT FRAME
+        ptu = SimulatedPTU()
+        response = PIDTuner(ptu.measure, ptu.move).step_test([0.1, 0.0, 0.0], step=3.0, max_frames=10)
+        self.assertEqual((response["overshoot"], response["settling_frames"]), (0.0, 1))
+
+    def test_tune_a_simulated_ptu(self):
+        result, _ = tune(SimulatedPTU(delay=3))
+        self.assertTrue(result["within_max_overshoot"])
+        self.assertLessEqual(result["overshoot"], 0.1)
+        self.assertEqual(len(result["candidates"]), 5)
+        self.assertEqual(result["gains"], ziegler_nichols(result["ultimate_gain"], result["ultimate_period"] * 30.0, result["rule"]))
+        # THE FASTEST GAINS, pid, OVERSHOOT MORE THAN 0.1 WITH THIS DELAY
+        self.assertGreater([c for c in result["candidates"] if c["rule"] == "pid"][0]["overshoot"], 0.1)
+
+    def test_gains_overshooting_too_much_are_marked(self):
+        result, output = tune(SimulatedPTU(delay=5), rules=("pid",), max_overshoot=0.1)
+        self.assertFalse(result["within_max_overshoot"])
+        self.assertGreater(result["overshoot"], 0.1)
+        self.assertIn("WARNING", output)
+        with self.assertRaises(RuntimeError):
+            tune(SimulatedPTU(delay=5), rules=("pid",), max_overshoot=0.1, strict=True)
+
+if __name__ == "__main__":
+    unittest.main()
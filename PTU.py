@@ -12,17 +12,66 @@
 # when issuing a command to move the PTU. I suggest to read the documentation of the PTU 
 # before issuing the movement commands.
 
+####### POSITION FEEDBACK #######
+# start_polling() QUERIES THE PAN AND TILT POSITIONS (PP AND TP WITHOUT A POSITION) IN A BACKGROUND THREAD
+# AND KEEPS THEM WITH THEIR TIMES IN A PositionCache. position_at(t) INTERPOLATES THE POSITION AT A TIME,
+# E.G. THE CAPTURE TIME OF A FRAME, WHILE THE PTU IS MOVING. THE COMMANDS AND THE QUERIES SHARE THE SOCKET,
+# A LOCK KEEPS EVERY COMMAND TOGETHER WITH ITS ANSWER.
+# THE MOVE COMMANDS CAN BE SENT FROM SEVERAL THREADS (E.G. A THREAD FOLLOWING A TRAJECTORY AND THE TRACKING LOOP),
+# command_lock KEEPS A COMMAND TOGETHER WITH THE UPDATE OF THE COMMANDED POSITION, SO A RELATIVE MOVE OF ONE THREAD
+# IS NOT LOST BY THE OTHER, THE POLLING THREAD ONLY QUERIES AND DOES NOT WAIT FOR IT.
+
+from collections import deque
+from threading import Event, Lock, RLock, Thread
 from time import sleep
+from Telemetry import Telemetry
+import numpy as np
 import serial
 import socket
+import time
+import re
+
+# ANSWER TO A POSITION QUERY, "PP * Current Pan position is -2500" OR "PP * -2500" IN TERSE MODE
+_POSITION = re.compile(r"\*[^\d-]*(-?\d+)")
+
+class PositionCache:
+    # KEEPS THE LAST capacity POSITIONS OF AN AXIS WITH THEIR TIMES (time.monotonic), THREAD SAFE
+    def __init__(self, capacity = 256):
+        self.lock = Lock()
+        self.times = deque(maxlen = capacity)
+        self.positions = deque(maxlen = capacity)
+
+    def add(self, t, position):
+        with self.lock:
+            self.times.append(t)
+            self.positions.append(position)
+
+    # LATEST (TIME, POSITION), NONE IF THE CACHE IS EMPTY
+    def latest(self):
+        with self.lock:
+            if not self.times:
+                return None
+            return self.times[-1], self.positions[-1]
+
+    # POSITION AT TIME t, LINEARLY INTERPOLATED BETWEEN THE SAMPLES AROUND IT. OUTSIDE OF THE SAMPLES THE
+    # FIRST OR THE LATEST POSITION IS RETURNED, NONE IF THE CACHE IS EMPTY
+    def at(self, t):
+        with self.lock:
+            if not self.times:
+                return None
+            times = np.array(self.times)
+            positions = np.array(self.positions, dtype = float)
+        return float(np.interp(t, times, positions))
 
 class PTU():
     # if you encounter a problem with serial communication
     # give permissions to the USB port by
     # sudo chmod 666 <path>
     # e.g. <path> -> /dev/ttyUSB0
-    def __init__(self, serial_port = "/dev/ttyUSB0"):
+    def __init__(self, serial_port = "/dev/ttyUSB0", telemetry = None):
         self.serial_port = serial_port
+        # TIMES THE ROUND-TRIP OF THE COMMANDS, DISABLED IF NOT GIVEN
+        self.telemetry = telemetry if telemetry is not None else Telemetry()
         # start a serial communication
         self.ser = serial.Serial(self.serial_port)
         print("Serial communication started over {}".format(self.serial_port))
@@ -33,8 +82,20 @@ class PTU():
         
         self.step_mode = None
         self.resolution = None
+
+        # LAST COMMANDED POSITIONS
+        self.pan_position = 0
+        self.tilt_position = 0
+
+        # QUERIED POSITIONS, FILLED BY start_polling
+        self.lock = Lock()
+        self.pan_cache = PositionCache()
+        self.tilt_cache = PositionCache()
+        self.poll_stop = Event()
+        self.poller = None
         
-        # command execution
+        # command execution, HELD FROM SENDING A COMMAND UNTIL THE COMMANDED POSITION IS UPDATED
+        self.command_lock = RLock()
         self.total_fail = 0
         self.execution_state = True
         self.first_failure = True
@@ -93,49 +154,58 @@ class PTU():
     
     # close the socket
     def socket_close(self):
+        self.stop_polling()
         self.sock.close()
         self.sock = None
     
+    # send a command over the socket and receive its answer, the polling thread may be using the socket as well
+    def _exchange(self, command):
+        with self.lock:
+            # send the command
+            self.sock.send(("{} ".format(command)).encode("utf-8"))
+            sleep(0.001)
+            # get the respond from the PTU, PTU replies with a command
+            return self.sock.recv(2048).decode("utf-8")
+
     # send a command over the socket
     def socket_send(self, command):
-        # send the command
-        self.sock.send(("{} ".format(command)).encode("utf-8"))
-        sleep(0.001)
-        # get the respond from the PTU, PTU replies with a command
-        received = self.sock.recv(2048).decode("utf-8")
+        with self.telemetry.stage("ptu", command = command):
+            received = self._exchange(command)
         # return the received command if the command or the query sent was succesfully executed otherwise return None
         return self.success(received)
     
     # receive messages over the open socket
     def sock_receive(self):
-        return self.sock.recv(2048).decode("utf-8")
+        with self.lock:
+            return self.sock.recv(2048).decode("utf-8")
 
     # most of the necessary commands are available on this file but
     # in case you want to execute a command on the PTU use this method
     # to send the command
     def execute_command(self, command):
-        # send the command and receive PTU’s response to that command
-        received = self.socket_send(command)
-        # if the received is not none some action has happened
-        if received != None:
-            self.execution_state = True
-            print(received)
-        else:
-            # if the response from the PTU is none
-            # execution could not happen
-            self.execution_state = False
-            print("Command execution Failed!")
-            
-            if self.first_failure != self.execution_state:
-                print("Execution Failed for the first time")
-                print(self.sock.recv(2048).decode("utf-8"))
+        with self.command_lock:
+            # send the command and receive PTU’s response to that command
+            received = self.socket_send(command)
+            # if the received is not none some action has happened
+            if received != None:
+                self.execution_state = True
             else:
-                print("Execution failed more than once")
-        
-            self.first_failure = self.execution_state
+                # if the response from the PTU is none
+                # execution could not happen
+                self.execution_state = False
+                print("Command execution Failed!")
+
+                if self.first_failure != self.execution_state:
+                    print("Execution Failed for the first time")
+                    print(self.sock_receive())
+                else:
+                    print("Execution failed more than once")
 
-        print(self.execution_state)
-        print(self.first_failure)
+                self.first_failure = self.execution_state
+
+            self.telemetry.event("ptu_state", command = command, execution_state = self.execution_state, first_failure = self.first_failure)
+            # RETURNED AS WELL, execution_state MAY ALREADY BELONG TO A COMMAND OF ANOTHER THREAD WHEN IT IS READ
+            return self.execution_state
 
     # set the step mode
     def set_step_mode(self, step_mode):
@@ -156,11 +226,15 @@ class PTU():
     # reset axis
     def axis_reset(self, pan = False, tilt = False):
         if pan:
-            self.socket_send("RP")
+            with self.command_lock:
+                self.socket_send("RP")
+                self.pan_position = 0
             print("sleeping for 2 seconds")
             sleep(2)
         if tilt:
-            self.socket_send("RT")
+            with self.command_lock:
+                self.socket_send("RT")
+                self.tilt_position = 0
             print("sleeping for 2 seconds")
             sleep(2)
         else:
@@ -170,13 +244,17 @@ class PTU():
     def move_x_to(self, position):
         # example respond: "PP100 *"
         command = "PP{}".format(position)
-        self.execute_command(command)
+        with self.command_lock:
+            if self.execute_command(command):
+                self.pan_position = int(position)
 
     # move the PTU to the y direction coordinate, tilting
     def move_y_to(self, position):
         # example respond: "TP100 *"
         command = "TP{}".format(position)
-        self.execute_command(command)
+        with self.command_lock:
+            if self.execute_command(command):
+                self.tilt_position = int(position)
 
     # move the PTU by the number of positions specified in the x direction, panning
     # number of position move in each step can be set using set_step_mode function
@@ -184,7 +262,9 @@ class PTU():
     def move_x_by(self, num_of_positions):
         # example respond: "PO100 *"
         command = "PO{}".format(num_of_positions)
-        self.execute_command(command)
+        with self.command_lock:
+            if self.execute_command(command):
+                self.pan_position += int(num_of_positions)
 
     # move the PTU by the number of positions specified in the y direction, tilting
     # number of position move in each step can be set using set_step_mode function
@@ -192,10 +272,62 @@ class PTU():
     def move_y_by(self, num_of_positions):
         # example respond: "TO100 *"
         command = "TO{}".format(num_of_positions)
-        self.execute_command(command)
+        with self.command_lock:
+            if self.execute_command(command):
+                self.tilt_position += int(num_of_positions)
 
     def num_of_positions(self, angle):
         return int(angle/self.resolution)
+
+    # LAST COMMANDED PAN AND TILT IN DEGREES, THE PTU MAY STILL BE MOVING THERE
+    def commanded_degrees(self):
+        with self.command_lock:
+            return self.pan_position * self.resolution, self.tilt_position * self.resolution
+
+    # QUERY THE CURRENT POSITION OF AN AXIS, "PP" OR "TP", NONE IF THE ANSWER CANNOT BE READ
+    def query_position(self, command):
+        match = _POSITION.search(self.success(self._exchange(command)) or "")
+        return int(match.group(1)) if match else None
+
+    # QUERY THE PAN AND TILT POSITIONS rate TIMES PER SECOND IN A BACKGROUND THREAD
+    def start_polling(self, rate = 50):
+        if self.poller is not None:
+            return
+        self.poll_stop.clear()
+        self.poller = Thread(target = self._poll_loop, args = (1.0 / rate,), name = "ptu-poller", daemon = True)
+        self.poller.start()
+
+    def stop_polling(self):
+        if self.poller is None:
+            return
+        self.poll_stop.set()
+        self.poller.join()
+        self.poller = None
+
+    def _poll_loop(self, interval):
+        next_poll = time.monotonic()
+        while not self.poll_stop.is_set():
+            for command, cache in (("PP", self.pan_cache), ("TP", self.tilt_cache)):
+                # THE POSITION IS READ SOMEWHERE BETWEEN SENDING THE QUERY AND RECEIVING THE ANSWER
+                start = time.monotonic()
+                try:
+                    position = self.query_position(command)
+                except OSError:
+                    position = None
+                if position is not None:
+                    cache.add((start + time.monotonic()) / 2, position)
+            next_poll += interval
+            self.poll_stop.wait(max(next_poll - time.monotonic(), 0))
+
+    # PAN AND TILT IN DEGREES AT TIME t (time.monotonic), E.G. WHEN A FRAME WAS CAPTURED
+    # THE COMMANDED POSITION IF THE PTU WAS NOT QUERIED YET
+    def position_at(self, t):
+        pan = self.pan_cache.at(t)
+        tilt = self.tilt_cache.at(t)
+        commanded_pan, commanded_tilt = self.commanded_degrees()
+        pan = commanded_pan if pan is None else pan * self.resolution
+        tilt = commanded_tilt if tilt is None else tilt * self.resolution
+        return pan, tilt
     
     # move the PTU to the x direction coordinate in degrees (0-360), panning
     def move_x_to_degrees(self, angle):
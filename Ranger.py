@@ -0,0 +1,250 @@
+####### WRITTEN TO MEASURE THE RANGE OF THE TRACKED OBJECT WITH THE BOSCH GLM 50C LASER RANGER #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# A MEASUREMENT OF THE GLM TAKES A FEW HUNDRED MILLISECONDS, THE CONTROL LOOP CANNOT WAIT FOR IT.
+# Ranger TALKS TO THE GLM IN A BACKGROUND THREAD: trigger() ONLY HANDS A REQUEST TO THE THREAD AND RETURNS
+# AT ONCE (FALSE IF A MEASUREMENT IS STILL RUNNING), readings() RETURNS THE MEASUREMENTS FINISHED SINCE THE
+# LAST CALL. EVERY READING KEEPS THE TIME OF THE REQUEST AND THE PAN, TILT AND FRAME IT WAS TRIGGERED WITH,
+# SO IT CAN BE ATTACHED TO THE TRACK IT WAS MEASURED ON.
+
+# THE GLM IS REACHED OVER BLUETOOTH (SERIAL PORT PROFILE), EITHER
+# - THROUGH A SERIAL PORT BOUND TO IT: sudo rfcomm bind 0 <bluetooth address> 5, THEN THE PORT IS /dev/rfcomm0
+# - OR DIRECTLY WITH ITS BLUETOOTH ADDRESS, E.G. 00:13:43:A1:B2:C3 (RFCOMM SOCKET, LINUX ONLY)
+# - OR "emulator", A LOCAL STAND-IN THAT SPEAKS THE SAME PROTOCOL, TO RUN WITHOUT THE DEVICE
+
+####### PROTOCOL #######
+# NOT DOCUMENTED BY BOSCH, AS REVERSE ENGINEERED BY THE GLM 50C USERS:
+# COMMAND: C0 <command> 00 <checksum>, MEASURE IS C0 40 00 EE
+# ANSWER: <status> <length> <length bytes> <checksum>, STATUS 0 IS SUCCESS. THE ANSWER TO MEASURE HAS 4 BYTES,
+# THE DISTANCE FROM THE BACK OF THE DEVICE AS A LITTLE ENDIAN UINT32 IN 0.05 MM. THE CHECKSUM IS NOT CHECKED.
+
+from threading import Event, Lock, Thread
+from collections import deque
+from Telemetry import Telemetry
+import numpy as np
+import socket
+import struct
+import queue
+import time
+import re
+
+MEASURE = bytes([0xC0, 0x40, 0x00, 0xEE])
+LASER_ON = bytes([0xC0, 0x41, 0x00, 0x96])
+LASER_OFF = bytes([0xC0, 0x42, 0x00, 0x1E])
+# METERS PER UNIT OF THE DISTANCE
+_UNIT = 0.00005
+_BLUETOOTH_ADDRESS = re.compile(r"^([0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}$")
+
+class RangeReading:
+    __slots__ = ("request_time", "time", "distance", "pan", "tilt", "frame")
+
+    def __init__(self, request_time, time, distance, pan, tilt, frame):
+        # time.monotonic WHEN THE MEASUREMENT WAS REQUESTED AND HALF WAY TO ITS ANSWER (ABOUT WHEN THE LASER FIRED)
+        self.request_time = request_time
+        self.time = time
+        # METERS, NONE IF THE MEASUREMENT FAILED (NO ECHO, TIMEOUT)
+        self.distance = distance
+        # PAN AND TILT OF THE PTU AND THE TELEMETRY FRAME GIVEN TO trigger
+        self.pan = pan
+        self.tilt = tilt
+        self.frame = frame
+
+class _SerialConnection:
+    # THE SAME send AND recv AS A SOCKET
+    def __init__(self, port, timeout):
+        import serial
+        self.ser = serial.Serial(port, timeout=timeout)
+
+    def settimeout(self, timeout):
+        self.ser.timeout = timeout
+
+    def send(self, data):
+        self.ser.write(data)
+
+    def recv(self, size):
+        data = self.ser.read(size)
+        if not data:
+            raise socket.timeout("No answer from the ranger.")
+        return data
+
+    def close(self):
+        self.ser.close()
+
+class RangerEmulator:
+    # ANSWERS THE MEASURE COMMAND LIKE THE GLM, OVER A SOCKET PAIR
+    # distance: meters, a number or a function of time.monotonic()
+    # delay: seconds a measurement takes
+    # failure_rate: fraction of the measurements without an echo
+    def __init__(self, distance=50.0, delay=0.3, noise=0.002, failure_rate=0.0, seed=None):
+        self.distance = distance
+        self.delay = delay
+        self.noise = noise
+        self.failure_rate = failure_rate
+        self.rng = np.random.default_rng(seed)
+        self.sock = None
+        self.thread = None
+
+    # RETURNS THE SOCKET THE RANGER TALKS TO
+    def connect(self):
+        client, self.sock = socket.socketpair()
+        self.thread = Thread(target=self._serve, name="ranger-emulator", daemon=True)
+        self.thread.start()
+        return client
+
+    def _serve(self):
+        while True:
+            try:
+                command = self.sock.recv(4)
+            except OSError:
+                return
+            if len(command) < 4:
+                return
+            if command != MEASURE:
+                # LASER ON AND OFF, AND ANY OTHER COMMAND
+                answer = bytes([0x00, 0x00, 0x00])
+            else:
+                time.sleep(self.delay)
+                distance = self.distance(time.monotonic()) if callable(self.distance) else self.distance
+                if self.rng.random() < self.failure_rate:
+                    answer = bytes([0x01, 0x00, 0x00])
+                else:
+                    distance += self.rng.normal(0, self.noise)
+                    answer = bytes([0x00, 0x04]) + struct.pack("<I", int(round(max(distance, 0) / _UNIT))) + bytes([0x00])
+            try:
+                self.sock.sendall(answer)
+            except (OSError, AttributeError):
+                # CLOSED WHILE MEASURING
+                return
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+class Ranger:
+    # port: serial port bound to the GLM, its Bluetooth address or "emulator" (or a RangerEmulator)
+    # channel: RFCOMM channel of the GLM, only used with a Bluetooth address
+    # timeout: seconds to wait for an answer
+    # min_interval: minimum seconds between two measurements, the laser is not fired on every frame
+    def __init__(self, port, channel=5, timeout=2.0, min_interval=0.5, telemetry=None):
+        self.port = port
+        self.timeout = timeout
+        self.min_interval = min_interval
+        # TIMES THE MEASUREMENTS, DISABLED IF NOT GIVEN
+        self.telemetry = telemetry if telemetry is not None else Telemetry()
+        self.emulator = None
+
+        if isinstance(port, RangerEmulator) or port == "emulator":
+            self.emulator = port if isinstance(port, RangerEmulator) else RangerEmulator()
+            self.connection = self.emulator.connect()
+            self.connection.settimeout(timeout)
+        elif _BLUETOOTH_ADDRESS.match(port):
+            self.connection = socket.socket(socket.AF_BLUETOOTH, socket.SOCK_STREAM, socket.BTPROTO_RFCOMM)
+            self.connection.settimeout(timeout)
+            self.connection.connect((port, channel))
+        else:
+            self.connection = _SerialConnection(port, timeout)
+        print("Ranger connected over {}".format("the emulator" if self.emulator is not None else port))
+
+        self.requests = queue.Queue(maxsize=1)
+        self.results = deque()
+        self.busy = Event()
+        self.lock = Lock()
+        self.last_request = None
+        self.num_of_failures = 0
+        # FALSE ONCE THE GLM CLOSED THE CONNECTION
+        self.connected = True
+        # AN ANSWER TIMED OUT AND MAY STILL ARRIVE
+        self.stale = False
+        self.worker = Thread(target=self._run, name="ranger", daemon=True)
+        self.worker.start()
+
+    def _recv_exactly(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.connection.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("The ranger closed the connection.")
+            data += chunk
+        return data
+
+    # DROP WHAT IS LEFT OF EARLIER ANSWERS, SO A LATE ANSWER IS NOT TAKEN FOR THE ANSWER TO THE NEXT MEASUREMENT
+    # AFTER A TIMEOUT THE LATE ANSWER IS WAITED FOR UP TO timeout SECONDS
+    def _discard(self):
+        wait = self.timeout if self.stale else 0
+        try:
+            while True:
+                self.connection.settimeout(wait)
+                if not self.connection.recv(64):
+                    break
+                wait = 0
+        except (socket.timeout, BlockingIOError):
+            pass
+        finally:
+            self.connection.settimeout(self.timeout)
+        self.stale = False
+
+    # MEASURE ONCE AND WAIT FOR THE ANSWER, RETURNS THE DISTANCE IN METERS OR NONE
+    # BLOCKS FOR THE WHOLE MEASUREMENT, THE CONTROL LOOP USES trigger() INSTEAD
+    def measure(self):
+        with self.lock:
+            self._discard()
+            self.connection.send(MEASURE)
+            try:
+                status, length = self._recv_exactly(2)
+                payload = self._recv_exactly(length + 1)[:length]
+            except socket.timeout:
+                self.stale = True
+                raise
+        if status != 0 or length < 4:
+            return None
+        return struct.unpack("<I", payload[:4])[0] * _UNIT
+
+    # REQUEST A MEASUREMENT WITHOUT WAITING, RETURNS FALSE IF ONE IS RUNNING OR THE LAST ONE WAS TOO RECENT
+    def trigger(self, now, pan=None, tilt=None, frame=None):
+        if not self.connected or self.busy.is_set() or (self.last_request is not None and now - self.last_request < self.min_interval):
+            return False
+        self.busy.set()
+        self.last_request = now
+        self.requests.put_nowait((now, pan, tilt, frame))
+        return True
+
+    # THE MEASUREMENTS FINISHED SINCE THE LAST CALL
+    def readings(self):
+        readings = []
+        while self.results:
+            readings.append(self.results.popleft())
+        return readings
+
+    def _run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            request_time, pan, tilt, frame = request
+            start = time.monotonic()
+            try:
+                with self.telemetry.stage("ranger") as stage:
+                    distance = self.measure()
+                    stage.fields["distance"] = distance
+            except ConnectionError:
+                distance = None
+                self.connected = False
+            except (OSError, ValueError):
+                distance = None
+            if distance is None:
+                self.num_of_failures += 1
+            self.results.append(RangeReading(request_time, (start + time.monotonic()) / 2, distance, pan, tilt, frame))
+            self.busy.clear()
+            if not self.connected:
+                print("The ranger closed the connection, ranging is stopped.")
+                break
+
+    def close(self):
+        if self.worker.is_alive():
+            self.requests.put(None)
+            self.worker.join()
+        self.connection.close()
+        if self.emulator is not None:
+            self.emulator.close()
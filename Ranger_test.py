@@ -0,0 +1,66 @@
+####### WRITTEN TO TEST THE LASER RANGER AGAINST ITS EMULATOR #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+from Ranger import Ranger, RangerEmulator
+import unittest
+import time
+
+def wait_for_readings(ranger, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        readings = ranger.readings()
+        if readings:
+            return readings
+        time.sleep(0.01)
+    return []
+
+class RangerTest(unittest.TestCase):
+
+    def test_trigger_does_not_wait(self):
+        ranger = Ranger(RangerEmulator(distance=12.5, delay=0.2, noise=0), min_interval=0)
+        start = time.monotonic()
+        self.assertTrue(ranger.trigger(start, 1.0, 2.0, 3))
+        self.assertLess(time.monotonic() - start, 0.05)
+        # ONE MEASUREMENT AT A TIME
+        self.assertFalse(ranger.trigger(start))
+        readings = wait_for_readings(ranger)
+        self.assertEqual(len(readings), 1)
+        self.assertAlmostEqual(readings[0].distance, 12.5, places=3)
+        self.assertEqual((readings[0].pan, readings[0].tilt, readings[0].frame), (1.0, 2.0, 3))
+        self.assertGreater(readings[0].time, readings[0].request_time)
+        ranger.close()
+
+    def test_closed_connection_stops_the_reader(self):
+        emulator = RangerEmulator(delay=0.5)
+        ranger = Ranger(emulator, min_interval=0)
+        self.assertTrue(ranger.trigger(time.monotonic()))
+        # THE GLM GOES AWAY WHILE MEASURING
+        time.sleep(0.1)
+        emulator.close()
+        readings = wait_for_readings(ranger)
+        self.assertEqual(len(readings), 1)
+        self.assertIsNone(readings[0].distance)
+        self.assertFalse(ranger.connected)
+        self.assertFalse(ranger.trigger(time.monotonic()))
+        start = time.monotonic()
+        ranger.close()
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_late_answer_is_not_taken_for_the_next_one(self):
+        distances = iter([10.0, 20.0])
+        emulator = RangerEmulator(distance=lambda t: next(distances), delay=0.3, noise=0)
+        ranger = Ranger(emulator, timeout=0.1, min_interval=0)
+        # THE FIRST ANSWER (10 M) ARRIVES AFTER THE TIMEOUT
+        self.assertTrue(ranger.trigger(time.monotonic()))
+        readings = wait_for_readings(ranger)
+        self.assertIsNone(readings[0].distance)
+        ranger.timeout = 1.0
+        ranger.connection.settimeout(1.0)
+        self.assertTrue(ranger.trigger(time.monotonic()))
+        readings = wait_for_readings(ranger)
+        self.assertAlmostEqual(readings[0].distance, 20.0, places=3)
+        ranger.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+####### WRITTEN TO DETECT OBJECTS WITH AN INTERLEAVED LSTM MODEL #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# THE MODEL IS EXPORTED WITH models/research/lstm_object_detection/export_saved_model.py.
+# ON A KEY FRAME THE LARGE MOBILENET RUNS AND UPDATES THE LSTM STATE, ON THE OTHER FRAMES ONLY THE SMALL
+# MOBILENET RUNS AND THE DETECTIONS COME FROM THE STATE OF THE LAST KEY FRAME. THE STATE IS KEPT BETWEEN
+# THE get_detections CALLS, SO ONE RecurrentDetector IS NEEDED PER CAMERA.
+# THE DETECTIONS ARE THE SAME AS THE ONES OF Detector.
+
+from Detector import Detector
+import tensorflow as tf
+import numpy as np
+
+class RecurrentDetector(Detector):
+    # key_frame_interval: number of frames from one key frame to the next, if not given the interval
+    # the model was trained with is used (eval_interleave_method of the lstm config)
+    def __init__(self, saved_model_path, label_map_path, min_score, telemetry=None, key_frame_interval=None):
+        super().__init__(saved_model_path, label_map_path, min_score, telemetry)
+        self.key_frame_fn = self.detect_fn.signatures["key_frame"]
+        self.frame_fn = self.detect_fn.signatures["frame"]
+        self.key_frame_interval = key_frame_interval
+
+        # THE STATE HAS THE SIZE OF THE LAST FEATURE MAP OF THE MOBILENETS, E.G. 1x10x10x320 FOR 320x320 INPUTS
+        self.state_shape = self.key_frame_fn.structured_input_signature[1]["lstm_c"].shape
+        self.reset()
+
+    # START A NEW VIDEO, E.G. AFTER THE CAMERA WAS MOVED TO ANOTHER POSITION, THE NEXT FRAME IS A KEY FRAME
+    def reset(self):
+        self.lstm_c = tf.zeros(self.state_shape)
+        self.lstm_h = tf.zeros(self.state_shape)
+        self.frame_index = 0
+
+    def get_detections(self, frame):
+        frame_arr = np.expand_dims(frame, axis=0)
+        frame_tensor = tf.convert_to_tensor(frame_arr)
+
+        key_frame = self.key_frame_interval is None or self.frame_index % self.key_frame_interval == 0
+        detect_fn = self.key_frame_fn if key_frame else self.frame_fn
+
+        with self.telemetry.stage("inference") as stage:
+            detections = detect_fn(input_tensor=frame_tensor, lstm_c=self.lstm_c, lstm_h=self.lstm_h)
+            stage.fields["key_frame"] = key_frame
+
+        # THE STATE STAYS A TENSOR, IT IS ONLY GIVEN BACK TO THE MODEL
+        self.lstm_c = detections.pop("lstm_c")
+        self.lstm_h = detections.pop("lstm_h")
+        key_frame_interval = detections.pop("key_frame_interval")
+        if self.key_frame_interval is None:
+            self.key_frame_interval = int(key_frame_interval)
+        self.frame_index += 1
+
+        with self.telemetry.stage("postprocess") as stage:
+            self._postprocess(frame, frame_arr, detections)
+            stage.fields["object_detected"] = self.object_detected
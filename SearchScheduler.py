@@ -0,0 +1,193 @@
+####### WRITTEN TO SEARCH FOR A LOST OBJECT WITH THE PTU #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# WHEN THE OBJECT IS LOST THE PTU STANDS STILL, SO IT IS ONLY FOUND AGAIN IF IT FLIES BACK INTO THE FRAME.
+# SearchScheduler MOVES THE PTU OVER A LIST OF POINTS (PAN AND TILT IN DEGREES) INSTEAD, FROM THE MOST TO THE
+# LEAST LIKELY PLACE OF THE OBJECT:
+#     "predicted" - POINTS ON THE TRAJECTORY PREDICTED FROM THE LAST SEEN BEARING AND ITS ANGULAR VELOCITY
+#     "spiral"    - SQUARE RINGS AROUND THE PREDICTED BEARING, ONE FRAME APART
+#     "raster"    - ROWS OVER THE WHOLE SEARCH AREA, REPEATED UNTIL THE OBJECT IS FOUND
+# NEIGHBOURING POINTS OVERLAP BY overlap OF THE FIELD OF VIEW, A POINT ALREADY LOOKED AT IS SKIPPED.
+# FRAMES CAPTURED WHILE THE PTU IS MOVING ARE BLURRED AND THE DETECTOR IS NOT RUN ON THEM: THE SCHEDULER
+# ESTIMATES WHEN THE PTU ARRIVES FROM ITS SPEED AND ADDS THE SETTLE TIME, AND MOVES ON AS SOON AS THE
+# DETECTOR RAN dwell_passes TIMES ON A SETTLED FRAME.
+# ALL THE METHODS TAKE THE CURRENT TIME, SO THE SAME SCHEDULER RUNS IN THE LOOP AND IN simulate_search.py.
+
+#     search = SearchScheduler((60, 40))
+#     target = search.start(now, (pan, tilt), (pan_rate, tilt_rate), ptu.commanded_degrees())
+#     ptu.move_x_to_degrees(target[0]); ptu.move_y_to_degrees(target[1])
+#     ... ON EVERY FRAME, WHILE THE OBJECT IS NOT DETECTED:
+#     if search.settled(now):
+#         detector.get_detections(frame)
+#         target = search.found(now) if detector.object_detected else search.searched(now)
+
+import numpy as np
+
+PATTERNS = ["predicted", "spiral", "raster"]
+
+class SearchScheduler:
+    # fov: horizontal and vertical field of view of the camera in degrees
+    # patterns: patterns searched one after the other, the last one is repeated
+    # overlap: fraction of the field of view neighbouring points overlap
+    # speed: speed of the PTU in degrees per second, both axes move at the same time
+    # settle_time: seconds from the end of a movement until a frame is sharp
+    # dwell_passes: number of detector passes at every point
+    # search_area: (pan_min, pan_max, tilt_min, tilt_max) in degrees of the PTU, within its limits. A positive tilt
+    #              points the camera down (see bearing_to_ptu), the default searches from 10 degrees below
+    #              the horizon to 40 degrees above it
+    # predict_times: seconds after the object was lost of the predicted points
+    # spiral_rings: number of rings of the spiral
+    def __init__(self, fov, patterns=PATTERNS, overlap=0.2, speed=60.0, settle_time=0.2, dwell_passes=1,
+                 search_area=(-90, 90, -40, 10), predict_times=(0.5, 1.0, 2.0), spiral_rings=2):
+        for pattern in patterns:
+            if pattern not in PATTERNS:
+                raise ValueError("Unknown search pattern {}, choose from {}".format(pattern, PATTERNS))
+        self.fov = np.asarray(fov, dtype=float)
+        self.patterns = list(patterns)
+        self.step = self.fov * (1 - overlap)
+        self.speed = speed
+        self.settle_time = settle_time
+        self.dwell_passes = dwell_passes
+        self.search_area = search_area
+        self.predict_times = predict_times
+        self.spiral_rings = spiral_rings
+
+        self.searching = False
+        # TIMES TO REACQUIRE THE OBJECT, FROM start TO found, IN SECONDS
+        self.reacquire_times = []
+        self.num_of_points = 0
+        self.search_time = 0.0
+
+    def clip(self, point):
+        pan_min, pan_max, tilt_min, tilt_max = self.search_area
+        return np.array([np.clip(point[0], pan_min, pan_max), np.clip(point[1], tilt_min, tilt_max)])
+
+    def predicted_points(self, bearing, rate):
+        if not np.any(rate):
+            return [self.clip(bearing)]
+        return [self.clip(bearing + rate * t) for t in self.predict_times]
+
+    # SQUARE RINGS AROUND THE CENTER, EVERY RING STARTS ON THE SIDE THE OBJECT WAS MOVING TO
+    def spiral_points(self, center, rate):
+        points = [self.clip(center)]
+        start = np.arctan2(rate[1], rate[0]) if np.any(rate) else 0.0
+        for ring in range(1, self.spiral_rings + 1):
+            ring_points = []
+            for i in range(-ring, ring + 1):
+                for j in range(-ring, ring + 1):
+                    if max(abs(i), abs(j)) == ring:
+                        ring_points.append((i, j))
+            # ORDER BY THE ANGLE AROUND THE CENTER, FROM THE DIRECTION OF THE MOVEMENT
+            ring_points.sort(key=lambda p: (np.arctan2(p[1], p[0]) - start) % (2 * np.pi))
+            points += [self.clip(center + np.array(p) * self.step) for p in ring_points]
+        return points
+
+    # ROWS FROM THE ONE CLOSEST TO THE CENTER OUTWARDS, EVERY ROW STARTS ON THE SIDE THE LAST ROW ENDED
+    def raster_points(self, center):
+        pan_min, pan_max, tilt_min, tilt_max = self.search_area
+        pans = _cover(pan_min, pan_max, self.fov[0], self.step[0])
+        tilts = _cover(tilt_min, tilt_max, self.fov[1], self.step[1])
+        tilts = sorted(tilts, key=lambda tilt: abs(tilt - center[1]))
+        points = []
+        left_to_right = abs(pans[0] - center[0]) <= abs(pans[-1] - center[0])
+        for tilt in tilts:
+            row = pans if left_to_right else pans[::-1]
+            points += [np.array([pan, tilt]) for pan in row]
+            left_to_right = not left_to_right
+        return points
+
+    def _plan(self, pattern):
+        if pattern == "predicted":
+            return self.predicted_points(self.bearing, self.rate)
+        if pattern == "spiral":
+            return self.spiral_points(self.predicted_points(self.bearing, self.rate)[-1], self.rate)
+        return self.raster_points(self.position)
+
+    # START SEARCHING, RETURNS THE FIRST POINT
+    # bearing: pan and tilt of the object when it was last seen, in degrees
+    # rate: angular velocity of the object when it was last seen, in degrees per second
+    # position: current (commanded) pan and tilt of the PTU
+    def start(self, now, bearing, rate=(0, 0), position=None):
+        self.searching = True
+        self.start_time = now
+        self.bearing = np.asarray(bearing, dtype=float)
+        self.rate = np.asarray(rate, dtype=float)
+        self.position = np.asarray(position if position is not None else bearing, dtype=float)
+        self.arrival_time = now
+        self.visited = []
+        self.pattern_index = 0
+        self.points = self._plan(self.patterns[0])
+        return self._next(now)
+
+    def _visited(self, point):
+        return any(np.all(np.abs(point - visited) < self.step / 2) for visited in self.visited)
+
+    # NEXT POINT THAT WAS NOT LOOKED AT, GOES TO THE NEXT PATTERN WHEN ONE IS FINISHED
+    def _next(self, now):
+        while True:
+            while self.points:
+                point = self.points.pop(0)
+                if not self._visited(point):
+                    return self._move(now, point)
+            if self.pattern_index + 1 < len(self.patterns):
+                self.pattern_index += 1
+            else:
+                # THE WHOLE AREA WAS SEARCHED, START THE LAST PATTERN AGAIN
+                self.visited = []
+            self.points = self._plan(self.patterns[self.pattern_index])
+
+    def _move(self, now, point):
+        distance = np.max(np.abs(point - self.position))
+        self.arrival_time = now + distance / self.speed + self.settle_time
+        self.position = point
+        self.visited.append(point)
+        self.passes = 0
+        return (float(point[0]), float(point[1]))
+
+    # FRAMES CAPTURED FROM NOW ON ARE SHARP ENOUGH FOR THE DETECTOR
+    def settled(self, now):
+        return self.searching and now >= self.arrival_time
+
+    # THE DETECTOR DID NOT FIND THE OBJECT ON A SETTLED FRAME, RETURNS THE NEXT POINT OR NONE TO STAY
+    def searched(self, now):
+        self.passes += 1
+        if self.passes < self.dwell_passes:
+            return None
+        self.num_of_points += 1
+        return self._next(now)
+
+    # THE OBJECT WAS FOUND, RETURNS THE TIME IT TOOK IN SECONDS
+    def found(self, now):
+        if not self.searching:
+            return None
+        self.searching = False
+        reacquire_time = now - self.start_time
+        self.reacquire_times.append(reacquire_time)
+        self.search_time += reacquire_time
+        return reacquire_time
+
+    # STOP WITHOUT FINDING THE OBJECT, E.G. WHEN THE USER TAKES OVER
+    def stop(self, now):
+        if self.searching:
+            self.searching = False
+            self.search_time += now - self.start_time
+
+    # STATISTICS OF THE SEARCHES SO FAR
+    def stats(self):
+        times = np.array(self.reacquire_times)
+        stats = {
+            "searches": len(times),
+            # SQUARE DEGREES LOOKED AT PER SECOND OF SEARCHING, OVERLAPS ARE COUNTED ONCE
+            "coverage_rate": self.num_of_points * np.prod(self.step) / self.search_time if self.search_time else 0.0,
+        }
+        if len(times):
+            stats.update(mean = times.mean(), median = np.median(times), p90 = np.percentile(times, 90), max = times.max())
+        return stats
+
+# CENTERS OF THE FRAMES COVERING [low, high], NEIGHBOURS ARE step APART
+def _cover(low, high, size, step):
+    if high - low <= size:
+        return [(low + high) / 2]
+    num_of_steps = int(np.ceil((high - low - size) / step))
+    return list(np.linspace(low + size / 2, high - size / 2, num_of_steps + 1))
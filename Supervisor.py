@@ -0,0 +1,221 @@
+####### WRITTEN TO TRACK WITH SEVERAL CAMERA AND PTU PAIRS ON ONE HOST #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# EVERY CAMERA AND PTU PAIR IS A CHANNEL WITH ITS OWN THREAD, VIDEO CAPTURE, DETECTOR, PID CONTROLLER
+# AND PTU CONNECTION. THE DETECTORS OF ALL THE CHANNELS SHARE ONE MODEL THROUGH AN InferenceService.
+# THE SUPERVISOR STARTS THE CHANNELS FROM A CONFIG FILE AND REPORTS THE THROUGHPUT OF EVERY CHANNEL.
+
+##### CONFIG FILE (JSON) ######
+# {
+#     "saved_model": "pretrained-models/pretrained-drone-model/exported-drone-model/saved_model",
+#     "label_map": "pretrained-models/pretrained-drone-model/label_map.pbtxt",
+#     "min_score": 0.5,
+#     "batch_size": 4,
+#     "gains": "pid_gains.json",
+#     "channels": [
+#         {"name": "north", "video": "/dev/video0", "serial": "/dev/ttyUSB0", "fps": 15, "pid": [0.02, 0, 0], "trace": "north.jsonl"},
+#         {"name": "east", "video": "/dev/video2", "serial": "/dev/ttyUSB1", "profile": "webcam-640x480"},
+#         {"name": "south", "video": "/dev/video1"}
+#     ]
+# }
+# serial, fps, pid, profile, step_mode and trace are optional for every channel,
+# a channel without a serial port only detects. pid are the gains of both axes, profile loads the gains of
+# the axes tuned by autotune_PID.py from the gains file (optional, pid_gains.json by default).
+
+from InferenceService import InferenceService
+from PIDTuner import GAINS_PATH, load_gains
+from Detector import Detector
+from Telemetry import Telemetry
+from PTU import PTU
+from threading import Thread, Event
+import json
+import time
+import cv2
+
+class Channel:
+    def __init__(self, config, inference_service, label_map_path, min_score, gains_path = GAINS_PATH):
+        self.name = config["name"]
+        self.video = config["video"]
+        self.serial = config.get("serial")
+        # maximum number of frames per second processed by this channel, None means as fast as possible
+        self.fps = config.get("fps")
+
+        # kP kI kD
+        self.x_PID = config.get("pid", [0.02, 0, 0])
+        self.y_PID = config.get("pid", [0.02, 0, 0])
+        # GAINS TUNED FOR THE CAMERA
+        if config.get("profile") is not None:
+            gains = load_gains(gains_path, config["profile"])
+            if gains is None:
+                raise ValueError("No PID gains for the camera profile {} of channel {} in {}, tune them with autotune_PID.py.".format(config["profile"], self.name, gains_path))
+            self.x_PID = gains.get("x", self.x_PID)
+            self.y_PID = gains.get("y", self.y_PID)
+        self.prev_error_x = 0
+        self.prev_error_y = 0
+        self.integral_x = 0
+        self.integral_y = 0
+
+        self.telemetry = Telemetry(config.get("trace"))
+        self.detector = Detector(None, label_map_path, min_score, self.telemetry, detect_fn=inference_service.client(self.name))
+
+        self.ptu = None
+        if self.serial is not None:
+            self.ptu = PTU(self.serial, self.telemetry)
+            self.ptu.start_socket()
+            self.ptu.serial_close()
+            self.ptu.set_step_mode(config.get("step_mode", "eighth"))
+            self.ptu.move_x_to_degrees(0)
+            self.ptu.move_y_to_degrees(0)
+
+        self.video_capture = cv2.VideoCapture(self.video)
+
+        self.stop_event = Event()
+        self.thread = None
+        self.error = None
+
+        # metrics
+        self.num_of_frames = 0
+        self.num_of_detections = 0
+        self.start_time = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self.thread = Thread(target=self._run, name="channel-{}".format(self.name), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def join(self):
+        if self.thread is not None:
+            self.thread.join()
+        self.video_capture.release()
+        if self.ptu is not None:
+            self.ptu.move_x_to(0)
+            self.ptu.move_y_to(0)
+            self.ptu.socket_close()
+        self.telemetry.close()
+
+    def _run(self):
+        period = 1.0 / self.fps if self.fps else 0.0
+        next_frame_time = time.perf_counter()
+        try:
+            while not self.stop_event.is_set():
+                # KEEP THE FRAME RATE OF THE CHANNEL
+                if period:
+                    delay = next_frame_time - time.perf_counter()
+                    if delay > 0 and self.stop_event.wait(delay):
+                        break
+                    next_frame_time = max(next_frame_time + period, time.perf_counter())
+
+                self.step()
+        except Exception as e:
+            # THE INFERENCE SERVICE REFUSES THE FRAMES OF A STOPPING CHANNEL, THAT IS NOT AN ERROR
+            if self.stop_event.is_set():
+                return
+            self.error = e
+            print("Channel {} stopped: {}".format(self.name, e))
+
+    # PROCESS ONE FRAME
+    def step(self):
+        self.telemetry.new_frame()
+        with self.telemetry.stage("capture"):
+            ret, frame = self.video_capture.read()
+
+        if ret is False:
+            raise RuntimeError("Could not read a frame over {}".format(self.video))
+
+        # HEIGHT AND WIDTH OF THE FRAME
+        (H, W) = frame.shape[:2]
+        frame_center_x = W // 2
+        frame_center_y = H // 2
+
+        self.detector.get_detections(frame)
+        self.num_of_frames += 1
+
+        if not self.detector.object_detected:
+            return
+        self.num_of_detections += 1
+
+        # THE FIRST DETECTION HAS THE HIGHEST SCORE
+        ymin, xmin, ymax, xmax = self.detector.detections["bounding_box"][0]
+        obj_center_x = int((xmax + xmin) // 2.0)
+        obj_center_y = int((ymax + ymin) // 2.0)
+
+        if self.ptu is None:
+            return
+
+        with self.telemetry.stage("control") as stage:
+            # ERROR IN THE X AXIS
+            error_x = obj_center_x - frame_center_x
+            # ERROR IN THE Y AXIS
+            error_y = frame_center_y - obj_center_y
+
+            # PID for x
+            self.integral_x = self.integral_x + error_x
+            differential_x = error_x - self.prev_error_x
+            u_x = round(self.x_PID[0] * error_x + self.x_PID[1] * self.integral_x + self.x_PID[2] * differential_x, 3)
+
+            # PID for y
+            self.integral_y = self.integral_y + error_y
+            differential_y = error_y - self.prev_error_y
+            u_y = round(self.y_PID[0] * error_y + self.y_PID[1] * self.integral_y + self.y_PID[2] * differential_y, 3)
+
+            self.prev_error_x = error_x
+            self.prev_error_y = error_y
+            stage.fields.update(error_x = error_x, error_y = error_y, u_x = u_x, u_y = u_y)
+
+        # IGNORE SMALL ERRORS!
+        if error_x**2 > 100:
+            self.ptu.move_x_by_degrees(u_x)
+
+        if error_y**2 > 100:
+            self.ptu.move_y_by_degrees(-u_y)
+
+    def get_metrics(self):
+        elapsed = time.perf_counter() - self.start_time if self.start_time is not None else 0.0
+        return {
+            "frames": self.num_of_frames,
+            "detections": self.num_of_detections,
+            "fps": self.num_of_frames / elapsed if elapsed > 0 else 0.0,
+            "running": self.thread is not None and self.thread.is_alive(),
+        }
+
+class Supervisor:
+    def __init__(self, config_path):
+        with open(config_path) as config_file:
+            self.config = json.load(config_file)
+
+        names = [channel_config["name"] for channel_config in self.config["channels"]]
+        if len(names) != len(set(names)):
+            raise ValueError("Channel names must be unique: {}".format(names))
+
+        # ONE MODEL FOR ALL THE CHANNELS
+        self.inference_service = InferenceService(self.config["saved_model"], self.config.get("batch_size", 4))
+        self.channels = [Channel(channel_config, self.inference_service, self.config["label_map"], self.config.get("min_score", 0.5), self.config.get("gains", GAINS_PATH)) for channel_config in self.config["channels"]]
+
+    def start(self):
+        self.inference_service.start()
+        for channel in self.channels:
+            channel.start()
+
+    def stop(self):
+        for channel in self.channels:
+            channel.stop()
+        # THE SERVICE IS STOPPED FIRST, SO THAT NO CHANNEL WAITS FOR A FRAME THAT IS NEVER PROCESSED
+        self.inference_service.stop()
+        for channel in self.channels:
+            channel.join()
+
+    def running(self):
+        return any(channel.get_metrics()["running"] for channel in self.channels)
+
+    def report(self):
+        total_fps = 0.0
+        for channel in self.channels:
+            metrics = channel.get_metrics()
+            total_fps += metrics["fps"]
+            print("{:<12} frames: {:>7} detections: {:>7} fps: {:>6.2f}{}".format(channel.name, metrics["frames"], metrics["detections"], metrics["fps"], "" if metrics["running"] else " (stopped)"))
+        service_metrics = self.inference_service.get_metrics()
+        print("total fps: {:.2f}, mean batch size: {:.2f}, mean batch time: {:.2f}ms".format(total_fps, service_metrics["mean_batch_size"], service_metrics["mean_batch_time_ms"]))
@@ -0,0 +1,135 @@
+####### WRITTEN TO MEASURE THE STAGES OF THE TRACKING LOOP #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# EVERY STAGE OF THE LOOP (CAPTURE, INFERENCE, POST-PROCESS, CONTROL, PTU ROUND-TRIP) IS TIMED WITH
+# A MONOTONIC CLOCK AND APPENDED TO A RING BUFFER IN MEMORY. A BACKGROUND THREAD WRITES THE
+# RECORDS TO A JSONL TRACE FILE, SO THE LOOP NEVER WAITS FOR THE DISK OR THE TERMINAL.
+# USE summarize_trace.py TO GET THE LATENCY HISTOGRAMS AND THE JITTER FROM A TRACE FILE.
+
+# ONE RECORD PER LINE:
+# {"stage": "inference", "frame": 12, "t": 1234567890, "d": 45000000, ...extra fields}
+# t - start of the stage in nanoseconds (time.perf_counter_ns)
+# d - duration of the stage in nanoseconds, 0 for events
+
+from collections import deque
+from threading import Event, Thread
+import json
+import time
+
+class _Stage:
+    # TIMES THE CODE INSIDE A with BLOCK
+    __slots__ = ("telemetry", "name", "fields", "start")
+
+    def __init__(self, telemetry, name, fields):
+        self.telemetry = telemetry
+        self.name = name
+        # extra values can be attached to the record inside the with block
+        self.fields = fields
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.telemetry.record(self.name, self.start, time.perf_counter_ns(), **self.fields)
+        return False
+
+class _NullStage:
+    # USED WHEN TELEMETRY IS DISABLED, DOES NOTHING
+    __slots__ = ("fields",)
+
+    def __init__(self):
+        self.fields = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.fields.clear()
+        return False
+
+class Telemetry:
+    # trace_path: path to the JSONL trace file, if None telemetry is disabled and costs nothing
+    # capacity: number of records kept in memory, oldest records are dropped if the writer falls behind
+    # flush_interval: seconds between two writes to the trace file
+    def __init__(self, trace_path=None, capacity=65536, flush_interval=0.5):
+        self.trace_path = trace_path
+        self.enabled = trace_path is not None
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+
+        # appending to and popping from a deque are thread safe
+        self.buffer = deque(maxlen=capacity)
+        self.dropped = 0
+        self.written = 0
+
+        # id of the frame that is being processed, attached to every record
+        self.frame = 0
+
+        self.null_stage = _NullStage()
+        self.stop_event = Event()
+        self.writer = None
+        self.trace_file = None
+
+        if self.enabled:
+            self.trace_file = open(self.trace_path, "w")
+            self.writer = Thread(target=self._write_loop, name="telemetry-writer", daemon=True)
+            self.writer.start()
+
+    # start a new frame, returns the frame id
+    def new_frame(self):
+        self.frame += 1
+        return self.frame
+
+    # time a stage of the loop
+    # with telemetry.stage("inference"):
+    #     detections = detect_fn(frame)
+    def stage(self, name, **fields):
+        if not self.enabled:
+            return self.null_stage
+        return _Stage(self, name, fields)
+
+    # add a record for a stage that started at start and ended at end (time.perf_counter_ns)
+    def record(self, name, start, end, **fields):
+        if not self.enabled:
+            return
+        if len(self.buffer) == self.capacity:
+            self.dropped += 1
+        fields["stage"] = name
+        fields["frame"] = self.frame
+        fields["t"] = start
+        fields["d"] = end - start
+        self.buffer.append(fields)
+
+    # add a record without a duration, e.g. the error or the output of the PID controller
+    def event(self, name, **fields):
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        self.record(name, now, now, **fields)
+
+    def _flush(self):
+        lines = []
+        while self.buffer:
+            lines.append(json.dumps(self.buffer.popleft(), default=float))
+        if lines:
+            self.trace_file.write("\n".join(lines) + "\n")
+            self.trace_file.flush()
+            self.written += len(lines)
+
+    def _write_loop(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self._flush()
+        self._flush()
+
+    # stop the writer and write the remaining records
+    def close(self):
+        if not self.enabled or self.writer is None:
+            return
+        self.stop_event.set()
+        self.writer.join()
+        self.writer = None
+        self.trace_file.close()
+        print("{} telemetry records were written to {}, {} were dropped".format(self.written, self.trace_path, self.dropped))
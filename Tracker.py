@@ -7,12 +7,15 @@
 # YOU MUST UNINSTALL YOUR OPENCV AND INSTALL OPENCV 3.4+
 
 
+from Telemetry import Telemetry
 import cv2
 
 class Tracker:
-    def __init__(self, tracker_name):
+    def __init__(self, tracker_name, telemetry=None):
         # tracker_name = ["kcf", "csrt", "mil"]
         self.tracker_name = tracker_name
+        # TIMES THE TRACKER UPDATES, DISABLED IF NOT GIVEN
+        self.telemetry = telemetry if telemetry is not None else Telemetry()
         # bounding box to be tracked
         self.bounding_box = None
         # center of the object
@@ -39,7 +42,9 @@ class Tracker:
     
     # update the bouding box for each frame
     def update_bounding_box(self, frame):
-        success, bounding_box = self.tracker.update(frame)
+        with self.telemetry.stage("tracking") as stage:
+            success, bounding_box = self.tracker.update(frame)
+            stage.fields["success"] = success
         # tracker may loose the object if success is not
         # True that means the tracker has lost the object
         # on that frame
@@ -49,7 +54,6 @@ class Tracker:
             self.lost = False
         elif not success:
             self.lost = True
-            print("Object is lost!")
         else:
             print("Something unexpected occured while updating the bounding box of the object that is being tracked!!!")
     
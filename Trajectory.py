@@ -0,0 +1,224 @@
+####### WRITTEN TO ESTIMATE AND PREDICT THE 3D TRAJECTORY OF THE OBJECT FROM ITS BEARING AND RANGE #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# BearingTracker ASSUMES A CONSTANT ANGULAR VELOCITY, BUT A DRONE FLYING STRAIGHT PAST THE PTU TURNS FASTER THE
+# CLOSER IT GETS, SO THE PREDICTION FALLS BEHIND WHEN THE DETECTIONS STOP FOR A WHILE. Trajectory TRACKS THE
+# POSITION OF THE OBJECT IN METERS WITH AN EXTENDED KALMAN FILTER, A CONSTANT VELOCITY ("cv") OR A CONSTANT
+# ACCELERATION ("ca") MODEL, FROM THE BEARINGS OF THE DETECTIONS (AZIMUTH AND ELEVATION IN DEGREES) AND THE
+# OCCASIONAL RANGES OF THE LASER RANGER. UNTIL THE FIRST RANGE THE DISTANCE IS ONLY A GUESS (initial_range), THE
+# PREDICTED BEARINGS ARE STILL GOOD SINCE THE VELOCITY SCALES WITH IT.
+
+# THE ORIGIN IS THE CENTER OF THE PTU, x TO THE RIGHT OF PAN 0, y FORWARD, z UP (AS IN BearingTracker.CameraModel).
+# THE FILTER CAN BE UPDATED FROM THE LOOP AND READ FROM ANOTHER THREAD: stream() YIELDS THE PAN AND TILT THE PTU
+# HAS TO BE SENT TO AT THE CONTROL RATE, PREDICTED lead SECONDS AHEAD TO MAKE UP FOR THE LATENCY OF THE PIPELINE.
+
+#     trajectory = Trajectory()
+#     ... IN THE LOOP
+#     trajectory.update_bearing(capture_time, azimuth, elevation)
+#     trajectory.update_range(reading.time, reading.distance)
+#     ... IN THE CONTROL THREAD
+#     for t, pan, tilt in trajectory.stream(50, lead=0.1, stop=stop_event):
+#         if pan is not None:
+#             ptu.move_x_to_degrees(pan); ptu.move_y_to_degrees(tilt)
+
+from BearingTracker import bearing_to_ptu
+from threading import Lock
+from math import factorial
+import numpy as np
+import time
+
+MODELS = {"cv": 2, "ca": 3}
+
+# POSITION IN METERS OF A BEARING IN DEGREES AT A DISTANCE
+def bearing_to_position(azimuth, elevation, distance):
+    a, e = np.radians(azimuth), np.radians(elevation)
+    return distance * np.array([np.cos(e) * np.sin(a), np.cos(e) * np.cos(a), np.sin(e)])
+
+# AZIMUTH AND ELEVATION IN DEGREES AND DISTANCE IN METERS OF A POSITION
+def position_to_bearing(position):
+    x, y, z = position
+    return np.degrees(np.arctan2(x, y)), np.degrees(np.arctan2(z, np.hypot(x, y))), np.linalg.norm(position)
+
+class Trajectory:
+    # model: "cv" (constant velocity) or "ca" (constant acceleration)
+    # process_noise: spectral density of the white noise on the highest derivative of the model, m^2/s^3 for "cv" and m^2/s^5 for "ca"
+    # bearing_noise: standard deviation of the azimuth and elevation of a detection in degrees
+    # range_noise: standard deviation of a range in meters
+    # initial_range, initial_range_noise: guess of the distance in meters until the first range
+    # max_speed: standard deviation of the unknown velocity of a new track in meters per second
+    # gate: measurements further than this many standard deviations from the prediction are ignored, e.g. a laser
+    #       hitting the background
+    # max_coast: seconds the track is predicted without a bearing before it is lost
+    def __init__(self, model="cv", process_noise=50.0, bearing_noise=0.5, range_noise=0.5, initial_range=100.0,
+                 initial_range_noise=100.0, max_speed=20.0, gate=4.0, max_coast=2.0):
+        if model not in MODELS:
+            raise ValueError("Unknown motion model {}, choose from {}".format(model, list(MODELS)))
+        self.model = model
+        self.order = MODELS[model]
+        self.process_noise = process_noise
+        self.bearing_noise = bearing_noise
+        self.range_noise = range_noise
+        self.initial_range = initial_range
+        self.initial_range_noise = initial_range_noise
+        self.max_speed = max_speed
+        self.gate = gate
+        self.max_coast = max_coast
+        self.lock = Lock()
+        self.num_of_rejected = 0
+        self.reset()
+
+    # FORGET THE TRACK
+    def reset(self):
+        # [x, y, z, vx, vy, vz(, ax, ay, az)] IN METERS AND SECONDS
+        self.state = None
+        self.covariance = None
+        self.time = None
+        self.last_bearing = None
+        self.last_range = None
+
+    @property
+    def tracking(self):
+        return self.state is not None
+
+    # TRANSITION AND PROCESS NOISE FOR dt SECONDS, WHITE NOISE ON THE HIGHEST DERIVATIVE
+    def _transition(self, dt):
+        n = self.order
+        F1 = np.zeros((n, n))
+        Q1 = np.zeros((n, n))
+        for i in range(n):
+            for j in range(i, n):
+                F1[i, j] = dt ** (j - i) / factorial(j - i)
+        for i in range(n):
+            for j in range(n):
+                k = 2 * n - 1 - i - j
+                Q1[i, j] = self.process_noise * dt ** k / (factorial(n - 1 - i) * factorial(n - 1 - j) * k)
+        # THE SAME MODEL ON x, y AND z, STATE ORDERED BY DERIVATIVE
+        return np.kron(F1, np.eye(3)), np.kron(Q1, np.eye(3))
+
+    def _predict(self, t):
+        dt = t - self.time
+        if dt <= 0:
+            return self.state, self.covariance
+        F, Q = self._transition(dt)
+        return F @ self.state, F @ self.covariance @ F.T + Q
+
+    def _start(self, t, azimuth, elevation):
+        a, e, r = np.radians(azimuth), np.radians(elevation), self.initial_range
+        # COVARIANCE OF THE GUESSED POSITION, FROM THE UNCERTAINTIES IN RANGE, AZIMUTH AND ELEVATION
+        J = np.column_stack([bearing_to_position(azimuth, elevation, 1.0),
+                             r * np.array([np.cos(e) * np.cos(a), -np.cos(e) * np.sin(a), 0.0]),
+                             r * np.array([-np.sin(e) * np.sin(a), -np.sin(e) * np.cos(a), np.cos(e)])])
+        sigma = np.radians(self.bearing_noise) ** 2
+        size = 3 * self.order
+        self.state = np.zeros(size)
+        self.state[:3] = bearing_to_position(azimuth, elevation, r)
+        self.covariance = np.zeros((size, size))
+        self.covariance[:3, :3] = J @ np.diag([self.initial_range_noise ** 2, sigma, sigma]) @ J.T
+        self.covariance[3:6, 3:6] = self.max_speed ** 2 * np.eye(3)
+        if self.order > 2:
+            self.covariance[6:, 6:] = (self.max_speed / 2) ** 2 * np.eye(3)
+        self.time = self.last_bearing = t
+
+    # UPDATE WITH THE MEASUREMENT z OF h(state), H ITS JACOBIAN, R ITS NOISE, RETURNS FALSE IF OUTSIDE THE GATE
+    def _correct(self, state, covariance, innovation, H, R):
+        S = H @ covariance @ H.T + R
+        S_inv = np.linalg.inv(S)
+        if np.sqrt(innovation @ S_inv @ innovation) > self.gate:
+            self.num_of_rejected += 1
+            return False
+        K = covariance @ H.T @ S_inv
+        self.state = state + K @ innovation
+        self.covariance = (np.eye(len(state)) - K @ H) @ covariance
+        return True
+
+    # BEARING OF A DETECTION IN A FRAME CAPTURED AT TIME t (time.monotonic), RETURNS FALSE IF IT WAS IGNORED
+    def update_bearing(self, t, azimuth, elevation):
+        with self.lock:
+            if self.state is not None and t - self.last_bearing > self.max_coast:
+                self.reset()
+            if self.state is None:
+                self._start(t, azimuth, elevation)
+                return True
+            state, covariance = self._predict(t)
+            self.state, self.covariance, self.time = state, covariance, max(t, self.time)
+
+            x, y, z = state[:3]
+            rho2 = x ** 2 + y ** 2
+            rho = np.sqrt(rho2)
+            r2 = rho2 + z ** 2
+            predicted_azimuth, predicted_elevation, _ = position_to_bearing(state[:3])
+            H = np.zeros((2, len(state)))
+            H[0, :3] = np.degrees([y / rho2, -x / rho2, 0.0])
+            H[1, :3] = np.degrees([-x * z / (r2 * rho), -y * z / (r2 * rho), rho / r2])
+            # THE AZIMUTH WRAPS AROUND AT 180 DEGREES
+            innovation = np.array([(azimuth - predicted_azimuth + 180) % 360 - 180, elevation - predicted_elevation])
+            if not self._correct(state, covariance, innovation, H, self.bearing_noise ** 2 * np.eye(2)):
+                return False
+            self.last_bearing = t
+            return True
+
+    # RANGE IN METERS MEASURED AT TIME t, RETURNS FALSE IF IT WAS IGNORED
+    # A RANGE ARRIVES AFTER THE FRAMES CAPTURED WHILE IT WAS MEASURED, IT IS MOVED TO THE TIME OF THE FILTER WITH
+    # THE RADIAL VELOCITY INSTEAD OF RUNNING THE FILTER AGAIN FROM t
+    def update_range(self, t, distance):
+        with self.lock:
+            if self.state is None or distance is None:
+                return False
+            state, covariance = self._predict(t)
+            self.state, self.covariance, self.time = state, covariance, max(t, self.time)
+            position, velocity = state[:3], state[3:6]
+            predicted = np.linalg.norm(position)
+            direction = position / predicted
+            distance += direction @ velocity * (self.time - t)
+            H = np.zeros((1, len(state)))
+            H[0, :3] = direction
+            if not self._correct(state, covariance, np.array([distance - predicted]), H, np.array([[self.range_noise ** 2]])):
+                return False
+            self.last_range = t
+            return True
+
+    # PREDICTED POSITION AND VELOCITY AT TIME t, NONE IF THERE IS NO TRACK
+    def predict(self, t):
+        with self.lock:
+            if self.state is None:
+                return None
+            state = self._predict(t)[0]
+        return state[:3], state[3:6]
+
+    # PREDICTED (AZIMUTH, ELEVATION, AZIMUTH RATE, ELEVATION RATE, RANGE) AT TIME t IN DEGREES, DEGREES PER SECOND
+    # AND METERS, NONE IF THERE IS NO TRACK
+    def bearing(self, t):
+        prediction = self.predict(t)
+        if prediction is None:
+            return None
+        (x, y, z), (vx, vy, vz) = prediction
+        rho2 = x ** 2 + y ** 2
+        r2 = rho2 + z ** 2
+        azimuth_rate = np.degrees((y * vx - x * vy) / rho2)
+        elevation_rate = np.degrees((rho2 * vz - z * (x * vx + y * vy)) / (r2 * np.sqrt(rho2)))
+        azimuth, elevation, distance = position_to_bearing(prediction[0])
+        return azimuth, elevation, azimuth_rate, elevation_rate, distance
+
+    # PAN AND TILT THAT POINT THE CAMERA AT THE PREDICTED POSITION AT TIME t, NONE IF THERE IS NO TRACK
+    def ptu_target(self, t):
+        bearing = self.bearing(t)
+        if bearing is None:
+            return None
+        return bearing_to_ptu(bearing[0], bearing[1])
+
+    # YIELDS (t, pan, tilt) rate TIMES PER SECOND, THE TARGET PREDICTED lead SECONDS AFTER t, (t, None, None)
+    # WITHOUT A TRACK, UNTIL stop (threading.Event) IS SET
+    def stream(self, rate, lead=0.0, stop=None):
+        period = 1.0 / rate
+        next_time = time.monotonic()
+        while stop is None or not stop.is_set():
+            now = time.monotonic()
+            with self.lock:
+                lost = self.state is not None and now - self.last_bearing > self.max_coast
+                if lost:
+                    self.reset()
+            target = self.ptu_target(now + lead)
+            yield (now, None, None) if target is None else (now, float(target[0]), float(target[1]))
+            next_time = max(next_time + period, time.monotonic())
+            time.sleep(max(next_time - time.monotonic(), 0))
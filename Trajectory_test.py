@@ -0,0 +1,89 @@
+####### WRITTEN TO TEST THE TRAJECTORY FILTER ON A SIMULATED DRONE #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+from Trajectory import Trajectory, bearing_to_position, position_to_bearing
+from BearingTracker import bearing_to_ptu
+from threading import Event
+import numpy as np
+import unittest
+import time
+
+# A DRONE FLYING STRAIGHT PAST THE PTU AT A CONSTANT VELOCITY, IN METERS AND SECONDS
+START = np.array([-30.0, 40.0, 10.0])
+VELOCITY = np.array([12.0, -2.0, 1.0])
+
+def position_at(t):
+    return START + VELOCITY * t
+
+# FEEDS EXACT BEARINGS AT fps AND A RANGE EVERY range_interval SECONDS (NONE FOR NO RANGES) FOR duration SECONDS,
+# THE TIMES ARE SHIFTED BY start
+def fly(trajectory, duration, fps=10.0, range_interval=0.5, start=0.0):
+    for frame in range(int(duration * fps) + 1):
+        t = frame / fps
+        azimuth, elevation, distance = position_to_bearing(position_at(t))
+        trajectory.update_bearing(start + t, azimuth, elevation)
+        if range_interval is not None and frame % int(range_interval * fps) == 0:
+            trajectory.update_range(start + t, distance)
+
+class TrajectoryTest(unittest.TestCase):
+
+    def test_bearing_to_position(self):
+        np.testing.assert_allclose(bearing_to_position(0, 0, 10), [0, 10, 0], atol=1e-9)
+        np.testing.assert_allclose(bearing_to_position(90, 0, 10), [10, 0, 0], atol=1e-9)
+        np.testing.assert_allclose(position_to_bearing(bearing_to_position(-30, 20, 50)), (-30, 20, 50))
+
+    def test_constant_velocity_converges(self):
+        for model in ["cv", "ca"]:
+            trajectory = Trajectory(model, initial_range=100.0)
+            fly(trajectory, 4.0)
+            self.assertEqual(trajectory.num_of_rejected, 0)
+            position, velocity = trajectory.predict(4.0)
+            np.testing.assert_allclose(position, position_at(4.0), atol=0.5)
+            np.testing.assert_allclose(velocity, VELOCITY, atol=1.0)
+            # ONE SECOND WITHOUT DETECTIONS
+            azimuth, elevation, _, _, distance = trajectory.bearing(5.0)
+            true_azimuth, true_elevation, true_distance = position_to_bearing(position_at(5.0))
+            self.assertAlmostEqual(azimuth, true_azimuth, delta=1.0)
+            self.assertAlmostEqual(elevation, true_elevation, delta=1.0)
+            self.assertAlmostEqual(distance, true_distance, delta=1.0)
+
+    def test_bearings_only_predict_the_bearing(self):
+        # WITHOUT A RANGE THE DISTANCE STAYS A GUESS, THE PREDICTED BEARING IS STILL CLOSE
+        trajectory = Trajectory("cv", initial_range=100.0)
+        fly(trajectory, 2.0, range_interval=None)
+        azimuth, elevation, _, _, _ = trajectory.bearing(2.2)
+        true_azimuth, true_elevation, _ = position_to_bearing(position_at(2.2))
+        self.assertAlmostEqual(azimuth, true_azimuth, delta=1.0)
+        self.assertAlmostEqual(elevation, true_elevation, delta=1.0)
+
+    def test_stream_predicts_lead_ahead(self):
+        trajectory = Trajectory("cv")
+        start = time.monotonic()
+        fly(trajectory, 4.0, start=start - 4.0)
+        stop = Event()
+        samples = []
+        for now, pan, tilt in trajectory.stream(100, lead=0.5, stop=stop):
+            samples.append((now, pan, tilt))
+            if len(samples) == 3:
+                stop.set()
+        self.assertEqual(len(samples), 3)
+        for now, pan, tilt in samples:
+            self.assertEqual((pan, tilt), tuple(float(angle) for angle in trajectory.ptu_target(now + 0.5)))
+            azimuth, elevation, _ = position_to_bearing(position_at(now + 0.5 - (start - 4.0)))
+            np.testing.assert_allclose((pan, tilt), bearing_to_ptu(azimuth, elevation), atol=0.5)
+            # THE AZIMUTH CHANGES ABOUT 15 DEGREES PER SECOND HERE, HALF A SECOND AHEAD IS NOT THE CURRENT TARGET
+            self.assertGreater(abs(pan - trajectory.ptu_target(now)[0]), 2.0)
+
+    def test_stream_without_a_track(self):
+        trajectory = Trajectory("cv", max_coast=1.0)
+        fly(trajectory, 1.0, start=time.monotonic() - 3.0)
+        stop = Event()
+        for now, pan, tilt in trajectory.stream(100, lead=0.1, stop=stop):
+            stop.set()
+        # THE LAST BEARING IS 2 SECONDS OLD, THE TRACK IS LOST
+        self.assertEqual((pan, tilt), (None, None))
+        self.assertFalse(trajectory.tracking)
+
+if __name__ == "__main__":
+    unittest.main()
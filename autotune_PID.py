@@ -0,0 +1,130 @@
+####### WRITTEN TO TUNE THE PID GAINS OF THE TRACKING LOOPS FOR A CAMERA #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# POINT THE CAMERA AT A STATIC TARGET (E.G. A DRONE ON A POLE) AND RUN:
+#     autotune_PID.py -v /dev/video0 -s /dev/ttyUSB0 -p webcam-640x480 -o [saved_model] -l [label_map]
+# OR WITH A TRACKER INSTEAD OF THE DETECTOR, SELECT THE TARGET ON THE FIRST FRAME AND PRESS ENTER:
+#     autotune_PID.py -v /dev/video0 -s /dev/ttyUSB0 -p webcam-640x480 -t csrt
+# EVERY AXIS IS TUNED WITH A RELAY TEST AND STEP TESTS THROUGH move_x_by_degrees AND move_y_by_degrees (SEE
+# PIDTuner.py), AND THE GAINS ARE SAVED UNDER THE PROFILE IN pid_gains.json. RUN THE TRACKING SCRIPTS WITH -k [profile].
+# TUNE AGAIN AFTER CHANGING THE LENS, THE RESOLUTION OR THE FRAME RATE OF THE CAMERA.
+
+import cv2
+import time
+import numpy as np
+from argparse import ArgumentParser
+from os import sys
+from PTU import PTU
+from PIDTuner import PIDTuner, RULES, GAINS_PATH, save_gains
+
+def main():
+    parser = ArgumentParser()
+
+    parser.add_argument("-v", "--video", required=True, help="video path, to find out the webcam path issue 'ls /dev/video*' command on the terminal", type=str)
+    parser.add_argument("-s", "--serial", required=True, help="Serial port to communicate with the PTU. To find out issue 'ls /dev/tty*' command on the terminal")
+    parser.add_argument("-p", "--profile", required=True, help="Name of the camera profile the gains are saved under, e.g. webcam-640x480.")
+    parser.add_argument("-o", "--object_detection_model", required=False, help="Path to the saved object detection model folder, finds the target.")
+    parser.add_argument("-l", "--labelmap", required=False, help="Path to the label map file (.pbtxt).")
+    parser.add_argument("-t", "--tracker", required=False, choices=["csrt", "kcf", "mil"], help="Track the target selected on the first frame instead of detecting it.")
+    parser.add_argument("-a", "--axes", default=["x", "y"], nargs="+", choices=["x", "y"], help="Axes to tune.")
+    parser.add_argument("-r", "--relay", default=0.5, type=float, help="Degrees the PTU is moved on every frame of the relay test.")
+    parser.add_argument("-S", "--step", default=3.0, type=float, help="Degrees of the step tests.")
+    parser.add_argument("-m", "--max_overshoot", default=0.1, type=float, help="Maximum overshoot of the step tests, as a fraction of the step.")
+    parser.add_argument("--strict", action="store_true", help="Fail if none of the gains overshoot less than the maximum overshoot, instead of saving the gains that settle first with a warning.")
+    parser.add_argument("-R", "--rules", default=list(RULES), nargs="+", choices=list(RULES), help="Ziegler-Nichols rules tried.")
+    parser.add_argument("-g", "--gains", default=GAINS_PATH, help="Path to the JSON file the gains are saved to.")
+
+    args = vars(parser.parse_args())
+
+    if (args["object_detection_model"] == None or args["labelmap"] == None) and args["tracker"] == None:
+        sys.exit("Give the detection model and the label map (-o, -l) or a tracker (-t) to find the target. Exiting the program!")
+
+    # CONFIGURE PTU
+    ptu = PTU(args["serial"])
+    ptu.start_socket()
+    ptu.serial_close()
+    ptu.set_step_mode("eighth")
+
+    video_capture = cv2.VideoCapture(args["video"])
+    W = int(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    H = int(video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    if args["tracker"] != None:
+        from Tracker import Tracker
+        tracker = Tracker(args["tracker"])
+        tracker.initialize_tracker()
+        ret, frame = video_capture.read()
+        if ret is False:
+            sys.exit("Could not read a frame over {}".format(args["video"]))
+        tracker.start_tracker(cv2.selectROI("Frame", frame, fromCenter = False, showCrosshair = True), frame)
+    else:
+        from Detector import Detector
+        detector = Detector(args["object_detection_model"], args["labelmap"], 0.5)
+
+    # ERRORS OF THE NEXT FRAME AS IN THE TRACKING LOOPS, NONE IF THE TARGET IS NOT FOUND
+    def measure():
+        ret, frame = video_capture.read()
+        now = time.monotonic()
+        if ret is False:
+            sys.exit("Could not read a frame over {}".format(args["video"]))
+        (H, W) = frame.shape[:2]
+        frame_center_x = W // 2
+        frame_center_y = H // 2
+
+        center = None
+        if args["tracker"] != None:
+            tracker.update_bounding_box(frame)
+            tracker.update_object_center()
+            if not tracker.lost and len(tracker.get_last_object_center()) > 0:
+                center = tracker.get_last_object_center()
+        else:
+            detector.get_detections(frame)
+            if detector.object_detected:
+                # THE DETECTION CLOSEST TO THE CENTER, OF THOSE SCORED ABOVE min_score (bounding_box ONLY HOLDS THEM)
+                center = min((((xmin + xmax) / 2, (ymin + ymax) / 2) for ymin, xmin, ymax, xmax in detector.detections["bounding_box"]),
+                             key = lambda c: np.hypot(c[0] - frame_center_x, c[1] - frame_center_y))
+
+        cv2.circle(frame, (frame_center_x, frame_center_y), 3, (0,0,255), 3)
+        if center is not None:
+            cv2.circle(frame, (int(center[0]), int(center[1])), 3, (0, 255, 0), 3)
+        cv2.imshow("Frame", frame)
+        cv2.waitKey(1)
+
+        if center is None:
+            return None
+        return now, center[0] - frame_center_x, frame_center_y - center[1]
+
+    # THE ERROR OF ONE AXIS
+    def axis_measure(index):
+        def measure_axis():
+            measurement = measure()
+            return None if measurement is None else (measurement[0], measurement[index])
+        return measure_axis
+
+    moves = {"x": ptu.move_x_by_degrees, "y": lambda u: ptu.move_y_by_degrees(-u)}
+    profile = {"width": W, "height": H}
+    for axis in args["axes"]:
+        print("Tuning the {} axis".format(axis))
+        tuner = PIDTuner(axis_measure(1 if axis == "x" else 2), moves[axis], relay = args["relay"])
+        try:
+            result = tuner.tune(args["rules"], args["max_overshoot"], args["step"], strict = args["strict"])
+        except RuntimeError as e:
+            sys.exit("Tuning the {} axis failed: {}".format(axis, e))
+        print("{} axis: {} gains {}, overshoot {:.2f}, settling time {:.2f} s".format(
+            axis, result["rule"], result["gains"], result["overshoot"], result["settling_time"]))
+        profile[axis] = result["gains"]
+        # within_max_overshoot IS FALSE IF THE GAINS OVERSHOOT MORE THAN --max_overshoot, NONE OF THE RULES DID BETTER
+        profile[axis + "_test"] = {key: result[key] for key in ["rule", "ultimate_gain", "ultimate_period", "overshoot", "settling_time", "within_max_overshoot"]}
+        if not result["within_max_overshoot"]:
+            print("WARNING: the {} axis gains overshoot more than {:.2f}, saved with within_max_overshoot false.".format(axis, args["max_overshoot"]))
+
+    save_gains(args["gains"], args["profile"], profile)
+    print("Gains of {} saved to {}".format(args["profile"], args["gains"]))
+
+    video_capture.release()
+    cv2.destroyAllWindows()
+    ptu.socket_close()
+
+if __name__ == "__main__":
+    main()
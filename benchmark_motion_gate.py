@@ -0,0 +1,72 @@
+####### WRITTEN TO BENCHMARK SKIPPING THE DETECTOR ON FRAMES WITHOUT MOTION #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# RUNS THE DETECTOR ON EVERY FRAME OF ONE OR MORE RECORDED VIDEOS, THEN THE SAME DETECTOR BEHIND A MotionGate,
+# AND PRINTS FOR EVERY VIDEO:
+#     fps      - FRAMES PER SECOND
+#     cpu ms   - CPU TIME PER FRAME OF ALL THE THREADS OF THE PROCESS, FOLLOWS THE POWER USE OF THE HOST
+#     full/roi - FRACTION OF THE FRAMES THE DETECTOR RAN ON, ON THE FULL FRAME AND ON A REGION
+#     detected - FRAMES WITH A DETECTION, AND HOW MANY OF THE FRAMES DETECTED WITHOUT THE GATE ARE STILL DETECTED
+# RECORD AN IDLE VIDEO (EMPTY SKY, PTU STANDING STILL) AND AN ACTIVE ONE (A DRONE FLYING), THE GATE SHOULD SAVE
+# MOST OF THE CPU TIME ON THE FIRST ONE AND MISS NO DETECTIONS ON THE SECOND ONE.
+# THE FRAMES ARE READ FROM THE VIDEO BEFORE MEASURING, SO DECODING THE VIDEO IS NOT MEASURED.
+
+from benchmark_processes import read_frames
+from MotionGate import MotionGate, METHODS
+from Detector import Detector
+from argparse import ArgumentParser
+import time
+import sys
+import os
+
+def run(detector, frames):
+    detected = []
+    start = time.perf_counter()
+    start_cpu = time.process_time()
+    for frame in frames:
+        detector.get_detections(frame)
+        detected.append(detector.object_detected)
+    cpu = time.process_time() - start_cpu
+    return len(frames) / (time.perf_counter() - start), 1000 * cpu / len(frames), detected
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("-v", "--videos", required=True, nargs="+", help="Paths to recorded videos, e.g. an idle and an active one.")
+    parser.add_argument("-s", "--savedmodel", required=True, help="Path to the saved model folder.")
+    parser.add_argument("-l", "--labelmap", required=True, help="Path to the label map file (.pbtxt).")
+    parser.add_argument("-n", "--frames", default=300, type=int, help="Number of frames of every video used for the benchmark.")
+    parser.add_argument("-g", "--gates", default=METHODS, nargs="+", choices=METHODS, help="Motion methods of the gate.")
+    parser.add_argument("-r", "--refresh", default=30, type=int, help="The detector runs at least once every this many frames, 0 disables it.")
+    parser.add_argument("-R", "--roi", action="store_true", help="Run the detector only on the region around the motion, not for models exported with fixed_shape_image_tensor.")
+    parser.add_argument("-m", "--minscore", default=0.5, type=float, help="Minimum score of a detection.")
+
+    args = vars(parser.parse_args())
+
+    for path in args["videos"] + [args["savedmodel"], args["labelmap"]]:
+        if not os.path.exists(path):
+            sys.exit("{} does not exist. Exiting the program!".format(path))
+
+    detector = Detector(args["savedmodel"], args["labelmap"], args["minscore"])
+
+    for video in args["videos"]:
+        frames = read_frames(video, args["frames"])
+        if not frames:
+            sys.exit("Could not read a frame over {}".format(video))
+        print("{}: {} frames of {}x{}".format(video, len(frames), frames[0].shape[1], frames[0].shape[0]))
+
+        # BASELINE: THE DETECTOR ON EVERY FRAME
+        detector.get_detections(frames[0])
+        fps, cpu, baseline_detected = run(detector, frames)
+        print("{:>12} {:>9} {:>9} {:>7} {:>7} {:>9} {:>9}".format("", "fps", "cpu ms", "full", "roi", "detected", "kept"))
+        print("{:>12} {:>9.2f} {:>9.2f} {:>7.2f} {:>7.2f} {:>9} {:>9}".format("detector", fps, cpu, 1.0, 0.0, sum(baseline_detected), sum(baseline_detected)))
+
+        for method in args["gates"]:
+            gate = MotionGate(detector, method, refresh_interval=args["refresh"], roi=args["roi"])
+            fps, cpu, detected = run(gate, frames)
+            kept = sum(b and g for b, g in zip(baseline_detected, detected))
+            print("{:>12} {:>9.2f} {:>9.2f} {:>7.2f} {:>7.2f} {:>9} {:>9}".format(
+                "gate " + method, fps, cpu, gate.num_of_full / len(frames), gate.num_of_roi / len(frames), sum(detected), kept))
+
+if __name__ == "__main__":
+    main()
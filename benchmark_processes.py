@@ -0,0 +1,101 @@
+####### WRITTEN TO BENCHMARK RUNNING THE DETECTOR IN SEPARATE PROCESSES #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# MEASURES THE FRAMES PER SECOND OF THE DETECTOR RUNNING IN THE MAIN PROCESS AND IN 1, 2, 4, ... WORKER PROCESSES.
+# OPTIONALLY AN OPENCV TRACKER IS UPDATED ON EVERY FRAME IN THE MAIN PROCESS, LIKE IN THE TRACKING LOOPS.
+# THE FRAMES ARE READ FROM THE VIDEO BEFORE MEASURING, SO DECODING THE VIDEO IS NOT MEASURED.
+
+from DetectorProcess import DetectorProcess
+from Detector import Detector
+from Tracker import Tracker
+from argparse import ArgumentParser
+import time
+import sys
+import os
+import cv2
+
+def read_frames(video_path, num_of_frames):
+    video_capture = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < num_of_frames:
+        ret, frame = video_capture.read()
+        if ret is False:
+            break
+        frames.append(frame)
+    video_capture.release()
+    return frames
+
+def start_tracker(tracker_name, frames):
+    if tracker_name is None:
+        return None
+    tracker = Tracker(tracker_name)
+    tracker.initialize_tracker()
+    (H, W) = frames[0].shape[:2]
+    tracker.start_tracker((W // 4, H // 4, W // 8, H // 8), frames[0])
+    return tracker
+
+def run_in_process(detector, frames, tracker_name):
+    tracker = start_tracker(tracker_name, frames)
+    start = time.perf_counter()
+    for frame in frames:
+        if tracker is not None:
+            tracker.update_bounding_box(frame)
+        detector.get_detections(frame)
+    return len(frames) / (time.perf_counter() - start)
+
+def run_with_workers(detector, frames, tracker_name):
+    tracker = start_tracker(tracker_name, frames)
+    start = time.perf_counter()
+    num_of_done = 0
+    for frame in frames:
+        if tracker is not None:
+            tracker.update_bounding_box(frame)
+        # WAIT FOR A WORKER ONLY IF ALL OF THEM ARE BUSY
+        while detector.submit(frame) is None:
+            detector.get_result()
+            num_of_done += 1
+    while num_of_done < len(frames):
+        detector.get_result()
+        num_of_done += 1
+    return len(frames) / (time.perf_counter() - start)
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("-v", "--video", required=True, help="Path to a recorded video.")
+    parser.add_argument("-s", "--savedmodel", required=True, help="Path to the saved model folder.")
+    parser.add_argument("-l", "--labelmap", required=True, help="Path to the label map file (.pbtxt).")
+    parser.add_argument("-n", "--frames", default=200, type=int, help="Number of frames of the video used for the benchmark.")
+    parser.add_argument("-w", "--workers", default=[1, 2, 4, 8], nargs="+", type=int, help="Numbers of worker processes.")
+    parser.add_argument("-j", "--threads", default=1, type=int, help="Tensorflow threads of every worker, 0 lets tensorflow decide.")
+    parser.add_argument("-t", "--tracker", default=None, help='Tracker updated on every frame in the main process. ["csrt","kcf","mil"]')
+
+    args = vars(parser.parse_args())
+
+    for key in ["video", "savedmodel", "labelmap"]:
+        if not os.path.exists(args[key]):
+            sys.exit("{} does not exist. Exiting the program!".format(args[key]))
+
+    frames = read_frames(args["video"], args["frames"])
+    if not frames:
+        sys.exit("Could not read a frame over {}".format(args["video"]))
+    print("{} frames of {}x{}, {} cpu cores".format(len(frames), frames[0].shape[1], frames[0].shape[0], os.cpu_count()))
+
+    # BASELINE: EVERYTHING IN ONE PROCESS
+    detector = Detector(args["savedmodel"], args["labelmap"], 0.5)
+    detector.get_detections(frames[0])
+    baseline_fps = run_in_process(detector, frames, args["tracker"])
+    del detector
+
+    print("{:>16} {:>9} {:>9}".format("", "fps", "speedup"))
+    print("{:>16} {:>9.2f} {:>8.2f}x".format("main process", baseline_fps, 1.0))
+    for num_of_workers in args["workers"]:
+        detector = DetectorProcess(args["savedmodel"], args["labelmap"], 0.5, num_of_workers, frames[0].shape, args["threads"])
+        # WARM UP EVERY WORKER
+        run_with_workers(detector, frames[:num_of_workers], None)
+        fps = run_with_workers(detector, frames, args["tracker"])
+        detector.close()
+        print("{:>16} {:>9.2f} {:>8.2f}x".format("{} worker(s)".format(num_of_workers), fps, fps / baseline_fps))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+####### WRITTEN TO BENCHMARK THE JITTER OF THE CONTROL LOOP WHILE THE LASER RANGER MEASURES #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# RUNS A CONTROL LOOP AT A FIXED RATE, EVERY ITERATION DOES --work MILLISECONDS OF WORK (STANDS FOR THE DETECTOR
+# AND THE PID) AND SLEEPS UNTIL THE NEXT PERIOD. THE LOOP IS RUN
+#     off      - WITHOUT THE RANGER
+#     async    - TRIGGERING THE RANGER ON EVERY ITERATION (Ranger.trigger), AS IN track_by_detecting_with_PTU.py
+#     blocking - WAITING FOR EVERY MEASUREMENT IN THE LOOP (Ranger.measure), FOR COMPARISON
+# AND PRINTS THE PERIOD OF THE LOOP, ITS STANDARD DEVIATION, THE 99TH PERCENTILE AND THE MAXIMUM OF THE
+# DEVIATION FROM THE NOMINAL PERIOD, THE MISSED PERIODS (LONGER THAN 1.5 PERIODS) AND THE NUMBER OF RANGES.
+# WITHOUT --port THE EMULATOR IS USED, WITH --delay SECONDS PER MEASUREMENT.
+
+from Ranger import Ranger, RangerEmulator
+from argparse import ArgumentParser
+import numpy as np
+import time
+
+def work(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def run(mode, ranger, args):
+    period = 1.0 / args["rate"]
+    num_of_ranges = 0
+    last_range = None
+    times = []
+    next_time = time.perf_counter()
+    end_time = next_time + args["seconds"]
+    while next_time < end_time:
+        now = time.perf_counter()
+        times.append(now)
+        work(args["work"] / 1000)
+        if mode == "async":
+            ranger.trigger(time.monotonic())
+            num_of_ranges += sum(reading.distance is not None for reading in ranger.readings())
+        elif mode == "blocking" and (last_range is None or now - last_range >= args["interval"]):
+            last_range = now
+            num_of_ranges += ranger.measure() is not None
+
+        next_time += period
+        # A LATE ITERATION DOES NOT TRY TO CATCH UP
+        next_time = max(next_time, time.perf_counter())
+        time.sleep(max(next_time - time.perf_counter(), 0))
+    if mode == "async":
+        # LET THE LAST MEASUREMENT FINISH BEFORE THE NEXT MODE
+        while ranger.busy.is_set():
+            time.sleep(0.01)
+        ranger.readings()
+    return np.diff(times), num_of_ranges
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("-p", "--port", required=False, help="Serial port or Bluetooth address of the laser ranger, the emulator is used if not given.")
+    parser.add_argument("-r", "--rate", default=30.0, type=float, help="Rate of the control loop in Hz.")
+    parser.add_argument("-w", "--work", default=10.0, type=float, help="Milliseconds of work in every iteration.")
+    parser.add_argument("-s", "--seconds", default=10.0, type=float, help="Seconds every mode runs.")
+    parser.add_argument("-i", "--interval", default=0.5, type=float, help="Minimum seconds between two measurements.")
+    parser.add_argument("-d", "--delay", default=0.3, type=float, help="Seconds a measurement of the emulator takes.")
+    parser.add_argument("-m", "--modes", default=["off", "async", "blocking"], nargs="+", choices=["off", "async", "blocking"], help="Modes of the loop.")
+
+    args = vars(parser.parse_args())
+
+    port = args["port"] if args["port"] != None else RangerEmulator(delay=args["delay"])
+    ranger = Ranger(port, min_interval=args["interval"])
+
+    period = 1000 / args["rate"]
+    print("{:>10} {:>10} {:>8} {:>8} {:>8} {:>7} {:>7}".format("", "period ms", "std ms", "p99 ms", "max ms", "missed", "ranges"))
+    for mode in args["modes"]:
+        periods, num_of_ranges = run(mode, ranger, args)
+        periods *= 1000
+        deviation = np.abs(periods - period)
+        print("{:>10} {:>10.2f} {:>8.2f} {:>8.2f} {:>8.2f} {:>7} {:>7}".format(
+            mode, periods.mean(), periods.std(), np.percentile(deviation, 99), deviation.max(), int(np.sum(periods > 1.5 * period)), num_of_ranges))
+    ranger.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+####### WRITTEN TO COMPARE THE DETECTOR WITH THE INTERLEAVED LSTM DETECTOR ON A RECORDED VIDEO #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# MEASURES THE FRAMES PER SECOND OF THE DETECTOR (FULL SSD ON EVERY FRAME) AND OF THE RECURRENT DETECTOR
+# WITH ONE OR MORE KEY FRAME INTERVALS, ON THE SAME FRAMES OF A RECORDED VIDEO.
+# THE FRAMES ARE READ FROM THE VIDEO BEFORE MEASURING, SO DECODING THE VIDEO IS NOT MEASURED.
+# THE NUMBER OF FRAMES WITH A DETECTION ABOVE THE SCORE IS PRINTED AS WELL, A FASTER MODEL THAT MISSES
+# THE DRONE IS NOT AN IMPROVEMENT.
+
+from benchmark_processes import read_frames
+from RecurrentDetector import RecurrentDetector
+from Detector import Detector
+from argparse import ArgumentParser
+import time
+import sys
+import os
+
+def run(detector, frames):
+    num_of_detected = 0
+    start = time.perf_counter()
+    for frame in frames:
+        detector.get_detections(frame)
+        num_of_detected += detector.object_detected
+    return len(frames) / (time.perf_counter() - start), num_of_detected
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("-v", "--video", required=True, help="Path to a recorded video.")
+    parser.add_argument("-s", "--savedmodel", required=True, help="Path to the saved model folder of the detector.")
+    parser.add_argument("-r", "--recurrentmodel", required=True, help="Path to the saved model folder of the interleaved LSTM model.")
+    parser.add_argument("-l", "--labelmap", required=True, help="Path to the label map file (.pbtxt).")
+    parser.add_argument("-n", "--frames", default=200, type=int, help="Number of frames of the video used for the benchmark.")
+    parser.add_argument("-k", "--keyframes", default=[0], nargs="+", type=int, help="Key frame intervals of the recurrent detector, 0 is the interval of the model.")
+    parser.add_argument("-m", "--minscore", default=0.5, type=float, help="Minimum score of a detection.")
+
+    args = vars(parser.parse_args())
+
+    for key in ["video", "savedmodel", "recurrentmodel", "labelmap"]:
+        if not os.path.exists(args[key]):
+            sys.exit("{} does not exist. Exiting the program!".format(args[key]))
+
+    frames = read_frames(args["video"], args["frames"])
+    if not frames:
+        sys.exit("Could not read a frame over {}".format(args["video"]))
+    print("{} frames of {}x{}".format(len(frames), frames[0].shape[1], frames[0].shape[0]))
+
+    # BASELINE: THE FULL SSD ON EVERY FRAME
+    detector = Detector(args["savedmodel"], args["labelmap"], args["minscore"])
+    detector.get_detections(frames[0])
+    baseline_fps, baseline_detected = run(detector, frames)
+    del detector
+
+    print("{:>24} {:>9} {:>9} {:>9}".format("", "fps", "speedup", "detected"))
+    print("{:>24} {:>9.2f} {:>8.2f}x {:>9}".format("detector", baseline_fps, 1.0, baseline_detected))
+    for key_frame_interval in args["keyframes"]:
+        detector = RecurrentDetector(args["recurrentmodel"], args["labelmap"], args["minscore"],
+                                     key_frame_interval=key_frame_interval or None)
+        # WARM UP THE KEY FRAME AND THE FRAME SIGNATURES, THEN START THE VIDEO FROM A KEY FRAME
+        for frame in frames[:2]:
+            detector.get_detections(frame)
+        detector.reset()
+        fps, detected = run(detector, frames)
+        name = "recurrent, every {}".format(detector.key_frame_interval)
+        print("{:>24} {:>9.2f} {:>8.2f}x {:>9}".format(name, fps, fps / baseline_fps, detected))
+
+if __name__ == "__main__":
+    main()
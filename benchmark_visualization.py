@@ -0,0 +1,85 @@
+####### WRITTEN TO BENCHMARK DRAWING THE DETECTIONS ON THE FRAMES #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# COMPARES DRAWING THE BOXES ONE BY ONE (ONE NUMPY -> PIL -> NUMPY CONVERSION PER BOX)
+# WITH visualize_boxes_and_labels_on_image_array, WHICH CONVERTS THE FRAME ONLY ONCE
+
+from object_detection.utils import visualization_utils as viz_utils
+from argparse import ArgumentParser
+import numpy as np
+import time
+
+CATEGORY_INDEX = {1: {"id": 1, "name": "drone"}}
+
+def random_detections(num_boxes, rng):
+    # RANDOM NORMALIZED BOXES: ymin, xmin, ymax, xmax
+    mins = rng.uniform(0.0, 0.9, size=(num_boxes, 2))
+    sizes = rng.uniform(0.02, 0.1, size=(num_boxes, 2))
+    boxes = np.concatenate([mins, np.minimum(mins + sizes, 1.0)], axis=1)
+    classes = np.ones(num_boxes, dtype=np.int64)
+    scores = rng.uniform(0.5, 1.0, size=num_boxes)
+    return boxes, classes, scores
+
+def random_masks(boxes, height, width):
+    masks = np.zeros((boxes.shape[0], height, width), dtype=np.uint8)
+    for mask, (ymin, xmin, ymax, xmax) in zip(masks, boxes):
+        mask[int(ymin * height):int(ymax * height), int(xmin * width):int(xmax * width)] = 1
+    return masks
+
+def draw_per_box(image, boxes, classes, scores, masks):
+    # THE WAY THE FRAMES WERE DRAWN BEFORE, ONE FULL FRAME CONVERSION PER BOX AND MASK
+    for i in range(boxes.shape[0]):
+        color = viz_utils.STANDARD_COLORS[classes[i] % len(viz_utils.STANDARD_COLORS)]
+        if masks is not None:
+            viz_utils.draw_mask_on_image_array(image, masks[i], color=color, alpha=0.4)
+        display_str = "{}: {}%".format(CATEGORY_INDEX[classes[i]]["name"], round(100 * scores[i]))
+        viz_utils.draw_bounding_box_on_image_array(image, *boxes[i], color=color, display_str_list=[display_str])
+
+def draw_batched(image, boxes, classes, scores, masks):
+    viz_utils.visualize_boxes_and_labels_on_image_array(
+        image,
+        boxes,
+        classes,
+        scores,
+        CATEGORY_INDEX,
+        instance_masks=masks,
+        use_normalized_coordinates=True,
+        max_boxes_to_draw=None,
+        min_score_thresh=0.0)
+
+def time_it(draw_fn, frame, detections, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        draw_fn(frame.copy(), *detections)
+    return (time.perf_counter() - start) / repeats
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("-W", "--width", default=1920, type=int, help="Frame width.")
+    parser.add_argument("-H", "--height", default=1080, type=int, help="Frame height.")
+    parser.add_argument("-b", "--boxes", default=[1, 5, 10, 25, 50, 100], nargs="+", type=int, help="Number of boxes to draw.")
+    parser.add_argument("-r", "--repeats", default=10, type=int, help="Number of times each measurement is repeated.")
+    parser.add_argument("-m", "--masks", action="store_true", help="Also draw an instance mask for every box.")
+
+    args = vars(parser.parse_args())
+
+    rng = np.random.RandomState(0)
+    frame = rng.randint(0, 256, size=(args["height"], args["width"], 3), dtype=np.uint8)
+
+    print("{}x{} frame, masks: {}".format(args["width"], args["height"], args["masks"]))
+    print("{:>6} {:>14} {:>14} {:>9}".format("boxes", "per box (ms)", "batched (ms)", "speedup"))
+    for num_boxes in args["boxes"]:
+        boxes, classes, scores = random_detections(num_boxes, rng)
+        masks = random_masks(boxes, args["height"], args["width"]) if args["masks"] else None
+        detections = (boxes, classes, scores, masks)
+
+        # WARM UP, SO THAT THE FONT IS LOADED BEFORE MEASURING
+        draw_batched(frame.copy(), *detections)
+
+        per_box = time_it(draw_per_box, frame, detections, args["repeats"])
+        batched = time_it(draw_batched, frame, detections, args["repeats"])
+        print("{:>6} {:>14.2f} {:>14.2f} {:>8.1f}x".format(num_boxes, per_box * 1000, batched * 1000, per_box / batched))
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@
 
 from object_detection.utils import label_map_util
 from object_detection.utils import visualization_utils as viz_utils
+from InferenceService import max_batch_size
+from DetectionCache import DetectionCache
 import tensorflow as tf
 from PIL import Image
 import os
@@ -12,49 +14,177 @@ import glob
 import numpy as np
 import cv2
 from argparse import ArgumentParser
-
-def get_arr_with_detections(img_path, detect_fn, category_index):
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import json
+import time
+
+# RETURNS A FUNCTION THAT LOADS THE SAVED MODEL ON ITS FIRST CALL AND RETURNS IT, THE MODEL IS ONLY LOADED
+# IF AN IMAGE IS NOT IN THE DETECTION CACHE (A MISSING OR BROKEN CACHE FILE IS A MISS AS WELL)
+def model_loader(saved_model_path):
+    model = {}
+    def load_model():
+        if "detect_fn" not in model:
+            print("Loading the saved model, and building a detection function.")
+            model["detect_fn"] = tf.saved_model.load(saved_model_path)
+        return model["detect_fn"]
+    return load_model
+
+# load_model: returns the detection function, see model_loader
+def get_arr_with_detections(img_path, load_model, category_index, cache=None, min_score_thresh=.30):
     # LOAD THE IMAGE
     img = Image.open(img_path)
 
     # CONVERT IMAGE INTO NUMPY ARRAY
     img_arr = np.array(img)
 
-    # CONVERT ARRAY INTO A TENSOR
-    img_tensor = tf.convert_to_tensor(img_arr)
-
-    # THE MODEL EXPECTS A BATCH(????) OF IMAGES
-    img_tensor = img_tensor[tf.newaxis, ...]
-
-    # GET OBJECTS DETECTED IN THAT IMAGE
-    detections = detect_fn(img_tensor)
-    
-    # ALL OUTPUTS IN DETECTIONS ARE BATCHES
-    # CONVERT THOSE INTO NUMPY ARRAYS
-    # TAKE THE FIRST ELEMENT AND REMOVE THE REST(BATCHES)
-    num_of_detections = int(detections.pop("num_detections"))
-    detections = {key: value[0, :num_of_detections].numpy() for key, value in detections.items()}
-    detections["num_detections"] = num_of_detections
-
-    # DETECTION CLASSES, AKA LABELS SHOULD BE TYPE OF INTEGERS
-    detections["detection_classes"] = detections["detection_classes"].astype(np.int64)
+    # THE MODEL ONLY RUNS IF THE DETECTIONS OF THE IMAGE ARE NOT IN THE CACHE
+    detections = cache.get(img_path) if cache is not None else None
+    if detections is None:
+        # CONVERT ARRAY INTO A TENSOR
+        img_tensor = tf.convert_to_tensor(img_arr)
+
+        # THE MODEL EXPECTS A BATCH(????) OF IMAGES
+        img_tensor = img_tensor[tf.newaxis, ...]
+
+        # GET OBJECTS DETECTED IN THAT IMAGE
+        detections = load_model()(img_tensor)
+
+        # ALL OUTPUTS IN DETECTIONS ARE BATCHES
+        # CONVERT THOSE INTO NUMPY ARRAYS
+        # TAKE THE FIRST ELEMENT AND REMOVE THE REST(BATCHES)
+        num_of_detections = int(detections.pop("num_detections"))
+        detections = {key: value[0, :num_of_detections].numpy() for key, value in detections.items()}
+        detections["num_detections"] = num_of_detections
+
+        # DETECTION CLASSES, AKA LABELS SHOULD BE TYPE OF INTEGERS
+        detections["detection_classes"] = detections["detection_classes"].astype(np.int64)
+        if cache is not None:
+            cache.put(img_path, detections)
     print(list(detections.keys()))
     # CREATE A NUMPY ARRAY WITH DETECTED IMAGES
     img_arr_with_detections = img_arr.copy()
 
+    draw_detections(img_arr_with_detections, detections, category_index, min_score_thresh)
+    
+    print(img_arr_with_detections)
+    return img_arr_with_detections
+
+def draw_detections(img_arr, detections, category_index, min_score_thresh=.30):
     viz_utils.visualize_boxes_and_labels_on_image_array(
-        img_arr_with_detections,
+        img_arr,
         detections['detection_boxes'],
         detections['detection_classes'],
         detections['detection_scores'],
         category_index,
         use_normalized_coordinates=True,
         max_boxes_to_draw=200,
-        min_score_thresh=.30,
+        min_score_thresh=min_score_thresh,
         agnostic_mode=False)
-    
-    print(img_arr_with_detections)
-    return img_arr_with_detections
+
+####### STREAMING MODE #######
+# IMAGES ARE DECODED IN A THREAD POOL WHILE THE MODEL IS RUNNING, IMAGES WITH THE SAME SIZE
+# ARE STACKED INTO BATCHES, AND THE RESULTS ARE WRITTEN TO THE OUTPUT FOLDER AS SOON AS
+# THEY ARE READY, SO ONLY A FEW IMAGES ARE KEPT IN MEMORY AT ANY TIME
+
+def decode_image(img_path, cache=None):
+    # THE IMAGE FILE IS HASHED FOR THE CACHE LOOKUP IN THE BACKGROUND AS WELL
+    if cache is not None:
+        cache.key(img_path)
+    return img_path, np.array(Image.open(img_path).convert("RGB"))
+
+def prefetch(executor, fn, items, size):
+    # LIKE executor.map, BUT AT MOST size ITEMS ARE SUBMITTED AHEAD OF THE CONSUMER
+    futures = deque()
+    for item in items:
+        futures.append(executor.submit(fn, item))
+        if len(futures) >= size:
+            yield futures.popleft().result()
+    while futures:
+        yield futures.popleft().result()
+
+def batches_of_same_size(decoded_images, batch_size):
+    # THE MODEL TAKES A SINGLE TENSOR, SO ONLY IMAGES WITH THE SAME SHAPE CAN BE BATCHED
+    batch = []
+    for img_path, img_arr in decoded_images:
+        if batch and (len(batch) == batch_size or batch[0][1].shape != img_arr.shape):
+            yield batch
+            batch = []
+        batch.append((img_path, img_arr))
+    if batch:
+        yield batch
+
+# load_model: returns the detection function, see model_loader
+def detect_batch(load_model, img_paths, img_arrays, cache=None):
+    # ONLY THE IMAGES THAT ARE NOT IN THE CACHE ARE GIVEN TO THE MODEL
+    batch_detections = [cache.get(img_path) if cache is not None else None for img_path in img_paths]
+    missing = [idx for idx, image_detections in enumerate(batch_detections) if image_detections is None]
+    if not missing:
+        return batch_detections
+
+    detect_fn = load_model()
+    # MODELS EXPORTED WITH THE image_tensor INPUT TYPE ONLY ACCEPT A BATCH OF ONE IMAGE
+    step = max_batch_size(detect_fn) or len(missing)
+    for start in range(0, len(missing), step):
+        chunk = missing[start:start + step]
+        detections = detect_fn(tf.convert_to_tensor(np.stack([img_arrays[idx] for idx in chunk])))
+
+        # SPLIT THE BATCHED OUTPUTS INTO ONE DICTIONARY PER IMAGE
+        nums_of_detections = detections.pop("num_detections").numpy().astype(np.int64)
+        detections = {key: detections[key].numpy() for key in ["detection_boxes", "detection_classes", "detection_scores"]}
+        for batch_idx, (idx, num_of_detections) in enumerate(zip(chunk, nums_of_detections)):
+            image_detections = {key: value[batch_idx, :num_of_detections] for key, value in detections.items()}
+            image_detections["detection_classes"] = image_detections["detection_classes"].astype(np.int64)
+            if cache is not None:
+                cache.put(img_paths[idx], image_detections)
+            batch_detections[idx] = image_detections
+    return batch_detections
+
+def write_detections(img_path, img_arr, detections, category_index, output_folder, min_score_thresh):
+    draw_detections(img_arr, detections, category_index, min_score_thresh)
+    Image.fromarray(img_arr).save(os.path.join(output_folder, os.path.basename(img_path)))
+
+    keep = detections["detection_scores"] >= min_score_thresh
+    return json.dumps({
+        "image": os.path.basename(img_path),
+        "height": img_arr.shape[0],
+        "width": img_arr.shape[1],
+        # bounding box: ymin, xmin, ymax, xmax (normalized)
+        "detection_boxes": detections["detection_boxes"][keep].round(5).tolist(),
+        "detection_classes": detections["detection_classes"][keep].tolist(),
+        "detection_scores": detections["detection_scores"][keep].round(5).tolist(),
+    })
+
+# load_model: returns the detection function, see model_loader. THE BATCHES ARE SPLIT FOR MODELS THAT ONLY ACCEPT
+# SMALLER ONES, SO THE MODEL IS NOT LOADED BEFORE THE FIRST IMAGE THAT IS NOT IN THE CACHE
+def stream_detections(img_files, load_model, category_index, output_folder, batch_size, workers, min_score_thresh, cache=None):
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    num_of_images = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor, open(os.path.join(output_folder, "detections.jsonl"), "w") as detections_file:
+        # ANNOTATED IMAGES ARE ENCODED AND WRITTEN IN THE BACKGROUND AS WELL
+        pending_writes = deque()
+        decoded_images = prefetch(executor, lambda img_path: decode_image(img_path, cache), img_files, 2 * batch_size + workers)
+        for batch in batches_of_same_size(decoded_images, batch_size):
+            img_paths, img_arrays = zip(*batch)
+            for img_path, img_arr, detections in zip(img_paths, img_arrays, detect_batch(load_model, img_paths, img_arrays, cache)):
+                pending_writes.append(executor.submit(write_detections, img_path, img_arr, detections, category_index, output_folder, min_score_thresh))
+
+            while len(pending_writes) > workers:
+                detections_file.write(pending_writes.popleft().result() + "\n")
+
+            num_of_images += len(batch)
+            print("{} images, {:.2f} images/s".format(num_of_images, num_of_images / (time.perf_counter() - start)))
+
+        while pending_writes:
+            detections_file.write(pending_writes.popleft().result() + "\n")
+
+    elapsed = time.perf_counter() - start
+    print("Processed {} images in {:.2f}s, {:.2f} images/s".format(num_of_images, elapsed, num_of_images / elapsed if elapsed > 0 else 0.0))
+    if cache is not None:
+        print("Detection cache: {} hits, {} misses, {:.1f} MB".format(cache.hits, cache.misses, cache.size / (1 << 20)))
 
 def main():
     parser = ArgumentParser()
@@ -62,16 +192,19 @@ def main():
     parser.add_argument("-s", "--savedmodel", required=True, help="Path to the saved model folder.")
     parser.add_argument("-l", "--labelmap", required=True, help="Path to the label map file (.pbtxt).")
     parser.add_argument("-i", "--images", required=True, help="Path to the images folder.")
+    parser.add_argument("-o", "--output", required=False, help="Path to the output folder. If given, images are processed in streaming mode and the annotated images and detections.jsonl are written to this folder instead of being plotted.")
+    parser.add_argument("-b", "--batch_size", default=8, type=int, help="Number of images given to the model at once in streaming mode.")
+    parser.add_argument("-w", "--workers", default=4, type=int, help="Number of threads decoding and writing images in streaming mode.")
+    parser.add_argument("-t", "--threshold", default=.30, type=float, help="Minimum score of the detections that are drawn and written.")
+    parser.add_argument("-c", "--cache", required=False, help="Path to the detection cache folder. If given, the detections of every image are stored on disk and the model only runs on new or changed images, or after the saved model changed.")
+    parser.add_argument("--cache_size", default=512, type=float, help="Maximum size of the detection cache in MB, the least recently used detections are removed first.")
 
     args = vars(parser.parse_args())
     # CHECK IF THE PATHS EXIST
-    for key in args:
+    for key in ["savedmodel", "labelmap", "images"]:
         if not os.path.exists(args[key]):
             sys.exit("{} does not exist. Exiting the program!".format(args[key]))
 
-    # LOAD SAVED MODEL AND BUILD THE DETECTION FUNCTION
-    detect_fn = tf.saved_model.load(args["savedmodel"])
-
     # LOAD LABEL MAP DATA FOR PLOTTING
     # LABEL MAP INDEX NUMBERS CORRESPONDS TO CLASS NAMES
     category_index = label_map_util.create_category_index_from_labelmap(args["labelmap"], use_display_name=True)
@@ -79,8 +212,18 @@ def main():
     # GET ALL THE IMAGE FILES FROM THE IMAGES DIRECTORY
     img_files = glob.glob(args["images"] + "/*.jpg")
 
+    cache = DetectionCache(args["cache"], args["savedmodel"], args["cache_size"]) if args["cache"] is not None else None
+
+    # LOAD SAVED MODEL AND BUILD THE DETECTION FUNCTION ON THE FIRST IMAGE THAT IS NOT IN THE CACHE
+    # NOT NEEDED IF THE DETECTIONS OF ALL IMAGES ARE IN THE CACHE, E.G. WHEN ONLY THE THRESHOLD CHANGED
+    load_model = model_loader(args["savedmodel"])
+
+    if args["output"] is not None:
+        stream_detections(sorted(img_files), load_model, category_index, args["output"], args["batch_size"], args["workers"], args["threshold"], cache)
+        sys.exit("Exiting the program!")
+
     # GO THROUGH ALL THE IMAGES AND GET IMAGE ARRAYS FOR EACH IMAGE WITH THE DETECTED OBJECTS IN THAT IMAGE
-    img_arrays_with_detections = [get_arr_with_detections(img_file_path, detect_fn, category_index) for img_file_path in img_files]
+    img_arrays_with_detections = [get_arr_with_detections(img_file_path, load_model, category_index, cache, args["threshold"]) for img_file_path in img_files]
 
     # PLOT ALL THE IMAGES
     print("Plotting images")
@@ -3,6 +3,7 @@
 ####### MAINTAINER: DENIZ KARTAL ######
 
 from Detector import Detector
+from Telemetry import Telemetry
 import cv2
 import os
 from argparse import ArgumentParser
@@ -13,15 +14,19 @@ def main():
     parser.add_argument("-v", "--video", required=True, help="video path, to find out the webcam path issue 'ls /dev/video*' command on the terminal", type=str)
     parser.add_argument("-s", "--savedmodel", required=True, help="Path to the saved model folder.")
     parser.add_argument("-l", "--labelmap", required=True, help="Path to the label map file (.pbtxt).")
+    parser.add_argument("-T", "--trace", required=False, help="Path to the telemetry trace file (.jsonl). Summarize it with summarize_trace.py")
 
     args = vars(parser.parse_args())
 
     # CHECK IF THE PATHS EXIST
-    for key in args:
+    for key in ["video", "savedmodel", "labelmap"]:
         if not os.path.exists(args[key]):
             sys.exit("{} does not exist. Exiting the program!".format(args[key]))
 
-    detector = Detector(args["savedmodel"], args["labelmap"], 0.5)
+    # TIMES EVERY STAGE OF THE LOOP, DISABLED IF NO TRACE FILE IS GIVEN
+    telemetry = Telemetry(args["trace"])
+
+    detector = Detector(args["savedmodel"], args["labelmap"], 0.5, telemetry)
 
     # VIDEO CAPTURE VIA THE VIDEO PATH
     video_capture = cv2.VideoCapture(args["video"])
@@ -29,7 +34,9 @@ def main():
     # RUN CONTINOUSLY UNTIL USER PRESSES Q TO QUIT!
     while(True):
         # READ CURRENT FRAME
-        ret, frame = video_capture.read()
+        telemetry.new_frame()
+        with telemetry.stage("capture"):
+            ret, frame = video_capture.read()
 
         if ret is False:
             print("Could not read a frame over {}".format(args["video"]))
@@ -40,23 +47,19 @@ def main():
         # CREATE A RED CIRCLE ON THE CENTER OF THE FRAME
         frame_center_x = W // 2
         frame_center_y = H // 2
-        print("frame-center-x: {}, frame-center-y: {}".format(frame_center_x, frame_center_y))
         cv2.circle(frame, (frame_center_x, frame_center_y), 3, (0,0,255), 3)
 
         detector.get_detections(frame)
         
         if(detector.object_detected):
-            print("An object detected!")
-
             # Go through all the detected objects!
             for bounding_box, detections_score, detection_classes_name in zip(detector.detections["bounding_box"], detector.detections["detection_scores"], detector.detections["detection_classes_names"]):
                 ymin, xmin, ymax, xmax = bounding_box
-                print("{} -> ymin: {}, xmin: {}, ymax: {}, xmax: {}".format(detection_classes_name, ymin, xmin, ymax, xmax))
                 obj_center_x = int((xmax + xmin) // 2.0)
                 obj_center_y = int((ymax + ymin) // 2.0)
+                telemetry.event("detection", label = detection_classes_name, score = detections_score, box = [ymin, xmin, ymax, xmax], center = [obj_center_x, obj_center_y])
 
                 # GREEN CIRCLE ON THE OBJECT
-                print("{} -> obj_center_x: {}, obj_center_y: {}".format(detection_classes_name, obj_center_x, obj_center_y))
                 cv2.circle(frame, (obj_center_x, obj_center_y), 3, (0, 255, 0), 3)
 
                 # GREEN RECTANGLE ON THE OBJECT
@@ -74,7 +77,10 @@ def main():
             video_capture.release()
             cv2.destroyAllWindows()
 
+            telemetry.close()
             sys.exit("Exiting the program!")
 
+    telemetry.close()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,89 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Exports an interleaved LSTM detection model for frame by frame inference.
+
+Outputs:
+* A SavedModel - $output_directory/saved_model
+
+The SavedModel holds a frozen graph and loads with `tf.saved_model.load` in
+TF2. It has two signatures with the same inputs and outputs, `key_frame` runs
+the large base network and `frame` runs the small base network. The caller
+runs `key_frame` on the first frame and then on every key_frame_interval-th
+frame (SKIPX eval_interleave_method of the lstm config: X + 1), and passes the
+LSTM state returned for a frame to the next frame.
+
+Inputs:
+'input_tensor': a uint8 tensor of shape [1, height, width, 3], the frame, of
+  any size, it is resized by the image resizer of the pipeline config.
+'lstm_c', 'lstm_h': float32 tensors of shape [1, state_height, state_width,
+  lstm_state_depth], the LSTM state after the previous frame. Zeros for the
+  first frame of a video.
+
+Outputs:
+'detection_boxes', 'detection_scores', 'detection_classes', 'num_detections':
+  the post-processed detections, as with the object_detection exporter.
+'lstm_c', 'lstm_h': the LSTM state after the frame. The state is only updated
+  by key frames.
+'key_frame_interval': an int32 scalar, the number of frames from one key frame
+  to the next.
+
+Example Usage:
+--------------
+python lstm_object_detection/export_saved_model.py \
+    --pipeline_config_path path/to/lstm_pipeline.config \
+    --trained_checkpoint_prefix path/to/model.ckpt \
+    --output_directory path/to/exported_model_directory
+
+Only 'SKIPX' eval interleave methods and fixed_shape_resizer image resizers are
+supported.
+"""
+
+import tensorflow.compat.v1 as tf
+
+from lstm_object_detection import export_saved_model_lib
+from lstm_object_detection.utils import config_util
+
+flags = tf.app.flags
+flags.DEFINE_string('output_directory', None, 'Path to write outputs.')
+flags.DEFINE_string(
+    'pipeline_config_path', None,
+    'Path to a pipeline_pb2.TrainEvalPipelineConfig config '
+    'file.')
+flags.DEFINE_string('trained_checkpoint_prefix', None, 'Checkpoint prefix.')
+
+FLAGS = flags.FLAGS
+
+
+def main(argv):
+  del argv  # Unused.
+  # The LSTM models read static dimensions with `Dimension.value`.
+  tf.disable_v2_tensorshape()
+  flags.mark_flag_as_required('output_directory')
+  flags.mark_flag_as_required('pipeline_config_path')
+  flags.mark_flag_as_required('trained_checkpoint_prefix')
+
+  pipeline_config = config_util.get_configs_from_pipeline_file(
+      FLAGS.pipeline_config_path)
+
+  key_frame_interval = export_saved_model_lib.export_saved_model(
+      pipeline_config,
+      FLAGS.trained_checkpoint_prefix,
+      FLAGS.output_directory)
+  tf.logging.info('Exported a model with a key frame every %d frames.',
+                  key_frame_interval)
+
+
+if __name__ == '__main__':
+  tf.app.run(main)
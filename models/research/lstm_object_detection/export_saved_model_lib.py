@@ -0,0 +1,215 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Exports interleaved LSTM detection models as frame by frame SavedModels.
+
+See export_saved_model.py for usage.
+"""
+import os
+import tempfile
+
+import tensorflow.compat.v1 as tf
+
+from lstm_object_detection import model_builder
+from object_detection import exporter
+
+KEY_FRAME_SIGNATURE = 'key_frame'
+FRAME_SIGNATURE = 'frame'
+LSTM_STATE_NAMES = ('lstm_c', 'lstm_h')
+
+
+def key_frame_interval(interleave_method):
+  """Returns the number of frames from one key frame to the next.
+
+  Args:
+    interleave_method: 'SKIPX' for integer X, the small base network runs on X
+      frames after every frame of the large base network.
+
+  Returns:
+    X + 1.
+
+  Raises:
+    ValueError: if interleave_method is not 'SKIPX'.
+  """
+  if not interleave_method.startswith('SKIP'):
+    raise ValueError('Only SKIPX interleave methods can be exported, found '
+                     '{}.'.format(interleave_method))
+  return int(interleave_method[4:]) + 1
+
+
+def build_frame_graph(detection_model, interval):
+  """Builds the key frame and frame detection graphs of a model.
+
+  Both graphs take the same inputs and share the variables:
+    input_tensor: a uint8 tensor of shape [1, None, None, 3], the frame.
+    lstm_c, lstm_h: float32 tensors, the LSTM state after the previous frame,
+      zeros for the first frame.
+
+  Args:
+    detection_model: an interleaved LSTMSSDMetaArch.
+    interval: The number of frames from one key frame to the next, returned as
+      the `key_frame_interval` output, so the schedule travels with the model.
+
+  Returns:
+    inputs: a dictionary of the input placeholders.
+    signature_outputs: a dictionary from the signature key to a dictionary of
+      the output tensors, the detections (see exporter.add_output_tensor_nodes),
+      the LSTM state after the frame and the key frame interval.
+  """
+  input_tensor = tf.placeholder(
+      tf.uint8, shape=[1, None, None, 3], name='input_tensor')
+  # The shape of the state is set by the feature extractor.
+  lstm_state = tuple(
+      tf.placeholder(tf.float32, shape=[1, None, None, None], name=name)
+      for name in LSTM_STATE_NAMES)
+  preprocessed_inputs, true_image_shapes = detection_model.preprocess(
+      tf.to_float(input_tensor))
+
+  signature_outputs = {}
+  for signature_key, key_frame in ((KEY_FRAME_SIGNATURE, True),
+                                   (FRAME_SIGNATURE, False)):
+    with tf.name_scope(signature_key):
+      prediction_dict, lstm_state_out = detection_model.predict_frame(
+          preprocessed_inputs, true_image_shapes, lstm_state,
+          key_frame=key_frame)
+      detections = detection_model.postprocess(prediction_dict,
+                                               true_image_shapes)
+      outputs = exporter.add_output_tensor_nodes(detections)
+      for name, state in zip(LSTM_STATE_NAMES, lstm_state_out):
+        outputs[name] = tf.identity(state, name=name)
+      outputs['key_frame_interval'] = tf.constant(
+          interval, dtype=tf.int32, name='key_frame_interval')
+    signature_outputs[signature_key] = outputs
+
+  inputs = dict(zip(LSTM_STATE_NAMES, lstm_state))
+  inputs['input_tensor'] = input_tensor
+  return inputs, signature_outputs
+
+
+def write_saved_model(saved_model_path, frozen_graph_def, inputs,
+                      signature_outputs):
+  """Writes a SavedModel with a signature per frame type.
+
+  The key frame signature is the default serving signature as well.
+
+  Args:
+    saved_model_path: Path to write the SavedModel.
+    frozen_graph_def: tf.GraphDef holding the frozen graph.
+    inputs: A dictionary of the input tensors of all signatures.
+    signature_outputs: A dictionary from the signature key to a dictionary of
+      the output tensors.
+  """
+  with tf.Graph().as_default():
+    with tf.Session() as sess:
+      tf.import_graph_def(frozen_graph_def, name='')
+      graph = tf.get_default_graph()
+
+      def tensor_infos(tensors):
+        infos = {}
+        for key, tensor in tensors.items():
+          imported_tensor = graph.get_tensor_by_name(tensor.name)
+          # Keeps the state shapes, which were set after the placeholders
+          # were created.
+          imported_tensor.set_shape(tensor.shape)
+          infos[key] = tf.saved_model.utils.build_tensor_info(imported_tensor)
+        return infos
+
+      signature_def_map = {}
+      for signature_key, outputs in signature_outputs.items():
+        signature_def_map[signature_key] = (
+            tf.saved_model.signature_def_utils.build_signature_def(
+                inputs=tensor_infos(inputs),
+                outputs=tensor_infos(outputs),
+                method_name=tf.saved_model.signature_constants
+                .PREDICT_METHOD_NAME))
+      signature_def_map[tf.saved_model.signature_constants
+                        .DEFAULT_SERVING_SIGNATURE_DEF_KEY] = (
+                            signature_def_map[KEY_FRAME_SIGNATURE])
+
+      builder = tf.saved_model.builder.SavedModelBuilder(saved_model_path)
+      builder.add_meta_graph_and_variables(
+          sess, [tf.saved_model.tag_constants.SERVING],
+          signature_def_map=signature_def_map)
+      builder.save()
+
+
+def export_saved_model(pipeline_config, trained_checkpoint_prefix, output_dir):
+  """Exports an interleaved LSTM model as a frame by frame SavedModel.
+
+  The SavedModel is written to output_dir/saved_model. It holds a frozen graph
+  and can be loaded with `tf.saved_model.load` in TF2. The caller carries the
+  LSTM state from one frame to the next and picks the signature of every
+  frame, `key_frame` runs the large base network and updates the state,
+  `frame` runs the small base network and returns the state unchanged.
+
+  Args:
+    pipeline_config: Dictionary of configuration objects. Keys are `model`,
+      `train_config`, `train_input_config`, `eval_config`, `eval_input_config`,
+      `lstm_model`. Value are the corresponding config objects.
+    trained_checkpoint_prefix: a file prefix for the checkpoint containing the
+      trained parameters of the model.
+    output_dir: A directory to write the SavedModel to.
+
+  Returns:
+    The number of frames from one key frame to the next of the
+    `eval_interleave_method` of the lstm config.
+
+  Raises:
+    ValueError: if the model is not an ssd model, does not use a
+      fixed_shape_resizer or the eval interleave method is not 'SKIPX'.
+  """
+  model_config = pipeline_config['model']
+  lstm_config = pipeline_config['lstm_model']
+  eval_config = pipeline_config['eval_config']
+  if model_config.WhichOneof('model') != 'ssd':
+    raise ValueError('Only ssd models are supported. Found {} in '
+                     'config'.format(model_config.WhichOneof('model')))
+  image_resizer = model_config.ssd.image_resizer.WhichOneof(
+      'image_resizer_oneof')
+  if image_resizer != 'fixed_shape_resizer':
+    raise ValueError('Only fixed_shape_resizer is supported. Found {} in '
+                     'config'.format(image_resizer))
+  interval = key_frame_interval(lstm_config.eval_interleave_method)
+  tf.gfile.MakeDirs(output_dir)
+
+  with tf.Graph().as_default():
+    detection_model = model_builder.build(
+        model_config, lstm_config, is_training=False)
+    inputs, signature_outputs = build_frame_graph(detection_model, interval)
+
+    if eval_config.use_moving_averages:
+      checkpoint_to_use = tempfile.mkdtemp()
+      exporter.replace_variable_values_with_moving_averages(
+          tf.get_default_graph(), trained_checkpoint_prefix, checkpoint_to_use)
+    else:
+      checkpoint_to_use = trained_checkpoint_prefix
+
+    saver = tf.train.Saver()
+    output_node_names = sorted(set(
+        tensor.op.name for outputs in signature_outputs.values()
+        for tensor in outputs.values()))
+    frozen_graph_def = exporter.freeze_graph_with_def_protos(
+        input_graph_def=tf.get_default_graph().as_graph_def(),
+        input_saver_def=saver.as_saver_def(),
+        input_checkpoint=checkpoint_to_use,
+        output_node_names=','.join(output_node_names),
+        restore_op_name='save/restore_all',
+        filename_tensor_name='save/Const:0',
+        output_graph='',
+        clear_devices=True,
+        initializer_nodes='')
+
+  write_saved_model(os.path.join(output_dir, 'saved_model'), frozen_graph_def,
+                    inputs, signature_outputs)
+  return interval
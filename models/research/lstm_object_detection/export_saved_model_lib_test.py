@@ -0,0 +1,208 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""Tests for lstm_object_detection.export_saved_model_lib."""
+
+import os
+
+import numpy as np
+import tensorflow.compat.v1 as tf
+from google.protobuf import text_format
+from lstm_object_detection import export_saved_model_lib
+from lstm_object_detection import model_builder
+from lstm_object_detection.protos import pipeline_pb2 as internal_pipeline_pb2
+from object_detection.protos import pipeline_pb2
+
+
+class ExportSavedModelLibTest(tf.test.TestCase):
+
+  def get_interleaved_configs(self):
+    """Creates a small interleaved model config for testing.
+
+    Returns:
+      A dictionary of configs.
+    """
+    pipeline_text_proto = """
+    [lstm_object_detection.protos.lstm_model] {
+      train_unroll_length: 4
+      eval_unroll_length: 4
+      lstm_state_depth: 32
+      depth_multipliers: 0.35
+      depth_multipliers: 0.35
+      pre_bottleneck: true
+      low_res: true
+      train_interleave_method: 'RANDOM_SKIP_SMALL'
+      eval_interleave_method: 'SKIP3'
+    }
+    model {
+      ssd {
+        num_classes: 2
+        feature_extractor {
+          type: 'lstm_ssd_interleaved_mobilenet_v2'
+          min_depth: 16
+          conv_hyperparams {
+            regularizer {
+              l2_regularizer {
+              }
+            }
+            initializer {
+              truncated_normal_initializer {
+              }
+            }
+          }
+        }
+        box_coder {
+          faster_rcnn_box_coder {
+          }
+        }
+        matcher {
+          argmax_matcher {
+          }
+        }
+        similarity_calculator {
+          iou_similarity {
+          }
+        }
+        anchor_generator {
+          ssd_anchor_generator {
+            num_layers: 5
+            aspect_ratios: 1.0
+          }
+        }
+        image_resizer {
+          fixed_shape_resizer {
+            height: 128
+            width: 128
+          }
+        }
+        box_predictor {
+          convolutional_box_predictor {
+            conv_hyperparams {
+              regularizer {
+                l2_regularizer {
+                }
+              }
+              initializer {
+                truncated_normal_initializer {
+                }
+              }
+            }
+          }
+        }
+        post_processing {
+          batch_non_max_suppression {
+            score_threshold: 0.0
+            iou_threshold: 0.6
+            max_detections_per_class: 5
+            max_total_detections: 5
+          }
+          score_converter: SIGMOID
+        }
+        loss {
+          classification_loss {
+            weighted_sigmoid {
+            }
+          }
+          localization_loss {
+            weighted_smooth_l1 {
+            }
+          }
+        }
+      }
+    }"""
+
+    pipeline_config = pipeline_pb2.TrainEvalPipelineConfig()
+    text_format.Merge(pipeline_text_proto, pipeline_config)
+
+    configs = {}
+    configs['model'] = pipeline_config.model
+    configs['eval_config'] = pipeline_config.eval_config
+    configs['lstm_model'] = pipeline_config.Extensions[
+        internal_pipeline_pb2.lstm_model]
+    return configs
+
+  def _save_checkpoint(self, configs, checkpoint_prefix):
+    with tf.Graph().as_default():
+      detection_model = model_builder.build(
+          configs['model'], configs['lstm_model'], is_training=False)
+      export_saved_model_lib.build_frame_graph(detection_model, 4)
+      with self.session() as sess:
+        sess.run(tf.global_variables_initializer())
+        tf.train.Saver().save(sess, checkpoint_prefix)
+
+  def test_key_frame_interval(self):
+    self.assertEqual(export_saved_model_lib.key_frame_interval('SKIP9'), 10)
+    with self.assertRaises(ValueError):
+      export_saved_model_lib.key_frame_interval('RANDOM_SKIP_SMALL')
+
+  def test_export_saved_model_and_run_frames(self):
+    configs = self.get_interleaved_configs()
+    tmp_dir = self.get_temp_dir()
+    checkpoint_prefix = os.path.join(tmp_dir, 'model.ckpt')
+    output_dir = os.path.join(tmp_dir, 'output')
+    self._save_checkpoint(configs, checkpoint_prefix)
+
+    interval = export_saved_model_lib.export_saved_model(
+        configs, checkpoint_prefix, output_dir)
+    self.assertEqual(interval, 4)
+
+    with tf.Graph().as_default():
+      with self.session() as sess:
+        meta_graph = tf.saved_model.loader.load(
+            sess, [tf.saved_model.tag_constants.SERVING],
+            os.path.join(output_dir, 'saved_model'))
+        signatures = meta_graph.signature_def
+        self.assertEqual(
+            signatures['serving_default'],
+            signatures[export_saved_model_lib.KEY_FRAME_SIGNATURE])
+
+        def run(signature_key, feed):
+          signature = signatures[signature_key]
+          fetches = {key: tensor_info.name
+                     for key, tensor_info in signature.outputs.items()}
+          return sess.run(fetches, feed_dict={
+              signature.inputs[key].name: value
+              for key, value in feed.items()})
+
+        state_shape = [
+            dim.size for dim in
+            signatures['key_frame'].inputs['lstm_c'].tensor_shape.dim]
+        self.assertEqual(state_shape, [1, 4, 4, 32])
+        frame = np.random.randint(0, 256, size=[1, 96, 160, 3]).astype(np.uint8)
+        zero_state = np.zeros(state_shape, dtype=np.float32)
+
+        key_frame_outputs = run('key_frame', {
+            'input_tensor': frame, 'lstm_c': zero_state, 'lstm_h': zero_state})
+        self.assertEqual(key_frame_outputs['detection_boxes'].shape,
+                         (1, 5, 4))
+        self.assertEqual(key_frame_outputs['num_detections'].shape, (1,))
+        self.assertEqual(key_frame_outputs['key_frame_interval'], 4)
+        self.assertEqual(key_frame_outputs['lstm_c'].shape, tuple(state_shape))
+        self.assertGreater(np.abs(key_frame_outputs['lstm_h']).sum(), 0)
+
+        frame_outputs = run('frame', {
+            'input_tensor': frame,
+            'lstm_c': key_frame_outputs['lstm_c'],
+            'lstm_h': key_frame_outputs['lstm_h']})
+        self.assertEqual(frame_outputs['detection_scores'].shape, (1, 5))
+        # The small base network does not update the state.
+        self.assertAllEqual(frame_outputs['lstm_c'],
+                            key_frame_outputs['lstm_c'])
+        self.assertAllEqual(frame_outputs['lstm_h'],
+                            key_frame_outputs['lstm_h'])
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -18,12 +18,10 @@ import functools
 import tensorflow.compat.v1 as tf
 import tf_slim as slim
 
-from tensorflow.contrib import rnn as contrib_rnn
-from tensorflow.contrib.framework.python.ops import variables as contrib_variables
 import lstm_object_detection.lstm.utils as lstm_utils
 
 
-class BottleneckConvLSTMCell(contrib_rnn.RNNCell):
+class BottleneckConvLSTMCell(tf.nn.rnn_cell.RNNCell):
   """Basic LSTM recurrent network cell using separable convolutions.
 
   The implementation is based on:
@@ -83,12 +81,14 @@ class BottleneckConvLSTMCell(contrib_rnn.RNNCell):
 
   @property
   def state_size(self):
-    return contrib_rnn.LSTMStateTuple(self._output_size + [self._num_units],
-                                      self._output_size + [self._num_units])
+    return tf.nn.rnn_cell.LSTMStateTuple(
+        self._output_size + [self._num_units],
+        self._output_size + [self._num_units])
 
   @property
   def state_size_flat(self):
-    return contrib_rnn.LSTMStateTuple([self._param_count], [self._param_count])
+    return tf.nn.rnn_cell.LSTMStateTuple([self._param_count],
+                                         [self._param_count])
 
   @property
   def output_size(self):
@@ -164,7 +164,7 @@ class BottleneckConvLSTMCell(contrib_rnn.RNNCell):
         new_c = tf.reshape(new_c, [-1, self._param_count])
         new_h = tf.reshape(new_h, [-1, self._param_count])
 
-      return output, contrib_rnn.LSTMStateTuple(new_c, new_h)
+      return output, tf.nn.rnn_cell.LSTMStateTuple(new_c, new_h)
 
   def init_state(self, state_name, batch_size, dtype, learned_state=False):
     """Creates an initial state compatible with this cell.
@@ -184,7 +184,7 @@ class BottleneckConvLSTMCell(contrib_rnn.RNNCell):
     # list of 2 zero tensors or variables tensors, depending on if
     # learned_state is true
     # pylint: disable=g-long-ternary,g-complex-comprehension
-    ret_flat = [(contrib_variables.model_variable(
+    ret_flat = [(slim.model_variable(
         state_name + str(i),
         shape=s,
         dtype=dtype,
@@ -258,7 +258,7 @@ class BottleneckConvLSTMCell(contrib_rnn.RNNCell):
     return inputs
 
 
-class GroupedConvLSTMCell(contrib_rnn.RNNCell):
+class GroupedConvLSTMCell(tf.nn.rnn_cell.RNNCell):
   """Basic LSTM recurrent network cell using separable convolutions.
 
   The implementation is based on: https://arxiv.org/abs/1903.10172.
@@ -350,12 +350,14 @@ class GroupedConvLSTMCell(contrib_rnn.RNNCell):
 
   @property
   def state_size(self):
-    return contrib_rnn.LSTMStateTuple(self._output_size + [self._num_units],
-                                      self._output_size + [self._num_units])
+    return tf.nn.rnn_cell.LSTMStateTuple(
+        self._output_size + [self._num_units],
+        self._output_size + [self._num_units])
 
   @property
   def state_size_flat(self):
-    return contrib_rnn.LSTMStateTuple([self._param_count], [self._param_count])
+    return tf.nn.rnn_cell.LSTMStateTuple([self._param_count],
+                                         [self._param_count])
 
   @property
   def output_size(self):
@@ -620,7 +622,7 @@ class GroupedConvLSTMCell(contrib_rnn.RNNCell):
       with tf.name_scope(None):
         new_c = tf.identity(new_c, name='raw_outputs/lstm_c')
         new_h = tf.identity(new_h, name='raw_outputs/lstm_h')
-      states_and_output = contrib_rnn.LSTMStateTuple(new_c, new_h)
+      states_and_output = tf.nn.rnn_cell.LSTMStateTuple(new_c, new_h)
 
       return output, states_and_output
 
@@ -642,7 +644,7 @@ class GroupedConvLSTMCell(contrib_rnn.RNNCell):
     # list of 2 zero tensors or variables tensors,
     # depending on if learned_state is true
     # pylint: disable=g-long-ternary,g-complex-comprehension
-    ret_flat = [(contrib_variables.model_variable(
+    ret_flat = [(slim.model_variable(
         state_name + str(i),
         shape=s,
         dtype=dtype,
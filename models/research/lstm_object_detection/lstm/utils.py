@@ -19,8 +19,7 @@ from __future__ import absolute_import
 from __future__ import division
 
 import tensorflow.compat.v1 as tf
-from tensorflow.contrib import framework as contrib_framework
-from tensorflow.contrib import layers as contrib_layers
+import tf_slim as slim
 from tensorflow.python.training import moving_averages
 
 
@@ -30,7 +29,7 @@ def _quant_var(
     vars_collection=tf.GraphKeys.MOVING_AVERAGE_VARIABLES,
 ):
   """Create an var for storing the min/max quantization range."""
-  return contrib_framework.model_variable(
+  return slim.model_variable(
       name,
       shape=[],
       initializer=tf.constant_initializer(initializer_val),
@@ -155,7 +154,7 @@ def quantizable_separable_conv2d(inputs,
     Tensor resulting from concatenation of input tensors
   """
   if is_quantized:
-    outputs = contrib_layers.separable_conv2d(
+    outputs = slim.separable_conv2d(
         inputs,
         None,
         kernel_size,
@@ -167,9 +166,9 @@ def quantizable_separable_conv2d(inputs,
         weights_initializer=weights_initializer,
         pointwise_initializer=None,
         scope=scope)
-    outputs = contrib_layers.bias_add(
+    outputs = slim.bias_add(
         outputs, trainable=True, scope='%s_bias' % scope)
-    outputs = contrib_layers.conv2d(
+    outputs = slim.conv2d(
         outputs,
         num_outputs, [1, 1],
         activation_fn=activation_fn,
@@ -178,7 +177,7 @@ def quantizable_separable_conv2d(inputs,
         weights_initializer=pointwise_initializer,
         scope=scope)
   else:
-    outputs = contrib_layers.separable_conv2d(
+    outputs = slim.separable_conv2d(
         inputs,
         num_outputs,
         kernel_size,
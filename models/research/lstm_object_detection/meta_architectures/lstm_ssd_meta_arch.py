@@ -91,11 +91,67 @@ class LSTMSSDMetaArch(ssd_meta_arch.SSDMetaArch):
       feature_maps = self._feature_extractor.extract_features(
           preprocessed_inputs, states, state_name,
           unroll_length=self._unroll_length, scope=feature_scope)
+    self._batch_size = preprocessed_inputs.shape[0].value / self._unroll_length
+    self._states = states
+    predictions_dict = self._predict_boxes(preprocessed_inputs, feature_maps)
+    predictions_dict['states_and_outputs'] = (
+        self._feature_extractor.states_and_outputs)
+    # In cases such as exporting the model, the states is always zero. Thus the
+    # step should be ignored.
+    if states is not None:
+      predictions_dict['step'] = self._feature_extractor.step
+    return predictions_dict
+
+  def predict_frame(self, preprocessed_inputs, true_image_shapes, lstm_state,
+                    key_frame=True, feature_scope=None):
+    """Predicts a single frame with an explicit LSTM state.
+
+    Unlike `predict`, which unrolls the LSTM over `unroll_length` frames and
+    runs every base network on every frame, only one base network runs per
+    call: the large one on key frames and the small one otherwise. The caller
+    carries the LSTM state from one frame to the next, so the interleaving
+    schedule is decided outside of the graph. Only interleaved feature
+    extractors support this.
+
+    Args:
+      preprocessed_inputs: a [1, height, width, channels] float tensor of a
+        single preprocessed frame.
+      true_image_shapes: int32 tensor of shape [1, 3] holding the true shape of
+        the frame, see `preprocess`.
+      lstm_state: a tuple (c, h) of rank 4 float tensors, the LSTM state after
+        the previous frame (zeros for the first frame of a video).
+      key_frame: whether to run the large base network.
+      feature_scope: Scope for the base network of the feature extractor.
+
+    Returns:
+      prediction_dict: a dictionary holding the prediction tensors of `predict`
+        except for `states_and_outputs` and `step`.
+      lstm_state: a tuple (c, h), the LSTM state after this frame.
+
+    Raises:
+      ValueError: if the feature extractor is not interleaved.
+    """
+    del true_image_shapes  # Unused.
+    if not self._feature_extractor.interleaved:
+      raise ValueError('Only interleaved models can be run frame by frame.')
+    with tf.variable_scope(self._extract_features_scope,
+                           values=[preprocessed_inputs], reuse=tf.AUTO_REUSE):
+      feature_maps, lstm_state = (
+          self._feature_extractor.extract_frame_features(
+              preprocessed_inputs, lstm_state, key_frame=key_frame,
+              scope=feature_scope))
+    self._batch_size = preprocessed_inputs.shape[0].value
+    # Key frames and other frames share the box predictor when both are built
+    # into one graph.
+    with tf.variable_scope(tf.get_variable_scope(), reuse=tf.AUTO_REUSE):
+      prediction_dict = self._predict_boxes(preprocessed_inputs, feature_maps)
+    return prediction_dict, lstm_state
+
+  def _predict_boxes(self, preprocessed_inputs, feature_maps):
+    """Generates the anchors and predicts the boxes of the feature maps."""
     feature_map_spatial_dims = self._get_feature_map_spatial_dims(feature_maps)
     image_shape = shape_utils.combined_static_and_dynamic_shape(
         preprocessed_inputs)
-    self._batch_size = preprocessed_inputs.shape[0].value / self._unroll_length
-    self._states = states
     anchors = self._anchor_generator.generate(feature_map_spatial_dims,
                                               im_height=image_shape[1],
                                               im_width=image_shape[2])
@@ -109,19 +165,13 @@ class LSTMSSDMetaArch(ssd_meta_arch.SSDMetaArch):
         box_encodings = tf.squeeze(box_encodings, axis=2)
       class_predictions_with_background = tf.concat(
           prediction_dict['class_predictions_with_background'], axis=1)
-    predictions_dict = {
+    return {
         'preprocessed_inputs': preprocessed_inputs,
         'box_encodings': box_encodings,
         'class_predictions_with_background': class_predictions_with_background,
         'feature_maps': feature_maps,
         'anchors': self._anchors.get(),
-        'states_and_outputs': self._feature_extractor.states_and_outputs,
     }
-    # In cases such as exporting the model, the states is always zero. Thus the
-    # step should be ignored.
-    if states is not None:
-      predictions_dict['step'] = self._feature_extractor.step
-    return predictions_dict
 
   def loss(self, prediction_dict, true_image_shapes, scope=None):
     """Computes scalar loss tensors with respect to provided groundtruth.
@@ -461,3 +511,25 @@ class LSTMSSDInterleavedFeatureExtractor(LSTMSSDFeatureExtractor):
       end_points: a dictionary of feature maps created.
     """
     pass
+
+  def extract_frame_features(self, preprocessed_inputs, lstm_state,
+                             key_frame=True, scope=None):
+    """Extract features of a single frame with an explicit LSTM state.
+
+    Args:
+      preprocessed_inputs: a [1, height, width, channels] float tensor of a
+        single preprocessed frame.
+      lstm_state: a tuple (c, h) of rank 4 float tensors, the LSTM state after
+        the previous frame.
+      key_frame: whether to run the large base network instead of the small
+        one.
+      scope: Scope for the base network of the feature extractor.
+
+    Returns:
+      feature_maps: a list of tensors where the ith tensor has shape
+        [1, height_i, width_i, depth_i].
+      lstm_state: a tuple (c, h), the LSTM state after this frame.
+    """
+    raise NotImplementedError(
+        '{} does not support frame by frame inference.'.format(
+            type(self).__name__))
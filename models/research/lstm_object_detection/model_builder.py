@@ -29,7 +29,11 @@ from object_detection.builders import post_processing_builder
 from object_detection.builders import region_similarity_calculator_builder as sim_calc
 from object_detection.core import target_assigner
 
-model_builder.SSD_FEATURE_EXTRACTOR_CLASS_MAP.update({
+# The slim SSD feature extractors are only registered with TF1, the LSTM models
+# are graph mode models and are built with tf.compat.v1 under TF2 as well.
+SSD_FEATURE_EXTRACTOR_CLASS_MAP = getattr(
+    model_builder, 'SSD_FEATURE_EXTRACTOR_CLASS_MAP', {})
+SSD_FEATURE_EXTRACTOR_CLASS_MAP.update({
     'lstm_ssd_mobilenet_v1':
         lstm_ssd_mobilenet_v1_feature_extractor
         .LSTMSSDMobileNetV1FeatureExtractor,
@@ -37,7 +41,6 @@ model_builder.SSD_FEATURE_EXTRACTOR_CLASS_MAP.update({
         lstm_ssd_interleaved_mobilenet_v2_feature_extractor
         .LSTMSSDInterleavedMobilenetV2FeatureExtractor,
 })
-SSD_FEATURE_EXTRACTOR_CLASS_MAP = model_builder.SSD_FEATURE_EXTRACTOR_CLASS_MAP
 
 
 def build(model_config, lstm_config, is_training):
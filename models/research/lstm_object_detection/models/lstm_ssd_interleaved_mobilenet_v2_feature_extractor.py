@@ -286,13 +286,74 @@ class LSTMSSDInterleavedMobilenetV2FeatureExtractor(
       else:
         image_features['layer_19'] = tf.concat(net_seq, 0)
 
-      # SSD layers.
-      with tf.variable_scope('FeatureMap'):
-        feature_maps = feature_map_generators.multi_resolution_feature_maps(
-            feature_map_layout=self._feature_map_layout,
-            depth_multiplier=self._depth_multiplier,
-            min_depth=self._min_depth,
-            insert_1x1_conv=True,
-            image_features=image_features,
-            pool_residual=True)
+      return self._extract_feature_maps(image_features)
+
+  def extract_frame_features(self, preprocessed_inputs, lstm_state,
+                             key_frame=True, scope=None):
+    """Extract features of a single frame with an explicit LSTM state.
+
+    Only the large base network runs on key frames and only the small one on
+    the other frames. As in `extract_features`, the LSTM state is not updated
+    on frames of the small base network.
+
+    Args:
+      preprocessed_inputs: a [1, height, width, channels] float tensor of a
+        single preprocessed frame.
+      lstm_state: a tuple (c, h) of rank 4 float tensors, the LSTM state after
+        the previous frame. The static shape is set from the base network
+        output, so the spatial dimensions and depth may be unknown.
+      key_frame: whether to run the large base network instead of the small
+        one.
+      scope: Scope for the base network of the feature extractor.
+
+    Returns:
+      feature_maps: a list of tensors where the ith tensor has shape
+        [1, height_i, width_i, depth_i].
+      lstm_state: a tuple (c, h), the LSTM state after this frame.
+    """
+    del scope  # Unused, as in `extract_features`.
+    preprocessed_inputs = shape_utils.check_min_image_dim(
+        33, preprocessed_inputs)
+    preprocessed_inputs = ops.pad_to_multiple(
+        preprocessed_inputs, self._pad_to_multiple)
+    batch_size = preprocessed_inputs.shape[0].value
+    input_index = 0 if key_frame else 1
+
+    with slim.arg_scope(mobilenet_v2.training_scope(
+        is_training=self._is_training,
+        bn_decay=0.9997)), \
+        slim.arg_scope([mobilenet.depth_multiplier],
+                       min_depth=self._min_depth, divisible_by=8):
+      if key_frame:
+        net, _ = self.extract_base_features_large(preprocessed_inputs)
+      else:
+        net, _ = self.extract_base_features_small(preprocessed_inputs)
+
+    with slim.arg_scope(self._conv_hyperparams_fn()):
+      with tf.variable_scope('LSTM', reuse=self._reuse_weights):
+        output_size = (net.shape[1].value, net.shape[2].value)
+        lstm_cell, _, _ = self.create_lstm_cell(
+            batch_size, output_size, None, 'lstm_state',
+            dtype=preprocessed_inputs.dtype)
+        for state, state_size in zip(lstm_state, lstm_cell.state_size):
+          state.set_shape([batch_size] + state_size)
+        if self._pre_bottleneck:
+          net = lstm_cell.pre_bottleneck(
+              inputs=net, state=lstm_state[1], input_index=input_index)
+        output, new_state = lstm_cell(net, lstm_state)
+        if key_frame:
+          lstm_state = tuple(new_state)
+
+      return self._extract_feature_maps({'layer_19': output}), lstm_state
+
+  def _extract_feature_maps(self, image_features):
+    """Returns the SSD feature maps of the LSTM output."""
+    with tf.variable_scope('FeatureMap'):
+      feature_maps = feature_map_generators.multi_resolution_feature_maps(
+          feature_map_layout=self._feature_map_layout,
+          depth_multiplier=self._depth_multiplier,
+          min_depth=self._min_depth,
+          insert_1x1_conv=True,
+          image_features=image_features,
+          pool_residual=True)
     return list(feature_maps.values())
@@ -312,6 +312,40 @@ class LSTMSSDInterleavedMobilenetV2FeatureExtractorTest(
     # state should no longer be zero after update
     self.assertTrue(state.any())
 
+  def test_extract_frame_features(self):
+    image_height = 128
+    image_width = 128
+    depth_multiplier = 1.0
+    pad_to_multiple = 1
+    image = tf.random_uniform([1, image_height, image_width, 3])
+    lstm_state = (tf.placeholder(tf.float32, [1, None, None, None]),
+                  tf.placeholder(tf.float32, [1, None, None, None]))
+    feature_extractor = self._create_feature_extractor(depth_multiplier,
+                                                       pad_to_multiple)
+    with tf.variable_scope('FeatureExtractor', reuse=tf.AUTO_REUSE):
+      _ = feature_extractor.extract_features(image, unroll_length=1)
+      num_variables = len(tf.global_variables())
+      key_frame_maps, key_frame_state = (
+          feature_extractor.extract_frame_features(image, lstm_state))
+      frame_maps, frame_state = feature_extractor.extract_frame_features(
+          image, lstm_state, key_frame=False)
+    # Both frame types reuse the variables of the unrolled model.
+    self.assertEqual(len(tf.global_variables()), num_variables)
+    self.assertAllEqual(lstm_state[0].shape.as_list(), [1, 4, 4, 320])
+    self.assertAllEqual(key_frame_maps[0].shape.as_list(), [1, 4, 4, 640])
+    self.assertAllEqual(frame_maps[0].shape.as_list(), [1, 4, 4, 640])
+
+    state = np.random.rand(1, 4, 4, 320).astype(np.float32)
+    with tf.Session() as sess:
+      sess.run(tf.global_variables_initializer())
+      key_frame_state, frame_state = sess.run(
+          [key_frame_state, frame_state],
+          feed_dict={lstm_state[0]: state, lstm_state[1]: state})
+    # Only the large base network updates the state.
+    self.assertFalse(np.all(np.equal(key_frame_state[0], state)))
+    self.assertAllEqual(frame_state[0], state)
+    self.assertAllEqual(frame_state[1], state)
+
   def check_extract_features_returns_correct_shape(
       self, batch_size, image_height, image_width, depth_multiplier,
       pad_to_multiple, expected_feature_map_shapes, unroll_length=1):
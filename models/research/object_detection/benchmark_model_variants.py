@@ -0,0 +1,179 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Compares a lighter SSD FPN model variant with an exported model.
+
+Measures the throughput (images/s at batch size 1) of the exported SavedModel
+and of a variant built with builders/model_variant_builder.py from the
+pipeline config of the exported model, e.g. with fewer FPN levels and a slimmer
+box predictor head. Both are called with the same uint8 image tensor input as
+the `serving_default` signature of the exported model.
+
+The accuracy metrics of the eval input reader (`metrics_set` of the eval
+config) are computed for the exported model and, if --variant_checkpoint_dir
+is set, for the trained variant. Without a checkpoint, only the throughput of
+the (untrained) variant is measured.
+
+Example usage:
+python benchmark_model_variants.py \
+  --pipeline_config_path=path/to/exported_model/pipeline.config \
+  --saved_model_dir=path/to/exported_model/saved_model \
+  --fpn_max_level=5 \
+  --head_depth=64 \
+  --head_num_layers=2 \
+  --single_class_head \
+  --variant_checkpoint_dir=path/to/variant/checkpoint \
+  --alsologtostderr
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+from object_detection import eval_util
+from object_detection import exporter_lib_v2
+from object_detection.builders import model_variant_builder
+from object_detection.utils import config_util
+
+flags.DEFINE_string('pipeline_config_path', None,
+                    'Path to the pipeline config of the exported model.')
+flags.DEFINE_string('saved_model_dir', None,
+                    'Path to the SavedModel of the exported model.')
+flags.DEFINE_string('variant_checkpoint_dir', None,
+                    'Optional checkpoint directory of the trained variant. '
+                    'If not set, only the throughput of the variant is '
+                    'measured.')
+flags.DEFINE_integer('fpn_min_level', None, 'Finest FPN level of the variant.')
+flags.DEFINE_integer('fpn_max_level', None,
+                     'Coarsest FPN level of the variant.')
+flags.DEFINE_integer('head_depth', None,
+                     'Depth of the box predictor tower of the variant.')
+flags.DEFINE_integer('head_num_layers', None,
+                     'Number of layers of the box predictor tower of the '
+                     'variant.')
+flags.DEFINE_bool('single_class_head', False,
+                  'Whether the variant uses a single class head.')
+flags.DEFINE_integer('num_warmup_runs', 10,
+                     'Number of untimed runs before the throughput is '
+                     'measured.')
+flags.DEFINE_integer('num_timing_runs', 100,
+                     'Number of timed runs of every model.')
+flags.DEFINE_integer('num_eval_examples', 0,
+                     'Number of eval examples, all examples if 0.')
+
+FLAGS = flags.FLAGS
+
+
+def measure_throughput(detect_fn, image_height, image_width, num_warmup_runs,
+                       num_timing_runs):
+  """Returns the images/s of a detection function on random images.
+
+  Args:
+    detect_fn: A function taking a uint8 image tensor of shape
+      [1, height, width, 3] and returning a dict of detection tensors.
+    image_height: Height of the images.
+    image_width: Width of the images.
+    num_warmup_runs: Number of untimed runs (tracing, memory allocation).
+    num_timing_runs: Number of timed runs.
+
+  Returns:
+    The number of images per second.
+  """
+  image = tf.constant(np.random.randint(
+      0, 256, size=(1, image_height, image_width, 3)).astype(np.uint8))
+  for _ in range(num_warmup_runs):
+    detect_fn(image)['num_detections'].numpy()
+  start_time = time.time()
+  for _ in range(num_timing_runs):
+    detect_fn(image)['num_detections'].numpy()
+  return num_timing_runs / (time.time() - start_time)
+
+
+def build_variant_detect_fn(model_config, variant_checkpoint_dir=None,
+                            **variant_kwargs):
+  """Returns a detection function of a model variant.
+
+  Args:
+    model_config: A model.proto object of the exported SSD FPN model.
+    variant_checkpoint_dir: optional, checkpoint directory of the trained
+      variant.
+    **variant_kwargs: Variant parameters, see
+      model_variant_builder.build_variant_config.
+
+  Returns:
+    A function with the inputs and outputs of an exported model.
+  """
+  detection_model = model_variant_builder.build(
+      model_config, is_training=False, **variant_kwargs)
+  if variant_checkpoint_dir:
+    checkpoint = tf.train.Checkpoint(model=detection_model)
+    checkpoint.restore(
+        tf.train.latest_checkpoint(variant_checkpoint_dir)).expect_partial()
+  return exporter_lib_v2.DetectionFromImageModule(detection_model).__call__
+
+
+def _log_results(name, images_per_second, metrics):
+  logging.info('%s: %.1f images/s', name, images_per_second)
+  for metric_name, value in sorted(metrics.items()):
+    logging.info('  %s: %.4f', metric_name, value)
+
+
+def main(unused_argv):
+  flags.mark_flag_as_required('pipeline_config_path')
+  flags.mark_flag_as_required('saved_model_dir')
+  tf.enable_v2_behavior()
+  configs = config_util.get_configs_from_pipeline_file(
+      FLAGS.pipeline_config_path)
+  image_height, image_width = config_util.get_spatial_image_size(
+      config_util.get_image_resizer_config(configs['model']))
+  if image_height <= 0 or image_width <= 0:
+    raise ValueError('Only models with a fixed input size are supported.')
+
+  exported_detect_fn = tf.saved_model.load(FLAGS.saved_model_dir)
+  exported_images_per_second = measure_throughput(
+      exported_detect_fn, image_height, image_width, FLAGS.num_warmup_runs,
+      FLAGS.num_timing_runs)
+  _log_results('Exported model', exported_images_per_second,
+               eval_util.evaluate_detection_fn(
+                   exported_detect_fn, configs, FLAGS.num_eval_examples))
+
+  variant_detect_fn = build_variant_detect_fn(
+      configs['model'],
+      variant_checkpoint_dir=FLAGS.variant_checkpoint_dir,
+      fpn_min_level=FLAGS.fpn_min_level,
+      fpn_max_level=FLAGS.fpn_max_level,
+      head_depth=FLAGS.head_depth,
+      head_num_layers=FLAGS.head_num_layers,
+      single_class_head=FLAGS.single_class_head)
+  variant_images_per_second = measure_throughput(
+      variant_detect_fn, image_height, image_width, FLAGS.num_warmup_runs,
+      FLAGS.num_timing_runs)
+  variant_metrics = {}
+  if FLAGS.variant_checkpoint_dir:
+    variant_metrics = eval_util.evaluate_detection_fn(
+        variant_detect_fn, configs, FLAGS.num_eval_examples)
+  _log_results('Variant', variant_images_per_second, variant_metrics)
+  logging.info('Variant speedup: %.2fx',
+               variant_images_per_second / exported_images_per_second)
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,176 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Benchmarks the vectorized box evaluation of PerImageEvaluation.
+
+Evaluates random images with the vectorized path of
+`PerImageEvaluation.compute_object_detection_metrics` and with the per class
+evaluation (`_compute_tp_fp` and `_compute_cor_loc`), checks that both give
+identical results and logs the time per image of both.
+
+Example usage:
+python benchmark_per_image_evaluation.py \
+  --num_images=200 \
+  --num_detections=300 \
+  --num_groundtruth=20 \
+  --num_classes=90 \
+  --alsologtostderr
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+import numpy as np
+
+from object_detection.utils import per_image_evaluation
+
+flags.DEFINE_integer('num_images', 200, 'Number of random images.')
+flags.DEFINE_integer('num_detections', 300, 'Number of detections per image.')
+flags.DEFINE_integer('num_groundtruth', 20,
+                     'Number of groundtruth boxes per image.')
+flags.DEFINE_integer('num_classes', 90, 'Number of classes.')
+flags.DEFINE_integer('num_image_classes', 5,
+                     'Number of classes of the detections and groundtruth '
+                     'boxes of an image.')
+flags.DEFINE_float('nms_iou_threshold', 0.3, 'NMS IOU threshold.')
+flags.DEFINE_integer('nms_max_output_boxes', 50,
+                     'Maximum number of boxes per class after NMS.')
+flags.DEFINE_float('group_of_fraction', 0.1,
+                   'Fraction of group-of groundtruth boxes.')
+flags.DEFINE_integer('seed', 0, 'Seed of the random images.')
+
+FLAGS = flags.FLAGS
+
+
+def _random_boxes(num_boxes, random_state):
+  corners = random_state.rand(num_boxes, 2) * 0.8
+  sizes = random_state.rand(num_boxes, 2) * 0.2 + 0.01
+  return np.concatenate([corners, corners + sizes], axis=1).astype(np.float32)
+
+
+def random_images(num_images, num_detections, num_groundtruth, num_classes,
+                  num_image_classes, group_of_fraction, seed):
+  """Returns random detections and groundtruth of images.
+
+  The detections are jittered copies of the groundtruth boxes and random
+  boxes.
+
+  Args:
+    num_images: Number of images.
+    num_detections: Number of detections per image.
+    num_groundtruth: Number of groundtruth boxes per image.
+    num_classes: Number of classes.
+    num_image_classes: Number of classes of an image.
+    group_of_fraction: Fraction of group-of groundtruth boxes.
+    seed: Random seed.
+
+  Returns:
+    A list of tuples with the arguments of
+    PerImageEvaluation.compute_object_detection_metrics.
+  """
+  random_state = np.random.RandomState(seed)
+  images = []
+  for _ in range(num_images):
+    image_classes = random_state.choice(
+        num_classes, min(num_image_classes, num_classes), replace=False)
+    groundtruth_boxes = _random_boxes(num_groundtruth, random_state)
+    groundtruth_class_labels = random_state.choice(image_classes,
+                                                   num_groundtruth)
+    copied = random_state.randint(0, num_groundtruth, num_detections // 2)
+    detected_boxes = np.concatenate([
+        groundtruth_boxes[copied] + random_state.normal(
+            scale=0.01, size=(copied.size, 4)).astype(np.float32),
+        _random_boxes(num_detections - copied.size, random_state)])
+    detected_class_labels = np.concatenate([
+        groundtruth_class_labels[copied],
+        random_state.choice(image_classes, num_detections - copied.size)])
+    detected_scores = random_state.rand(num_detections).astype(np.float32)
+    images.append((
+        detected_boxes, detected_scores, detected_class_labels,
+        groundtruth_boxes, groundtruth_class_labels,
+        random_state.rand(num_groundtruth) < 0.05,
+        random_state.rand(num_groundtruth) < group_of_fraction))
+  return images
+
+
+def evaluate_per_class(evaluation, detected_boxes, detected_scores,
+                       detected_class_labels, groundtruth_boxes,
+                       groundtruth_class_labels, groundtruth_is_difficult_list,
+                       groundtruth_is_group_of_list):
+  """Evaluates an image with the per class evaluation of PerImageEvaluation."""
+  detected_boxes, detected_scores, detected_class_labels, _ = (
+      evaluation._remove_invalid_boxes(  # pylint: disable=protected-access
+          detected_boxes, detected_scores, detected_class_labels))
+  scores, tp_fp_labels = evaluation._compute_tp_fp(  # pylint: disable=protected-access
+      detected_boxes, detected_scores, detected_class_labels,
+      groundtruth_boxes, groundtruth_class_labels,
+      groundtruth_is_difficult_list, groundtruth_is_group_of_list)
+  is_class_correctly_detected_in_image = evaluation._compute_cor_loc(  # pylint: disable=protected-access
+      detected_boxes, detected_scores, detected_class_labels,
+      groundtruth_boxes, groundtruth_class_labels)
+  return scores, tp_fp_labels, is_class_correctly_detected_in_image
+
+
+def _time_per_image(evaluate_fn, images):
+  results = []
+  start_time = time.time()
+  for image in images:
+    results.append(evaluate_fn(*image))
+  return (time.time() - start_time) / len(images), results
+
+
+def _are_identical(results, expected_results):
+  for (scores, tp_fp_labels, corloc), (expected_scores, expected_tp_fp_labels,
+                                       expected_corloc) in zip(
+                                           results, expected_results):
+    for array, expected_array in zip(
+        scores + tp_fp_labels + [corloc],
+        expected_scores + expected_tp_fp_labels + [expected_corloc]):
+      if (array.dtype != expected_array.dtype or
+          array.shape != expected_array.shape or
+          array.tobytes() != expected_array.tobytes()):
+        return False
+  return True
+
+
+def main(unused_argv):
+  evaluation = per_image_evaluation.PerImageEvaluation(
+      num_groundtruth_classes=FLAGS.num_classes,
+      nms_iou_threshold=FLAGS.nms_iou_threshold,
+      nms_max_output_boxes=FLAGS.nms_max_output_boxes,
+      group_of_weight=1.0)
+  images = random_images(FLAGS.num_images, FLAGS.num_detections,
+                         FLAGS.num_groundtruth, FLAGS.num_classes,
+                         FLAGS.num_image_classes, FLAGS.group_of_fraction,
+                         FLAGS.seed)
+
+  per_class_time, per_class_results = _time_per_image(
+      lambda *image: evaluate_per_class(evaluation, *image), images)
+  vectorized_time, vectorized_results = _time_per_image(
+      evaluation.compute_object_detection_metrics, images)
+  if not _are_identical(vectorized_results, per_class_results):
+    raise ValueError('The vectorized and the per class evaluation differ.')
+
+  logging.info('Per class evaluation: %.3f ms/image', per_class_time * 1e3)
+  logging.info('Vectorized evaluation: %.3f ms/image', vectorized_time * 1e3)
+  logging.info('Speedup: %.1fx', per_class_time / vectorized_time)
+
+
+if __name__ == '__main__':
+  app.run(main)
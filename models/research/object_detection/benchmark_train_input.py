@@ -0,0 +1,146 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Measures the throughput of the training input pipeline.
+
+Compares the examples/s of inputs.train_input without a cache (decoding and
+preprocessing every example on every epoch) with the cached pipeline
+(`cache_dir` in the train input reader), where the decoded (and, with
+--cache_resized_images, resized) examples are read from a local cache and only
+the data augmentations run on every epoch. The first epoch of the cached
+pipeline fills the cache and is reported separately.
+
+The first epoch is read completely, so use sample_1_of_n_examples in the train
+input reader to benchmark on a part of a big dataset.
+
+Example usage:
+python benchmark_train_input.py \
+  --pipeline_config_path=path/to/pipeline.config \
+  --cache_dir=/tmp/train_input_cache \
+  --num_batches=200 \
+  --alsologtostderr
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import math
+import shutil
+import tempfile
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+import tensorflow.compat.v2 as tf
+
+from object_detection import inputs
+from object_detection.protos import input_reader_pb2
+from object_detection.utils import config_util
+
+flags.DEFINE_string('pipeline_config_path', None,
+                    'Path to pipeline config file.')
+flags.DEFINE_string('cache_dir', None,
+                    'Directory of the cache. If not set, a temporary directory '
+                    'is used and removed at the end.')
+flags.DEFINE_bool('cache_resized_images', False,
+                  'Whether the images are resized before they are cached.')
+flags.DEFINE_integer('num_batches', 100,
+                     'Number of batches measured for every pipeline.')
+
+FLAGS = flags.FLAGS
+
+
+def _count_examples(train_input_config):
+  """Returns the number of examples of one epoch of the train inputs."""
+  filenames = tf.io.gfile.glob(
+      train_input_config.tf_record_input_reader.input_path[:])
+  num_records = sum(1 for _ in tf.data.TFRecordDataset(filenames))
+  return int(math.ceil(num_records /
+                       float(train_input_config.sample_1_of_n_examples or 1)))
+
+
+def _examples_per_second(iterator, num_batches, batch_size):
+  start_time = time.time()
+  for _ in range(num_batches):
+    next(iterator)
+  return num_batches * batch_size / (time.time() - start_time)
+
+
+def benchmark_train_input(configs, cache_dir, cache_resized_images,
+                          num_batches):
+  """Measures the examples/s of the train input pipeline with and without cache.
+
+  Args:
+    configs: A dictionary of configs, see
+      config_util.get_configs_from_pipeline_file.
+    cache_dir: Directory of the cache.
+    cache_resized_images: Whether the images are resized before caching.
+    num_batches: Number of batches measured for every pipeline.
+
+  Returns:
+    A dict with the examples/s of the pipeline without cache ('uncached'),
+    while filling the cache ('cache_fill') and from the cache ('cached').
+  """
+  train_config = configs['train_config']
+  model_config = configs['model']
+  batch_size = train_config.batch_size
+  results = {}
+
+  uncached_input_config = input_reader_pb2.InputReader()
+  uncached_input_config.CopyFrom(configs['train_input_config'])
+  uncached_input_config.ClearField('cache_dir')
+  iterator = iter(inputs.train_input(train_config, uncached_input_config,
+                                     model_config))
+  next(iterator)
+  results['uncached'] = _examples_per_second(iterator, num_batches, batch_size)
+  del iterator
+
+  cached_input_config = input_reader_pb2.InputReader()
+  cached_input_config.CopyFrom(configs['train_input_config'])
+  cached_input_config.cache_dir = cache_dir
+  cached_input_config.cache_resized_images = cache_resized_images
+  num_examples = _count_examples(cached_input_config)
+  num_batches_per_epoch = int(math.ceil(num_examples / float(batch_size)))
+  iterator = iter(inputs.train_input(train_config, cached_input_config,
+                                     model_config))
+  results['cache_fill'] = _examples_per_second(
+      iterator, num_batches_per_epoch, batch_size)
+  next(iterator)
+  results['cached'] = _examples_per_second(iterator, num_batches, batch_size)
+  return results
+
+
+def main(unused_argv):
+  flags.mark_flag_as_required('pipeline_config_path')
+  configs = config_util.get_configs_from_pipeline_file(
+      FLAGS.pipeline_config_path)
+  cache_dir = FLAGS.cache_dir or tempfile.mkdtemp()
+  try:
+    results = benchmark_train_input(configs, cache_dir,
+                                    FLAGS.cache_resized_images,
+                                    FLAGS.num_batches)
+  finally:
+    if not FLAGS.cache_dir:
+      shutil.rmtree(cache_dir, ignore_errors=True)
+
+  logging.info('Without cache: %.1f examples/s', results['uncached'])
+  logging.info('Filling the cache (first epoch): %.1f examples/s',
+               results['cache_fill'])
+  logging.info('From the cache: %.1f examples/s (%.2fx)', results['cached'],
+               results['cached'] / results['uncached'])
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -27,7 +27,10 @@ from __future__ import division
 from __future__ import print_function
 
 import functools
+import hashlib
 import math
+import os
+import six
 import tensorflow.compat.v1 as tf
 
 from object_detection.builders import decoder_builder
@@ -165,6 +168,105 @@ def read_dataset(file_read_func, input_files, config, filename_shard_fn=None):
                                   config.num_readers, config, filename_shard_fn)
 
 
+def cache_file_path(input_reader_config, input_files, cache_key='',
+                    input_context=None):
+  """Returns the path of the file caching the decoded examples of a dataset.
+
+  The file name is a fingerprint of the input files, the input reader config
+  and cache_key, so a changed config never reads the cache of another one.
+
+  Args:
+    input_reader_config: A input_reader_pb2.InputReader object with cache_dir
+      set.
+    input_files: A list of file paths (or glob patterns) to read.
+    cache_key: optional, a string (or bytes) describing everything else that
+      changes the cached examples, e.g. the config of a resizer applied before
+      caching.
+    input_context: optional, A tf.distribute.InputContext object, every input
+      pipeline caches its own shard.
+
+  Returns:
+    The path of the cache file in input_reader_config.cache_dir.
+  """
+  fingerprint = hashlib.sha1()
+  fingerprint.update(input_reader_config.SerializeToString(deterministic=True))
+  for input_file in input_files:
+    fingerprint.update(six.ensure_binary(input_file))
+  fingerprint.update(six.ensure_binary(cache_key))
+  file_name = 'decoded_examples_{}'.format(fingerprint.hexdigest()[:16])
+  if input_context is not None:
+    file_name += '_{}_of_{}'.format(input_context.input_pipeline_id,
+                                    input_context.num_input_pipelines)
+  return os.path.join(input_reader_config.cache_dir, file_name)
+
+
+def _read_and_cache_dataset(file_read_func, input_files, config, decode_fn,
+                            dataset_map_fn, batch_size, cache_transform_fn=None,
+                            cache_key='', input_context=None):
+  """Reads and decodes one epoch of a dataset, caches it and repeats the cache.
+
+  The files are read in a fixed order without repetition, so the cache holds
+  exactly one epoch and is complete at the end of the first epoch. Shuffling
+  (with shuffle_buffer_size) and repetition are applied to the cached examples.
+
+  Args:
+    file_read_func: Function to use in tf_data.parallel_interleave, to read
+      every individual file into a tf.data.Dataset.
+    input_files: A list of file paths to read.
+    config: A input_reader_pb2.InputReader object with cache_dir set.
+    decode_fn: Function decoding a serialized example.
+    dataset_map_fn: Function mapping a function over a dataset, see build.
+    batch_size: Batch size used to determine the number of parallel calls of
+      the legacy map function.
+    cache_transform_fn: optional, a deterministic function applied to the
+      decoded examples before they are cached.
+    cache_key: optional, a string describing cache_transform_fn, see
+      cache_file_path.
+    input_context: optional, A tf.distribute.InputContext object used to shard
+      filenames.
+
+  Returns:
+    A tf.data.Dataset of decoded examples.
+
+  Raises:
+    RuntimeError: If no files are found at the supplied path(s).
+    ValueError: If sample_from_datasets_weights are configured.
+  """
+  if config.sample_from_datasets_weights:
+    raise ValueError('`cache_dir` is not supported with '
+                     '`sample_from_datasets_weights`.')
+  filenames = tf.gfile.Glob(input_files)
+  if not filenames:
+    raise RuntimeError('Did not find any input files matching the glob pattern '
+                       '{}'.format(input_files))
+  if not tf.gfile.IsDirectory(config.cache_dir):
+    tf.gfile.MakeDirs(config.cache_dir)
+  cache_path = cache_file_path(config, filenames, cache_key, input_context)
+  tf.logging.info('Caching the decoded examples of %s in %s' %
+                  (input_files, cache_path))
+
+  filename_dataset = tf.data.Dataset.from_tensor_slices(filenames)
+  filename_shard_fn = shard_function_for_context(input_context)
+  if filename_shard_fn:
+    filename_dataset = filename_shard_fn(filename_dataset)
+  dataset = filename_dataset.apply(
+      tf.data.experimental.parallel_interleave(
+          file_read_func,
+          cycle_length=min(config.num_readers, len(filenames)),
+          block_length=config.read_block_length,
+          sloppy=False))
+  if config.sample_1_of_n_examples > 1:
+    dataset = dataset.shard(config.sample_1_of_n_examples, 0)
+  dataset = dataset_map_fn(dataset, decode_fn, batch_size, config)
+  if cache_transform_fn is not None:
+    dataset = dataset_map_fn(dataset, cache_transform_fn, batch_size, config)
+  dataset = dataset.cache(cache_path)
+  dataset = dataset.repeat(config.num_epochs or None)
+  if config.shuffle:
+    dataset = dataset.shuffle(config.shuffle_buffer_size)
+  return dataset
+
+
 def shard_function_for_context(input_context):
   """Returns a function that shards filenames based on the input context."""
 
@@ -179,12 +281,17 @@ def shard_function_for_context(input_context):
 
 
 def build(input_reader_config, batch_size=None, transform_input_data_fn=None,
-          input_context=None, reduce_to_frame_fn=None):
+          input_context=None, reduce_to_frame_fn=None, cache_transform_fn=None,
+          cache_key=''):
   """Builds a tf.data.Dataset.
 
   Builds a tf.data.Dataset by applying the `transform_input_data_fn` on all
   records. Applies a padded batch to the resulting dataset.
 
+  If `cache_dir` is set in the input reader config, the decoded records (with
+  `cache_transform_fn` applied) are cached on disk during the first epoch and
+  only `reduce_to_frame_fn` and `transform_input_data_fn` run on every epoch.
+
   Args:
     input_reader_config: A input_reader_pb2.InputReader object.
     batch_size: Batch size. If batch size is None, no batching is performed.
@@ -195,6 +302,10 @@ def build(input_reader_config, batch_size=None, transform_input_data_fn=None,
       is being called per-replica.
     reduce_to_frame_fn: Function that extracts frames from tf.SequenceExample
       type input data.
+    cache_transform_fn: optional, a deterministic function applied to the
+      decoded records before they are cached. Only used if `cache_dir` is set.
+    cache_key: optional, a string describing `cache_transform_fn`. Caches of
+      different keys are kept in different files.
 
   Returns:
     A tf.data.Dataset based on the input_reader_config.
@@ -241,15 +352,23 @@ def build(input_reader_config, batch_size=None, transform_input_data_fn=None,
     shard_fn = shard_function_for_context(input_context)
     if input_context is not None:
       batch_size = input_context.get_per_replica_batch_size(batch_size)
-    dataset = read_dataset(
-        functools.partial(tf.data.TFRecordDataset, buffer_size=8 * 1000 * 1000),
-        config.input_path[:], input_reader_config, filename_shard_fn=shard_fn)
-    if input_reader_config.sample_1_of_n_examples > 1:
-      dataset = dataset.shard(input_reader_config.sample_1_of_n_examples, 0)
-    # TODO(rathodv): make batch size a required argument once the old binaries
-    # are deleted.
-    dataset = dataset_map_fn(dataset, decoder.decode, batch_size,
-                             input_reader_config)
+    file_read_func = functools.partial(tf.data.TFRecordDataset,
+                                       buffer_size=8 * 1000 * 1000)
+    if input_reader_config.cache_dir:
+      dataset = _read_and_cache_dataset(
+          file_read_func, config.input_path[:], input_reader_config,
+          decoder.decode, dataset_map_fn, batch_size,
+          cache_transform_fn=cache_transform_fn, cache_key=cache_key,
+          input_context=input_context)
+    else:
+      dataset = read_dataset(file_read_func, config.input_path[:],
+                             input_reader_config, filename_shard_fn=shard_fn)
+      if input_reader_config.sample_1_of_n_examples > 1:
+        dataset = dataset.shard(input_reader_config.sample_1_of_n_examples, 0)
+      # TODO(rathodv): make batch size a required argument once the old
+      # binaries are deleted.
+      dataset = dataset_map_fn(dataset, decoder.decode, batch_size,
+                               input_reader_config)
     if reduce_to_frame_fn:
       dataset = reduce_to_frame_fn(dataset, dataset_map_fn, batch_size,
                                    input_reader_config)
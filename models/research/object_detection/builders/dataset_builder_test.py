@@ -393,6 +393,41 @@ class DatasetBuilderTest(test_case.TestCase):
     self.assertAllEqual([b'0'], output_dict1[fields.InputDataFields.source_id])
     self.assertEqual([b'1'], output_dict2[fields.InputDataFields.source_id])
 
+  def test_build_tf_record_input_reader_with_cache(self):
+    tf_record_path = self.create_tf_record(num_examples_per_shard=2)
+    cache_dir = os.path.join(self.get_temp_dir(), 'cache')
+
+    input_reader_text_proto = """
+      shuffle: false
+      num_readers: 1
+      cache_dir: '{1}'
+      tf_record_input_reader {{
+        input_path: '{0}'
+      }}
+    """.format(tf_record_path, cache_dir)
+    input_reader_proto = input_reader_pb2.InputReader()
+    text_format.Merge(input_reader_text_proto, input_reader_proto)
+
+    def crop_image_fn(tensor_dict):
+      tensor_dict[fields.InputDataFields.image] = (
+          tensor_dict[fields.InputDataFields.image][:2])
+      return tensor_dict
+
+    def graph_fn():
+      dataset = dataset_builder.build(
+          input_reader_proto, batch_size=3, cache_transform_fn=crop_image_fn,
+          cache_key='crop')
+      return get_iterator_next_for_testing(dataset, self.is_tf2())
+
+    output_dict = self.execute(graph_fn, [])
+
+    self.assertAllEqual([b'0', b'1', b'0'],
+                        output_dict[fields.InputDataFields.source_id])
+    self.assertEqual((3, 2, 5, 3),
+                     output_dict[fields.InputDataFields.image].shape)
+    self.assertNotEmpty(
+        tf.gfile.Glob(os.path.join(cache_dir, 'decoded_examples_*')))
+
   def test_sample_one_of_n_shards(self):
     tf_record_path = self.create_tf_record(num_examples_per_shard=4)
 
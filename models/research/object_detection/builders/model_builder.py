@@ -389,6 +389,16 @@ def _build_ssd_model(ssd_config, is_training, add_summaries):
   """
   num_classes = ssd_config.num_classes
   _check_feature_extractor_exists(ssd_config.feature_extractor.type)
+  if (ssd_config.feature_extractor.HasField('fpn') and
+      ssd_config.anchor_generator.HasField('multiscale_anchor_generator')):
+    fpn_config = ssd_config.feature_extractor.fpn
+    anchor_config = ssd_config.anchor_generator.multiscale_anchor_generator
+    if (fpn_config.min_level != anchor_config.min_level or
+        fpn_config.max_level != anchor_config.max_level):
+      raise ValueError(
+          'The FPN levels [{}, {}] do not match the anchor generator levels '
+          '[{}, {}].'.format(fpn_config.min_level, fpn_config.max_level,
+                             anchor_config.min_level, anchor_config.max_level))
 
   # Feature extractor
   feature_extractor = _build_ssd_feature_extractor(
@@ -221,6 +221,17 @@ class ModelBuilderTest(test_case.TestCase, parameterized.TestCase):
     self.assertEqual(model._feature_extractor._fpn_min_level, 3)
     self.assertEqual(model._feature_extractor._fpn_max_level, 7)
 
+  def test_create_ssd_fpn_model_with_mismatched_anchor_levels(self):
+    model_proto = self.create_default_ssd_model_proto()
+    model_proto.ssd.feature_extractor.fpn.min_level = 3
+    model_proto.ssd.feature_extractor.fpn.max_level = 5
+    anchor_generator = (
+        model_proto.ssd.anchor_generator.multiscale_anchor_generator)
+    anchor_generator.min_level = 3
+    anchor_generator.max_level = 7
+    with self.assertRaisesRegex(ValueError, 'do not match'):
+      model_builder.build(model_proto, is_training=True)
+
 
   @parameterized.named_parameters(
       {
@@ -0,0 +1,135 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""Functions to build lighter variants of SSD FPN detection models.
+
+A variant is derived from the model config of an existing SSD model with a FPN
+feature extractor, a multiscale anchor generator and a weight shared box
+predictor:
+
+* The FPN (and the anchors) can be restricted to fewer pyramid levels. Levels
+  above the coarsest level of the backbone add extra convolutions, and the
+  backbone blocks above the coarsest used level are not computed.
+* The shared box predictor tower can be made thinner (`head_depth`) and
+  shallower (`head_num_layers`).
+* For single class models, `single_class_head` shares one tower between the box
+  and class heads and predicts a single sigmoid logit per anchor, without a
+  background class.
+
+A variant has different variables than the model it is derived from and has to
+be trained (e.g. fine-tuned from the same classification checkpoint).
+"""
+
+from object_detection.builders import model_builder
+from object_detection.protos import model_pb2
+
+_SIGMOID_CLASSIFICATION_LOSSES = ('weighted_sigmoid', 'weighted_sigmoid_focal')
+
+
+def build_variant_config(model_config, fpn_min_level=None, fpn_max_level=None,
+                         head_depth=None, head_num_layers=None,
+                         single_class_head=False):
+  """Returns the model config of a lighter variant of an SSD FPN model.
+
+  Args:
+    model_config: A model.proto object of an SSD model with a FPN feature
+      extractor, a multiscale_anchor_generator and a
+      weight_shared_convolutional_box_predictor.
+    fpn_min_level: optional, the finest pyramid level of the variant.
+    fpn_max_level: optional, the coarsest pyramid level of the variant.
+    head_depth: optional, depth of the conv layers of the box predictor tower.
+    head_num_layers: optional, number of conv layers of the box predictor tower
+      before the predictions.
+    single_class_head: Whether to share the predictor tower between the box and
+      class heads and to predict the class without a background class. Only
+      valid for single class models with a sigmoid classification loss.
+
+  Returns:
+    A new model.proto object. model_config is not modified.
+
+  Raises:
+    ValueError: If model_config is not a supported SSD model or the variant
+      parameters are invalid.
+  """
+  if model_config.WhichOneof('model') != 'ssd':
+    raise ValueError('Model variants are only supported for SSD models.')
+  ssd_config = model_config.ssd
+  if not ssd_config.feature_extractor.HasField('fpn'):
+    raise ValueError('Model variants need a FPN feature extractor.')
+  if not ssd_config.anchor_generator.HasField('multiscale_anchor_generator'):
+    raise ValueError('Model variants need a multiscale_anchor_generator.')
+  if not ssd_config.box_predictor.HasField(
+      'weight_shared_convolutional_box_predictor'):
+    raise ValueError('Model variants need a '
+                     'weight_shared_convolutional_box_predictor.')
+
+  variant_config = model_pb2.DetectionModel()
+  variant_config.CopyFrom(model_config)
+  ssd_config = variant_config.ssd
+  fpn_config = ssd_config.feature_extractor.fpn
+  if fpn_min_level is not None:
+    fpn_config.min_level = fpn_min_level
+  if fpn_max_level is not None:
+    fpn_config.max_level = fpn_max_level
+  if fpn_config.min_level > fpn_config.max_level:
+    raise ValueError('fpn_min_level {} is larger than fpn_max_level {}.'.format(
+        fpn_config.min_level, fpn_config.max_level))
+  anchor_config = ssd_config.anchor_generator.multiscale_anchor_generator
+  anchor_config.min_level = fpn_config.min_level
+  anchor_config.max_level = fpn_config.max_level
+
+  box_predictor_config = (
+      ssd_config.box_predictor.weight_shared_convolutional_box_predictor)
+  if head_depth is not None:
+    if head_depth <= 0:
+      raise ValueError('head_depth must be positive, got {}.'.format(
+          head_depth))
+    box_predictor_config.depth = head_depth
+  if head_num_layers is not None:
+    if head_num_layers < 0:
+      raise ValueError('head_num_layers must not be negative, got {}.'.format(
+          head_num_layers))
+    box_predictor_config.num_layers_before_predictor = head_num_layers
+
+  if single_class_head:
+    if ssd_config.num_classes != 1:
+      raise ValueError('single_class_head needs a single class model, got {} '
+                       'classes.'.format(ssd_config.num_classes))
+    if (ssd_config.loss.classification_loss.WhichOneof('classification_loss')
+        not in _SIGMOID_CLASSIFICATION_LOSSES):
+      raise ValueError('single_class_head needs a sigmoid classification '
+                       'loss.')
+    box_predictor_config.share_prediction_tower = True
+    ssd_config.add_background_class = False
+    ssd_config.encode_background_as_zeros = True
+  return variant_config
+
+
+def build(model_config, is_training, add_summaries=True, **variant_kwargs):
+  """Builds a lighter variant of an SSD FPN model.
+
+  Args:
+    model_config: A model.proto object of an SSD FPN model, see
+      build_variant_config.
+    is_training: True if this model is being built for training purposes.
+    add_summaries: Whether to add tensorflow summaries in the model graph.
+    **variant_kwargs: Variant parameters passed to build_variant_config.
+
+  Returns:
+    DetectionModel of the variant.
+  """
+  return model_builder.build(
+      build_variant_config(model_config, **variant_kwargs), is_training,
+      add_summaries)
@@ -0,0 +1,194 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for model_variant_builder."""
+
+import unittest
+
+import numpy as np
+import tensorflow.compat.v1 as tf
+
+from google.protobuf import text_format
+from object_detection.builders import model_variant_builder
+from object_detection.protos import model_pb2
+from object_detection.utils import test_case
+from object_detection.utils import tf_version
+
+_SSD_FPN_MODEL_CONFIG = """
+  ssd {
+    num_classes: 1
+    image_resizer {
+      fixed_shape_resizer {
+        height: 320
+        width: 320
+      }
+    }
+    feature_extractor {
+      type: "ssd_mobilenet_v2_fpn_keras"
+      depth_multiplier: 1.0
+      min_depth: 16
+      conv_hyperparams {
+        regularizer {
+          l2_regularizer {
+          }
+        }
+        initializer {
+          random_normal_initializer {
+          }
+        }
+      }
+      use_depthwise: true
+      override_base_feature_extractor_hyperparams: true
+      fpn {
+        min_level: 3
+        max_level: 7
+        additional_layer_depth: 128
+      }
+    }
+    box_coder {
+      faster_rcnn_box_coder {
+      }
+    }
+    matcher {
+      argmax_matcher {
+      }
+    }
+    similarity_calculator {
+      iou_similarity {
+      }
+    }
+    box_predictor {
+      weight_shared_convolutional_box_predictor {
+        conv_hyperparams {
+          regularizer {
+            l2_regularizer {
+            }
+          }
+          initializer {
+            random_normal_initializer {
+            }
+          }
+        }
+        depth: 128
+        num_layers_before_predictor: 4
+        kernel_size: 3
+        use_depthwise: true
+      }
+    }
+    anchor_generator {
+      multiscale_anchor_generator {
+        min_level: 3
+        max_level: 7
+        anchor_scale: 4.0
+        aspect_ratios: [1.0, 2.0, 0.5]
+        scales_per_octave: 2
+      }
+    }
+    post_processing {
+      batch_non_max_suppression {
+        score_threshold: 1e-8
+        iou_threshold: 0.6
+        max_detections_per_class: 100
+        max_total_detections: 100
+      }
+      score_converter: SIGMOID
+    }
+    loss {
+      localization_loss {
+        weighted_smooth_l1 {
+        }
+      }
+      classification_loss {
+        weighted_sigmoid_focal {
+        }
+      }
+    }
+  }"""
+
+
+class ModelVariantBuilderTest(test_case.TestCase):
+
+  def _model_config(self):
+    return text_format.Merge(_SSD_FPN_MODEL_CONFIG, model_pb2.DetectionModel())
+
+  def test_build_variant_config(self):
+    model_config = self._model_config()
+
+    variant_config = model_variant_builder.build_variant_config(
+        model_config, fpn_max_level=5, head_depth=64, head_num_layers=2)
+
+    ssd_config = variant_config.ssd
+    self.assertEqual(ssd_config.feature_extractor.fpn.min_level, 3)
+    self.assertEqual(ssd_config.feature_extractor.fpn.max_level, 5)
+    anchor_config = ssd_config.anchor_generator.multiscale_anchor_generator
+    self.assertEqual((anchor_config.min_level, anchor_config.max_level), (3, 5))
+    box_predictor_config = (
+        ssd_config.box_predictor.weight_shared_convolutional_box_predictor)
+    self.assertEqual(box_predictor_config.depth, 64)
+    self.assertEqual(box_predictor_config.num_layers_before_predictor, 2)
+    self.assertFalse(box_predictor_config.share_prediction_tower)
+    self.assertTrue(ssd_config.add_background_class)
+    self.assertEqual(model_config, self._model_config())
+
+  def test_build_single_class_head_config(self):
+    variant_config = model_variant_builder.build_variant_config(
+        self._model_config(), single_class_head=True)
+
+    self.assertFalse(variant_config.ssd.add_background_class)
+    self.assertTrue(variant_config.ssd.box_predictor
+                    .weight_shared_convolutional_box_predictor
+                    .share_prediction_tower)
+
+  def test_single_class_head_raises_error_with_multiple_classes(self):
+    model_config = self._model_config()
+    model_config.ssd.num_classes = 2
+
+    with self.assertRaisesRegex(ValueError, 'single class'):
+      model_variant_builder.build_variant_config(model_config,
+                                                 single_class_head=True)
+
+  def test_single_class_head_raises_error_with_softmax_loss(self):
+    model_config = self._model_config()
+    model_config.ssd.loss.classification_loss.weighted_softmax.SetInParent()
+
+    with self.assertRaisesRegex(ValueError, 'sigmoid'):
+      model_variant_builder.build_variant_config(model_config,
+                                                 single_class_head=True)
+
+  def test_raises_error_with_invalid_levels(self):
+    with self.assertRaisesRegex(ValueError, 'larger than'):
+      model_variant_builder.build_variant_config(
+          self._model_config(), fpn_min_level=5, fpn_max_level=4)
+
+  @unittest.skipIf(tf_version.is_tf1(), 'Skipping TF2.X only test.')
+  def test_build_variant(self):
+    model = model_variant_builder.build(
+        self._model_config(), is_training=False, fpn_max_level=4,
+        head_depth=32, head_num_layers=1, single_class_head=True)
+
+    def graph_fn(images):
+      preprocessed_images, true_image_shapes = model.preprocess(images)
+      prediction_dict = model.predict(preprocessed_images, true_image_shapes)
+      return (prediction_dict['box_encodings'],
+              prediction_dict['class_predictions_with_background'])
+
+    box_encodings, class_predictions = self.execute(
+        graph_fn, [np.zeros((1, 320, 320, 3), np.float32)])
+    # 6 anchors on a 40x40 and a 20x20 grid, one class logit per anchor.
+    self.assertEqual(box_encodings.shape, (1, 6 * (40 * 40 + 20 * 20), 4))
+    self.assertEqual(class_predictions.shape, (1, 6 * (40 * 40 + 20 * 20), 1))
+
+
+if __name__ == '__main__':
+  tf.test.main()
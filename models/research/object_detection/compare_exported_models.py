@@ -0,0 +1,218 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Compares the latency and accuracy of exported models.
+
+E.g. the SSD MobileNetV2 FPNLite drone model and the CenterNet MobileNetV2 FPN
+drone model (configs/tf2/centernet_mobilenet_v2_fpn_320x320_drone.config).
+Every model is a directory written by exporter_main_v2.py, holding the
+SavedModel and the pipeline config.
+
+The latency of a call of every model is measured on a random uint8 frame of
+--frame_height x --frame_width (the size of the camera frames), models exported
+with the `fixed_shape_image_tensor` input type get a frame of their input
+shape. The accuracy metrics (`metrics_set` of the eval config) are computed on
+the eval input reader of --pipeline_config_path, by default the pipeline
+config of the first model, the eval images are resized to the input shape of
+fixed shape models. The eval images are RGB, compare the accuracy of models
+exported without --bgr_input.
+
+Example usage:
+python compare_exported_models.py \
+  --exported_model_dirs=path/to/ssd_drone_model,path/to/centernet_drone_model \
+  --pipeline_config_path=path/to/centernet_drone_model/pipeline.config \
+  --frame_height=720 \
+  --frame_width=1280 \
+  --alsologtostderr
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+from object_detection import eval_util
+from object_detection.utils import config_util
+
+flags.DEFINE_list('exported_model_dirs', None,
+                  'A comma separated list of directories of exported models, '
+                  'each holding a saved_model directory and a '
+                  'pipeline.config.')
+flags.DEFINE_string('pipeline_config_path', None,
+                    'Path to the pipeline config with the eval input reader '
+                    'and eval config all models are evaluated with. Defaults '
+                    'to the pipeline config of the first model.')
+flags.DEFINE_integer('frame_height', 480,
+                     'Height of the frames the latency is measured on.')
+flags.DEFINE_integer('frame_width', 640,
+                     'Width of the frames the latency is measured on.')
+flags.DEFINE_integer('num_warmup_runs', 10,
+                     'Number of untimed runs before the latency is measured.')
+flags.DEFINE_integer('num_timing_runs', 100,
+                     'Number of timed runs of every model.')
+flags.DEFINE_integer('num_eval_examples', 0,
+                     'Number of eval examples, all examples if 0. No metrics '
+                     'are computed if negative.')
+
+FLAGS = flags.FLAGS
+
+
+def get_fixed_input_shape(detect_fn):
+  """Returns the [height, width] of the input of a fixed shape model.
+
+  Args:
+    detect_fn: A loaded SavedModel.
+
+  Returns:
+    The [height, width] of the `input_tensor` of the `serving_default`
+    signature, None if the height or width is not fixed.
+  """
+  try:
+    signature = detect_fn.signatures['serving_default']
+    input_spec = signature.structured_input_signature[1]['input_tensor']
+  except (AttributeError, KeyError, IndexError):
+    return None
+  height, width = input_spec.shape.as_list()[1:3]
+  if height is None or width is None:
+    return None
+  return [height, width]
+
+
+def measure_latencies(detect_fn, image, num_warmup_runs, num_timing_runs):
+  """Returns the latencies of a detection function on an image.
+
+  Args:
+    detect_fn: A function taking a uint8 image tensor of shape
+      [1, height, width, 3] and returning a dict of detection tensors.
+    image: A uint8 image tensor of shape [1, height, width, 3].
+    num_warmup_runs: Number of untimed runs (tracing, memory allocation).
+    num_timing_runs: Number of timed runs.
+
+  Returns:
+    A float numpy array with the latencies of the timed runs in seconds.
+  """
+  for _ in range(num_warmup_runs):
+    detect_fn(image)['num_detections'].numpy()
+  latencies = []
+  for _ in range(num_timing_runs):
+    start_time = time.time()
+    detect_fn(image)['num_detections'].numpy()
+    latencies.append(time.time() - start_time)
+  return np.array(latencies)
+
+
+def _resize_inputs(detect_fn, input_shape):
+  """Returns a detection function resizing its images to input_shape."""
+  def resized_detect_fn(image):
+    return detect_fn(tf.cast(
+        tf.image.resize(image, input_shape, antialias=True), tf.uint8))
+  return resized_detect_fn
+
+
+def compare_models(exported_model_dirs, configs, frame_height, frame_width,
+                   num_warmup_runs, num_timing_runs, num_eval_examples=0):
+  """Measures the latency and the eval metrics of exported models.
+
+  Args:
+    exported_model_dirs: A list of directories of exported models.
+    configs: A dictionary of configs with the eval config and eval input
+      reader, see config_util.get_configs_from_pipeline_file.
+    frame_height: Height of the frames the latency is measured on.
+    frame_width: Width of the frames the latency is measured on.
+    num_warmup_runs: Number of untimed runs before the latency is measured.
+    num_timing_runs: Number of timed runs of every model.
+    num_eval_examples: Number of eval examples, all examples if 0. No metrics
+      are computed if negative.
+
+  Returns:
+    A list with a dict of results per model, holding the `name`, `meta_arch`,
+    `input_shape` (None if the model takes any shape), the `latencies` in
+    seconds and the eval `metrics`.
+  """
+  results = []
+  for exported_model_dir in exported_model_dirs:
+    model_configs = config_util.get_configs_from_pipeline_file(
+        os.path.join(exported_model_dir, 'pipeline.config'))
+    detect_fn = tf.saved_model.load(
+        os.path.join(exported_model_dir, 'saved_model'))
+    input_shape = get_fixed_input_shape(detect_fn)
+    eval_detect_fn = detect_fn
+    if input_shape:
+      eval_detect_fn = _resize_inputs(detect_fn, input_shape)
+    image = tf.constant(np.random.randint(
+        0, 256, size=[1] + (input_shape or [frame_height, frame_width]) +
+        [3]).astype(np.uint8))
+
+    latencies = measure_latencies(detect_fn, image, num_warmup_runs,
+                                  num_timing_runs)
+    metrics = {}
+    if num_eval_examples >= 0:
+      metrics = eval_util.evaluate_detection_fn(eval_detect_fn, configs,
+                                                num_eval_examples)
+    results.append({
+        'name': os.path.basename(os.path.normpath(exported_model_dir)),
+        'meta_arch': model_configs['model'].WhichOneof('model'),
+        'input_shape': input_shape,
+        'latencies': latencies,
+        'metrics': metrics,
+    })
+  return results
+
+
+def _log_results(result, reference_result):
+  latencies = result['latencies'] * 1e3
+  logging.info('%s (%s%s):', result['name'], result['meta_arch'],
+               ', {}x{} input'.format(*result['input_shape'])
+               if result['input_shape'] else '')
+  logging.info('  latency: mean %.2f ms, p50 %.2f ms, p90 %.2f ms, '
+               'p99 %.2f ms (%.1f frames/s)', np.mean(latencies),
+               np.percentile(latencies, 50), np.percentile(latencies, 90),
+               np.percentile(latencies, 99), 1e3 / np.mean(latencies))
+  if result is not reference_result:
+    logging.info('  speedup over %s: %.2fx', reference_result['name'],
+                 np.mean(reference_result['latencies']) /
+                 np.mean(result['latencies']))
+  for metric_name, value in sorted(result['metrics'].items()):
+    reference_value = reference_result['metrics'].get(metric_name)
+    if result is not reference_result and reference_value is not None:
+      logging.info('  %s: %.4f (%+.4f)', metric_name, value,
+                   value - reference_value)
+    else:
+      logging.info('  %s: %.4f', metric_name, value)
+
+
+def main(unused_argv):
+  flags.mark_flag_as_required('exported_model_dirs')
+  tf.enable_v2_behavior()
+  pipeline_config_path = FLAGS.pipeline_config_path or os.path.join(
+      FLAGS.exported_model_dirs[0], 'pipeline.config')
+  configs = config_util.get_configs_from_pipeline_file(pipeline_config_path)
+
+  results = compare_models(FLAGS.exported_model_dirs, configs,
+                           FLAGS.frame_height, FLAGS.frame_width,
+                           FLAGS.num_warmup_runs, FLAGS.num_timing_runs,
+                           FLAGS.num_eval_examples)
+  for result in results:
+    _log_results(result, results[0])
+
+
+if __name__ == '__main__':
+  app.run(main)
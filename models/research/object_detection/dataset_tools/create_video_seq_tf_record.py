@@ -0,0 +1,456 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Creates tf.SequenceExamples of recorded videos and their per-frame tracks.
+
+Every video is read once from start to end. The frames are decoded in chunks of
+--decode_chunk_size frames and every chunk is JPEG encoded by a pool of
+--num_encode_threads threads while the next chunk is decoded, so only two
+chunks of decoded frames and one sequence of encoded frames are in memory,
+however long the video is.
+
+Every --frame_stride-th frame of the video is used. A sequence has
+--frames_per_sequence of these frames, and a new sequence starts every
+--hop_between_sequences frames (sequences overlap if the hop is smaller than
+the sequence). Sequences with fewer than --min_annotated_frames annotated
+frames are not written.
+
+The tracks are read from one annotation file per video, in the formats of
+create_video_tf_record.py (coco, cvat or mot). The sequence examples have the
+fields of seq_example_util.make_sequence_example and can be read with
+data_decoders/tf_sequence_example_decoder.py (input_type TF_SEQUENCE_EXAMPLE
+in the input reader).
+
+The decode, encode and overall frames/s are logged at the end. --max_frames
+limits the number of frames read from every video, e.g. to benchmark the tool
+on the beginning of a long recording.
+
+Example usage:
+    python create_video_seq_tf_record.py --logtostderr \
+      --video_paths="${VIDEO_DIR}/session1.mp4,${VIDEO_DIR}/session2.mp4" \
+      --annotation_paths="${VIDEO_DIR}/session1.txt,${VIDEO_DIR}/session2.txt" \
+      --annotation_format=mot \
+      --mot_class_name=drone \
+      --label_map_path="${LABEL_MAP_PATH}" \
+      --output_path="${OUTPUT_DIR}/drone_seq_train.record" \
+      --frames_per_sequence=8 \
+      --frame_stride=2
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+from multiprocessing.pool import ThreadPool
+import os
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+import contextlib2
+import cv2
+from six.moves import zip
+
+from object_detection.dataset_tools import create_video_tf_record
+from object_detection.dataset_tools import seq_example_util
+from object_detection.dataset_tools import tf_record_creation_util
+from object_detection.utils import label_map_util
+
+# A JPEG encoded frame of a video.
+Frame = collections.namedtuple('Frame', ['index', 'timestamp', 'encoded',
+                                         'height', 'width'])
+
+
+class VideoFrameReader(object):
+  """Reads the frames of a video in chunks and JPEG encodes them in threads.
+
+  OpenCV releases the GIL while it decodes and encodes, so the threads encode
+  the frames of a chunk in parallel while the next chunk is decoded. At most two
+  chunks of decoded frames are in memory.
+  """
+
+  def __init__(self, video_path, frame_stride=1, decode_chunk_size=64,
+               num_encode_threads=4, image_height=0, image_width=0,
+               jpeg_quality=95, max_frames=0):
+    """Constructor.
+
+    Args:
+      video_path: Path of the video.
+      frame_stride: Only every frame_stride-th frame of the video is read.
+      decode_chunk_size: Number of frames decoded before they are encoded.
+      num_encode_threads: Number of threads encoding the frames.
+      image_height: If positive, the frames are resized to this height.
+      image_width: If positive, the frames are resized to this width.
+      jpeg_quality: JPEG quality of the encoded frames.
+      max_frames: If positive, only the first max_frames frames of the video
+        are read.
+    """
+    self._video_path = video_path
+    self._frame_stride = frame_stride
+    self._decode_chunk_size = decode_chunk_size
+    self._num_encode_threads = num_encode_threads
+    self._image_size = ((image_width, image_height)
+                        if image_height > 0 and image_width > 0 else None)
+    self._jpeg_quality = jpeg_quality
+    self._max_frames = max_frames
+    self.num_decoded_frames = 0
+    self.num_encoded_frames = 0
+    self.decode_seconds = 0.0
+    # Summed over the encode threads.
+    self.encode_seconds = 0.0
+
+  def _encode(self, frame):
+    start_time = time.time()
+    if self._image_size is not None:
+      frame = cv2.resize(frame, self._image_size, interpolation=cv2.INTER_AREA)
+    _, encoded = cv2.imencode('.jpg', frame,
+                              [cv2.IMWRITE_JPEG_QUALITY, self._jpeg_quality])
+    return (encoded.tobytes(), frame.shape[0], frame.shape[1],
+            time.time() - start_time)
+
+  def _read_chunk(self, video, position):
+    """Decodes the next chunk, returns the indices and frames of the chunk."""
+    frame_indices = []
+    frames = []
+    while len(frames) < self._decode_chunk_size:
+      if self._max_frames > 0 and position >= self._max_frames:
+        break
+      if position % self._frame_stride:
+        # Skipped frames are not converted to images.
+        if not video.grab():
+          break
+      else:
+        ret, frame = video.read()
+        if not ret:
+          break
+        frame_indices.append(position)
+        frames.append(frame)
+      position += 1
+    return frame_indices, frames, position
+
+  def __iter__(self):
+    """Yields the Frames of the video in order."""
+    video = cv2.VideoCapture(self._video_path)
+    if not video.isOpened():
+      raise ValueError('Cannot open video {}.'.format(self._video_path))
+    fps = video.get(cv2.CAP_PROP_FPS)
+    pool = ThreadPool(self._num_encode_threads)
+    position = 0
+    pending_chunk = None
+    try:
+      while True:
+        start_time = time.time()
+        frame_indices, frames, position = self._read_chunk(video, position)
+        self.decode_seconds += time.time() - start_time
+        self.num_decoded_frames = position
+
+        if pending_chunk is not None:
+          pending_indices, pending_frames = pending_chunk
+          for frame_index, (encoded, height, width, seconds) in zip(
+              pending_indices, pending_frames.get()):
+            self.num_encoded_frames += 1
+            self.encode_seconds += seconds
+            # Timestamps in microseconds, as in the AVA sequence examples.
+            timestamp = (int(round(frame_index * 1e6 / fps)) if fps > 0
+                         else frame_index)
+            yield Frame(frame_index, timestamp, encoded, height, width)
+        if not frames:
+          break
+        # The chunk is encoded while the next chunk is decoded.
+        pending_chunk = (frame_indices, pool.map_async(self._encode, frames))
+        del frames
+    finally:
+      pool.close()
+      pool.join()
+      video.release()
+
+
+def sliding_windows(frames, frames_per_sequence, hop_between_sequences):
+  """Groups a stream of frames into (possibly overlapping) sequences.
+
+  Only the frames of the current sequence are kept in memory.
+
+  Args:
+    frames: An iterable of frames.
+    frames_per_sequence: Number of frames of a sequence.
+    hop_between_sequences: Number of frames between the first frames of two
+      consecutive sequences.
+
+  Yields:
+    Lists of frames_per_sequence consecutive frames. The last frames of the
+    stream are dropped if they do not fill a sequence.
+  """
+  window = collections.deque(maxlen=frames_per_sequence)
+  num_frames = 0
+  for frame in frames:
+    window.append(frame)
+    num_frames += 1
+    if (len(window) == frames_per_sequence and
+        (num_frames - frames_per_sequence) % hop_between_sequences == 0):
+      yield list(window)
+
+
+def _normalized_boxes(boxes, image_height, image_width, label_map_dict):
+  """Returns the [ymin, xmin, ymax, xmax] boxes and the names of the boxes."""
+  normalized_boxes = []
+  class_names = []
+  for box in boxes:
+    xmin = min(max(box.xmin, 0.0), image_width) / image_width
+    ymin = min(max(box.ymin, 0.0), image_height) / image_height
+    xmax = min(max(box.xmax, 0.0), image_width) / image_width
+    ymax = min(max(box.ymax, 0.0), image_height) / image_height
+    if xmax <= xmin or ymax <= ymin or box.class_name not in label_map_dict:
+      continue
+    normalized_boxes.append([ymin, xmin, ymax, xmax])
+    class_names.append(box.class_name.encode('utf8'))
+  return normalized_boxes, class_names
+
+
+def create_sequence_example(dataset_name, video_name, frames, annotations,
+                            video_height, video_width, label_map_dict):
+  """Converts a sequence of frames and their boxes to a tf.SequenceExample.
+
+  Args:
+    dataset_name: Name of the data set.
+    video_name: Name of the video of the frames.
+    frames: A list of Frames.
+    annotations: A dict mapping the frame indices to lists of Boxes, in pixels
+      of the video. Frames that are not in annotations are not annotated.
+    video_height: Height of the video, the frames may be resized.
+    video_width: Width of the video.
+    label_map_dict: A dict mapping the class names to the label map ids, boxes
+      of other classes are ignored.
+
+  Returns:
+    A tf.SequenceExample.
+  """
+  bboxes = []
+  label_strings = []
+  is_annotated = []
+  for frame in frames:
+    boxes, class_names = _normalized_boxes(annotations.get(frame.index, []),
+                                           video_height, video_width,
+                                           label_map_dict)
+    bboxes.append(boxes)
+    label_strings.append(class_names)
+    is_annotated.append(int(frame.index in annotations))
+  return seq_example_util.make_sequence_example(
+      dataset_name,
+      '{}_{}'.format(video_name, frames[0].index),
+      [frame.encoded for frame in frames],
+      frames[0].height,
+      frames[0].width,
+      image_format='JPEG',
+      image_source_ids=['{}/{}'.format(video_name, frame.index)
+                        for frame in frames],
+      timestamps=[frame.timestamp for frame in frames],
+      is_annotated=is_annotated,
+      bboxes=bboxes,
+      label_strings=label_strings,
+      use_strs_for_source_id=True)
+
+
+def create_tf_record(video_paths,
+                     annotation_paths,
+                     annotation_format,
+                     label_map_path,
+                     output_path,
+                     num_shards=10,
+                     dataset_name='drone_tracking',
+                     frames_per_sequence=10,
+                     hop_between_sequences=10,
+                     frame_stride=1,
+                     min_annotated_frames=1,
+                     decode_chunk_size=64,
+                     num_encode_threads=4,
+                     image_height=0,
+                     image_width=0,
+                     jpeg_quality=95,
+                     max_frames=0,
+                     mot_class_name=None):
+  """Writes sequence examples of videos and their tracks as sharded TFRecords.
+
+  Args:
+    video_paths: Paths of the videos.
+    annotation_paths: Paths of the annotation files, one per video.
+    annotation_format: Format of the annotation files, 'coco', 'cvat' or 'mot'.
+    label_map_path: Path to the label map.
+    output_path: Path of the data set, the shards are
+      <output_path>-<shard>-of-<num_shards>.
+    num_shards: Number of output shards.
+    dataset_name: Name of the data set in the sequence examples.
+    frames_per_sequence: Number of frames of a sequence.
+    hop_between_sequences: Number of (used) frames between the first frames of
+      two consecutive sequences.
+    frame_stride: Only every frame_stride-th frame of a video is used.
+    min_annotated_frames: Sequences with fewer annotated frames are not
+      written.
+    decode_chunk_size: Number of frames decoded before they are encoded.
+    num_encode_threads: Number of threads encoding the frames.
+    image_height: If positive, the frames are resized to this height.
+    image_width: If positive, the frames are resized to this width.
+    jpeg_quality: JPEG quality of the encoded frames.
+    max_frames: If positive, only the first max_frames frames of every video
+      are read.
+    mot_class_name: Class name of all the boxes of 'mot' files, if set.
+
+  Returns:
+    A dict with the number of decoded and written frames, the number of
+    written sequences, the seconds spent decoding, encoding (summed over the
+    encode threads) and in total, and the decode, encode (per thread) and
+    overall frames/s.
+
+  Raises:
+    ValueError: if the number of videos and annotation files differ.
+  """
+  if len(video_paths) != len(annotation_paths):
+    raise ValueError('Got {} videos but {} annotation files.'.format(
+        len(video_paths), len(annotation_paths)))
+  label_map_dict = label_map_util.get_label_map_dict(label_map_path)
+
+  start_time = time.time()
+  num_decoded_frames = 0
+  num_encoded_frames = 0
+  num_frames = 0
+  num_sequences = 0
+  decode_seconds = 0.0
+  encode_seconds = 0.0
+  with contextlib2.ExitStack() as tf_record_close_stack:
+    output_tfrecords = tf_record_creation_util.open_sharded_output_tfrecords(
+        tf_record_close_stack, output_path, num_shards)
+    for video_path, annotation_path in zip(video_paths, annotation_paths):
+      annotations = create_video_tf_record.read_annotations(
+          annotation_path, annotation_format, label_map_dict, mot_class_name)
+      video_name = os.path.splitext(os.path.basename(video_path))[0]
+      video = cv2.VideoCapture(video_path)
+      video_height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+      video_width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
+      video.release()
+
+      reader = VideoFrameReader(video_path, frame_stride, decode_chunk_size,
+                                num_encode_threads, image_height, image_width,
+                                jpeg_quality, max_frames)
+      for frames in sliding_windows(reader, frames_per_sequence,
+                                    hop_between_sequences):
+        if sum(frame.index in annotations
+               for frame in frames) < min_annotated_frames:
+          continue
+        sequence_example = create_sequence_example(
+            dataset_name, video_name, frames, annotations, video_height,
+            video_width, label_map_dict)
+        output_tfrecords[num_sequences % num_shards].write(
+            sequence_example.SerializeToString())
+        num_sequences += 1
+        num_frames += len(frames)
+      logging.info('Wrote %d sequences of %s.', num_sequences, video_path)
+      num_decoded_frames += reader.num_decoded_frames
+      num_encoded_frames += reader.num_encoded_frames
+      decode_seconds += reader.decode_seconds
+      encode_seconds += reader.encode_seconds
+
+  seconds = time.time() - start_time
+  report = {
+      'decoded_frames': num_decoded_frames,
+      'frames': num_frames,
+      'sequences': num_sequences,
+      'decode_seconds': decode_seconds,
+      'encode_seconds': encode_seconds,
+      'seconds': seconds,
+      'decode_frames_per_second': (num_decoded_frames / decode_seconds
+                                   if decode_seconds > 0 else 0.0),
+      'encode_frames_per_second': (num_encoded_frames / encode_seconds
+                                   if encode_seconds > 0 else 0.0),
+      'frames_per_second': (num_decoded_frames / seconds
+                            if seconds > 0 else 0.0),
+  }
+  logging.info('Read %d frames and wrote %d sequences (%d frames) in %.1f s: '
+               '%.1f frames/s. Decoding: %.1f frames/s, encoding: %.1f '
+               'frames/s per thread.', report['decoded_frames'], report['sequences'],
+               report['frames'], report['seconds'],
+               report['frames_per_second'],
+               report['decode_frames_per_second'],
+               report['encode_frames_per_second'])
+  return report
+
+
+def main(argv):
+  if len(argv) > 1:
+    raise app.UsageError('Too many command-line arguments.')
+  create_tf_record(
+      flags.FLAGS.video_paths,
+      flags.FLAGS.annotation_paths,
+      flags.FLAGS.annotation_format,
+      flags.FLAGS.label_map_path,
+      flags.FLAGS.output_path,
+      num_shards=flags.FLAGS.num_shards,
+      dataset_name=flags.FLAGS.dataset_name,
+      frames_per_sequence=flags.FLAGS.frames_per_sequence,
+      hop_between_sequences=(flags.FLAGS.hop_between_sequences or
+                             flags.FLAGS.frames_per_sequence),
+      frame_stride=flags.FLAGS.frame_stride,
+      min_annotated_frames=flags.FLAGS.min_annotated_frames,
+      decode_chunk_size=flags.FLAGS.decode_chunk_size,
+      num_encode_threads=flags.FLAGS.num_encode_threads,
+      image_height=flags.FLAGS.image_height,
+      image_width=flags.FLAGS.image_width,
+      jpeg_quality=flags.FLAGS.jpeg_quality,
+      max_frames=flags.FLAGS.max_frames,
+      mot_class_name=flags.FLAGS.mot_class_name)
+
+
+if __name__ == '__main__':
+  flags.DEFINE_list('video_paths', None, 'Comma separated paths of the videos.')
+  flags.DEFINE_list('annotation_paths', None,
+                    'Comma separated paths of the annotation files, in the '
+                    'same order as the videos.')
+  flags.DEFINE_enum('annotation_format', 'mot', ['coco', 'cvat', 'mot'],
+                    'Format of the annotation files.')
+  flags.DEFINE_string('label_map_path', None, 'Path to the label map.')
+  flags.DEFINE_string('output_path', None,
+                      'Path of the data set, the shards are '
+                      '<output_path>-<shard>-of-<num_shards>.')
+  flags.DEFINE_integer('num_shards', 10, 'Number of output shards.')
+  flags.DEFINE_string('dataset_name', 'drone_tracking',
+                      'Name of the data set in the sequence examples.')
+  flags.DEFINE_integer('frames_per_sequence', 10,
+                       'Number of frames of a sequence.')
+  flags.DEFINE_integer('hop_between_sequences', 0,
+                       'Number of frames between the first frames of two '
+                       'sequences. If less than frames_per_sequence, the '
+                       'sequences overlap. 0 means frames_per_sequence.')
+  flags.DEFINE_integer('frame_stride', 1,
+                       'Only every frame_stride-th frame of a video is used.')
+  flags.DEFINE_integer('min_annotated_frames', 1,
+                       'Sequences with fewer annotated frames are not '
+                       'written.')
+  flags.DEFINE_integer('decode_chunk_size', 64,
+                       'Number of frames decoded before they are encoded.')
+  flags.DEFINE_integer('num_encode_threads', 4,
+                       'Number of threads encoding the frames.')
+  flags.DEFINE_integer('image_height', 0,
+                       'If positive, the frames are resized to this height.')
+  flags.DEFINE_integer('image_width', 0,
+                       'If positive, the frames are resized to this width.')
+  flags.DEFINE_integer('jpeg_quality', 95,
+                       'JPEG quality of the encoded frames.')
+  flags.DEFINE_integer('max_frames', 0,
+                       'If positive, only the first max_frames frames of '
+                       'every video are read, e.g. for a benchmark.')
+  flags.DEFINE_string('mot_class_name', None,
+                      'Class name of all the boxes of mot files. If not set, '
+                      'the class column is a label map id.')
+  flags.mark_flags_as_required(['video_paths', 'annotation_paths',
+                                'label_map_path', 'output_path'])
+  app.run(main)
@@ -0,0 +1,129 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Test for create_video_seq_tf_record.py."""
+
+import os
+
+import cv2
+import numpy as np
+import tensorflow.compat.v1 as tf
+
+from object_detection.dataset_tools import create_video_seq_tf_record
+from object_detection.dataset_tools import create_video_tf_record
+
+Box = create_video_tf_record.Box
+Frame = create_video_seq_tf_record.Frame
+
+
+class CreateVideoSeqTFRecordTest(tf.test.TestCase):
+
+  def _write_video(self, num_frames, height=48, width=64):
+    path = os.path.join(self.get_temp_dir(), 'session.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10,
+                             (width, height))
+    for frame_index in range(num_frames):
+      writer.write(np.full((height, width, 3), frame_index * 10 % 256,
+                           np.uint8))
+    writer.release()
+    return path
+
+  def test_sliding_windows(self):
+    windows = create_video_seq_tf_record.sliding_windows(range(7), 3, 3)
+    overlapping_windows = create_video_seq_tf_record.sliding_windows(
+        range(7), 3, 2)
+
+    self.assertEqual(list(windows), [[0, 1, 2], [3, 4, 5]])
+    self.assertEqual(list(overlapping_windows),
+                     [[0, 1, 2], [2, 3, 4], [4, 5, 6]])
+
+  def test_video_frame_reader(self):
+    video_path = self._write_video(20)
+
+    reader = create_video_seq_tf_record.VideoFrameReader(
+        video_path, frame_stride=3, decode_chunk_size=2, num_encode_threads=2,
+        image_height=24, image_width=32, max_frames=14)
+    frames = list(reader)
+
+    self.assertEqual([frame.index for frame in frames], [0, 3, 6, 9, 12])
+    self.assertEqual([frame.timestamp for frame in frames],
+                     [0, 300000, 600000, 900000, 1200000])
+    self.assertEqual(reader.num_decoded_frames, 14)
+    self.assertEqual(reader.num_encoded_frames, 5)
+    image = cv2.imdecode(np.frombuffer(frames[1].encoded, np.uint8),
+                         cv2.IMREAD_COLOR)
+    self.assertEqual(image.shape, (24, 32, 3))
+    self.assertEqual((frames[1].height, frames[1].width), (24, 32))
+    self.assertNear(image.mean(), 30, 3)
+
+  def test_create_sequence_example(self):
+    frames = [Frame(4, 400, b'a', 24, 32), Frame(5, 500, b'b', 24, 32)]
+    annotations = {4: [Box(16, 12, 32, 48, 'drone'),
+                       Box(0, 0, 8, 8, 'plane')]}
+
+    sequence_example = create_video_seq_tf_record.create_sequence_example(
+        'drones', 'session', frames, annotations, 48, 64, {'drone': 1})
+
+    context = sequence_example.context.feature
+    feature_lists = sequence_example.feature_lists.feature_list
+    self.assertEqual(context['clip/media_id'].bytes_list.value,
+                     [b'session_4'])
+    self.assertEqual(context['image/height'].int64_list.value, [24])
+    self.assertEqual(
+        [feature.bytes_list.value[0]
+         for feature in feature_lists['image/source_id'].feature],
+        [b'session/4', b'session/5'])
+    self.assertEqual(
+        [feature.int64_list.value[0]
+         for feature in feature_lists['region/is_annotated'].feature],
+        [1, 0])
+    self.assertAllClose(
+        feature_lists['region/bbox/xmin'].feature[0].float_list.value, [0.25])
+    self.assertAllClose(
+        feature_lists['region/bbox/ymax'].feature[0].float_list.value, [1.0])
+    self.assertEmpty(
+        feature_lists['region/bbox/xmin'].feature[1].float_list.value)
+    self.assertEqual(
+        feature_lists['region/label/string'].feature[0].bytes_list.value,
+        [b'drone'])
+
+  def test_create_tf_record(self):
+    video_path = self._write_video(12)
+    annotation_path = os.path.join(self.get_temp_dir(), 'session.txt')
+    with tf.gfile.GFile(annotation_path, 'w') as fid:
+      fid.write('1,1,8,8,16,16,1,1,1.0\n9,1,8,8,16,16,1,1,1.0\n')
+    label_map_path = os.path.join(self.get_temp_dir(), 'label_map.pbtxt')
+    with tf.gfile.GFile(label_map_path, 'w') as fid:
+      fid.write("item {\n  id: 1\n  name: 'drone'\n}\n")
+    output_path = os.path.join(self.get_temp_dir(), 'session.record')
+
+    report = create_video_seq_tf_record.create_tf_record(
+        [video_path], [annotation_path], 'mot', label_map_path, output_path,
+        num_shards=2, frames_per_sequence=2, hop_between_sequences=2,
+        frame_stride=2, decode_chunk_size=4)
+
+    self.assertEqual(report['decoded_frames'], 12)
+    self.assertEqual(report['sequences'], 2)
+    media_ids = []
+    for idx in range(2):
+      for record in tf.python_io.tf_record_iterator(
+          '{}-{:05d}-of-00002'.format(output_path, idx)):
+        sequence_example = tf.train.SequenceExample.FromString(record)
+        media_ids.extend(
+            sequence_example.context.feature['clip/media_id'].bytes_list.value)
+    self.assertEqual(media_ids, [b'session_0', b'session_8'])
+
+
+if __name__ == '__main__':
+  tf.test.main()
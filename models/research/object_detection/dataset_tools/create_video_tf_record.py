@@ -0,0 +1,662 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Creates a TFRecord data set of labelled frames straight from videos.
+
+The frames are decoded from the videos, the boxes come from an annotation file
+per video in one of the following formats:
+
+  coco: COCO JSON where every image is a frame of the video. The frame index is
+    the 'frame_id' field of the image or, as exported by CVAT, the last number
+    in its 'file_name'.
+  cvat: CVAT XML, either 'CVAT for video' (tracks of boxes, boxes that are
+    'outside' are ignored) or 'CVAT for images'.
+  mot: MOTChallenge CSV (frame, id, x, y, width, height, conf, class, ...)
+    with 1-based frame numbers. Rows with conf 0 are ignored. The class column
+    is a label map id, unless --mot_class_name is set.
+
+The selected frames of every video are split into chunks of
+--frames_per_shard frames. The chunks are decoded, JPEG encoded and written
+in a pool of --num_workers processes, every chunk into its own shard
+<output_path>-<shard>-of-<num_shards>, so the build scales with the number of
+cores. A shard is written to a temporary file that is renamed once the shard is
+complete, and the finished shards are recorded in <output_path>.progress.json,
+together with a fingerprint of the frames, boxes and encoding of all the
+shards. Running the tool again with the same arguments only builds the missing
+shards; if anything that goes into the shards changed, all of them are built
+again.
+A throughput report (frames/s and MB/s, in total and per worker) is logged at
+the end.
+
+The examples have the same fields as the ones of create_coco_tf_record.py, the
+source id of a frame is '<video name>/<frame index>'.
+
+Example usage:
+    python create_video_tf_record.py --logtostderr \
+      --video_paths="${VIDEO_DIR}/flight1.mp4,${VIDEO_DIR}/flight2.mp4" \
+      --annotation_paths="${VIDEO_DIR}/flight1.xml,${VIDEO_DIR}/flight2.xml" \
+      --annotation_format=cvat \
+      --label_map_path="${LABEL_MAP_PATH}" \
+      --output_path="${OUTPUT_DIR}/drone_train.record" \
+      --num_workers=8
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+import cv2
+from lxml import etree
+import six
+import tensorflow.compat.v1 as tf
+
+from object_detection.utils import dataset_util
+from object_detection.utils import label_map_util
+
+# Seeking is slower than grabbing a few frames for short gaps between the
+# selected frames of a chunk.
+_MAX_FRAMES_TO_GRAB = 64
+
+# A box of an annotation file, in pixels.
+Box = collections.namedtuple('Box', ['xmin', 'ymin', 'xmax', 'ymax',
+                                     'class_name'])
+
+# A chunk of frames of a video written into one shard. annotations maps the
+# frame indices to the boxes of the frames.
+Shard = collections.namedtuple('Shard', ['path', 'video_path', 'frame_indices',
+                                         'annotations'])
+
+
+def read_coco_annotations(annotations_path):
+  """Reads the boxes of the frames of a video from a COCO JSON file.
+
+  Args:
+    annotations_path: Path to the COCO JSON file.
+
+  Returns:
+    A dict mapping the frame indices to lists of Boxes. Frames that are images
+    of the file without annotations map to empty lists.
+
+  Raises:
+    ValueError: if the frame index of an image cannot be determined.
+  """
+  with tf.gfile.GFile(annotations_path, 'r') as fid:
+    groundtruth_data = json.load(fid)
+  category_names = {category['id']: category['name']
+                    for category in groundtruth_data['categories']}
+
+  annotations = {}
+  frame_index_of_image = {}
+  for image in groundtruth_data['images']:
+    if 'frame_id' in image:
+      frame_index = int(image['frame_id'])
+    else:
+      numbers = re.findall(r'\d+', os.path.basename(image['file_name']))
+      if not numbers:
+        raise ValueError('Cannot find the frame index of image {}.'.format(
+            image['file_name']))
+      frame_index = int(numbers[-1])
+    frame_index_of_image[image['id']] = frame_index
+    annotations.setdefault(frame_index, [])
+
+  for annotation in groundtruth_data.get('annotations', []):
+    x, y, width, height = annotation['bbox']
+    annotations[frame_index_of_image[annotation['image_id']]].append(
+        Box(x, y, x + width, y + height,
+            category_names[annotation['category_id']]))
+  return annotations
+
+
+def _read_cvat_box(box, class_name):
+  return Box(float(box.get('xtl')), float(box.get('ytl')),
+             float(box.get('xbr')), float(box.get('ybr')), class_name)
+
+
+def read_cvat_annotations(annotations_path):
+  """Reads the boxes of the frames of a video from a CVAT XML file.
+
+  Args:
+    annotations_path: Path to a 'CVAT for video' or 'CVAT for images' XML file.
+
+  Returns:
+    A dict mapping the frame indices to lists of Boxes. Frames that are images
+    of a 'CVAT for images' file without boxes map to empty lists.
+  """
+  with tf.gfile.GFile(annotations_path, 'rb') as fid:
+    root = etree.fromstring(fid.read())
+
+  annotations = {}
+  for track in root.iter('track'):
+    for box in track.iter('box'):
+      if box.get('outside') == '1':
+        continue
+      annotations.setdefault(int(box.get('frame')), []).append(
+          _read_cvat_box(box, track.get('label')))
+  for image in root.iter('image'):
+    boxes = annotations.setdefault(int(image.get('id')), [])
+    for box in image.iter('box'):
+      boxes.append(_read_cvat_box(box, box.get('label')))
+  return annotations
+
+
+def read_mot_annotations(annotations_path, class_names, class_name=None):
+  """Reads the boxes of the frames of a video from a MOTChallenge CSV file.
+
+  Args:
+    annotations_path: Path to the CSV file, e.g. gt/gt.txt.
+    class_names: A dict mapping the label map ids to the class names, used for
+      the class column.
+    class_name: If set, the class name of all the boxes, the class column is
+      not used.
+
+  Returns:
+    A dict mapping the (0-based) frame indices to lists of Boxes. Boxes of
+    classes that are not in class_names are ignored.
+  """
+  annotations = {}
+  with tf.gfile.GFile(annotations_path, 'r') as fid:
+    for row in csv.reader(fid):
+      if not row:
+        continue
+      if len(row) > 6 and float(row[6]) == 0:
+        continue
+      name = class_name
+      if not name:
+        name = class_names.get(int(float(row[7])) if len(row) > 7 else 1)
+        if name is None:
+          continue
+      x, y, width, height = [float(value) for value in row[2:6]]
+      annotations.setdefault(int(row[0]) - 1, []).append(
+          Box(x, y, x + width, y + height, name))
+  return annotations
+
+
+def select_frames(annotations, num_frames, frame_stride=1,
+                  negative_frame_stride=0):
+  """Selects the frames of a video that are written to the data set.
+
+  Args:
+    annotations: A dict mapping the frame indices to lists of Boxes.
+    num_frames: Number of frames of the video.
+    frame_stride: Only every frame_stride-th annotated frame is selected,
+      consecutive frames of a video are nearly identical.
+    negative_frame_stride: If positive, every negative_frame_stride-th frame
+      that is not in annotations is selected as well, as an example without
+      objects.
+
+  Returns:
+    The sorted list of the selected frame indices.
+  """
+  frame_indices = set(
+      frame_index for frame_index in annotations
+      if frame_index < num_frames and frame_index % frame_stride == 0)
+  if negative_frame_stride > 0:
+    frame_indices.update(
+        frame_index for frame_index in range(0, num_frames,
+                                             negative_frame_stride)
+        if frame_index not in annotations)
+  return sorted(frame_indices)
+
+
+def plan_shards(output_path, videos, frames_per_shard):
+  """Splits the selected frames of the videos into shards.
+
+  Args:
+    output_path: Path of the data set, the shards are
+      <output_path>-<shard>-of-<num_shards>.
+    videos: A list of (video_path, frame_indices, annotations) tuples.
+    frames_per_shard: Maximum number of frames of a shard.
+
+  Returns:
+    A list of Shards, the frames of a shard are from one video.
+  """
+  chunks = []
+  for video_path, frame_indices, annotations in videos:
+    for start in range(0, len(frame_indices), frames_per_shard):
+      chunk = frame_indices[start:start + frames_per_shard]
+      chunks.append((video_path, chunk,
+                     {frame_index: annotations.get(frame_index, [])
+                      for frame_index in chunk}))
+  return [
+      Shard('{}-{:05d}-of-{:05d}'.format(output_path, idx, len(chunks)),
+            video_path, chunk, chunk_annotations)
+      for idx, (video_path, chunk, chunk_annotations) in enumerate(chunks)
+  ]
+
+
+def create_tf_example(encoded_jpg, image_height, image_width, source_id, boxes,
+                      label_map_dict):
+  """Converts a JPEG encoded frame and its boxes to a tf.Example proto.
+
+  Args:
+    encoded_jpg: The JPEG encoded frame.
+    image_height: Height of the frame in pixels.
+    image_width: Width of the frame in pixels.
+    source_id: Unique id of the frame, also used as its file name.
+    boxes: A list of Boxes in pixels.
+    label_map_dict: A dict mapping the class names to the label map ids.
+
+  Returns:
+    example: The converted tf.Example.
+    num_annotations_skipped: Number of boxes that were ignored because they are
+      empty or their class is not in the label map.
+  """
+  key = hashlib.sha256(encoded_jpg).hexdigest()
+
+  xmin = []
+  xmax = []
+  ymin = []
+  ymax = []
+  category_names = []
+  category_ids = []
+  num_annotations_skipped = 0
+  for box in boxes:
+    box_xmin = min(max(box.xmin, 0.0), image_width)
+    box_ymin = min(max(box.ymin, 0.0), image_height)
+    box_xmax = min(max(box.xmax, 0.0), image_width)
+    box_ymax = min(max(box.ymax, 0.0), image_height)
+    if (box_xmax <= box_xmin or box_ymax <= box_ymin or
+        box.class_name not in label_map_dict):
+      num_annotations_skipped += 1
+      continue
+    xmin.append(float(box_xmin) / image_width)
+    xmax.append(float(box_xmax) / image_width)
+    ymin.append(float(box_ymin) / image_height)
+    ymax.append(float(box_ymax) / image_height)
+    category_names.append(box.class_name.encode('utf8'))
+    category_ids.append(label_map_dict[box.class_name])
+
+  feature_dict = {
+      'image/height':
+          dataset_util.int64_feature(image_height),
+      'image/width':
+          dataset_util.int64_feature(image_width),
+      'image/filename':
+          dataset_util.bytes_feature(source_id.encode('utf8')),
+      'image/source_id':
+          dataset_util.bytes_feature(source_id.encode('utf8')),
+      'image/key/sha256':
+          dataset_util.bytes_feature(key.encode('utf8')),
+      'image/encoded':
+          dataset_util.bytes_feature(encoded_jpg),
+      'image/format':
+          dataset_util.bytes_feature('jpeg'.encode('utf8')),
+      'image/object/bbox/xmin':
+          dataset_util.float_list_feature(xmin),
+      'image/object/bbox/xmax':
+          dataset_util.float_list_feature(xmax),
+      'image/object/bbox/ymin':
+          dataset_util.float_list_feature(ymin),
+      'image/object/bbox/ymax':
+          dataset_util.float_list_feature(ymax),
+      'image/object/class/text':
+          dataset_util.bytes_list_feature(category_names),
+      'image/object/class/label':
+          dataset_util.int64_list_feature(category_ids),
+  }
+  example = tf.train.Example(features=tf.train.Features(feature=feature_dict))
+  return example, num_annotations_skipped
+
+
+def write_shard(shard, label_map_dict, jpeg_quality=95):
+  """Decodes the frames of a shard from its video and writes the shard.
+
+  The shard is written to <shard path>.tmp, which is renamed to the shard path
+  once all the frames are written, so a shard file is always complete.
+
+  Args:
+    shard: The Shard to write.
+    label_map_dict: A dict mapping the class names to the label map ids.
+    jpeg_quality: JPEG quality of the encoded frames.
+
+  Returns:
+    A dict with the number of frames, bytes and skipped annotations of the
+    shard, the seconds it took and the id of the process that wrote it.
+
+  Raises:
+    ValueError: if the video cannot be opened.
+  """
+  start_time = time.time()
+  video = cv2.VideoCapture(shard.video_path)
+  if not video.isOpened():
+    raise ValueError('Cannot open video {}.'.format(shard.video_path))
+  video_name = os.path.splitext(os.path.basename(shard.video_path))[0]
+
+  num_frames = 0
+  num_bytes = 0
+  num_annotations_skipped = 0
+  position = -1
+  temp_path = shard.path + '.tmp'
+  with tf.python_io.TFRecordWriter(temp_path) as writer:
+    for frame_index in shard.frame_indices:
+      if position < 0 or not 0 <= frame_index - position <= _MAX_FRAMES_TO_GRAB:
+        video.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+        position = frame_index
+      while position < frame_index:
+        video.grab()
+        position += 1
+      ret, frame = video.read()
+      position += 1
+      if not ret:
+        logging.warning('Cannot read frame %d of %s, skipping the rest of the '
+                        'shard.', frame_index, shard.video_path)
+        break
+      _, encoded_jpg = cv2.imencode('.jpg', frame,
+                                    [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+      example, num_skipped = create_tf_example(
+          encoded_jpg.tobytes(), frame.shape[0], frame.shape[1],
+          '{}/{}'.format(video_name, frame_index),
+          shard.annotations[frame_index], label_map_dict)
+      serialized_example = example.SerializeToString()
+      writer.write(serialized_example)
+      num_frames += 1
+      num_bytes += len(serialized_example)
+      num_annotations_skipped += num_skipped
+  video.release()
+  tf.gfile.Rename(temp_path, shard.path, overwrite=True)
+
+  return {
+      'frames': num_frames,
+      'bytes': num_bytes,
+      'annotations_skipped': num_annotations_skipped,
+      'seconds': time.time() - start_time,
+      'worker': os.getpid(),
+  }
+
+
+def _write_shard_in_worker(args):
+  shard, label_map_dict, jpeg_quality = args
+  return shard, write_shard(shard, label_map_dict, jpeg_quality)
+
+
+def _fingerprint(shards, label_map_dict, jpeg_quality):
+  """Returns a hash of everything that goes into the shards.
+
+  The plan of the shards covers the videos, the annotations and the
+  frame_stride, negative_frame_stride, frames_per_shard and mot_class_name
+  arguments; the label map and the JPEG quality change the examples as well.
+  """
+  plan = {
+      'jpeg_quality': jpeg_quality,
+      'label_map': label_map_dict,
+      'shards': [[shard.path, shard.video_path, shard.frame_indices,
+                  [[list(box) for box in shard.annotations[frame_index]]
+                   for frame_index in shard.frame_indices]]
+                 for shard in shards],
+  }
+  return hashlib.sha256(
+      json.dumps(plan, sort_keys=True).encode('utf8')).hexdigest()
+
+
+def _read_progress(progress_path, shards, fingerprint):
+  """Returns the stats of the shards that are already written."""
+  if not tf.gfile.Exists(progress_path):
+    return {}
+  with tf.gfile.GFile(progress_path, 'r') as fid:
+    progress = json.load(fid)
+  # The shards of a run with different arguments hold other frames or were
+  # encoded differently, even if their names are the same.
+  if (progress.get('num_shards') != len(shards) or
+      progress.get('fingerprint') != fingerprint):
+    if progress.get('shards'):
+      logging.info('The arguments changed since %s was written, writing all '
+                   'the shards again.', progress_path)
+    return {}
+  shard_paths = set(shard.path for shard in shards)
+  return {path: stats for path, stats in six.iteritems(progress['shards'])
+          if path in shard_paths and tf.gfile.Exists(path)}
+
+
+def _write_progress(progress_path, fingerprint, num_shards, done):
+  temp_path = progress_path + '.tmp'
+  with tf.gfile.GFile(temp_path, 'w') as fid:
+    json.dump({'fingerprint': fingerprint, 'num_shards': num_shards,
+               'shards': done}, fid, indent=1)
+  tf.gfile.Rename(temp_path, progress_path, overwrite=True)
+
+
+def throughput_report(shard_stats, elapsed_seconds):
+  """Sums up the stats of written shards.
+
+  Args:
+    shard_stats: A list of the dicts returned by write_shard.
+    elapsed_seconds: Wall time it took to write the shards.
+
+  Returns:
+    A dict with the total number of frames, MB and skipped annotations, the
+    frames/s and MB/s over elapsed_seconds and, in 'workers', the frames,
+    seconds and frames/s of every worker process.
+  """
+  workers = collections.OrderedDict()
+  for stats in shard_stats:
+    worker = workers.setdefault(stats['worker'],
+                                {'frames': 0, 'seconds': 0.0})
+    worker['frames'] += stats['frames']
+    worker['seconds'] += stats['seconds']
+  for worker in workers.values():
+    worker['frames_per_second'] = (worker['frames'] / worker['seconds']
+                                   if worker['seconds'] > 0 else 0.0)
+
+  num_frames = sum(stats['frames'] for stats in shard_stats)
+  num_megabytes = sum(stats['bytes'] for stats in shard_stats) / 2.0**20
+  return {
+      'frames': num_frames,
+      'megabytes': num_megabytes,
+      'annotations_skipped': sum(
+          stats['annotations_skipped'] for stats in shard_stats),
+      'seconds': elapsed_seconds,
+      'frames_per_second': (num_frames / elapsed_seconds
+                            if elapsed_seconds > 0 else 0.0),
+      'megabytes_per_second': (num_megabytes / elapsed_seconds
+                               if elapsed_seconds > 0 else 0.0),
+      'workers': workers,
+  }
+
+
+def read_annotations(annotation_path, annotation_format, label_map_dict,
+                     mot_class_name=None):
+  """Reads the boxes of the frames of a video from an annotation file.
+
+  Args:
+    annotation_path: Path to the annotation file.
+    annotation_format: Format of the file, 'coco', 'cvat' or 'mot'.
+    label_map_dict: A dict mapping the class names to the label map ids.
+    mot_class_name: Class name of all the boxes of a 'mot' file, if set.
+
+  Returns:
+    A dict mapping the frame indices to lists of Boxes.
+
+  Raises:
+    ValueError: if the annotation format is unknown.
+  """
+  if annotation_format == 'coco':
+    return read_coco_annotations(annotation_path)
+  if annotation_format == 'cvat':
+    return read_cvat_annotations(annotation_path)
+  if annotation_format == 'mot':
+    class_names = {class_id: name
+                   for name, class_id in six.iteritems(label_map_dict)}
+    return read_mot_annotations(annotation_path, class_names, mot_class_name)
+  raise ValueError('Unknown annotation format {}.'.format(annotation_format))
+
+
+def _num_frames(video_path, annotations):
+  video = cv2.VideoCapture(video_path)
+  if not video.isOpened():
+    raise ValueError('Cannot open video {}.'.format(video_path))
+  num_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+  video.release()
+  # Some containers and streams do not know their number of frames.
+  if num_frames <= 0:
+    num_frames = max(annotations) + 1 if annotations else 0
+  return num_frames
+
+
+def create_tf_record(video_paths,
+                     annotation_paths,
+                     annotation_format,
+                     label_map_path,
+                     output_path,
+                     num_workers=1,
+                     frames_per_shard=500,
+                     frame_stride=1,
+                     negative_frame_stride=0,
+                     jpeg_quality=95,
+                     mot_class_name=None):
+  """Writes the labelled frames of videos as a sharded TFRecord data set.
+
+  Shards that were written by an earlier run with the same arguments are not
+  written again.
+
+  Args:
+    video_paths: Paths of the videos.
+    annotation_paths: Paths of the annotation files, one per video.
+    annotation_format: Format of the annotation files, 'coco', 'cvat' or 'mot'.
+    label_map_path: Path to the label map.
+    output_path: Path of the data set, the shards are
+      <output_path>-<shard>-of-<num_shards>.
+    num_workers: Number of processes writing the shards, 1 writes them in this
+      process.
+    frames_per_shard: Maximum number of frames of a shard.
+    frame_stride: Only every frame_stride-th annotated frame is written.
+    negative_frame_stride: If positive, every negative_frame_stride-th frame
+      without annotations is written as well.
+    jpeg_quality: JPEG quality of the encoded frames.
+    mot_class_name: Class name of all the boxes of 'mot' files, if set.
+
+  Returns:
+    The throughput report of the shards written by this call, see
+    throughput_report.
+
+  Raises:
+    ValueError: if the number of videos and annotation files differ.
+  """
+  if len(video_paths) != len(annotation_paths):
+    raise ValueError('Got {} videos but {} annotation files.'.format(
+        len(video_paths), len(annotation_paths)))
+  label_map_dict = label_map_util.get_label_map_dict(label_map_path)
+
+  videos = []
+  for video_path, annotation_path in zip(video_paths, annotation_paths):
+    annotations = read_annotations(annotation_path, annotation_format,
+                                   label_map_dict, mot_class_name)
+    frame_indices = select_frames(annotations,
+                                  _num_frames(video_path, annotations),
+                                  frame_stride, negative_frame_stride)
+    logging.info('Selected %d frames of %s.', len(frame_indices), video_path)
+    videos.append((video_path, frame_indices, annotations))
+  shards = plan_shards(output_path, videos, frames_per_shard)
+
+  progress_path = output_path + '.progress.json'
+  fingerprint = _fingerprint(shards, label_map_dict, jpeg_quality)
+  done = _read_progress(progress_path, shards, fingerprint)
+  todo = [shard for shard in shards if shard.path not in done]
+  if done:
+    logging.info('Resuming, %d of %d shards are already written.', len(done),
+                 len(shards))
+
+  start_time = time.time()
+  shard_stats = []
+  tasks = [(shard, label_map_dict, jpeg_quality) for shard in todo]
+  pool = None
+  if num_workers > 1 and len(todo) > 1:
+    # spawn instead of fork, forking a process that already runs opencv or
+    # tensorflow threads is not safe.
+    pool = multiprocessing.get_context('spawn').Pool(num_workers)
+    results = pool.imap_unordered(_write_shard_in_worker, tasks)
+  else:
+    results = six.moves.map(_write_shard_in_worker, tasks)
+  try:
+    for shard, stats in results:
+      shard_stats.append(stats)
+      done[shard.path] = stats
+      _write_progress(progress_path, fingerprint, len(shards), done)
+      elapsed_seconds = time.time() - start_time
+      num_frames = sum(stats['frames'] for stats in shard_stats)
+      logging.info('Wrote %d of %d shards, %.1f frames/s.', len(done),
+                   len(shards), num_frames / max(elapsed_seconds, 1e-6))
+  finally:
+    if pool is not None:
+      pool.close()
+      pool.join()
+
+  report = throughput_report(shard_stats, time.time() - start_time)
+  logging.info('Wrote %d frames (%.1f MB) in %.1f s: %.1f frames/s, %.1f MB/s, '
+               'skipped %d annotations.', report['frames'],
+               report['megabytes'], report['seconds'],
+               report['frames_per_second'], report['megabytes_per_second'],
+               report['annotations_skipped'])
+  for worker, worker_report in six.iteritems(report['workers']):
+    logging.info('Worker %s: %d frames, %.1f frames/s.', worker,
+                 worker_report['frames'], worker_report['frames_per_second'])
+  return report
+
+
+def main(argv):
+  if len(argv) > 1:
+    raise app.UsageError('Too many command-line arguments.')
+  create_tf_record(
+      flags.FLAGS.video_paths,
+      flags.FLAGS.annotation_paths,
+      flags.FLAGS.annotation_format,
+      flags.FLAGS.label_map_path,
+      flags.FLAGS.output_path,
+      num_workers=flags.FLAGS.num_workers,
+      frames_per_shard=flags.FLAGS.frames_per_shard,
+      frame_stride=flags.FLAGS.frame_stride,
+      negative_frame_stride=flags.FLAGS.negative_frame_stride,
+      jpeg_quality=flags.FLAGS.jpeg_quality,
+      mot_class_name=flags.FLAGS.mot_class_name)
+
+
+if __name__ == '__main__':
+  flags.DEFINE_list('video_paths', None, 'Comma separated paths of the videos.')
+  flags.DEFINE_list('annotation_paths', None,
+                    'Comma separated paths of the annotation files, in the '
+                    'same order as the videos.')
+  flags.DEFINE_enum('annotation_format', 'coco', ['coco', 'cvat', 'mot'],
+                    'Format of the annotation files.')
+  flags.DEFINE_string('label_map_path', None, 'Path to the label map.')
+  flags.DEFINE_string('output_path', None,
+                      'Path of the data set, the shards are '
+                      '<output_path>-<shard>-of-<num_shards>.')
+  flags.DEFINE_integer('num_workers', multiprocessing.cpu_count(),
+                       'Number of processes writing the shards.')
+  flags.DEFINE_integer('frames_per_shard', 500,
+                       'Maximum number of frames of a shard.')
+  flags.DEFINE_integer('frame_stride', 1,
+                       'Only every frame_stride-th annotated frame is '
+                       'written.')
+  flags.DEFINE_integer('negative_frame_stride', 0,
+                       'If positive, every negative_frame_stride-th frame '
+                       'without annotations is written as well.')
+  flags.DEFINE_integer('jpeg_quality', 95,
+                       'JPEG quality of the encoded frames.')
+  flags.DEFINE_string('mot_class_name', None,
+                      'Class name of all the boxes of mot files. If not set, '
+                      'the class column is a label map id.')
+  flags.mark_flags_as_required(['video_paths', 'annotation_paths',
+                                'label_map_path', 'output_path'])
+  app.run(main)
@@ -0,0 +1,234 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Test for create_video_tf_record.py."""
+
+import json
+import os
+
+import cv2
+import numpy as np
+import tensorflow.compat.v1 as tf
+
+from object_detection.dataset_tools import create_video_tf_record
+
+Box = create_video_tf_record.Box
+
+
+class CreateVideoTFRecordTest(tf.test.TestCase):
+
+  def _write_file(self, file_name, contents):
+    path = os.path.join(self.get_temp_dir(), file_name)
+    with tf.gfile.GFile(path, 'w') as fid:
+      fid.write(contents)
+    return path
+
+  def _write_video(self, file_name, num_frames, height=48, width=64):
+    path = os.path.join(self.get_temp_dir(), file_name)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10,
+                             (width, height))
+    for frame_index in range(num_frames):
+      writer.write(np.full((height, width, 3), frame_index * 10 % 256,
+                           np.uint8))
+    writer.release()
+    return path
+
+  def _label_map_path(self):
+    return self._write_file(
+        'label_map.pbtxt',
+        "item {\n  id: 1\n  name: 'drone'\n}\n"
+        "item {\n  id: 2\n  name: 'bird'\n}\n")
+
+  def test_read_coco_annotations(self):
+    path = self._write_file('annotations.json', json.dumps({
+        'categories': [{'id': 1, 'name': 'drone'}, {'id': 2, 'name': 'bird'}],
+        'images': [{'id': 1, 'file_name': 'frame_000003.PNG'},
+                   {'id': 2, 'file_name': 'frame.png', 'frame_id': 7},
+                   {'id': 3, 'file_name': 'frame_000009.PNG'}],
+        'annotations': [
+            {'image_id': 1, 'category_id': 2, 'bbox': [1, 2, 10, 20]},
+            {'image_id': 2, 'category_id': 1, 'bbox': [5, 5, 2, 3]}],
+    }))
+
+    annotations = create_video_tf_record.read_coco_annotations(path)
+
+    self.assertDictEqual(annotations, {
+        3: [Box(1, 2, 11, 22, 'bird')],
+        7: [Box(5, 5, 7, 8, 'drone')],
+        9: [],
+    })
+
+  def test_read_cvat_annotations(self):
+    path = self._write_file('annotations.xml', """<annotations>
+  <track id="0" label="drone">
+    <box frame="0" outside="0" xtl="1.0" ytl="2.0" xbr="3.0" ybr="4.0"/>
+    <box frame="1" outside="0" xtl="2.0" ytl="3.0" xbr="4.0" ybr="5.0"/>
+    <box frame="2" outside="1" xtl="2.0" ytl="3.0" xbr="4.0" ybr="5.0"/>
+  </track>
+  <track id="1" label="bird">
+    <box frame="1" outside="0" xtl="10" ytl="10" xbr="20" ybr="30"/>
+  </track>
+</annotations>""")
+
+    annotations = create_video_tf_record.read_cvat_annotations(path)
+
+    self.assertDictEqual(annotations, {
+        0: [Box(1.0, 2.0, 3.0, 4.0, 'drone')],
+        1: [Box(2.0, 3.0, 4.0, 5.0, 'drone'),
+            Box(10.0, 10.0, 20.0, 30.0, 'bird')],
+    })
+
+  def test_read_cvat_image_annotations(self):
+    path = self._write_file('annotations.xml', """<annotations>
+  <image id="4" name="frame_000004.png">
+    <box label="bird" xtl="1" ytl="2" xbr="3" ybr="4"/>
+  </image>
+  <image id="5" name="frame_000005.png"/>
+</annotations>""")
+
+    annotations = create_video_tf_record.read_cvat_annotations(path)
+
+    self.assertDictEqual(annotations, {
+        4: [Box(1.0, 2.0, 3.0, 4.0, 'bird')],
+        5: [],
+    })
+
+  def test_read_mot_annotations(self):
+    path = self._write_file('gt.txt', '1,1,10,20,5,6,1,1,1.0\n'
+                                      '1,2,0,0,5,6,0,1,1.0\n'
+                                      '3,3,1,2,3,4,1,2,0.5\n'
+                                      '3,4,1,2,3,4,1,7,0.5\n')
+
+    annotations = create_video_tf_record.read_mot_annotations(
+        path, {1: 'drone', 2: 'bird'})
+    annotations_with_class_name = create_video_tf_record.read_mot_annotations(
+        path, {}, class_name='drone')
+
+    self.assertDictEqual(annotations, {
+        0: [Box(10.0, 20.0, 15.0, 26.0, 'drone')],
+        2: [Box(1.0, 2.0, 4.0, 6.0, 'bird')],
+    })
+    self.assertEqual(
+        [len(boxes) for _, boxes in sorted(annotations_with_class_name.items())],
+        [1, 2])
+
+  def test_select_frames(self):
+    annotations = {0: [Box(0, 0, 1, 1, 'drone')], 3: [], 4: [], 30: []}
+
+    self.assertEqual(
+        create_video_tf_record.select_frames(annotations, 10), [0, 3, 4])
+    self.assertEqual(
+        create_video_tf_record.select_frames(annotations, 10, frame_stride=2),
+        [0, 4])
+    self.assertEqual(
+        create_video_tf_record.select_frames(annotations, 10,
+                                             negative_frame_stride=3),
+        [0, 3, 4, 6, 9])
+
+  def test_plan_shards(self):
+    videos = [('a.mp4', [0, 1, 2, 3, 4], {1: [Box(0, 0, 1, 1, 'drone')]}),
+              ('b.mp4', [7], {})]
+
+    shards = create_video_tf_record.plan_shards('/tmp/out.record', videos, 2)
+
+    self.assertEqual([shard.path for shard in shards],
+                     ['/tmp/out.record-{:05d}-of-00004'.format(idx)
+                      for idx in range(4)])
+    self.assertEqual([shard.video_path for shard in shards],
+                     ['a.mp4', 'a.mp4', 'a.mp4', 'b.mp4'])
+    self.assertEqual([shard.frame_indices for shard in shards],
+                     [[0, 1], [2, 3], [4], [7]])
+    self.assertEqual(shards[0].annotations,
+                     {0: [], 1: [Box(0, 0, 1, 1, 'drone')]})
+
+  def test_create_tf_example(self):
+    boxes = [Box(-8, 12, 32, 48, 'drone'),
+             Box(0, 0, 10, 10, 'plane'),
+             Box(70, 0, 80, 10, 'bird')]
+
+    example, num_annotations_skipped = create_video_tf_record.create_tf_example(
+        b'jpeg', 48, 64, 'flight/3', boxes, {'drone': 1, 'bird': 2})
+
+    features = example.features.feature
+    self.assertEqual(num_annotations_skipped, 2)
+    self.assertEqual(features['image/source_id'].bytes_list.value,
+                     [b'flight/3'])
+    self.assertEqual(features['image/height'].int64_list.value, [48])
+    self.assertEqual(features['image/width'].int64_list.value, [64])
+    self.assertAllClose(features['image/object/bbox/xmin'].float_list.value,
+                        [0.0])
+    self.assertAllClose(features['image/object/bbox/xmax'].float_list.value,
+                        [0.5])
+    self.assertAllClose(features['image/object/bbox/ymin'].float_list.value,
+                        [0.25])
+    self.assertAllClose(features['image/object/bbox/ymax'].float_list.value,
+                        [1.0])
+    self.assertEqual(features['image/object/class/text'].bytes_list.value,
+                     [b'drone'])
+    self.assertEqual(features['image/object/class/label'].int64_list.value,
+                     [1])
+
+  def test_create_tf_record_resumes(self):
+    video_path = self._write_video('flight.avi', 12)
+    annotation_path = self._write_file(
+        'flight.txt', '\n'.join('{},1,8,8,16,16,1,1,1.0'.format(frame)
+                                for frame in (1, 2, 6, 10, 11)))
+    output_path = os.path.join(self.get_temp_dir(), 'flight.record')
+    args = ([video_path], [annotation_path], 'mot', self._label_map_path(),
+            output_path)
+
+    report = create_video_tf_record.create_tf_record(*args, frames_per_shard=2)
+    os.remove(output_path + '-00001-of-00003')
+    resumed_report = create_video_tf_record.create_tf_record(
+        *args, frames_per_shard=2)
+
+    self.assertEqual(report['frames'], 5)
+    self.assertEqual(resumed_report['frames'], 2)
+    source_ids = []
+    for idx in range(3):
+      for record in tf.python_io.tf_record_iterator(
+          '{}-{:05d}-of-00003'.format(output_path, idx)):
+        example = tf.train.Example.FromString(record)
+        source_ids.extend(
+            example.features.feature['image/source_id'].bytes_list.value)
+    self.assertEqual(source_ids, [b'flight/0', b'flight/1', b'flight/5',
+                                  b'flight/9', b'flight/10'])
+    with tf.gfile.GFile(output_path + '.progress.json') as fid:
+      self.assertLen(json.load(fid)['shards'], 3)
+
+  def test_create_tf_record_rewrites_shards_of_other_arguments(self):
+    video_path = self._write_video('flight.avi', 12)
+    annotation_path = self._write_file(
+        'flight.txt', '\n'.join('{},1,8,8,16,16,1,1,1.0'.format(frame)
+                                for frame in (1, 2, 6, 10, 11)))
+    output_path = os.path.join(self.get_temp_dir(), 'flight.record')
+    args = ([video_path], [annotation_path], 'mot', self._label_map_path(),
+            output_path)
+
+    create_video_tf_record.create_tf_record(*args, frames_per_shard=2)
+    # The same shard names, but other frames and another encoding.
+    same_report = create_video_tf_record.create_tf_record(
+        *args, frames_per_shard=2)
+    quality_report = create_video_tf_record.create_tf_record(
+        *args, frames_per_shard=2, jpeg_quality=50)
+    stride_report = create_video_tf_record.create_tf_record(
+        *args, frames_per_shard=1, frame_stride=2)
+
+    self.assertEqual(same_report['frames'], 0)
+    self.assertEqual(quality_report['frames'], 5)
+    self.assertEqual(stride_report['frames'], 2)
+
+
+if __name__ == '__main__':
+  tf.test.main()
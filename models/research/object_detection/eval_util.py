@@ -28,6 +28,7 @@ import tensorflow.compat.v1 as tf
 
 import tf_slim as slim
 
+from object_detection.builders import decoder_builder
 from object_detection.core import box_list
 from object_detection.core import box_list_ops
 from object_detection.core import keypoint_ops
@@ -49,6 +50,8 @@ EVAL_KEYPOINT_METRIC = 'coco_keypoint_metrics'
 EVAL_METRICS_CLASS_DICT = {
     'coco_detection_metrics':
         coco_evaluation.CocoDetectionEvaluator,
+    'coco_streaming_detection_metrics':
+        coco_evaluation.CocoStreamingDetectionEvaluator,
     'coco_keypoint_metrics':
         coco_evaluation.CocoKeypointEvaluator,
     'coco_mask_metrics':
@@ -1130,6 +1133,69 @@ def get_evaluators(eval_config, categories, evaluator_options=None):
   return evaluators_list
 
 
+def evaluate_detection_fn(detect_fn, configs, num_examples=0):
+  """Computes the eval metrics of a detection function on the eval inputs.
+
+  Runs eagerly, one example at a time, e.g. to evaluate an exported model.
+
+  Args:
+    detect_fn: A function taking a uint8 image tensor of shape
+      [1, height, width, 3] and returning a dict of detection tensors with
+      normalized boxes and 1-based classes, like an exported model.
+    configs: A dictionary of configs, see
+      config_util.get_configs_from_pipeline_file.
+    num_examples: Number of eval examples, all examples if 0.
+
+  Returns:
+    A dict of the metrics of the evaluators of the eval config.
+  """
+  eval_input_config = configs['eval_input_configs'][0]
+  categories = label_map_util.create_categories_from_labelmap(
+      eval_input_config.label_map_path)
+  evaluators = get_evaluators(configs['eval_config'], categories)
+  decoder = decoder_builder.build(eval_input_config)
+  filenames = tf.io.gfile.glob(
+      eval_input_config.tf_record_input_reader.input_path[:])
+  dataset = tf.data.TFRecordDataset(filenames)
+  if num_examples:
+    dataset = dataset.take(num_examples)
+
+  input_fields = fields.InputDataFields
+  detection_fields = fields.DetectionResultFields
+  for image_id, serialized_example in enumerate(dataset):
+    tensor_dict = decoder.decode(serialized_example)
+    image = tensor_dict[input_fields.image]
+    height, width = image.shape[0], image.shape[1]
+    scale = np.array([height, width, height, width], np.float32)
+    detections = detect_fn(image[tf.newaxis])
+    num_detections = int(detections[detection_fields.num_detections][0])
+    groundtruth = {
+        input_fields.groundtruth_boxes:
+            tensor_dict[input_fields.groundtruth_boxes].numpy() * scale,
+        input_fields.groundtruth_classes:
+            tensor_dict[input_fields.groundtruth_classes].numpy(),
+    }
+    detection = {
+        detection_fields.detection_boxes:
+            detections[detection_fields.detection_boxes][0][
+                :num_detections].numpy() * scale,
+        detection_fields.detection_scores:
+            detections[detection_fields.detection_scores][0][
+                :num_detections].numpy(),
+        detection_fields.detection_classes:
+            detections[detection_fields.detection_classes][0][
+                :num_detections].numpy().astype(np.int32),
+    }
+    for evaluator in evaluators:
+      evaluator.add_single_ground_truth_image_info(image_id, groundtruth)
+      evaluator.add_single_detected_image_info(image_id, detection)
+
+  metrics = {}
+  for evaluator in evaluators:
+    metrics.update(evaluator.evaluate())
+  return metrics
+
+
 def get_eval_metric_ops_for_evaluators(eval_config,
                                        categories,
                                        eval_dict):
@@ -1174,7 +1240,8 @@ def evaluator_options_from_eval_config(eval_config):
   evaluator_options = {}
   for eval_metric_fn_key in eval_metric_fn_keys:
     if eval_metric_fn_key in (
-        'coco_detection_metrics', 'coco_mask_metrics', 'lvis_mask_metrics'):
+        'coco_detection_metrics', 'coco_streaming_detection_metrics',
+        'coco_mask_metrics', 'lvis_mask_metrics'):
       evaluator_options[eval_metric_fn_key] = {
           'include_metrics_per_category': (
               eval_config.include_metrics_per_category)
@@ -1188,8 +1255,9 @@ def evaluator_options_from_eval_config(eval_config):
       # For coco detection eval, if the eval_config proto contains the
       # "skip_predictions_for_unlabeled_class" field, include this field in
       # evaluator_options.
-      if eval_metric_fn_key == 'coco_detection_metrics' and hasattr(
-          eval_config, 'skip_predictions_for_unlabeled_class'):
+      if eval_metric_fn_key in (
+          'coco_detection_metrics', 'coco_streaming_detection_metrics'
+      ) and hasattr(eval_config, 'skip_predictions_for_unlabeled_class'):
         evaluator_options[eval_metric_fn_key].update({
             'skip_predictions_for_unlabeled_class':
                 (eval_config.skip_predictions_for_unlabeled_class)
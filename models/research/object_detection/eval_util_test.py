@@ -18,6 +18,7 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import os
 import unittest
 from absl.testing import parameterized
 
@@ -31,6 +32,8 @@ from object_detection import eval_util
 from object_detection.core import standard_fields as fields
 from object_detection.metrics import coco_evaluation
 from object_detection.protos import eval_pb2
+from object_detection.protos import input_reader_pb2
+from object_detection.utils import dataset_util
 from object_detection.utils import test_case
 from object_detection.utils import tf_version
 
@@ -456,6 +459,54 @@ class EvalUtilTest(test_case.TestCase, parameterized.TestCase):
     self.assertAllEqual(super_categories['supercat1'], ['a', 'b', 'c'])
     self.assertAllEqual(super_categories['supercat2'], ['d', 'e', 'f'])
 
+  @unittest.skipIf(tf_version.is_tf1(), 'Skipping TF2.X only test.')
+  def test_evaluate_detection_fn(self):
+    tmp_dir = self.get_temp_dir()
+    label_map_path = os.path.join(tmp_dir, 'label_map.pbtxt')
+    with tf.gfile.Open(label_map_path, 'w') as f:
+      f.write('item { name: "drone" id: 1 }')
+    tfrecord_path = os.path.join(tmp_dir, 'eval.tfrecord')
+    encoded_png = tf.image.encode_png(
+        tf.zeros([4, 8, 3], dtype=tf.uint8)).numpy()
+    with tf.io.TFRecordWriter(tfrecord_path) as writer:
+      for _ in range(2):
+        writer.write(tf.train.Example(features=tf.train.Features(feature={
+            'image/encoded': dataset_util.bytes_feature(encoded_png),
+            'image/format': dataset_util.bytes_feature(six.b('png')),
+            'image/object/bbox/ymin': dataset_util.float_list_feature([0.25]),
+            'image/object/bbox/xmin': dataset_util.float_list_feature([0.25]),
+            'image/object/bbox/ymax': dataset_util.float_list_feature([0.75]),
+            'image/object/bbox/xmax': dataset_util.float_list_feature([0.5]),
+            'image/object/class/label': dataset_util.int64_list_feature([1]),
+        })).SerializeToString())
+    eval_input_config = input_reader_pb2.InputReader(
+        label_map_path=label_map_path)
+    eval_input_config.tf_record_input_reader.input_path.append(tfrecord_path)
+    configs = {
+        'eval_config': eval_pb2.EvalConfig(
+            metrics_set=['coco_detection_metrics']),
+        'eval_input_configs': [eval_input_config],
+    }
+    images = []
+
+    def detect_fn(image):
+      images.append(image)
+      return {
+          'num_detections': tf.constant([2.0]),
+          'detection_boxes': tf.constant(
+              [[[0.25, 0.25, 0.75, 0.5], [0.0, 0.0, 0.1, 0.1]]]),
+          'detection_scores': tf.constant([[0.9, 0.1]]),
+          'detection_classes': tf.constant([[1.0, 1.0]]),
+      }
+
+    metrics = eval_util.evaluate_detection_fn(detect_fn, configs,
+                                              num_examples=1)
+
+    self.assertLen(images, 1)
+    self.assertAllEqual(images[0].shape, [1, 4, 8, 3])
+    self.assertAlmostEqual(
+        metrics['DetectionBoxes_Precision/mAP@.50IOU'], 1.0)
+
 
 if __name__ == '__main__':
   tf.test.main()
@@ -98,6 +98,14 @@ class FakeModel(model.DetectionModel):
     pass
 
 
+class FirstChannelFakeModel(FakeModel):
+  """A FakeModel whose detection scores only depend on the first channel."""
+
+  def preprocess(self, inputs):
+    return (inputs * tf.constant([1.0, 0.0, 0.0]),
+            exporter_lib_v2.get_true_shapes(inputs))
+
+
 @unittest.skipIf(tf_version.is_tf1(), 'Skipping TF2.X only test.')
 class ExportInferenceGraphTest(tf.test.TestCase, parameterized.TestCase):
 
@@ -265,6 +273,73 @@ class ExportInferenceGraphTest(tf.test.TestCase, parameterized.TestCase):
                           [[1, 2], [2, 1]])
       self.assertAllClose(detections[detection_fields.num_detections], [2, 1])
 
+  @parameterized.parameters(
+      {'bgr_input': False, 'expected_scores': [[0.7], [0.9]],
+       'expected_num_detections': [0, 1]},
+      {'bgr_input': True, 'expected_scores': [[6.7], [6.9]],
+       'expected_num_detections': [1, 1]},
+  )
+  def test_export_saved_model_with_fixed_shape_and_run_inference(
+      self, bgr_input, expected_scores, expected_num_detections):
+    tmp_dir = self.get_temp_dir()
+    self._save_checkpoint_from_mock_model(tmp_dir)
+    with mock.patch.object(
+        model_builder, 'build', autospec=True) as mock_builder:
+      mock_builder.return_value = FirstChannelFakeModel()
+      exporter_lib_v2.INPUT_BUILDER_UTIL_MAP['model_build'] = mock_builder
+      output_directory = os.path.join(tmp_dir, 'output')
+      pipeline_config = pipeline_pb2.TrainEvalPipelineConfig()
+      fixed_shape_resizer = (
+          pipeline_config.model.ssd.image_resizer.fixed_shape_resizer)
+      fixed_shape_resizer.height = 4
+      fixed_shape_resizer.width = 6
+      exporter_lib_v2.export_inference_graph(
+          input_type='fixed_shape_image_tensor',
+          pipeline_config=pipeline_config,
+          trained_checkpoint_dir=tmp_dir,
+          output_directory=output_directory,
+          bgr_input=bgr_input,
+          max_detections=1,
+          score_threshold=0.8)
+
+      saved_model_path = os.path.join(output_directory, 'saved_model')
+      detect_fn = tf.saved_model.load(saved_model_path)
+      detect_fn_sig = detect_fn.signatures['serving_default']
+      self.assertEqual(detect_fn_sig.inputs[0].shape.as_list(),
+                       [None, 4, 6, 3])
+      # A single BGR pixel with a red value of 1.
+      image = np.zeros((2, 4, 6, 3), dtype=np.uint8)
+      image[0, 0, 0, 2] = 1
+      detections = detect_fn_sig(input_tensor=tf.constant(image))
+
+      detection_fields = fields.DetectionResultFields
+      self.assertCountEqual(detections.keys(), [
+          detection_fields.detection_boxes, detection_fields.detection_scores,
+          detection_fields.detection_classes, detection_fields.num_detections
+      ])
+      self.assertAllClose(detections[detection_fields.detection_boxes],
+                          [[[0.0, 0.0, 0.5, 0.5]], [[0.5, 0.5, 1.0, 1.0]]])
+      self.assertAllClose(detections[detection_fields.detection_scores],
+                          expected_scores)
+      self.assertAllClose(detections[detection_fields.detection_classes],
+                          [[1], [2]])
+      self.assertAllClose(detections[detection_fields.num_detections],
+                          expected_num_detections)
+
+  def test_export_with_fixed_shape_requires_input_shape(self):
+    tmp_dir = self.get_temp_dir()
+    self._save_checkpoint_from_mock_model(tmp_dir)
+    with mock.patch.object(
+        model_builder, 'build', autospec=True) as mock_builder:
+      mock_builder.return_value = FakeModel()
+      exporter_lib_v2.INPUT_BUILDER_UTIL_MAP['model_build'] = mock_builder
+      with self.assertRaises(ValueError):
+        exporter_lib_v2.export_inference_graph(
+            input_type='fixed_shape_image_tensor',
+            pipeline_config=pipeline_pb2.TrainEvalPipelineConfig(),
+            trained_checkpoint_dir=tmp_dir,
+            output_directory=os.path.join(tmp_dir, 'output'))
+
   def test_export_checkpoint_and_run_inference_with_image(self):
     tmp_dir = self.get_temp_dir()
     self._save_checkpoint_from_mock_model(tmp_dir, conv_weight_scalar=2.0)
@@ -170,6 +170,84 @@ class DetectionFromImageModule(DetectionInferenceModule):
                                                    zipped_side_inputs)
 
 
+class DetectionFromFixedShapeImageModule(DetectionInferenceModule):
+  """Detection Inference Module for uint8 images of a fixed shape.
+
+  The signature takes a batch of uint8 images of a fixed height and width,
+  e.g. the frames of a camera, so it is traced once. The conversion of BGR
+  images to RGB and the resizing by the image resizer of the model are part of
+  the graph, and only the boxes, scores and classes of the top
+  `max_detections` detections with a score of at least `score_threshold` are
+  returned.
+  """
+
+  def __init__(self,
+               detection_model,
+               use_side_inputs=False,
+               zipped_side_inputs=None,
+               input_shape=None,
+               bgr_input=False,
+               max_detections=0,
+               score_threshold=0.0):
+    """Initializes a module for detection.
+
+    Args:
+      detection_model: the detection model to use for inference.
+      use_side_inputs: whether to use side inputs, not supported.
+      zipped_side_inputs: the zipped side inputs.
+      input_shape: [height, width] of the input images.
+      bgr_input: whether the input images are in BGR channel order (OpenCV)
+        instead of RGB.
+      max_detections: maximum number of returned detections per image, all
+        detections of the model if 0.
+      score_threshold: minimum score of the returned detections.
+
+    Raises:
+      ValueError: if side inputs are used or the input shape is not set.
+    """
+    if use_side_inputs:
+      raise ValueError('Side inputs are not supported for fixed shape images.')
+    if not input_shape or len(input_shape) != 2:
+      raise ValueError('The input shape [height, width] is required for fixed '
+                       'shape images.')
+    self._bgr_input = bgr_input
+    self._max_detections = max_detections
+    self._score_threshold = score_threshold
+    sig = [tf.TensorSpec(shape=[None, input_shape[0], input_shape[1], 3],
+                         dtype=tf.uint8,
+                         name='input_tensor')]
+    self.__call__ = tf.function(self._detect, input_signature=sig)
+    super(DetectionFromFixedShapeImageModule, self).__init__(
+        detection_model, use_side_inputs, zipped_side_inputs)
+
+  def _detect(self, input_tensor):
+    images = tf.cast(input_tensor, tf.float32)
+    if self._bgr_input:
+      images = tf.reverse(images, axis=[-1])
+    images, true_shapes = self._model.preprocess(images)
+    detections = self._run_inference_on_images(images, true_shapes)
+
+    # The detections of the model are sorted by decreasing score.
+    detection_fields = fields.DetectionResultFields
+    outputs = {}
+    for key in [detection_fields.detection_boxes,
+                detection_fields.detection_scores,
+                detection_fields.detection_classes]:
+      outputs[key] = detections[key]
+      if self._max_detections:
+        outputs[key] = outputs[key][:, :self._max_detections]
+    scores = outputs[detection_fields.detection_scores]
+    num_detections = tf.cast(detections[detection_fields.num_detections],
+                             tf.int32)
+    is_valid = tf.logical_and(
+        tf.range(tf.shape(scores)[1])[tf.newaxis, :] <
+        num_detections[:, tf.newaxis],
+        scores >= self._score_threshold)
+    outputs[detection_fields.num_detections] = tf.reduce_sum(
+        tf.cast(is_valid, tf.float32), axis=1)
+    return outputs
+
+
 def get_true_shapes(input_tensor):
   input_shape = tf.shape(input_tensor)
   batch = input_shape[0]
@@ -216,7 +294,11 @@ def export_inference_graph(input_type,
                            use_side_inputs=False,
                            side_input_shapes='',
                            side_input_types='',
-                           side_input_names=''):
+                           side_input_names='',
+                           input_shape=None,
+                           bgr_input=False,
+                           max_detections=0,
+                           score_threshold=0.0):
   """Exports inference graph for the model specified in the pipeline config.
 
   This function creates `output_directory` if it does not already exist,
@@ -236,6 +318,15 @@ def export_inference_graph(input_type,
         describing input shapes.
     side_input_types: comma-separated list of the types of the inputs.
     side_input_names: comma-separated list of the names of the inputs.
+    input_shape: [height, width] of the input images of the
+      `fixed_shape_image_tensor` input type. Defaults to the input size of
+      models with a fixed shape image resizer.
+    bgr_input: whether the `fixed_shape_image_tensor` inputs are in BGR
+      channel order.
+    max_detections: maximum number of detections per image returned for the
+      `fixed_shape_image_tensor` input type, all detections if 0.
+    score_threshold: minimum score of the detections returned for the
+      `fixed_shape_image_tensor` input type.
   Raises:
     ValueError: if input_type is invalid.
   """
@@ -262,9 +353,23 @@ def export_inference_graph(input_type,
                                               side_input_types,
                                               side_input_names)
 
+  module_kwargs = {}
+  if input_type == 'fixed_shape_image_tensor':
+    if not input_shape and pipeline_config.model.WhichOneof('model'):
+      spatial_image_size = config_util.get_spatial_image_size(
+          config_util.get_image_resizer_config(pipeline_config.model))
+      if min(spatial_image_size) > 0:
+        input_shape = spatial_image_size
+    module_kwargs = {
+        'input_shape': input_shape,
+        'bgr_input': bgr_input,
+        'max_detections': max_detections,
+        'score_threshold': score_threshold,
+    }
   detection_module = DETECTION_MODULE_MAP[input_type](detection_model,
                                                       use_side_inputs,
-                                                      list(zipped_side_inputs))
+                                                      list(zipped_side_inputs),
+                                                      **module_kwargs)
   # Getting the concrete function traces the graph and forces variables to
   # be constructed --- only after this can we save the checkpoint and
   # saved model.
@@ -354,4 +459,5 @@ DETECTION_MODULE_MAP = {
     'tf_example': DetectionFromTFExampleModule,
     'float_image_tensor': DetectionFromFloatImageModule,
     'image_and_boxes_tensor': DetectionFromImageAndBoxModule,
+    'fixed_shape_image_tensor': DetectionFromFixedShapeImageModule,
 }
@@ -36,6 +36,13 @@ specified option.
     bounding boxes. To be able to support this option, the model needs
     to implement a predict_masks_from_boxes method. See the documentation
     for DetectionFromImageAndBoxModule for details.
+  * `fixed_shape_image_tensor`: Accepts a uint8 4-D tensor of shape
+    [None, height, width, 3] with the height and width of `fixed_input_shape`
+    (by default the input size of models with a fixed shape image resizer).
+    The conversion of BGR images (`bgr_input`) and the resizing are part of
+    the graph and only `num_detections`, `detection_boxes`, `detection_scores`
+    and `detection_classes` of the top `max_detections` detections with a
+    score of at least `score_threshold` are returned.
 
 and the following output nodes returned by the model.postprocess(..):
   * `num_detections`: Outputs float32 tensors of the form [batch]
@@ -96,6 +103,19 @@ If side inputs are desired, the following arguments could be appended
    --side_input_shapes 1,2000,2057/1 \
    --side_input_names context_features,valid_context_size \
    --side_input_types tf.float32,tf.int32
+
+To export a model for the frames of a 1280x720 OpenCV camera, which returns
+the top 10 detections with a score of at least 0.3:
+
+python exporter_main_v2.py \
+    --input_type fixed_shape_image_tensor \
+    --fixed_input_shape 720,1280 \
+    --bgr_input \
+    --max_detections 10 \
+    --score_threshold 0.3 \
+    --pipeline_config_path path/to/ssd_mobilenet_v2.config \
+    --trained_checkpoint_dir path/to/checkpoint \
+    --output_directory path/to/exported_model_directory
 """
 from absl import app
 from absl import flags
@@ -113,7 +133,7 @@ FLAGS = flags.FLAGS
 flags.DEFINE_string('input_type', 'image_tensor', 'Type of input node. Can be '
                     'one of [`image_tensor`, `encoded_image_string_tensor`, '
                     '`tf_example`, `float_image_tensor`, '
-                    '`image_and_boxes_tensor`]')
+                    '`image_and_boxes_tensor`, `fixed_shape_image_tensor`]')
 flags.DEFINE_string('pipeline_config_path', None,
                     'Path to a pipeline_pb2.TrainEvalPipelineConfig config '
                     'file.')
@@ -144,6 +164,21 @@ flags.DEFINE_string('side_input_names', '',
                     'the names of the side input tensors required by the model '
                     'assuming the names will be a comma-separated list of '
                     'strings. This flag is required if using side inputs.')
+flags.DEFINE_list('fixed_input_shape', None,
+                  'If input_type is `fixed_shape_image_tensor`, the height '
+                  'and width of the input images as `height,width`. Defaults '
+                  'to the input size of models with a fixed shape image '
+                  'resizer.')
+flags.DEFINE_boolean('bgr_input', False,
+                     'If input_type is `fixed_shape_image_tensor`, whether '
+                     'the input images are in BGR channel order.')
+flags.DEFINE_integer('max_detections', 0,
+                     'If input_type is `fixed_shape_image_tensor`, the '
+                     'maximum number of returned detections per image, all '
+                     'detections if 0.')
+flags.DEFINE_float('score_threshold', 0.0,
+                   'If input_type is `fixed_shape_image_tensor`, the minimum '
+                   'score of the returned detections.')
 
 flags.mark_flag_as_required('pipeline_config_path')
 flags.mark_flag_as_required('trained_checkpoint_dir')
@@ -158,7 +193,12 @@ def main(_):
   exporter_lib_v2.export_inference_graph(
       FLAGS.input_type, pipeline_config, FLAGS.trained_checkpoint_dir,
       FLAGS.output_directory, FLAGS.use_side_inputs, FLAGS.side_input_shapes,
-      FLAGS.side_input_types, FLAGS.side_input_names)
+      FLAGS.side_input_types, FLAGS.side_input_names,
+      input_shape=([int(dim) for dim in FLAGS.fixed_input_shape]
+                   if FLAGS.fixed_input_shape else None),
+      bgr_input=FLAGS.bgr_input,
+      max_detections=FLAGS.max_detections,
+      score_threshold=FLAGS.score_threshold)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,357 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Utility functions for batch detection inference with a TF2 SavedModel."""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from absl import logging
+import tensorflow.compat.v2 as tf
+
+from object_detection.core import standard_fields
+
+# pylint: disable=g-import-not-at-top
+try:
+  import pyarrow
+  import pyarrow.parquet
+except ImportError:
+  # pyarrow is only needed to write Parquet files.
+  pyarrow = None
+# pylint: enable=g-import-not-at-top
+
+INPUT_TYPES = ('image_tensor', 'encoded_image_string_tensor', 'tf_example')
+OUTPUT_FORMATS = ('tfrecord', 'parquet')
+
+_DETECTION_FIELDS = standard_fields.DetectionResultFields
+_TF_EXAMPLE_FIELDS = standard_fields.TfExampleFields
+
+
+def sharded_path(path, shard_index, num_shards):
+  """Returns the path of a shard, <path>-<shard_index>-of-<num_shards>."""
+  if num_shards == 1:
+    return path
+  return '{}-{:05d}-of-{:05d}'.format(path, shard_index, num_shards)
+
+
+def _parse_encoded_image(serialized_example):
+  features = tf.io.parse_single_example(
+      serialized_example,
+      features={
+          _TF_EXAMPLE_FIELDS.image_encoded: tf.io.FixedLenFeature([],
+                                                                  tf.string),
+      })
+  return features[_TF_EXAMPLE_FIELDS.image_encoded]
+
+
+def _decode_image(serialized_example):
+  image = tf.image.decode_image(
+      _parse_encoded_image(serialized_example), channels=3,
+      expand_animations=False)
+  image.set_shape([None, None, 3])
+  return image
+
+
+def build_input(input_tfrecord_paths, input_type='image_tensor', batch_size=1,
+                num_shards=1, shard_index=0, num_parallel_reads=8):
+  """Builds a dataset of the examples and the model inputs of a shard.
+
+  The TFRecord files are read interleaved and in parallel. The model inputs
+  are prepared (parsed and, for `image_tensor`, decoded) in parallel and the
+  batches are prefetched while the model runs. If there are at least as many
+  files as shards, every shard reads a subset of the files, otherwise every
+  shard reads a subset of the records of all files.
+
+  Args:
+    input_tfrecord_paths: List of paths or glob patterns of the input
+      TFRecords of tf.Examples.
+    input_type: Input type of the SavedModel, one of INPUT_TYPES.
+    batch_size: Number of examples per batch. Batches of `image_tensor` inputs
+      require images of the same shape.
+    num_shards: Number of shards the inputs are split into.
+    shard_index: Index of the shard to read.
+    num_parallel_reads: Number of files read in parallel.
+
+  Returns:
+    A tf.data.Dataset of (serialized_examples, model_inputs) tuples, with
+    a string tensor of shape [batch_size] and the batched model inputs.
+
+  Raises:
+    ValueError: If the input type is unknown or no input file is found.
+  """
+  if input_type not in INPUT_TYPES:
+    raise ValueError('Unknown input type {}, expected one of {}.'.format(
+        input_type, INPUT_TYPES))
+  filenames = sorted(
+      filename for path in input_tfrecord_paths
+      for filename in tf.io.gfile.glob(path))
+  if not filenames:
+    raise ValueError('No input files found in {}.'.format(
+        input_tfrecord_paths))
+  shard_files = len(filenames) >= num_shards
+  dataset = tf.data.Dataset.from_tensor_slices(filenames)
+  if shard_files:
+    dataset = dataset.shard(num_shards, shard_index)
+  dataset = dataset.interleave(
+      tf.data.TFRecordDataset,
+      cycle_length=num_parallel_reads,
+      num_parallel_calls=tf.data.experimental.AUTOTUNE,
+      deterministic=True)
+  if not shard_files:
+    dataset = dataset.shard(num_shards, shard_index)
+
+  if input_type == 'image_tensor':
+    input_fn = _decode_image
+  elif input_type == 'encoded_image_string_tensor':
+    input_fn = _parse_encoded_image
+  else:
+    input_fn = tf.identity
+  dataset = dataset.map(
+      lambda serialized_example: (serialized_example,  # pylint: disable=g-long-lambda
+                                  input_fn(serialized_example)),
+      num_parallel_calls=tf.data.experimental.AUTOTUNE)
+  dataset = dataset.batch(batch_size)
+  return dataset.prefetch(tf.data.experimental.AUTOTUNE)
+
+
+def load_detect_fn(saved_model_dir):
+  """Returns the serving function of an exported SavedModel.
+
+  Args:
+    saved_model_dir: Directory of the SavedModel, see exporter_lib_v2.
+
+  Returns:
+    detect_fn: A function of the batched model inputs returning a dict of
+      detection tensors.
+    max_batch_size: The batch size of the input signature, or None if the
+      signature accepts any batch size.
+  """
+  serving_fn = tf.saved_model.load(saved_model_dir).signatures[
+      'serving_default']
+  input_name, input_spec = list(
+      serving_fn.structured_input_signature[1].items())[0]
+  max_batch_size = input_spec.shape[0] if input_spec.shape.rank else None
+
+  def detect_fn(model_inputs):
+    return serving_fn(**{input_name: model_inputs})
+
+  return detect_fn, max_batch_size
+
+
+def run_inference(detect_fn, dataset, max_batch_size=None):
+  """Runs the detection function on a dataset.
+
+  Args:
+    detect_fn: A function of the batched model inputs returning a dict of
+      detection tensors, see load_detect_fn.
+    dataset: A dataset of (serialized_examples, model_inputs) batches, see
+      build_input.
+    max_batch_size: Optional maximum batch size of detect_fn. Larger batches
+      are split.
+
+  Yields:
+    (serialized_example, detections) tuples in the order of the dataset, with
+    the boxes, scores and int64 classes of the num_detections detections of
+    the example.
+  """
+  for serialized_examples, model_inputs in dataset:
+    batch_size = int(serialized_examples.shape[0])
+    step = max_batch_size or batch_size
+    for start in range(0, batch_size, step):
+      detections = detect_fn(model_inputs[start:start + step])
+      num_detections = detections[_DETECTION_FIELDS.num_detections].numpy()
+      boxes = detections[_DETECTION_FIELDS.detection_boxes].numpy()
+      scores = detections[_DETECTION_FIELDS.detection_scores].numpy()
+      classes = detections[_DETECTION_FIELDS.detection_classes].numpy()
+      for i in range(int(num_detections.shape[0])):
+        num = int(num_detections[i])
+        yield serialized_examples[start + i].numpy(), {
+            _DETECTION_FIELDS.detection_boxes: boxes[i, :num],
+            _DETECTION_FIELDS.detection_scores: scores[i, :num],
+            _DETECTION_FIELDS.detection_classes:
+                classes[i, :num].astype('int64'),
+        }
+
+
+def add_detections_to_example(serialized_example, detections,
+                              discard_image_pixels=False):
+  """Adds detections to a serialized tf.Example.
+
+  The detections are stored in the same features as
+  detection_inference.infer_detections_and_add_to_example does.
+
+  Args:
+    serialized_example: A serialized tf.Example.
+    detections: A dict with the boxes, scores and classes of the detections,
+      see run_inference.
+    discard_image_pixels: If true, discards the image from the result.
+
+  Returns:
+    The tf.train.Example augmented with the detections.
+  """
+  tf_example = tf.train.Example()
+  tf_example.ParseFromString(serialized_example)
+  feature = tf_example.features.feature
+  boxes = detections[_DETECTION_FIELDS.detection_boxes].T
+  feature[_TF_EXAMPLE_FIELDS.detection_score].float_list.value[:] = (
+      detections[_DETECTION_FIELDS.detection_scores])
+  feature[_TF_EXAMPLE_FIELDS.detection_bbox_ymin].float_list.value[:] = boxes[0]
+  feature[_TF_EXAMPLE_FIELDS.detection_bbox_xmin].float_list.value[:] = boxes[1]
+  feature[_TF_EXAMPLE_FIELDS.detection_bbox_ymax].float_list.value[:] = boxes[2]
+  feature[_TF_EXAMPLE_FIELDS.detection_bbox_xmax].float_list.value[:] = boxes[3]
+  feature[_TF_EXAMPLE_FIELDS.detection_class_label].int64_list.value[:] = (
+      detections[_DETECTION_FIELDS.detection_classes])
+  if discard_image_pixels:
+    del feature[_TF_EXAMPLE_FIELDS.image_encoded]
+  return tf_example
+
+
+def _bytes_feature_value(feature_map, key):
+  if key not in feature_map or not feature_map[key].bytes_list.value:
+    return ''
+  return feature_map[key].bytes_list.value[0].decode('utf8')
+
+
+class TFRecordDetectionWriter(object):
+  """Writes the input tf.Examples augmented with their detections."""
+
+  def __init__(self, output_path, discard_image_pixels=False):
+    self._writer = tf.io.TFRecordWriter(output_path)
+    self._discard_image_pixels = discard_image_pixels
+
+  def write(self, serialized_example, detections):
+    tf_example = add_detections_to_example(serialized_example, detections,
+                                           self._discard_image_pixels)
+    self._writer.write(tf_example.SerializeToString())
+
+  def close(self):
+    self._writer.close()
+
+
+class ParquetDetectionWriter(object):
+  """Writes a Parquet table with one row of detections per example.
+
+  The columns are the source id and the filename of the example and the
+  lists of normalized [ymin, xmin, ymax, xmax] boxes, scores and classes of
+  its detections. Rows are written in row groups of `rows_per_group` rows.
+  """
+
+  def __init__(self, output_path, rows_per_group=1000):
+    if pyarrow is None:
+      raise ValueError('Writing Parquet files requires pyarrow.')
+    self._schema = pyarrow.schema([
+        ('source_id', pyarrow.string()),
+        ('filename', pyarrow.string()),
+        (_DETECTION_FIELDS.detection_boxes,
+         pyarrow.list_(pyarrow.list_(pyarrow.float32(), 4))),
+        (_DETECTION_FIELDS.detection_scores, pyarrow.list_(pyarrow.float32())),
+        (_DETECTION_FIELDS.detection_classes, pyarrow.list_(pyarrow.int64())),
+    ])
+    self._writer = pyarrow.parquet.ParquetWriter(output_path, self._schema)
+    self._rows_per_group = rows_per_group
+    self._columns = {name: [] for name in self._schema.names}
+    self._num_rows = 0
+
+  def write(self, serialized_example, detections):
+    tf_example = tf.train.Example()
+    tf_example.ParseFromString(serialized_example)
+    feature_map = tf_example.features.feature
+    self._columns['source_id'].append(
+        _bytes_feature_value(feature_map, _TF_EXAMPLE_FIELDS.source_id))
+    self._columns['filename'].append(
+        _bytes_feature_value(feature_map, _TF_EXAMPLE_FIELDS.filename))
+    for field in (_DETECTION_FIELDS.detection_boxes,
+                  _DETECTION_FIELDS.detection_scores,
+                  _DETECTION_FIELDS.detection_classes):
+      self._columns[field].append(detections[field].tolist())
+    self._num_rows += 1
+    if self._num_rows >= self._rows_per_group:
+      self._flush()
+
+  def _flush(self):
+    self._writer.write_table(
+        pyarrow.Table.from_pydict(self._columns, schema=self._schema))
+    self._columns = {name: [] for name in self._schema.names}
+    self._num_rows = 0
+
+  def close(self):
+    if self._num_rows:
+      self._flush()
+    self._writer.close()
+
+
+def build_writer(output_path, output_format='tfrecord',
+                 discard_image_pixels=False):
+  """Returns a detection writer of an output format, one of OUTPUT_FORMATS."""
+  if output_format == 'tfrecord':
+    return TFRecordDetectionWriter(output_path, discard_image_pixels)
+  if output_format == 'parquet':
+    return ParquetDetectionWriter(output_path)
+  raise ValueError('Unknown output format {}, expected one of {}.'.format(
+      output_format, OUTPUT_FORMATS))
+
+
+def infer_detections(input_tfrecord_paths,
+                     saved_model_dir,
+                     output_path,
+                     output_format='tfrecord',
+                     input_type='image_tensor',
+                     batch_size=1,
+                     num_shards=1,
+                     shard_index=0,
+                     discard_image_pixels=False,
+                     log_every_n=100):
+  """Infers the detections of a shard of the inputs and writes them.
+
+  Args:
+    input_tfrecord_paths: List of paths or glob patterns of the input
+      TFRecords.
+    saved_model_dir: Directory of the SavedModel.
+    output_path: Path of the output, the shard is written to
+      sharded_path(output_path, shard_index, num_shards).
+    output_format: One of OUTPUT_FORMATS.
+    input_type: Input type of the SavedModel, one of INPUT_TYPES.
+    batch_size: Number of examples per batch.
+    num_shards: Number of shards of the inputs and outputs.
+    shard_index: Index of the shard to process.
+    discard_image_pixels: If true, discards the images in the output
+      tf.Examples.
+    log_every_n: Number of examples between two progress logs.
+
+  Returns:
+    The number of processed examples.
+  """
+  detect_fn, max_batch_size = load_detect_fn(saved_model_dir)
+  if max_batch_size and batch_size > max_batch_size:
+    logging.info(
+        'The SavedModel takes batches of %d examples, the batches of %d '
+        'examples are split.', max_batch_size, batch_size)
+  dataset = build_input(input_tfrecord_paths, input_type, batch_size,
+                        num_shards, shard_index)
+  shard_output_path = sharded_path(output_path, shard_index, num_shards)
+  writer = build_writer(shard_output_path, output_format, discard_image_pixels)
+  num_examples = 0
+  try:
+    for serialized_example, detections in run_inference(
+        detect_fn, dataset, max_batch_size):
+      writer.write(serialized_example, detections)
+      num_examples += 1
+      if num_examples % log_every_n == 0:
+        logging.info('Shard %d: processed %d examples...', shard_index,
+                     num_examples)
+  finally:
+    writer.close()
+  logging.info('Shard %d: wrote %d examples to %s.', shard_index,
+               num_examples, shard_output_path)
+  return num_examples
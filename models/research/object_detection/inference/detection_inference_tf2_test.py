@@ -0,0 +1,196 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Tests for detection_inference_tf2.py."""
+import os
+import unittest
+
+import numpy as np
+from PIL import Image
+import six
+import tensorflow.compat.v2 as tf
+from google.protobuf import text_format
+
+from object_detection.core import standard_fields
+from object_detection.inference import detection_inference_tf2
+from object_detection.utils import dataset_util
+from object_detection.utils import tf_version
+
+
+def create_mock_tfrecord(path, num_examples=1):
+  """Writes examples with a 1x1 image of value 123 + index."""
+  with tf.io.TFRecordWriter(path) as writer:
+    for index in range(num_examples):
+      pil_image = Image.fromarray(
+          np.array([[[123 + index, 0, 0]]], dtype=np.uint8), 'RGB')
+      image_output_stream = six.BytesIO()
+      pil_image.save(image_output_stream, format='png')
+      feature_map = {
+          'test_field':
+              dataset_util.float_list_feature([1, 2, 3, 4]),
+          standard_fields.TfExampleFields.image_encoded:
+              dataset_util.bytes_feature(image_output_stream.getvalue()),
+          standard_fields.TfExampleFields.source_id:
+              dataset_util.bytes_feature(six.ensure_binary(str(index))),
+      }
+      tf_example = tf.train.Example(
+          features=tf.train.Features(feature=feature_map))
+      writer.write(tf_example.SerializeToString())
+
+
+def _mock_detections(pixel_sums):
+  batch_size = tf.shape(pixel_sums)[0]
+  boxes = tf.constant(
+      [[0, 0.8, 0.7, 1], [0.1, 0.2, 0.8, 0.9], [0.2, 0.3, 0.4, 0.5]])
+  return {
+      'num_detections': tf.fill([batch_size], 2.0),
+      'detection_boxes': tf.tile(boxes[tf.newaxis], [batch_size, 1, 1]),
+      'detection_scores': tf.tile([[0.1, 0.2, 0.3]], [batch_size, 1]),
+      'detection_classes': (tf.constant([[1.0, 2.0, 3.0]]) *
+                            pixel_sums[:, tf.newaxis]),
+  }
+
+
+class MockImageModel(tf.Module):
+  """Takes one uint8 image, like the `image_tensor` exports."""
+
+  @tf.function(input_signature=[
+      tf.TensorSpec(shape=[1, None, None, 3], dtype=tf.uint8,
+                    name='input_tensor')])
+  def __call__(self, input_tensor):
+    return _mock_detections(
+        tf.reduce_sum(tf.cast(input_tensor, tf.float32), axis=[1, 2, 3]))
+
+
+class MockTFExampleModel(tf.Module):
+  """Takes a batch of serialized tf.Examples, like the `tf_example` exports."""
+
+  @tf.function(input_signature=[
+      tf.TensorSpec(shape=[None], dtype=tf.string, name='input_tensor')])
+  def __call__(self, input_tensor):
+    def pixel_sum(serialized_example):
+      features = tf.io.parse_single_example(serialized_example, {
+          'image/encoded': tf.io.FixedLenFeature([], tf.string)})
+      return tf.reduce_sum(tf.cast(
+          tf.io.decode_png(features['image/encoded']), tf.float32))
+    return _mock_detections(
+        tf.map_fn(pixel_sum, input_tensor, fn_output_signature=tf.float32))
+
+
+@unittest.skipIf(tf_version.is_tf1(), 'Skipping TF2.X only test.')
+class InferDetectionsTest(tf.test.TestCase):
+
+  def setUp(self):
+    super(InferDetectionsTest, self).setUp()
+    self._tmp_dir = self.get_temp_dir()
+    self._input_path = os.path.join(self._tmp_dir, 'mock.tfrec')
+    self._output_path = os.path.join(self._tmp_dir, 'detections.tfrec')
+
+  def _save_model(self, model):
+    saved_model_dir = os.path.join(self._tmp_dir, 'saved_model')
+    tf.saved_model.save(model, saved_model_dir,
+                        signatures=model.__call__.get_concrete_function())
+    return saved_model_dir
+
+  def _read_examples(self, path):
+    tf_examples = []
+    for serialized_example in tf.data.TFRecordDataset(path):
+      tf_example = tf.train.Example()
+      tf_example.ParseFromString(serialized_example.numpy())
+      tf_examples.append(tf_example)
+    return tf_examples
+
+  def test_infer_detections(self):
+    create_mock_tfrecord(self._input_path)
+    saved_model_dir = self._save_model(MockImageModel())
+
+    num_examples = detection_inference_tf2.infer_detections(
+        [self._input_path], saved_model_dir, self._output_path,
+        discard_image_pixels=True)
+
+    self.assertEqual(num_examples, 1)
+    expected_example = tf.train.Example()
+    text_format.Merge(r"""
+        features {
+          feature {
+            key: "image/detection/bbox/ymin"
+            value { float_list { value: [0.0, 0.1] } } }
+          feature {
+            key: "image/detection/bbox/xmin"
+            value { float_list { value: [0.8, 0.2] } } }
+          feature {
+            key: "image/detection/bbox/ymax"
+            value { float_list { value: [0.7, 0.8] } } }
+          feature {
+            key: "image/detection/bbox/xmax"
+            value { float_list { value: [1.0, 0.9] } } }
+          feature {
+            key: "image/detection/label"
+            value { int64_list { value: [123, 246] } } }
+          feature {
+            key: "image/detection/score"
+            value { float_list { value: [0.1, 0.2] } } }
+          feature {
+            key: "image/source_id"
+            value { bytes_list { value: "0" } } }
+          feature {
+            key: "test_field"
+            value { float_list { value: [1.0, 2.0, 3.0, 4.0] } } } }""",
+                      expected_example)
+    self.assertProtoEquals(expected_example,
+                           self._read_examples(self._output_path)[0])
+
+  def test_infer_detections_in_batches_and_shards(self):
+    create_mock_tfrecord(self._input_path, num_examples=5)
+    saved_model_dir = self._save_model(MockTFExampleModel())
+
+    labels = {}
+    for shard_index in range(2):
+      detection_inference_tf2.infer_detections(
+          [self._input_path], saved_model_dir, self._output_path,
+          input_type='tf_example', batch_size=2, num_shards=2,
+          shard_index=shard_index)
+      for tf_example in self._read_examples(
+          self._output_path + '-{:05d}-of-00002'.format(shard_index)):
+        feature = tf_example.features.feature
+        source_id = feature['image/source_id'].bytes_list.value[0]
+        labels[source_id] = list(
+            feature['image/detection/label'].int64_list.value)
+
+    self.assertEqual(labels, {
+        six.ensure_binary(str(index)): [123 + index, 2 * (123 + index)]
+        for index in range(5)})
+
+  @unittest.skipIf(detection_inference_tf2.pyarrow is None,
+                   'pyarrow is not installed.')
+  def test_infer_detections_to_parquet(self):
+    create_mock_tfrecord(self._input_path, num_examples=3)
+    saved_model_dir = self._save_model(MockImageModel())
+    output_path = os.path.join(self._tmp_dir, 'detections.parquet')
+
+    detection_inference_tf2.infer_detections(
+        [self._input_path], saved_model_dir, output_path,
+        output_format='parquet')
+
+    table = detection_inference_tf2.pyarrow.parquet.read_table(
+        output_path).to_pydict()
+    self.assertEqual(table['source_id'], ['0', '1', '2'])
+    self.assertEqual(table['detection_classes'],
+                     [[123, 246], [124, 248], [125, 250]])
+    self.assertAllClose(table['detection_boxes'][0],
+                        [[0, 0.8, 0.7, 1], [0.1, 0.2, 0.8, 0.9]])
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -0,0 +1,129 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Infers detections on TFRecords of TFExamples with a TF2 SavedModel.
+
+The TF2 version of infer_detections.py, for SavedModels exported with
+exporter_main_v2.py. The TFRecords are read with an interleaved, prefetching
+tf.data pipeline and the model runs on batches of --batch_size examples (the
+SavedModels of the `image_tensor` input type take one image per call, export
+with --input_type=tf_example or encoded_image_string_tensor to run larger
+batches).
+
+The inputs are split into --num_shards shards, every shard is written to
+<output_path>-<shard_index>-of-<num_shards>. A machine processes all shards or,
+with --shard_index, a single shard, in a pool of --num_workers processes.
+
+Example usage:
+  python infer_detections_tf2.py \
+    --input_tfrecord_paths=/path/to/input/tfrecord1,/path/to/input/tfrecord2 \
+    --saved_model_dir=/path/to/exported_model/saved_model \
+    --input_type=tf_example \
+    --batch_size=16 \
+    --output_path=/path/to/output/detections.tfrecord \
+    --num_shards=8 \
+    --num_workers=2
+
+The output is a TFRecord of the input TFExamples augmented with their
+detections, in the same features as infer_detections.py writes, or, with
+--output_format=parquet, a Parquet table with one row of detections per
+TFExample (requires pyarrow).
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import multiprocessing
+
+from absl import app
+from absl import flags
+from absl import logging
+
+from object_detection.inference import detection_inference_tf2
+
+flags.DEFINE_list('input_tfrecord_paths', None,
+                  'A comma separated list of paths or glob patterns of the '
+                  'input TFRecords.')
+flags.DEFINE_string('saved_model_dir', None, 'Path to the SavedModel.')
+flags.DEFINE_string('output_path', None,
+                    'Path of the output, the shards are '
+                    '<output_path>-<shard_index>-of-<num_shards>.')
+flags.DEFINE_enum('output_format', 'tfrecord',
+                  detection_inference_tf2.OUTPUT_FORMATS,
+                  'Format of the output.')
+flags.DEFINE_enum('input_type', 'image_tensor',
+                  detection_inference_tf2.INPUT_TYPES,
+                  'Input type of the SavedModel.')
+flags.DEFINE_integer('batch_size', 1, 'Number of examples per batch.')
+flags.DEFINE_integer('num_shards', 1,
+                     'Number of shards the inputs and outputs are split into.')
+flags.DEFINE_integer('shard_index', None,
+                     'If set, only this shard is processed, otherwise all '
+                     'shards.')
+flags.DEFINE_integer('num_workers', 1,
+                     'Number of processes processing the shards.')
+flags.DEFINE_boolean('discard_image_pixels', False,
+                     'Discards the images in the output TFExamples. This'
+                     ' significantly reduces the output size and is useful'
+                     ' if the subsequent tools don\'t need access to the'
+                     ' images (e.g. when computing evaluation measures).')
+
+FLAGS = flags.FLAGS
+
+
+def _infer_detections_in_worker(kwargs):
+  return detection_inference_tf2.infer_detections(**kwargs)
+
+
+def main(_):
+  required_flags = ['input_tfrecord_paths', 'saved_model_dir', 'output_path']
+  for flag_name in required_flags:
+    if not getattr(FLAGS, flag_name):
+      raise ValueError('Flag --{} is required'.format(flag_name))
+
+  if FLAGS.shard_index is None:
+    shard_indices = list(range(FLAGS.num_shards))
+  else:
+    shard_indices = [FLAGS.shard_index]
+  tasks = [
+      dict(input_tfrecord_paths=FLAGS.input_tfrecord_paths,
+           saved_model_dir=FLAGS.saved_model_dir,
+           output_path=FLAGS.output_path,
+           output_format=FLAGS.output_format,
+           input_type=FLAGS.input_type,
+           batch_size=FLAGS.batch_size,
+           num_shards=FLAGS.num_shards,
+           shard_index=shard_index,
+           discard_image_pixels=FLAGS.discard_image_pixels)
+      for shard_index in shard_indices
+  ]
+  if FLAGS.num_workers > 1 and len(tasks) > 1:
+    # spawn instead of fork, forking a process that already runs tensorflow is
+    # not safe.
+    pool = multiprocessing.get_context('spawn').Pool(
+        min(FLAGS.num_workers, len(tasks)))
+    try:
+      num_examples = sum(pool.imap_unordered(_infer_detections_in_worker,
+                                             tasks))
+    finally:
+      pool.close()
+      pool.join()
+  else:
+    num_examples = sum(_infer_detections_in_worker(task) for task in tasks)
+  logging.info('Finished processing %d examples in %d shards.', num_examples,
+               len(tasks))
+
+
+if __name__ == '__main__':
+  app.run(main)
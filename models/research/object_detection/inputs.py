@@ -584,6 +584,49 @@ def pad_input_data_to_static_shapes(tensor_dict,
   return padded_tensor_dict
 
 
+def resize_input_data(tensor_dict, image_resizer_fn):
+  """Resizes the image (and instance masks) of a decoded example.
+
+  The padding added by the resizer is cropped away, so the normalized boxes
+  and keypoints of the example still match the image. The resized image keeps
+  the type of the decoded image.
+
+  Args:
+    tensor_dict: A dictionary of input tensors keyed by fields.InputDataFields.
+    image_resizer_fn: A function that takes an image and optional masks and
+      returns the resized image, masks and the (unpadded) resized image shape,
+      see builders/image_resizer_builder.py.
+
+  Returns:
+    A copy of tensor_dict with the resized image, additional channels and
+    instance masks.
+  """
+  out_tensor_dict = tensor_dict.copy()
+  input_fields = fields.InputDataFields
+
+  def resize(image, masks=None):
+    outputs = image_resizer_fn(
+        tf.cast(image, tf.float32),
+        None if masks is None else tf.cast(masks, tf.float32))
+    height, width = outputs[-1][0], outputs[-1][1]
+    resized_image = outputs[0][:height, :width]
+    if image.dtype.is_integer:
+      resized_image = tf.saturate_cast(tf.round(resized_image), image.dtype)
+    if masks is None:
+      return resized_image, None
+    return resized_image, tf.cast(outputs[1][:, :height, :width], masks.dtype)
+
+  image = out_tensor_dict[input_fields.image]
+  masks = out_tensor_dict.get(input_fields.groundtruth_instance_masks)
+  out_tensor_dict[input_fields.image], resized_masks = resize(image, masks)
+  if masks is not None:
+    out_tensor_dict[input_fields.groundtruth_instance_masks] = resized_masks
+  if input_fields.image_additional_channels in out_tensor_dict:
+    out_tensor_dict[input_fields.image_additional_channels] = resize(
+        out_tensor_dict[input_fields.image_additional_channels])[0]
+  return out_tensor_dict
+
+
 def augment_input_data(tensor_dict, data_augmentation_options):
   """Applies data augmentation ops to input tensors.
 
@@ -898,12 +941,29 @@ def train_input(train_config, train_input_config,
             _get_labels_dict(tensor_dict))
   reduce_to_frame_fn = get_reduce_to_frame_fn(train_input_config, True)
 
+  # Resizing is deterministic, so it can run before the decoded examples are
+  # cached. The data augmentations then work on the resized images.
+  cache_transform_fn = None
+  cache_key = ''
+  if train_input_config.cache_dir and train_input_config.cache_resized_images:
+    if train_input_config.input_type == (
+        input_reader_pb2.InputType.Value('TF_SEQUENCE_EXAMPLE')):
+      raise ValueError('`cache_resized_images` is not supported for '
+                       'TF_SEQUENCE_EXAMPLE inputs.')
+    image_resizer_config = config_util.get_image_resizer_config(model_config)
+    cache_transform_fn = functools.partial(
+        resize_input_data,
+        image_resizer_fn=image_resizer_builder.build(image_resizer_config))
+    cache_key = image_resizer_config.SerializeToString(deterministic=True)
+
   dataset = INPUT_BUILDER_UTIL_MAP['dataset_build'](
       train_input_config,
       transform_input_data_fn=transform_and_pad_input_data_fn,
       batch_size=params['batch_size'] if params else train_config.batch_size,
       input_context=input_context,
-      reduce_to_frame_fn=reduce_to_frame_fn)
+      reduce_to_frame_fn=reduce_to_frame_fn,
+      cache_transform_fn=cache_transform_fn,
+      cache_key=cache_key)
   return dataset
 
 
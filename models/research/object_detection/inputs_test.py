@@ -1469,6 +1469,33 @@ class DataTransformationFnTest(test_case.TestCase, parameterized.TestCase):
         [[0.7, 0.8], [0.9, 1.0]])
 
 
+class ResizeInputDataTest(test_case.TestCase):
+
+  def test_resize_crops_padding_and_keeps_dtype(self):
+    def graph_fn():
+      tensor_dict = {
+          fields.InputDataFields.image:
+              tf.constant(np.full((100, 50, 3), 200, np.uint8)),
+          fields.InputDataFields.groundtruth_instance_masks:
+              tf.constant(np.ones((2, 100, 50), np.float32)),
+          fields.InputDataFields.groundtruth_boxes:
+              tf.constant(np.array([[.5, .5, 1, 1], [.0, .0, .5, .5]],
+                                   np.float32)),
+      }
+      image_resizer_fn = functools.partial(
+          preprocessor.resize_to_range, min_dimension=50, max_dimension=50,
+          pad_to_max_dimension=True)
+      resized_inputs = inputs.resize_input_data(tensor_dict, image_resizer_fn)
+      return (resized_inputs[fields.InputDataFields.image],
+              resized_inputs[fields.InputDataFields.groundtruth_instance_masks],
+              resized_inputs[fields.InputDataFields.groundtruth_boxes])
+    image, masks, boxes = self.execute_cpu(graph_fn, [])
+    self.assertEqual(image.dtype, np.uint8)
+    self.assertAllEqual(image, np.full((50, 25, 3), 200, np.uint8))
+    self.assertAllEqual(masks, np.ones((2, 50, 25), np.float32))
+    self.assertAllClose(boxes, [[.5, .5, 1, 1], [.0, .0, .5, .5]])
+
+
 class PadInputDataToStaticShapesFnTest(test_case.TestCase):
 
   def test_pad_images_boxes_and_classes(self):
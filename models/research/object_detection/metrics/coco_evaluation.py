@@ -498,6 +498,205 @@ class CocoDetectionEvaluator(object_detection_evaluation.DetectionEvaluator):
     return eval_metric_ops
 
 
+class CocoStreamingDetectionEvaluator(CocoDetectionEvaluator):
+  """Class to evaluate COCO detection metrics with bounded memory.
+
+  CocoDetectionEvaluator keeps the groundtruth and detections of all images as
+  lists of dicts until evaluate() is called. This evaluator matches the
+  detections of an image to its groundtruth as soon as they are added and only
+  keeps the matches, in files on disk (see coco_tools.COCOStreamingEval). The
+  metrics are the same as the ones of CocoDetectionEvaluator. Keypoints are
+  not evaluated and dump_detections_to_json_file() is not supported.
+  """
+
+  def __init__(self,
+               categories,
+               include_metrics_per_category=False,
+               all_metrics_per_category=False,
+               skip_predictions_for_unlabeled_class=False,
+               super_categories=None,
+               store_dir=None,
+               chunk_size=1000000):
+    """Constructor.
+
+    Args:
+      categories: A list of dicts, each of which has the following keys -
+        'id': (required) an integer id uniquely identifying this category.
+        'name': (required) string representing category name e.g., 'cat', 'dog'.
+      include_metrics_per_category: If True, include metrics for each category.
+      all_metrics_per_category: Whether to include all the summary metrics for
+        each category in per_category_ap.
+      skip_predictions_for_unlabeled_class: Skip predictions that do not match
+        with the labeled classes for the image.
+      super_categories: None or a python dict mapping super-category names
+        (strings) to lists of categories (corresponding to category names
+        in the label_map).
+      store_dir: directory for the matches of the detections. If None, a
+        temporary directory is used.
+      chunk_size: maximum number of detections held in memory.
+    """
+    super(CocoStreamingDetectionEvaluator, self).__init__(
+        categories,
+        include_metrics_per_category=include_metrics_per_category,
+        all_metrics_per_category=all_metrics_per_category,
+        skip_predictions_for_unlabeled_class=(
+            skip_predictions_for_unlabeled_class),
+        super_categories=super_categories)
+    self._streaming_eval = coco_tools.COCOStreamingEval(
+        self._categories, store_dir=store_dir, chunk_size=chunk_size)
+    # Groundtruth of the images whose detections have not been added yet.
+    self._pending_groundtruth = {}
+
+  def clear(self):
+    """Clears the state to prepare for a fresh evaluation."""
+    super(CocoStreamingDetectionEvaluator, self).clear()
+    self._streaming_eval.Clear()
+    self._pending_groundtruth = {}
+    self._groundtruth_labeled_classes = {}
+
+  def add_single_ground_truth_image_info(self,
+                                         image_id,
+                                         groundtruth_dict):
+    """Adds groundtruth for a single image to be used for evaluation.
+
+    The groundtruth is kept until the detections of the image are added.
+    If the image has already been added, a warning is logged, and groundtruth is
+    ignored.
+
+    Args:
+      image_id: A unique string/integer identifier for the image.
+      groundtruth_dict: A dictionary containing -
+        InputDataFields.groundtruth_boxes: float32 numpy array of shape
+          [num_boxes, 4] containing `num_boxes` groundtruth boxes of the format
+          [ymin, xmin, ymax, xmax] in absolute image coordinates.
+        InputDataFields.groundtruth_classes: integer numpy array of shape
+          [num_boxes] containing 1-indexed groundtruth classes for the boxes.
+        InputDataFields.groundtruth_is_crowd (optional): integer numpy array of
+          shape [num_boxes] containing iscrowd flag for groundtruth boxes.
+        InputDataFields.groundtruth_area (optional): float numpy array of
+          shape [num_boxes] containing the area (in the original absolute
+          coordinates) of the annotated object.
+        InputDataFields.groundtruth_labeled_classes (optional): a tensor of
+          shape [num_classes + 1] containing the multi-hot tensor indicating the
+          classes that each image is labeled for. Note that the classes labels
+          are 1-indexed.
+
+    Raises:
+      ValueError: If groundtruth_labeled_classes has an invalid shape.
+    """
+    if image_id in self._image_ids:
+      tf.logging.warning('Ignoring ground truth with image id %s since it was '
+                         'previously added', image_id)
+      return
+
+    if (standard_fields.InputDataFields.groundtruth_labeled_classes
+       ) in groundtruth_dict:
+      labeled_classes = groundtruth_dict[
+          standard_fields.InputDataFields.groundtruth_labeled_classes]
+      if labeled_classes.shape != (len(self._category_id_set) + 1,):
+        raise ValueError('Invalid shape for groundtruth labeled classes: {}, '
+                         'num_categories_including_background: {}'.format(
+                             labeled_classes,
+                             len(self._category_id_set) + 1))
+      self._groundtruth_labeled_classes[image_id] = np.flatnonzero(
+          labeled_classes == 1).tolist()
+
+    self._pending_groundtruth[image_id] = (
+        groundtruth_dict[standard_fields.InputDataFields.groundtruth_boxes],
+        groundtruth_dict[standard_fields.InputDataFields.groundtruth_classes],
+        groundtruth_dict.get(
+            standard_fields.InputDataFields.groundtruth_is_crowd),
+        groundtruth_dict.get(standard_fields.InputDataFields.groundtruth_area))
+    # Boolean to indicate whether a detection has been added for this image.
+    self._image_ids[image_id] = False
+
+  def add_single_detected_image_info(self,
+                                     image_id,
+                                     detections_dict):
+    """Matches the detections of a single image to its groundtruth.
+
+    If a detection has already been added for this image id, a warning is
+    logged, and the detection is skipped.
+
+    Args:
+      image_id: A unique string/integer identifier for the image.
+      detections_dict: A dictionary containing -
+        DetectionResultFields.detection_boxes: float32 numpy array of shape
+          [num_boxes, 4] containing `num_boxes` detection boxes of the format
+          [ymin, xmin, ymax, xmax] in absolute image coordinates.
+        DetectionResultFields.detection_scores: float32 numpy array of shape
+          [num_boxes] containing detection scores for the boxes.
+        DetectionResultFields.detection_classes: integer numpy array of shape
+          [num_boxes] containing 1-indexed detection classes for the boxes.
+    Raises:
+      ValueError: If groundtruth for the image_id is not available.
+    """
+    if image_id not in self._image_ids:
+      raise ValueError('Missing groundtruth for image id: {}'.format(image_id))
+
+    if self._image_ids[image_id]:
+      tf.logging.warning('Ignoring detection with image id %s since it was '
+                         'previously added', image_id)
+      return
+
+    detection_boxes = detections_dict[
+        standard_fields.DetectionResultFields.detection_boxes]
+    detection_scores = detections_dict[
+        standard_fields.DetectionResultFields.detection_scores]
+    detection_classes = detections_dict[
+        standard_fields.DetectionResultFields.detection_classes]
+    if self._skip_predictions_for_unlabeled_class:
+      keep = np.isin(detection_classes,
+                     self._groundtruth_labeled_classes[image_id])
+      detection_boxes = detection_boxes[keep]
+      detection_scores = detection_scores[keep]
+      detection_classes = detection_classes[keep]
+    self._add_image(image_id, detection_boxes, detection_scores,
+                    detection_classes)
+
+  def _add_image(self, image_id, detection_boxes=None, detection_scores=None,
+                 detection_classes=None):
+    """Passes the groundtruth and detections of an image to the matcher."""
+    (groundtruth_boxes, groundtruth_classes, groundtruth_is_crowd,
+     groundtruth_area) = self._pending_groundtruth.pop(image_id)
+    self._groundtruth_labeled_classes.pop(image_id, None)
+    self._streaming_eval.AddImage(
+        image_id, groundtruth_boxes, groundtruth_classes,
+        groundtruth_is_crowd=groundtruth_is_crowd,
+        groundtruth_area=groundtruth_area,
+        detection_boxes=detection_boxes,
+        detection_scores=detection_scores,
+        detection_classes=detection_classes)
+    self._image_ids[image_id] = True
+
+  def dump_detections_to_json_file(self, json_output_path):
+    """Not supported, the detections are not kept."""
+    if json_output_path:
+      tf.logging.warning('CocoStreamingDetectionEvaluator does not keep the '
+                         'detections, nothing is written to %s.',
+                         json_output_path)
+
+  def evaluate(self):
+    """Evaluates the detection boxes and returns a dictionary of coco metrics.
+
+    Images whose detections were not added are evaluated without detections.
+
+    Returns:
+      The same dictionary as CocoDetectionEvaluator.evaluate().
+    """
+    tf.logging.info('Performing evaluation on %d images.', len(self._image_ids))
+    for image_id in list(self._pending_groundtruth):
+      self._add_image(image_id)
+    box_metrics, box_per_category_ap = self._streaming_eval.ComputeMetrics(
+        include_metrics_per_category=self._include_metrics_per_category,
+        all_metrics_per_category=self._all_metrics_per_category,
+        super_categories=self._super_categories)
+    box_metrics.update(box_per_category_ap)
+    box_metrics = {'DetectionBoxes_'+ key: value
+                   for key, value in iter(box_metrics.items())}
+    return box_metrics
+
+
 def convert_masks_to_binary(masks):
   """Converts masks to 0 or 1 and uint8 type."""
   return (masks > 0).astype(np.uint8)
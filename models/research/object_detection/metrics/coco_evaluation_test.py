@@ -252,6 +252,71 @@ class CocoDetectionEvaluationTest(tf.test.TestCase):
           })
 
 
+class CocoStreamingDetectionEvaluationTest(tf.test.TestCase):
+
+  def testSameMetricsAsCocoDetectionEvaluator(self):
+    np.random.seed(1)
+    coco_evaluator = coco_evaluation.CocoDetectionEvaluator(
+        _get_categories_list())
+    streaming_evaluator = coco_evaluation.CocoStreamingDetectionEvaluator(
+        _get_categories_list(), chunk_size=5)
+    for image_index in range(20):
+      image_id = 'image{}'.format(image_index)
+      corners = np.random.uniform(0, 200, size=(3, 2))
+      groundtruth_boxes = np.concatenate(
+          [corners, corners + np.random.uniform(10, 120, size=(3, 2))],
+          axis=1).astype(np.float32)
+      groundtruth_dict = {
+          standard_fields.InputDataFields.groundtruth_boxes:
+              groundtruth_boxes,
+          standard_fields.InputDataFields.groundtruth_classes:
+              np.random.randint(1, 4, size=3),
+          standard_fields.InputDataFields.groundtruth_is_crowd:
+              np.array([0, 0, image_index % 2])
+      }
+      detections_dict = {
+          standard_fields.DetectionResultFields.detection_boxes:
+              groundtruth_boxes + np.random.normal(
+                  scale=8., size=(3, 4)).astype(np.float32),
+          standard_fields.DetectionResultFields.detection_scores:
+              np.random.uniform(size=3).astype(np.float32),
+          standard_fields.DetectionResultFields.detection_classes:
+              np.random.randint(1, 4, size=3)
+      }
+      for evaluator in [coco_evaluator, streaming_evaluator]:
+        evaluator.add_single_ground_truth_image_info(
+            image_id=image_id, groundtruth_dict=groundtruth_dict)
+        # The last images have no detections.
+        if image_index < 17:
+          evaluator.add_single_detected_image_info(
+              image_id=image_id, detections_dict=detections_dict)
+
+    metrics = coco_evaluator.evaluate()
+    streaming_metrics = streaming_evaluator.evaluate()
+    self.assertEqual(sorted(metrics.keys()), sorted(streaming_metrics.keys()))
+    for name, value in metrics.items():
+      self.assertEqual(value, streaming_metrics[name])
+
+    streaming_evaluator.clear()
+    self.assertFalse(streaming_evaluator._image_ids)
+    self.assertFalse(streaming_evaluator._pending_groundtruth)
+
+  def testRejectAddingDetectionsBeforeGroundtruth(self):
+    streaming_evaluator = coco_evaluation.CocoStreamingDetectionEvaluator(
+        _get_categories_list())
+    with self.assertRaises(ValueError):
+      streaming_evaluator.add_single_detected_image_info(
+          image_id='image1',
+          detections_dict={
+              standard_fields.DetectionResultFields.detection_boxes:
+                  np.array([[100., 100., 200., 200.]]),
+              standard_fields.DetectionResultFields.detection_scores:
+                  np.array([.8]),
+              standard_fields.DetectionResultFields.detection_classes:
+                  np.array([1])
+          })
+
+
 @unittest.skipIf(tf_version.is_tf2(), 'Only Supported in TF1.X')
 class CocoEvaluationPyFuncTest(tf.test.TestCase):
 
@@ -38,6 +38,17 @@ then evaluation (in multi-class mode) can be invoked as follows:
                                          agnostic_mode=False)
   metrics = evaluator.ComputeMetrics()
 
+For datasets that do not fit into memory as lists of dicts (e.g. hours of
+video), COCOStreamingEval computes the same box metrics image by image:
+
+  evaluator = coco_tools.COCOStreamingEval(categories)
+  for image_id, groundtruth_boxes, ... in images:
+    evaluator.AddImage(image_id, groundtruth_boxes, groundtruth_classes,
+                       detection_boxes=detection_boxes,
+                       detection_scores=detection_scores,
+                       detection_classes=detection_classes)
+  metrics = evaluator.ComputeMetrics()
+
 """
 from __future__ import absolute_import
 from __future__ import division
@@ -45,6 +56,9 @@ from __future__ import print_function
 
 from collections import OrderedDict
 import copy
+import os
+import shutil
+import tempfile
 import time
 import numpy as np
 
@@ -303,57 +317,79 @@ class COCOEvalWrapper(cocoeval.COCOeval):
       return summary_metrics, {}
     if not hasattr(self, 'category_stats'):
       raise ValueError('Category stats do not exist')
-    per_category_ap = OrderedDict([])
-    super_category_ap = OrderedDict([])
     if self.GetAgnosticMode():
-      return summary_metrics, per_category_ap
+      return summary_metrics, OrderedDict([])
 
-    if super_categories:
-      for key in super_categories:
-        super_category_ap['PerformanceBySuperCategory/{}'.format(key)] = 0
+    category_names = [self.GetCategory(category_id)['name']
+                      for category_id in self.GetCategoryIdList()]
+    per_category_ap = _ComputePerCategoryMetrics(
+        category_names, self.category_stats, all_metrics_per_category,
+        super_categories)
+    return summary_metrics, per_category_ap
 
-        if all_metrics_per_category:
-          for metric_name, _ in COCO_METRIC_NAMES_AND_INDEX:
-            metric_key = '{} BySuperCategory/{}'.format(metric_name, key)
-            super_category_ap[metric_key] = 0
 
-    for category_index, category_id in enumerate(self.GetCategoryIdList()):
-      category = self.GetCategory(category_id)['name']
-      # Kept for backward compatilbility
-      per_category_ap['PerformanceByCategory/mAP/{}'.format(
-          category)] = self.category_stats[0][category_index]
+def _ComputePerCategoryMetrics(category_names, category_stats,
+                               all_metrics_per_category, super_categories):
+  """Builds the per category (and super-category) metrics of ComputeMetrics.
+
+  Args:
+    category_names: list of category names, in the order of category_stats.
+    category_stats: array of shape [12, num_categories] holding the summary
+      metrics (in the order of COCO_METRIC_NAMES_AND_INDEX) of every category.
+    all_metrics_per_category: If true, include all the summary metrics for
+      each category, otherwise only the mAP.
+    super_categories: None or a python dict mapping super-category names
+      (strings) to lists of category names.
+
+  Returns:
+    per_category_ap: a dictionary holding category specific results, see
+      COCOEvalWrapper.ComputeMetrics.
+  """
+  per_category_ap = OrderedDict([])
+  super_category_ap = OrderedDict([])
+  if super_categories:
+    for key in super_categories:
+      super_category_ap['PerformanceBySuperCategory/{}'.format(key)] = 0
 
       if all_metrics_per_category:
-        for metric_name, index in COCO_METRIC_NAMES_AND_INDEX:
-          metric_key = '{} ByCategory/{}'.format(metric_name, category)
-          per_category_ap[metric_key] = self.category_stats[index][
-              category_index]
-
-      if super_categories:
-        for key in super_categories:
-          if category in super_categories[key]:
-            metric_key = 'PerformanceBySuperCategory/{}'.format(key)
-            super_category_ap[metric_key] += self.category_stats[0][
-                category_index]
-            if all_metrics_per_category:
-              for metric_name, index in COCO_METRIC_NAMES_AND_INDEX:
-                metric_key = '{} BySuperCategory/{}'.format(metric_name, key)
-                super_category_ap[metric_key] += (
-                    self.category_stats[index][category_index])
+        for metric_name, _ in COCO_METRIC_NAMES_AND_INDEX:
+          metric_key = '{} BySuperCategory/{}'.format(metric_name, key)
+          super_category_ap[metric_key] = 0
+
+  for category_index, category in enumerate(category_names):
+    # Kept for backward compatilbility
+    per_category_ap['PerformanceByCategory/mAP/{}'.format(
+        category)] = category_stats[0][category_index]
+
+    if all_metrics_per_category:
+      for metric_name, index in COCO_METRIC_NAMES_AND_INDEX:
+        metric_key = '{} ByCategory/{}'.format(metric_name, category)
+        per_category_ap[metric_key] = category_stats[index][category_index]
 
     if super_categories:
       for key in super_categories:
-        length = len(super_categories[key])
-        super_category_ap['PerformanceBySuperCategory/{}'.format(
-            key)] /= length
+        if category in super_categories[key]:
+          metric_key = 'PerformanceBySuperCategory/{}'.format(key)
+          super_category_ap[metric_key] += category_stats[0][category_index]
+          if all_metrics_per_category:
+            for metric_name, index in COCO_METRIC_NAMES_AND_INDEX:
+              metric_key = '{} BySuperCategory/{}'.format(metric_name, key)
+              super_category_ap[metric_key] += (
+                  category_stats[index][category_index])
+
+  if super_categories:
+    for key in super_categories:
+      length = len(super_categories[key])
+      super_category_ap['PerformanceBySuperCategory/{}'.format(
+          key)] /= length
 
-        if all_metrics_per_category:
-          for metric_name, _ in COCO_METRIC_NAMES_AND_INDEX:
-            super_category_ap['{} BySuperCategory/{}'.format(
-                metric_name, key)] /= length
+      if all_metrics_per_category:
+        for metric_name, _ in COCO_METRIC_NAMES_AND_INDEX:
+          super_category_ap['{} BySuperCategory/{}'.format(
+              metric_name, key)] /= length
 
-      per_category_ap.update(super_category_ap)
-    return summary_metrics, per_category_ap
+    per_category_ap.update(super_category_ap)
+  return per_category_ap
 
 
 def _ConvertBoxToCOCOFormat(box):
@@ -978,3 +1014,623 @@ def ExportKeypointsToCOCO(image_ids,
     with tf.gfile.GFile(output_path, 'w') as fid:
       json_utils.Dump(keypoints_export_list, fid, float_digits=4, indent=2)
   return keypoints_export_list
+
+
+# Columns written by COCOStreamingEval for every detection. 'matched' and
+# 'ignored' hold one bit for every (area range, IOU threshold) pair, the bit of
+# area range a and IOU threshold t is a * num_iou_thresholds + t.
+_STREAMING_ROW_DTYPE = np.dtype([('image', '<i8'), ('rank', '<i8'),
+                                 ('score', '<f8'), ('matched', '<u8'),
+                                 ('ignored', '<u8')])
+# Rows sorted for accumulation, 'key' orders the detections with the same
+# score by the sorted image id and then by their rank in the image, like the
+# stable sort of cocoeval.COCOeval.accumulate.
+_SORTED_ROW_DTYPE = np.dtype([('score', '<f8'), ('key', '<i8'),
+                              ('matched', '<u8'), ('ignored', '<u8')])
+# Number of sorted rows accumulated at once. The cumulative sums take about
+# 2KB per row.
+_ACCUMULATION_BLOCK_SIZE = 16384
+
+
+def _ConvertBoxesToCOCOFormat(boxes):
+  """Vectorized _ConvertBoxToCOCOFormat.
+
+  Args:
+    boxes: a [num_boxes, 4] numpy array of [ymin, xmin, ymax, xmax] boxes.
+
+  Returns:
+    a float64 numpy array of shape [num_boxes, 4] holding
+    [xmin, ymin, width, height], with the same values as
+    _ConvertBoxToCOCOFormat.
+  """
+  return np.stack([
+      boxes[:, 1].astype(np.float64), boxes[:, 0].astype(np.float64),
+      (boxes[:, 3] - boxes[:, 1]).astype(np.float64),
+      (boxes[:, 2] - boxes[:, 0]).astype(np.float64)
+  ], axis=1)
+
+
+def _ComputeBoxIou(detection_boxes, groundtruth_boxes, groundtruth_is_crowd):
+  """Computes the IOU of COCO boxes like pycocotools.mask.iou.
+
+  Args:
+    detection_boxes: float64 numpy array of shape [num_detections, 4] in COCO
+      format.
+    groundtruth_boxes: float64 numpy array of shape [num_groundtruth, 4] in
+      COCO format.
+    groundtruth_is_crowd: numpy array of shape [num_groundtruth]. The IOU with
+      a crowd box is the intersection over the area of the detection.
+
+  Returns:
+    a float64 numpy array of shape [num_detections, num_groundtruth].
+  """
+  detection_area = detection_boxes[:, 2] * detection_boxes[:, 3]
+  groundtruth_area = groundtruth_boxes[:, 2] * groundtruth_boxes[:, 3]
+  detection_boxes = detection_boxes[:, None, :]
+  groundtruth_boxes = groundtruth_boxes[None, :, :]
+  width = (np.minimum(detection_boxes[..., 2] + detection_boxes[..., 0],
+                      groundtruth_boxes[..., 2] + groundtruth_boxes[..., 0]) -
+           np.maximum(detection_boxes[..., 0], groundtruth_boxes[..., 0]))
+  height = (np.minimum(detection_boxes[..., 3] + detection_boxes[..., 1],
+                       groundtruth_boxes[..., 3] + groundtruth_boxes[..., 1]) -
+            np.maximum(detection_boxes[..., 1], groundtruth_boxes[..., 1]))
+  intersection = width * height
+  union = np.where(groundtruth_is_crowd[None, :] != 0, detection_area[:, None],
+                   detection_area[:, None] + groundtruth_area[None, :] -
+                   intersection)
+  overlaps = np.logical_and(width > 0, height > 0)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    return np.where(overlaps, intersection / union, 0.0)
+
+
+def _MatchDetections(ious, groundtruth_ignore, groundtruth_is_crowd,
+                     iou_thresholds):
+  """Greedily matches sorted detections to groundtruth like COCOeval.evaluateImg.
+
+  Args:
+    ious: numpy array of shape [num_detections, num_groundtruth], detections
+      sorted by decreasing score and groundtruth sorted with the ignored ones
+      last.
+    groundtruth_ignore: bool numpy array of shape [num_groundtruth].
+    groundtruth_is_crowd: numpy array of shape [num_groundtruth].
+    iou_thresholds: list of IOU thresholds.
+
+  Returns:
+    detection_matched: bool numpy array of shape [num_iou_thresholds,
+      num_detections], True if the detection is matched to a groundtruth box.
+    detection_ignored: bool numpy array of shape [num_iou_thresholds,
+      num_detections], True if the detection is matched to an ignored
+      groundtruth box.
+  """
+  num_detections, num_groundtruth = ious.shape
+  detection_matched = np.zeros((len(iou_thresholds), num_detections),
+                               dtype=bool)
+  detection_ignored = np.zeros((len(iou_thresholds), num_detections),
+                               dtype=bool)
+  # Python lists are much faster than numpy scalars in the loops below.
+  ious = ious.tolist()
+  groundtruth_ignore = groundtruth_ignore.tolist()
+  groundtruth_is_crowd = groundtruth_is_crowd.tolist()
+  for threshold_index, threshold in enumerate(iou_thresholds):
+    groundtruth_matched = [False] * num_groundtruth
+    for detection_index in range(num_detections):
+      best_iou = min([threshold, 1 - 1e-10])
+      match = -1
+      detection_ious = ious[detection_index]
+      for groundtruth_index in range(num_groundtruth):
+        if (groundtruth_matched[groundtruth_index] and
+            not groundtruth_is_crowd[groundtruth_index]):
+          continue
+        if (match > -1 and not groundtruth_ignore[match] and
+            groundtruth_ignore[groundtruth_index]):
+          break
+        if detection_ious[groundtruth_index] < best_iou:
+          continue
+        best_iou = detection_ious[groundtruth_index]
+        match = groundtruth_index
+      if match == -1:
+        continue
+      detection_matched[threshold_index, detection_index] = True
+      detection_ignored[threshold_index, detection_index] = (
+          groundtruth_ignore[match])
+      groundtruth_matched[match] = True
+  return detection_matched, detection_ignored
+
+
+def _NumRowsNotAfter(rows, score, key):
+  """Returns the number of sorted rows that come before or at (score, key)."""
+  negative_scores = -rows['score']
+  start = np.searchsorted(negative_scores, -score, side='left')
+  end = np.searchsorted(negative_scores, -score, side='right')
+  return start + np.searchsorted(rows['key'][start:end], key, side='right')
+
+
+def _MergeSortedRuns(runs, block_size):
+  """Yields the rows of several sorted runs in sorted blocks.
+
+  At most block_size rows of every run are read at a time. The rows that can
+  not be preceded by a row not read yet are sorted and yielded.
+
+  Args:
+    runs: list of arrays of _SORTED_ROW_DTYPE, each sorted by decreasing score
+      and increasing key. Can be numpy memmaps.
+    block_size: number of rows read from every run at a time.
+
+  Yields:
+    numpy arrays of _SORTED_ROW_DTYPE; their concatenation is sorted.
+  """
+  positions = [0] * len(runs)
+  while True:
+    blocks = []
+    last_row = None
+    for run, position in zip(runs, positions):
+      block = run[position:position + block_size]
+      blocks.append(block)
+      if position + block_size < run.shape[0]:
+        row = (-block['score'][-1], block['key'][-1])
+        if last_row is None or row < last_row:
+          last_row = row
+    if not any(block.shape[0] for block in blocks):
+      return
+    merged = []
+    for index, block in enumerate(blocks):
+      if last_row is None:
+        num_rows = block.shape[0]
+      else:
+        num_rows = _NumRowsNotAfter(block, -last_row[0], last_row[1])
+      merged.append(np.array(block[:num_rows]))
+      positions[index] += num_rows
+    merged = np.concatenate(merged)
+    yield merged[np.lexsort((merged['key'], -merged['score']))]
+
+
+class COCOStreamingEval(object):
+  """Computes the box metrics of COCOEvalWrapper with bounded memory.
+
+  COCOEvalWrapper needs the groundtruth and the detections of all images in
+  memory as lists of dicts. COCOStreamingEval matches the detections of an
+  image to its groundtruth as soon as the image is added (like
+  cocoeval.COCOeval.evaluateImg), and appends one row per detection with its
+  score and its matches to a file per category. ComputeMetrics() sorts the
+  rows in chunks, merges the sorted chunks and accumulates precision and recall
+  on the fly (like cocoeval.COCOeval.accumulate). At most chunk_size rows are
+  in memory at a time, only the image ids and the number of groundtruth boxes
+  per category grow with the dataset.
+
+  The metrics are the same as the ones of COCOEvalWrapper with
+  agnostic_mode=False and iou_type='bbox'.
+  """
+
+  def __init__(self, categories, store_dir=None, chunk_size=1000000):
+    """COCOStreamingEval constructor.
+
+    Args:
+      categories: A list of dicts, each of which has the following keys -
+        'id': (required) an integer id uniquely identifying this category.
+        'name': (required) string representing category name e.g., 'cat'.
+      store_dir: directory for the rows of the detections. If None, a
+        temporary directory is used and deleted by Clear().
+      chunk_size: number of rows kept in memory before they are written, and
+        sorted at once by ComputeMetrics().
+    """
+    # Same parameters as cocoeval.Params for the 'bbox' iou type.
+    self._category_ids = sorted(category['id'] for category in categories)
+    self._category_names = {
+        category['id']: category['name'] for category in categories}
+    self._category_indices = {
+        category_id: index
+        for index, category_id in enumerate(self._category_ids)}
+    self._iou_thresholds = np.linspace(
+        .5, 0.95, int(np.round((0.95 - .5) / .05)) + 1, endpoint=True)
+    self._recall_thresholds = np.linspace(
+        .0, 1.00, int(np.round((1.00 - .0) / .01)) + 1, endpoint=True)
+    self._max_detections = [1, 10, 100]
+    self._area_ranges = [[0 ** 2, 1e5 ** 2], [0 ** 2, 32 ** 2],
+                         [32 ** 2, 96 ** 2], [96 ** 2, 1e5 ** 2]]
+    self._chunk_size = chunk_size
+    self._temporary_store_dir = store_dir is None
+    self._store_dir = store_dir
+    self.Clear()
+
+  def Clear(self):
+    """Removes all images and their rows."""
+    if self._store_dir is not None and os.path.isdir(self._store_dir):
+      if self._temporary_store_dir:
+        shutil.rmtree(self._store_dir, ignore_errors=True)
+      else:
+        for category_id in self._category_ids:
+          for path in self._GetPaths(category_id):
+            os.remove(path)
+    if self._temporary_store_dir:
+      self._store_dir = None
+    self._image_ids = []
+    self._num_positives = np.zeros(
+        (len(self._category_ids), len(self._area_ranges)), dtype=np.int64)
+    self._buffers = [[] for _ in self._category_ids]
+    self._num_buffered_rows = 0
+
+  def _GetRowsPath(self, category_id):
+    return os.path.join(self._store_dir, 'category_{}.rows'.format(category_id))
+
+  def _GetPaths(self, category_id):
+    """Returns the existing files of a category."""
+    prefix = 'category_{}.'.format(category_id)
+    return [os.path.join(self._store_dir, name)
+            for name in os.listdir(self._store_dir) if name.startswith(prefix)]
+
+  def _Flush(self):
+    """Appends the buffered rows to the files of their categories."""
+    if not self._num_buffered_rows:
+      return
+    if self._store_dir is None:
+      self._store_dir = tempfile.mkdtemp(prefix='coco_streaming_eval_')
+    elif not os.path.isdir(self._store_dir):
+      os.makedirs(self._store_dir)
+    for category_index, buffers in enumerate(self._buffers):
+      if buffers:
+        with open(self._GetRowsPath(self._category_ids[category_index]),
+                  'ab') as fid:
+          np.concatenate(buffers).tofile(fid)
+    self._buffers = [[] for _ in self._category_ids]
+    self._num_buffered_rows = 0
+
+  def AddImage(self,
+               image_id,
+               groundtruth_boxes,
+               groundtruth_classes,
+               groundtruth_is_crowd=None,
+               groundtruth_area=None,
+               detection_boxes=None,
+               detection_scores=None,
+               detection_classes=None):
+    """Matches the detections of an image to its groundtruth.
+
+    Groundtruth and detections with classes that are not in categories are
+    dropped, as in ExportSingleImageGroundtruthToCoco and
+    ExportSingleImageDetectionBoxesToCoco.
+
+    Args:
+      image_id: a unique image identifier either of type integer or string.
+      groundtruth_boxes: numpy array (float32) with shape [num_gt_boxes, 4] of
+        the format [ymin, xmin, ymax, xmax] in absolute image coordinates.
+      groundtruth_classes: numpy array (int) with shape [num_gt_boxes]
+      groundtruth_is_crowd: optional numpy array (int) with shape
+        [num_gt_boxes] indicating whether groundtruth boxes are crowd.
+      groundtruth_area: optional numpy array (float32) with shape
+        [num_gt_boxes]. Positive values are used as the area of the boxes
+        instead of the area of the bounding boxes.
+      detection_boxes: optional numpy array (float32) with shape
+        [num_detections, 4] of the format [ymin, xmin, ymax, xmax] in
+        absolute image coordinates. None if the image has no detections.
+      detection_scores: numpy array (float32) with shape [num_detections].
+      detection_classes: numpy array (int) with shape [num_detections].
+
+    Raises:
+      ValueError: if the shapes of the groundtruth or detection arrays do not
+        agree.
+    """
+    if (len(groundtruth_boxes.shape) != 2 or groundtruth_boxes.shape[1] != 4 or
+        groundtruth_classes.shape != groundtruth_boxes.shape[:1]):
+      raise ValueError('groundtruth_boxes should have shape [num_gt_boxes, 4] '
+                       'and groundtruth_classes [num_gt_boxes]. Image ID: '
+                       '%s' % image_id)
+    if detection_boxes is None:
+      detection_boxes = np.zeros((0, 4), dtype=np.float32)
+      detection_scores = np.zeros((0,), dtype=np.float32)
+      detection_classes = np.zeros((0,), dtype=np.int32)
+    if (len(detection_boxes.shape) != 2 or detection_boxes.shape[1] != 4 or
+        detection_scores.shape != detection_boxes.shape[:1] or
+        detection_classes.shape != detection_boxes.shape[:1]):
+      raise ValueError('detection_boxes should have shape [num_detections, 4] '
+                       'and detection_scores and detection_classes '
+                       '[num_detections]. Image ID: %s' % image_id)
+    image_index = len(self._image_ids)
+    self._image_ids.append(image_id)
+
+    keep = np.isin(groundtruth_classes, self._category_ids)
+    groundtruth_boxes = groundtruth_boxes[keep]
+    groundtruth_classes = groundtruth_classes[keep]
+    box_area = ((groundtruth_boxes[:, 2] - groundtruth_boxes[:, 0]) *
+                (groundtruth_boxes[:, 3] - groundtruth_boxes[:, 1])).astype(
+                    np.float64)
+    if groundtruth_area is not None and groundtruth_area.shape[0]:
+      groundtruth_area = groundtruth_area[keep]
+      groundtruth_area = np.where(groundtruth_area > 0,
+                                  groundtruth_area.astype(np.float64), box_area)
+    else:
+      groundtruth_area = box_area
+    if groundtruth_is_crowd is not None and groundtruth_is_crowd.shape[0]:
+      groundtruth_is_crowd = groundtruth_is_crowd[keep].astype(np.int64)
+    else:
+      groundtruth_is_crowd = np.zeros(groundtruth_classes.shape, dtype=np.int64)
+    groundtruth_boxes = _ConvertBoxesToCOCOFormat(groundtruth_boxes)
+
+    keep = np.isin(detection_classes, self._category_ids)
+    detection_boxes = _ConvertBoxesToCOCOFormat(detection_boxes[keep])
+    detection_scores = detection_scores[keep].astype(np.float64)
+    detection_classes = detection_classes[keep]
+
+    for category_id in np.unique(
+        np.concatenate([groundtruth_classes, detection_classes])):
+      in_groundtruth = groundtruth_classes == category_id
+      in_detections = detection_classes == category_id
+      self._AddImageCategory(image_index,
+                             self._category_indices[int(category_id)],
+                             groundtruth_boxes[in_groundtruth],
+                             groundtruth_is_crowd[in_groundtruth],
+                             groundtruth_area[in_groundtruth],
+                             detection_boxes[in_detections],
+                             detection_scores[in_detections])
+    if self._num_buffered_rows >= self._chunk_size:
+      self._Flush()
+
+  def _AddImageCategory(self, image_index, category_index, groundtruth_boxes,
+                        groundtruth_is_crowd, groundtruth_area,
+                        detection_boxes, detection_scores):
+    """Matches the detections of one category of an image, buffers the rows."""
+    order = np.argsort(-detection_scores,
+                       kind='mergesort')[:self._max_detections[-1]]
+    detection_boxes = detection_boxes[order]
+    detection_scores = detection_scores[order]
+    detection_area = detection_boxes[:, 2] * detection_boxes[:, 3]
+    ious = _ComputeBoxIou(detection_boxes, groundtruth_boxes,
+                          groundtruth_is_crowd)
+
+    num_iou_thresholds = len(self._iou_thresholds)
+    matched_bits = np.zeros(detection_scores.shape, dtype=np.uint64)
+    ignored_bits = np.zeros(detection_scores.shape, dtype=np.uint64)
+    for area_index, (area_min, area_max) in enumerate(self._area_ranges):
+      groundtruth_ignore = np.logical_or(
+          groundtruth_is_crowd != 0,
+          np.logical_or(groundtruth_area < area_min,
+                        groundtruth_area > area_max))
+      self._num_positives[category_index, area_index] += np.count_nonzero(
+          np.logical_not(groundtruth_ignore))
+      if not detection_scores.shape[0]:
+        continue
+      groundtruth_order = np.argsort(groundtruth_ignore, kind='mergesort')
+      detection_matched, detection_ignored = _MatchDetections(
+          ious[:, groundtruth_order], groundtruth_ignore[groundtruth_order],
+          groundtruth_is_crowd[groundtruth_order], self._iou_thresholds)
+      # Unmatched detections outside of the area range are ignored.
+      outside_area = np.logical_or(detection_area < area_min,
+                                   detection_area > area_max)
+      detection_ignored = np.logical_or(
+          detection_ignored,
+          np.logical_and(np.logical_not(detection_matched),
+                         outside_area[None, :]))
+      shifts = (area_index * num_iou_thresholds + np.arange(
+          num_iou_thresholds, dtype=np.uint64))[:, None].astype(np.uint64)
+      matched_bits |= np.bitwise_or.reduce(
+          detection_matched.astype(np.uint64) << shifts, axis=0)
+      ignored_bits |= np.bitwise_or.reduce(
+          detection_ignored.astype(np.uint64) << shifts, axis=0)
+
+    if not detection_scores.shape[0]:
+      return
+    rows = np.empty(detection_scores.shape[0], dtype=_STREAMING_ROW_DTYPE)
+    rows['image'] = image_index
+    rows['rank'] = np.arange(detection_scores.shape[0])
+    rows['score'] = detection_scores
+    rows['matched'] = matched_bits
+    rows['ignored'] = ignored_bits
+    self._buffers[category_index].append(rows)
+    self._num_buffered_rows += rows.shape[0]
+
+  def _GetSortedRuns(self, category_id, image_ranks):
+    """Sorts the rows of a category in chunks of chunk_size rows.
+
+    Returns:
+      a list of arrays of _SORTED_ROW_DTYPE. If there is more than one chunk,
+      the sorted chunks are written next to the rows and memory mapped.
+    """
+    path = self._GetRowsPath(category_id)
+    if not os.path.exists(path) or not os.path.getsize(path):
+      return []
+    rows = np.memmap(path, dtype=_STREAMING_ROW_DTYPE, mode='r')
+    num_chunks = (rows.shape[0] + self._chunk_size - 1) // self._chunk_size
+    runs = []
+    for chunk_index in range(num_chunks):
+      chunk = rows[chunk_index * self._chunk_size:
+                   (chunk_index + 1) * self._chunk_size]
+      run = np.empty(chunk.shape[0], dtype=_SORTED_ROW_DTYPE)
+      run['score'] = chunk['score']
+      run['key'] = (image_ranks[chunk['image']] * self._max_detections[-1] +
+                    chunk['rank'])
+      run['matched'] = chunk['matched']
+      run['ignored'] = chunk['ignored']
+      run = run[np.lexsort((run['key'], -run['score']))]
+      if num_chunks > 1:
+        run_path = '{}.run{}'.format(path, chunk_index)
+        run.tofile(run_path)
+        run = np.memmap(run_path, dtype=_SORTED_ROW_DTYPE, mode='r')
+      runs.append(run)
+    del rows
+    return runs
+
+  def _AccumulateRows(self, rows, num_positives, num_true_positives,
+                      num_false_positives, num_detections, best_precision):
+    """Accumulates a block of sorted rows into the running sums of a category.
+
+    Args:
+      rows: array of _SORTED_ROW_DTYPE following the rows accumulated so far.
+      num_positives: number of not ignored groundtruth boxes per area range.
+      num_true_positives: int array [num_max_detections, num_areas,
+        num_iou_thresholds] of the true positives so far, updated in place.
+      num_false_positives: same as num_true_positives for false positives.
+      num_detections: int array [num_max_detections] of the number of
+        detections so far, updated in place.
+      best_precision: array [num_max_detections, num_areas, num_iou_thresholds,
+        num_recall_thresholds] of the interpolated precision so far, updated in
+        place.
+    """
+    num_areas = len(self._area_ranges)
+    num_iou_thresholds = len(self._iou_thresholds)
+    shifts = np.arange(num_areas * num_iou_thresholds, dtype=np.uint64)
+    matched = ((rows['matched'][:, None] >> shifts) & 1).astype(bool)
+    ignored = ((rows['ignored'][:, None] >> shifts) & 1).astype(bool)
+    matched = matched.reshape(-1, num_areas, num_iou_thresholds)
+    ignored = ignored.reshape(-1, num_areas, num_iou_thresholds)
+    true_positives = np.logical_and(matched, np.logical_not(ignored))
+    false_positives = np.logical_and(np.logical_not(matched),
+                                     np.logical_not(ignored))
+    ranks = rows['key'] % self._max_detections[-1]
+    for max_detections_index, max_detections in enumerate(
+        self._max_detections):
+      keep = ranks < max_detections
+      if not keep.any():
+        continue
+      tp_sum = (np.cumsum(true_positives[keep], axis=0) +
+                num_true_positives[max_detections_index])
+      fp_sum = (np.cumsum(false_positives[keep], axis=0) +
+                num_false_positives[max_detections_index])
+      num_true_positives[max_detections_index] = tp_sum[-1]
+      num_false_positives[max_detections_index] = fp_sum[-1]
+      num_detections[max_detections_index] += tp_sum.shape[0]
+      tp_sum = tp_sum.astype(np.float64)
+      fp_sum = fp_sum.astype(np.float64)
+      with np.errstate(divide='ignore', invalid='ignore'):
+        rc = tp_sum / num_positives[:, None]
+      pr = tp_sum / (fp_sum + tp_sum + np.spacing(1))
+      pr = np.maximum.accumulate(pr[::-1], axis=0)[::-1]
+      for area_index in range(num_areas):
+        if not num_positives[area_index]:
+          continue
+        for iou_index in range(num_iou_thresholds):
+          indices = np.searchsorted(rc[:, area_index, iou_index],
+                                    self._recall_thresholds, side='left')
+          valid = indices < rc.shape[0]
+          values = best_precision[max_detections_index, area_index,
+                                  iou_index]
+          values[valid] = np.maximum(
+              values[valid], pr[indices[valid], area_index, iou_index])
+
+  def _AccumulateCategory(self, category_index, image_ranks, precision,
+                          recall):
+    """Fills precision and recall of a category, see COCOeval.accumulate."""
+    num_positives = self._num_positives[category_index]
+    if not num_positives.any():
+      return
+    num_areas = len(self._area_ranges)
+    num_max_detections = len(self._max_detections)
+    num_iou_thresholds = len(self._iou_thresholds)
+    num_true_positives = np.zeros(
+        (num_max_detections, num_areas, num_iou_thresholds), dtype=np.int64)
+    num_false_positives = np.zeros_like(num_true_positives)
+    num_detections = np.zeros(num_max_detections, dtype=np.int64)
+    # Interpolated precision at every recall threshold: the highest precision
+    # of all detections (of all blocks) with a recall at least as high.
+    best_precision = np.zeros(
+        (num_max_detections, num_areas, num_iou_thresholds,
+         len(self._recall_thresholds)))
+
+    runs = self._GetSortedRuns(self._category_ids[category_index], image_ranks)
+    block_size = max(1, self._chunk_size // max(1, len(runs)))
+    for merged_rows in _MergeSortedRuns(runs, block_size):
+      for start in range(0, merged_rows.shape[0], _ACCUMULATION_BLOCK_SIZE):
+        self._AccumulateRows(
+            merged_rows[start:start + _ACCUMULATION_BLOCK_SIZE],
+            num_positives, num_true_positives, num_false_positives,
+            num_detections, best_precision)
+    del runs
+    for path in self._GetPaths(self._category_ids[category_index]):
+      if '.run' in os.path.basename(path):
+        os.remove(path)
+
+    for area_index in range(num_areas):
+      if not num_positives[area_index]:
+        continue
+      for max_detections_index in range(num_max_detections):
+        precision[:, :, category_index, area_index, max_detections_index] = (
+            best_precision[max_detections_index, area_index])
+        if num_detections[max_detections_index]:
+          recall[:, category_index, area_index, max_detections_index] = (
+              num_true_positives[max_detections_index, area_index] /
+              num_positives[area_index])
+        else:
+          recall[:, category_index, area_index, max_detections_index] = 0
+
+  def _Summarize(self, precision, recall):
+    """Returns the 12 summary metrics, see COCOeval.summarize."""
+    def _SummarizeOne(average_precision, iou_threshold=None, area_index=0,
+                      max_detections_index=2):
+      if average_precision:
+        values = precision
+        if iou_threshold is not None:
+          values = values[np.where(iou_threshold == self._iou_thresholds)[0]]
+        values = values[:, :, :, area_index, max_detections_index]
+      else:
+        values = recall
+        if iou_threshold is not None:
+          values = values[np.where(iou_threshold == self._iou_thresholds)[0]]
+        values = values[:, :, area_index, max_detections_index]
+      if not values[values > -1].size:
+        return -1
+      return np.mean(values[values > -1])
+
+    return np.array([
+        _SummarizeOne(1),
+        _SummarizeOne(1, iou_threshold=.5),
+        _SummarizeOne(1, iou_threshold=.75),
+        _SummarizeOne(1, area_index=1),
+        _SummarizeOne(1, area_index=2),
+        _SummarizeOne(1, area_index=3),
+        _SummarizeOne(0, max_detections_index=0),
+        _SummarizeOne(0, max_detections_index=1),
+        _SummarizeOne(0),
+        _SummarizeOne(0, area_index=1),
+        _SummarizeOne(0, area_index=2),
+        _SummarizeOne(0, area_index=3),
+    ])
+
+  def ComputeMetrics(self,
+                     include_metrics_per_category=False,
+                     all_metrics_per_category=False,
+                     super_categories=None):
+    """Computes the detection metrics of all the images added.
+
+    Args:
+      include_metrics_per_category: If True, will include metrics per category.
+      all_metrics_per_category: If true, include all the summery metrics for
+        each category in per_category_ap.
+      super_categories: None or a python dict mapping super-category names
+        (strings) to lists of categories (corresponding to category names
+        in the label_map).
+
+    Returns:
+      summary_metrics and per_category_ap, see COCOEvalWrapper.ComputeMetrics.
+    """
+    tf.logging.info('Accumulating the matches of %d images.',
+                    len(self._image_ids))
+    self._Flush()
+    # COCOeval goes through the images in the order of their sorted ids.
+    image_ranks = np.empty(len(self._image_ids), dtype=np.int64)
+    image_ranks[sorted(range(len(self._image_ids)),
+                       key=self._image_ids.__getitem__)] = np.arange(
+                           len(self._image_ids))
+
+    shape = (len(self._iou_thresholds), len(self._recall_thresholds),
+             len(self._category_ids), len(self._area_ranges),
+             len(self._max_detections))
+    precision = -np.ones(shape)
+    recall = -np.ones(shape[:1] + shape[2:])
+    for category_index in range(len(self._category_ids)):
+      self._AccumulateCategory(category_index, image_ranks, precision, recall)
+
+    stats = self._Summarize(precision, recall)
+    summary_metrics = OrderedDict(
+        [(name, stats[index]) for name, index in COCO_METRIC_NAMES_AND_INDEX])
+    if not include_metrics_per_category:
+      return summary_metrics, {}
+
+    category_stats = np.stack([
+        self._Summarize(precision[:, :, index:index + 1],
+                        recall[:, index:index + 1])
+        for index in range(len(self._category_ids))
+    ], axis=1)
+    category_names = [self._category_names[category_id]
+                      for category_id in self._category_ids]
+    per_category_ap = _ComputePerCategoryMetrics(
+        category_names, category_stats, all_metrics_per_category,
+        super_categories)
+    return summary_metrics, per_category_ap
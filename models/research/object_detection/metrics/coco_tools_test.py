@@ -78,6 +78,77 @@ class CocoToolsTest(tf.test.TestCase):
     summary_metrics, _ = evaluator.ComputeMetrics()
     self.assertAlmostEqual(1.0, summary_metrics['Precision/mAP'])
 
+  def testStreamingEvalMatchesCocoEvalWrapper(self):
+    np.random.seed(0)
+    categories = [{'id': 1, 'name': 'cat'}, {'id': 2, 'name': 'dog'}]
+    category_id_set = set([1, 2])
+    groundtruth_list = []
+    detections_list = []
+    image_list = []
+    next_annotation_id = 1
+    # Sorts 7 detections at a time, so the sorted chunks have to be merged.
+    streaming_evaluator = coco_tools.COCOStreamingEval(categories, chunk_size=7)
+    for image_index in range(30):
+      image_id = 'image{}'.format(29 - image_index)
+      num_groundtruth = np.random.randint(0, 4)
+      corners = np.random.uniform(0, 300, size=(num_groundtruth, 2))
+      sizes = np.random.uniform(5, 150, size=(num_groundtruth, 2))
+      groundtruth_boxes = np.concatenate(
+          [corners, corners + sizes], axis=1).astype(np.float32)
+      groundtruth_classes = np.random.randint(1, 4, size=num_groundtruth)
+      groundtruth_is_crowd = (
+          np.random.uniform(size=num_groundtruth) < .2).astype(np.int32)
+      # Some detections match the groundtruth, the others are random.
+      detection_boxes = np.concatenate([
+          groundtruth_boxes + np.random.normal(
+              scale=5., size=groundtruth_boxes.shape).astype(np.float32),
+          groundtruth_boxes[::-1] + 20.
+      ])
+      detection_classes = np.concatenate(
+          [groundtruth_classes, np.random.randint(1, 3, num_groundtruth)])
+      # Rounded scores, so that there are ties between images.
+      detection_scores = np.round(
+          np.random.uniform(size=detection_classes.shape), 1).astype(
+              np.float32)
+
+      groundtruth_list.extend(
+          coco_tools.ExportSingleImageGroundtruthToCoco(
+              image_id, next_annotation_id, category_id_set,
+              groundtruth_boxes, groundtruth_classes,
+              groundtruth_is_crowd=groundtruth_is_crowd))
+      next_annotation_id += num_groundtruth
+      detections_list.extend(
+          coco_tools.ExportSingleImageDetectionBoxesToCoco(
+              image_id, category_id_set, detection_boxes, detection_scores,
+              detection_classes))
+      image_list.append({'id': image_id})
+      streaming_evaluator.AddImage(
+          image_id, groundtruth_boxes, groundtruth_classes,
+          groundtruth_is_crowd=groundtruth_is_crowd,
+          detection_boxes=detection_boxes, detection_scores=detection_scores,
+          detection_classes=detection_classes)
+
+    groundtruth = coco_tools.COCOWrapper({
+        'annotations': groundtruth_list,
+        'images': image_list,
+        'categories': categories
+    })
+    detections = groundtruth.LoadAnnotations(detections_list)
+    evaluator = coco_tools.COCOEvalWrapper(groundtruth, detections)
+    summary_metrics, _ = evaluator.ComputeMetrics()
+    streaming_summary_metrics, per_category_ap = (
+        streaming_evaluator.ComputeMetrics(include_metrics_per_category=True))
+    self.assertEqual(list(summary_metrics.keys()),
+                     list(streaming_summary_metrics.keys()))
+    for name, value in summary_metrics.items():
+      self.assertEqual(value, streaming_summary_metrics[name])
+    self.assertEqual(list(per_category_ap.keys()), [
+        'PerformanceByCategory/mAP/cat', 'PerformanceByCategory/mAP/dog'])
+
+    streaming_evaluator.Clear()
+    streaming_summary_metrics, _ = streaming_evaluator.ComputeMetrics()
+    self.assertEqual(-1, streaming_summary_metrics['Precision/mAP'])
+
   def testExportGroundtruthToCOCO(self):
     image_ids = ['first', 'second']
     groundtruth_boxes = [np.array([[100, 100, 200, 200]], np.float),
@@ -30,15 +30,29 @@ Example usage:
         --eval_dir=path/to/eval_dir \
         --eval_config_path=path/to/evaluation/configuration/file \
         --input_config_path=path/to/input/configuration/file
+
+With --num_workers > 1 the records are evaluated in separate processes. If
+there are at least as many input files as workers every file is a shard,
+otherwise the files are split into shards of --records_per_shard consecutive
+records; the byte offsets of the records are found in a single pass over the
+record headers and every process seeks to the first record of its shard.
+Every process returns the internal state of its evaluator and the states are
+merged in the order of the shards, so the metrics are the same as the ones of
+a single process. Only evaluators with get_internal_state() (the
+Pascal VOC and Open Images ones) can be sharded; other evaluators run in a
+single process.
 """
 import csv
+import multiprocessing
 import os
 import re
+import struct
 import tensorflow.compat.v1 as tf
 
 from object_detection import eval_util
 from object_detection.core import standard_fields
 from object_detection.metrics import tf_example_parser
+from object_detection.protos import eval_pb2
 from object_detection.utils import config_util
 from object_detection.utils import label_map_util
 
@@ -50,6 +64,10 @@ flags.DEFINE_string('eval_config_path', None,
                     'Path to an eval_pb2.EvalConfig config file.')
 flags.DEFINE_string('input_config_path', None,
                     'Path to an eval_pb2.InputConfig config file.')
+flags.DEFINE_integer('num_workers', 1,
+                     'Number of processes evaluating shards of the records.')
+flags.DEFINE_integer('records_per_shard', 1000,
+                     'Number of consecutive records in a shard.')
 
 FLAGS = flags.FLAGS
 
@@ -73,7 +91,168 @@ def _generate_filenames(filenames):
   return result
 
 
-def read_data_and_evaluate(input_config, eval_config):
+def _shard_ranges(num_records, records_per_shard):
+  """Splits the records of a file into ranges of consecutive records.
+
+  Args:
+    num_records: number of records in the file.
+    records_per_shard: maximum number of records in a range.
+
+  Returns:
+    A list of (start, end) tuples covering [0, num_records) in order.
+  """
+  return [(start, min(start + records_per_shard, num_records))
+          for start in range(0, num_records, records_per_shard)]
+
+
+def _record_offsets(input_path):
+  """Finds the byte offsets of the records of an uncompressed TFRecord file.
+
+  Only the headers of the records are read, the payloads are skipped.
+
+  Args:
+    input_path: path to the TFRecord file.
+
+  Returns:
+    A list with the byte offset of every record in the file, in order.
+
+  Raises:
+    ValueError: if the file ends in the middle of a record header.
+  """
+  offsets = []
+  offset = 0
+  with tf.gfile.GFile(input_path, 'rb') as record_file:
+    while True:
+      # uint64 length, uint32 masked crc of the length.
+      header = record_file.read(12)
+      if not header:
+        break
+      if len(header) < 12:
+        raise ValueError('Truncated record header in {0} at byte {1}.'.format(
+            input_path, offset))
+      length = struct.unpack('<Q', header[:8])[0]
+      offsets.append(offset)
+      # The payload is followed by the uint32 masked crc of the payload.
+      offset += 12 + length + 4
+      record_file.seek(offset)
+  return offsets
+
+
+def _read_records(input_path, offset, num_records):
+  """Reads consecutive records of an uncompressed TFRecord file.
+
+  Args:
+    input_path: path to the TFRecord file.
+    offset: byte offset of the first record, from _record_offsets.
+    num_records: number of records to read.
+
+  Yields:
+    The serialized records.
+  """
+  with tf.gfile.GFile(input_path, 'rb') as record_file:
+    record_file.seek(offset)
+    for _ in range(num_records):
+      length = struct.unpack('<Q', record_file.read(12)[:8])[0]
+      yield record_file.read(length)
+      record_file.read(4)
+
+
+def _add_record(object_detection_evaluator, data_parser, string_record):
+  """Adds the groundtruth and detections of a record to the evaluator.
+
+  Returns:
+    False if the record was skipped, True otherwise.
+  """
+  example = tf.train.Example()
+  example.ParseFromString(string_record)
+  decoded_dict = data_parser.parse(example)
+
+  if not decoded_dict:
+    return False
+  object_detection_evaluator.add_single_ground_truth_image_info(
+      decoded_dict[standard_fields.DetectionResultFields.key], decoded_dict)
+  object_detection_evaluator.add_single_detected_image_info(
+      decoded_dict[standard_fields.DetectionResultFields.key], decoded_dict)
+  return True
+
+
+def _evaluate_shard(shard):
+  """Runs in a worker process and adds a range of records to a new evaluator.
+
+  Args:
+    shard: tuple of (input_path, offset, num_records, serialized eval_config,
+      categories). offset is the byte offset of the first record of the shard
+      and num_records the number of records in it; if both are None the
+      shard is the whole file.
+
+  Returns:
+    A tuple of (internal state of the evaluator, number of processed images,
+    number of skipped images).
+  """
+  input_path, offset, num_records, serialized_eval_config, categories = shard
+  eval_config = eval_pb2.EvalConfig.FromString(serialized_eval_config)
+  object_detection_evaluator = eval_util.get_evaluators(
+      eval_config, categories)[0]
+  data_parser = tf_example_parser.TfExampleDetectionAndGTParser()
+
+  processed_images = 0
+  skipped_images = 0
+  if offset is None:
+    record_iterator = tf.python_io.tf_record_iterator(path=input_path)
+  else:
+    record_iterator = _read_records(input_path, offset, num_records)
+  for string_record in record_iterator:
+    processed_images += 1
+    if not _add_record(object_detection_evaluator, data_parser, string_record):
+      skipped_images += 1
+  return (object_detection_evaluator.get_internal_state(), processed_images,
+          skipped_images)
+
+
+def _read_data_and_evaluate_in_parallel(input_paths, eval_config, categories,
+                                        object_detection_evaluator,
+                                        num_workers, records_per_shard):
+  """Evaluates shards of the records in a pool of processes.
+
+  The internal states of the shards are merged into object_detection_evaluator
+  in the order of the records, so the result equals the serial evaluation.
+  """
+  serialized_eval_config = eval_config.SerializeToString()
+  shards = []
+  if len(input_paths) >= num_workers:
+    # Enough files to keep every worker busy, no need to look inside them.
+    for input_path in input_paths:
+      shards.append(
+          (input_path, None, None, serialized_eval_config, categories))
+  else:
+    for input_path in input_paths:
+      offsets = _record_offsets(input_path)
+      tf.logging.info('File {0} has {1} records.'.format(input_path,
+                                                         len(offsets)))
+      for start, end in _shard_ranges(len(offsets), records_per_shard):
+        shards.append((input_path, offsets[start], end - start,
+                       serialized_eval_config, categories))
+
+  skipped_images = 0
+  processed_images = 0
+  # spawn instead of fork, forking a process that already runs tensorflow is
+  # not safe.
+  pool = multiprocessing.get_context('spawn').Pool(num_workers)
+  try:
+    for (state_tuple, image_ids), processed, skipped in pool.imap(
+        _evaluate_shard, shards):
+      object_detection_evaluator.merge_internal_state(image_ids, state_tuple)
+      processed_images += processed
+      skipped_images += skipped
+      tf.logging.info('Processed %d images...', processed_images)
+  finally:
+    pool.close()
+    pool.join()
+  tf.logging.info('Skipped images: {0}'.format(skipped_images))
+
+
+def read_data_and_evaluate(input_config, eval_config, num_workers=1,
+                           records_per_shard=1000):
   """Reads pre-computed object detections and groundtruth from tf_record.
 
   Args:
@@ -81,6 +260,11 @@ def read_data_and_evaluate(input_config, eval_config):
       object_detection.protos.InputReader.
     eval_config: evaluation config proto of type
       object_detection.protos.EvalConfig.
+    num_workers: number of processes evaluating shards of the records. The
+      evaluator has to support get_internal_state() and
+      merge_internal_state() to run in more than one process.
+    records_per_shard: number of consecutive records evaluated by a process
+      at once.
 
   Returns:
     Evaluated detections metrics.
@@ -99,6 +283,19 @@ def read_data_and_evaluate(input_config, eval_config):
     # Support a single evaluator
     object_detection_evaluator = object_detection_evaluators[0]
 
+    if num_workers > 1 and not hasattr(object_detection_evaluator,
+                                       'get_internal_state'):
+      tf.logging.warning(
+          '{0} cannot be sharded, evaluating in a single process.'.format(
+              type(object_detection_evaluator).__name__))
+      num_workers = 1
+
+    if num_workers > 1:
+      _read_data_and_evaluate_in_parallel(
+          _generate_filenames(input_paths), eval_config, categories,
+          object_detection_evaluator, num_workers, records_per_shard)
+      return object_detection_evaluator.evaluate()
+
     skipped_images = 0
     processed_images = 0
     for input_path in _generate_filenames(input_paths):
@@ -112,18 +309,8 @@ def read_data_and_evaluate(input_config, eval_config):
                                processed_images)
         processed_images += 1
 
-        example = tf.train.Example()
-        example.ParseFromString(string_record)
-        decoded_dict = data_parser.parse(example)
-
-        if decoded_dict:
-          object_detection_evaluator.add_single_ground_truth_image_info(
-              decoded_dict[standard_fields.DetectionResultFields.key],
-              decoded_dict)
-          object_detection_evaluator.add_single_detected_image_info(
-              decoded_dict[standard_fields.DetectionResultFields.key],
-              decoded_dict)
-        else:
+        if not _add_record(object_detection_evaluator, data_parser,
+                           string_record):
           skipped_images += 1
           tf.logging.info('Skipped images: {0}'.format(skipped_images))
 
@@ -161,7 +348,8 @@ def main(argv):
   eval_config = configs['eval_config']
   input_config = configs['eval_input_config']
 
-  metrics = read_data_and_evaluate(input_config, eval_config)
+  metrics = read_data_and_evaluate(input_config, eval_config,
+                                   FLAGS.num_workers, FLAGS.records_per_shard)
 
   # Save metrics
   write_metrics(metrics, FLAGS.eval_dir)
@@ -14,6 +14,8 @@
 # ==============================================================================
 """Tests for utilities in offline_eval_map_corloc binary."""
 
+import os
+
 import tensorflow.compat.v1 as tf
 
 from object_detection.metrics import offline_eval_map_corloc as offline_eval
@@ -53,6 +55,27 @@ class OfflineEvalMapCorlocTest(tf.test.TestCase):
         '/path/to/-00001-of-00003.record', '/path/to/-00002-of-00003.record'
     ])
 
+  def test_shardRanges(self):
+    self.assertEqual(offline_eval._shard_ranges(0, 3), [])
+    self.assertEqual(offline_eval._shard_ranges(3, 3), [(0, 3)])
+    self.assertEqual(
+        offline_eval._shard_ranges(7, 3), [(0, 3), (3, 6), (6, 7)])
+
+  def test_recordOffsets(self):
+    path = os.path.join(self.get_temp_dir(), 'records.tfrecord')
+    records = [b'', b'a', b'bcd' * 100, b'efgh']
+    with tf.python_io.TFRecordWriter(path) as writer:
+      for record in records:
+        writer.write(record)
+
+    offsets = offline_eval._record_offsets(path)
+    self.assertEqual(len(offsets), len(records))
+    self.assertEqual(
+        list(offline_eval._read_records(path, offsets[0], len(records))),
+        records)
+    self.assertEqual(
+        list(offline_eval._read_records(path, offsets[2], 2)), records[2:])
+
 
 if __name__ == '__main__':
   tf.test.main()
@@ -46,7 +46,9 @@ class SsdMobilenetV2FpnFeatureExtractorTest(
                                 is_training=True,
                                 use_explicit_padding=False,
                                 use_keras=False,
-                                use_depthwise=False):
+                                use_depthwise=False,
+                                fpn_min_level=3,
+                                fpn_max_level=7):
     """Constructs a new feature extractor.
 
     Args:
@@ -60,6 +62,8 @@ class SsdMobilenetV2FpnFeatureExtractorTest(
       use_keras: if True builds a keras-based feature extractor, if False builds
         a slim-based one.
       use_depthwise: Whether to use depthwise convolutions.
+      fpn_min_level: the highest resolution feature map to use in FPN.
+      fpn_max_level: the smallest resolution feature map to use in FPN.
     Returns:
       an ssd_meta_arch.SSDFeatureExtractor object.
     """
@@ -75,6 +79,8 @@ class SsdMobilenetV2FpnFeatureExtractorTest(
                     add_batch_norm=False),
                 freeze_batchnorm=False,
                 inplace_batchnorm_update=False,
+                fpn_min_level=fpn_min_level,
+                fpn_max_level=fpn_max_level,
                 use_explicit_padding=use_explicit_padding,
                 use_depthwise=use_depthwise,
                 name='MobilenetV2_FPN'))
@@ -234,6 +240,24 @@ class SsdMobilenetV2FpnFeatureExtractorTest(
         use_keras=use_keras,
         use_depthwise=use_depthwise)
 
+  def test_extract_features_with_reduced_fpn_levels(self, use_depthwise):
+    image_tensor = np.random.rand(2, 320, 320, 3).astype(np.float32)
+    feature_extractor = self._create_feature_extractor(
+        depth_multiplier=1.0,
+        pad_to_multiple=1,
+        use_depthwise=use_depthwise,
+        fpn_min_level=3,
+        fpn_max_level=4)
+
+    def graph_fn(image_tensor):
+      return feature_extractor(image_tensor)
+
+    feature_maps = self.execute(graph_fn, [image_tensor])
+    self.assertEqual([feature_map.shape for feature_map in feature_maps],
+                     [(2, 40, 40, 256), (2, 20, 20, 256)])
+    # The MobileNet blocks after layer_14 are not part of the backbone.
+    self.assertLen(feature_extractor.classification_backbone.outputs, 3)
+
   def test_extract_features_raises_error_with_invalid_image_size(
       self, use_depthwise=False):
     use_keras = True
@@ -147,14 +147,16 @@ class SSDMobileNetV2FpnKerasFeatureExtractor(
       outputs.append(full_mobilenet_v2.get_layer(output_layer_name).output)
     layer_19 = full_mobilenet_v2.get_layer(name='out_relu').output
     outputs.append(layer_19)
+    self._base_fpn_max_level = min(self._fpn_max_level, 5)
+    self._num_levels = self._base_fpn_max_level + 1 - self._fpn_min_level
+    # Only the blocks up to the coarsest FPN level of the backbone are kept, so
+    # a FPN with fewer levels does not compute the last MobileNet blocks.
     self.classification_backbone = tf.keras.Model(
         inputs=full_mobilenet_v2.inputs,
-        outputs=outputs)
+        outputs=outputs[:self._base_fpn_max_level - 1])
     # pylint:disable=g-long-lambda
     self._depth_fn = lambda d: max(
         int(d * self._depth_multiplier), self._min_depth)
-    self._base_fpn_max_level = min(self._fpn_max_level, 5)
-    self._num_levels = self._base_fpn_max_level + 1 - self._fpn_min_level
     self._fpn_features_generator = (
         feature_map_generators.KerasFpnTopDownFeatureMaps(
             num_levels=self._num_levels,
@@ -223,7 +225,7 @@ class SSDMobileNetV2FpnKerasFeatureExtractor(
     for level in range(self._fpn_min_level, self._base_fpn_max_level + 1):
       feature_block_list.append(self._feature_blocks[level - 2])
 
-    feature_start_index = len(self._feature_blocks) - self._num_levels
+    feature_start_index = self._fpn_min_level - 2
     fpn_input_image_features = [
         (key, image_features[feature_start_index + index])
         for index, key in enumerate(feature_block_list)]
@@ -0,0 +1,453 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Fits the multiscale anchors of an SSD model to the boxes of a dataset.
+
+Reads the groundtruth boxes of the training TFRecords, clusters their shapes
+with IoU k-means and searches the `multiscale_anchor_generator` parameters
+(pyramid levels, anchor scale, scales per octave and aspect ratios) that match
+the boxes with the fewest anchors per image. Fewer anchors mean a cheaper box
+predictor head and less work in post-processing.
+
+A groundtruth box is recalled if its best anchor, exactly as placed by
+anchor_generators/multiscale_grid_anchor_generator.py on the resized image,
+has an IoU of at least the `matched_threshold` of the model's argmax matcher.
+Among the configurations whose recall is within --recall_tolerance of the best
+one, the configuration with the fewest anchors per image is chosen.
+
+The pyramid levels are searched within the levels of the FPN feature
+extractor, which is updated together with the anchor generator in the written
+pipeline config. A model with changed anchors has to be retrained.
+
+Example usage:
+python optimize_anchors.py \
+  --pipeline_config_path=path/to/pipeline.config \
+  --output_directory=path/to/optimized_model \
+  --alsologtostderr
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import itertools
+
+from absl import app
+from absl import flags
+from absl import logging
+import numpy as np
+from six.moves import range
+import tensorflow.compat.v1 as tf
+
+from object_detection.utils import config_util
+from object_detection.utils import np_box_ops
+
+flags.DEFINE_string('pipeline_config_path', None,
+                    'Path to the pipeline config of the SSD model.')
+flags.DEFINE_list('input_path', None,
+                  'TFRecord files (or glob patterns) with the groundtruth '
+                  'boxes. Defaults to the input path of the train input '
+                  'reader.')
+flags.DEFINE_integer('image_height', None,
+                     'Height of the resized images. Defaults to the height of '
+                     'the fixed shape resizer of the model.')
+flags.DEFINE_integer('image_width', None,
+                     'Width of the resized images. Defaults to the width of '
+                     'the fixed shape resizer of the model.')
+flags.DEFINE_integer('num_clusters', 6,
+                     'Number of IoU k-means clusters reported for the boxes.')
+flags.DEFINE_integer('max_aspect_ratios', 3,
+                     'Maximum number of aspect ratios of the anchors.')
+flags.DEFINE_float('recall_tolerance', 0.01,
+                   'Recall that may be traded for fewer anchors.')
+flags.DEFINE_integer('max_boxes', 100000,
+                     'Maximum number of boxes used, a random sample of the '
+                     'boxes is taken for larger datasets.')
+flags.DEFINE_string('output_directory', None,
+                    'If set, the pipeline config with the optimized anchors is '
+                    'written to this directory.')
+
+FLAGS = flags.FLAGS
+
+# Anchor scales (anchor size relative to the stride of its level) searched.
+_ANCHOR_SCALES = tuple(2**(exponent / 4.0) for exponent in range(13))
+_SCALES_PER_OCTAVE = (1, 2, 3)
+
+AnchorConfig = collections.namedtuple(
+    'AnchorConfig', ['min_level', 'max_level', 'anchor_scale',
+                     'scales_per_octave', 'aspect_ratios'])
+
+
+def read_boxes(input_paths, image_height, image_width, max_boxes=None,
+               seed=0):
+  """Reads the groundtruth boxes of tf.Examples in TFRecord files.
+
+  Args:
+    input_paths: A list of TFRecord files or glob patterns.
+    image_height: Height of the resized images the boxes are scaled to.
+    image_width: Width of the resized images the boxes are scaled to.
+    max_boxes: optional, if there are more boxes, a random sample of max_boxes
+      boxes is returned.
+    seed: Seed of the random sample.
+
+  Returns:
+    boxes: A float numpy array of shape [N, 4] with the non-empty boxes as
+      [ymin, xmin, ymax, xmax] in pixels of the resized images.
+    num_images: Number of examples read.
+
+  Raises:
+    ValueError: If no boxes are found.
+  """
+  boxes = []
+  num_images = 0
+  for path in tf.gfile.Glob(input_paths):
+    for record in tf.python_io.tf_record_iterator(path):
+      feature = tf.train.Example.FromString(record).features.feature
+      num_images += 1
+      boxes.append(np.stack([
+          feature['image/object/bbox/' + name].float_list.value
+          for name in ('ymin', 'xmin', 'ymax', 'xmax')], axis=1))
+  if not boxes or not sum(len(image_boxes) for image_boxes in boxes):
+    raise ValueError('No groundtruth boxes found in {}.'.format(input_paths))
+  boxes = np.concatenate(boxes).astype(np.float64) * [
+      image_height, image_width, image_height, image_width]
+  boxes = boxes[(boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])]
+  if max_boxes and len(boxes) > max_boxes:
+    sample = np.random.RandomState(seed).choice(len(boxes), max_boxes,
+                                                replace=False)
+    boxes = boxes[np.sort(sample)]
+  return boxes, num_images
+
+
+def _centered_boxes(sizes):
+  return np.concatenate([-sizes / 2.0, sizes / 2.0], axis=1)
+
+
+def iou_kmeans(sizes, num_clusters, max_iterations=300, seed=0):
+  """Clusters box sizes with k-means using 1 - IoU as distance.
+
+  The boxes are compared as if they were centered at the same point, so only
+  their heights and widths matter. Cluster centers are updated to the median
+  size of their boxes.
+
+  Args:
+    sizes: A numpy array of shape [N, 2] with the heights and widths of the
+      boxes.
+    num_clusters: Number of clusters, at most N.
+    max_iterations: Maximum number of k-means iterations.
+    seed: Seed of the random initialization.
+
+  Returns:
+    centers: A numpy array of shape [num_clusters, 2] with the heights and
+      widths of the cluster centers, sorted by area.
+    mean_iou: Mean IoU of the boxes with their cluster center.
+  """
+  centers = sizes[np.random.RandomState(seed).choice(
+      len(sizes), num_clusters, replace=False)]
+  boxes = _centered_boxes(sizes)
+  assignments = None
+  for _ in range(max_iterations):
+    ious = np_box_ops.iou(boxes, _centered_boxes(centers))
+    new_assignments = np.argmax(ious, axis=1)
+    if assignments is not None and np.all(new_assignments == assignments):
+      break
+    assignments = new_assignments
+    for cluster in range(num_clusters):
+      if np.any(assignments == cluster):
+        centers[cluster] = np.median(sizes[assignments == cluster], axis=0)
+  ious = np_box_ops.iou(boxes, _centered_boxes(centers))
+  order = np.argsort(centers[:, 0] * centers[:, 1])
+  return centers[order], float(np.mean(np.max(ious, axis=1)))
+
+
+def anchor_sizes(level, anchor_scale, scales_per_octave, aspect_ratios):
+  """Returns the [height, width] of the anchors of one pyramid level.
+
+  Args:
+    level: Pyramid level, the anchor stride is 2**level.
+    anchor_scale: Size of the base anchor relative to the stride.
+    scales_per_octave: Number of intermediate scales per octave.
+    aspect_ratios: A list of width / height ratios.
+
+  Returns:
+    A numpy array of shape [scales_per_octave * len(aspect_ratios), 2].
+  """
+  scales = 2**(np.arange(scales_per_octave) / float(scales_per_octave))
+  scales, aspect_ratios = np.meshgrid(scales, np.asarray(aspect_ratios))
+  sizes = 2**level * anchor_scale * scales.ravel()
+  ratio_sqrts = np.sqrt(aspect_ratios.ravel())
+  return np.stack([sizes / ratio_sqrts, sizes * ratio_sqrts], axis=1)
+
+
+def _grid_shape(level, image_size):
+  stride = 2**level
+  num_cells = -(-image_size // stride)
+  offset = stride / 2.0 if image_size % stride == 0 else 0.0
+  return stride, num_cells, offset
+
+
+def best_anchor_iou(boxes, level, sizes, image_height, image_width):
+  """Returns the IoU of every box with its best anchor of a pyramid level.
+
+  Anchors of the same size only differ in their centers and their IoU with a
+  box decreases with the distance of the centers along either axis, so the
+  best anchor is centered at the grid point nearest to the box center.
+
+  Args:
+    boxes: A numpy array of shape [N, 4] with boxes in pixels.
+    level: Pyramid level of the anchors.
+    sizes: A numpy array of shape [M, 2] with the anchor heights and widths,
+      see anchor_sizes.
+    image_height: Height of the resized image.
+    image_width: Width of the resized image.
+
+  Returns:
+    A numpy array of shape [N].
+  """
+  overlaps = []
+  for axis, image_size in ((0, image_height), (1, image_width)):
+    stride, num_cells, offset = _grid_shape(level, image_size)
+    box_min, box_max = boxes[:, axis:axis + 1], boxes[:, axis + 2:axis + 3]
+    cell = np.clip(np.round(((box_min + box_max) / 2.0 - offset) / stride),
+                   0, num_cells - 1)
+    anchor_center = cell * stride + offset
+    half_sizes = sizes[:, axis] / 2.0
+    overlaps.append(np.maximum(
+        np.minimum(box_max, anchor_center + half_sizes) -
+        np.maximum(box_min, anchor_center - half_sizes), 0.0))
+  intersections = overlaps[0] * overlaps[1]
+  areas = np_box_ops.area(boxes)[:, np.newaxis]
+  ious = intersections / (areas + sizes[:, 0] * sizes[:, 1] - intersections)
+  return np.max(ious, axis=1)
+
+
+def num_anchors_per_image(anchor_config, image_height, image_width):
+  """Returns the number of anchors generated for one image."""
+  num_anchors = 0
+  for level in range(anchor_config.min_level, anchor_config.max_level + 1):
+    num_locations = (_grid_shape(level, image_height)[1] *
+                     _grid_shape(level, image_width)[1])
+    num_anchors += num_locations * (anchor_config.scales_per_octave *
+                                    len(anchor_config.aspect_ratios))
+  return num_anchors
+
+
+def _level_ious(boxes, anchor_scale, scales_per_octave, aspect_ratios, levels,
+                image_height, image_width):
+  return np.stack([
+      best_anchor_iou(
+          boxes, level,
+          anchor_sizes(level, anchor_scale, scales_per_octave, aspect_ratios),
+          image_height, image_width) for level in levels])
+
+
+def evaluate_anchors(boxes, anchor_config, image_height, image_width,
+                     matched_threshold=0.5):
+  """Measures how well the anchors of a configuration match the boxes.
+
+  Args:
+    boxes: A numpy array of shape [N, 4] with boxes in pixels.
+    anchor_config: An AnchorConfig.
+    image_height: Height of the resized image.
+    image_width: Width of the resized image.
+    matched_threshold: IoU from which a box counts as matched.
+
+  Returns:
+    A dict with the fraction of boxes with a matched anchor ('recall'), the
+    mean IoU of the boxes with their best anchor ('mean_iou'), the number of
+    anchors per image ('anchors_per_image') and the fraction of boxes whose
+    best anchor is on each level ('level_fractions').
+  """
+  levels = list(range(anchor_config.min_level, anchor_config.max_level + 1))
+  level_ious = _level_ious(boxes, anchor_config.anchor_scale,
+                           anchor_config.scales_per_octave,
+                           anchor_config.aspect_ratios, levels, image_height,
+                           image_width)
+  best_ious = np.max(level_ious, axis=0)
+  best_levels = np.argmax(level_ious, axis=0)
+  return {
+      'recall': float(np.mean(best_ious >= matched_threshold)),
+      'mean_iou': float(np.mean(best_ious)),
+      'anchors_per_image': num_anchors_per_image(anchor_config, image_height,
+                                                 image_width),
+      'level_fractions': collections.OrderedDict(
+          (level, float(np.mean(best_levels == idx)))
+          for idx, level in enumerate(levels)),
+  }
+
+
+def optimize_anchors(boxes, image_height, image_width, min_level, max_level,
+                     matched_threshold=0.5, max_aspect_ratios=3,
+                     recall_tolerance=0.01):
+  """Searches the multiscale anchor configuration for a set of boxes.
+
+  The aspect ratios are taken from IoU k-means clusters of the box sizes with
+  1 to max_aspect_ratios clusters. For every aspect ratio set, anchor scale
+  and number of scales per octave, the best anchor IoU of every box is
+  computed once per level, so all contiguous level ranges are compared
+  without recomputing it.
+
+  Args:
+    boxes: A numpy array of shape [N, 4] with boxes in pixels.
+    image_height: Height of the resized image.
+    image_width: Width of the resized image.
+    min_level: Lowest pyramid level that can be used.
+    max_level: Highest pyramid level that can be used.
+    matched_threshold: IoU from which a box counts as matched.
+    max_aspect_ratios: Maximum number of aspect ratios.
+    recall_tolerance: Recall below the best recall that is accepted for fewer
+      anchors.
+
+  Returns:
+    The AnchorConfig with the fewest anchors per image among the configurations
+    with a recall within recall_tolerance of the best recall. Ties are broken
+    by the mean IoU.
+  """
+  sizes = np.stack([boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]],
+                   axis=1)
+  aspect_ratio_sets = []
+  for num_aspect_ratios in range(1, min(max_aspect_ratios, len(sizes)) + 1):
+    centers, _ = iou_kmeans(sizes, num_aspect_ratios)
+    aspect_ratios = sorted(set(
+        round(float(width / height), 2) for height, width in centers))
+    if aspect_ratios not in aspect_ratio_sets:
+      aspect_ratio_sets.append(aspect_ratios)
+
+  levels = list(range(min_level, max_level + 1))
+  candidates = []
+  for aspect_ratios, anchor_scale, scales_per_octave in itertools.product(
+      aspect_ratio_sets, _ANCHOR_SCALES, _SCALES_PER_OCTAVE):
+    level_ious = _level_ious(boxes, anchor_scale, scales_per_octave,
+                             aspect_ratios, levels, image_height, image_width)
+    for first, last in itertools.combinations_with_replacement(
+        range(len(levels)), 2):
+      best_ious = np.max(level_ious[first:last + 1], axis=0)
+      anchor_config = AnchorConfig(levels[first], levels[last],
+                                   round(anchor_scale, 3), scales_per_octave,
+                                   aspect_ratios)
+      candidates.append((float(np.mean(best_ious >= matched_threshold)),
+                         float(np.mean(best_ious)), anchor_config))
+
+  best_recall = max(recall for recall, _, _ in candidates)
+  _, _, anchor_config = min(
+      (candidate for candidate in candidates
+       if candidate[0] >= best_recall - recall_tolerance),
+      key=lambda candidate: (num_anchors_per_image(  # pylint: disable=g-long-lambda
+          candidate[2], image_height, image_width), -candidate[1]))
+  return anchor_config
+
+
+def anchor_config_from_proto(anchor_generator_config):
+  """Returns the AnchorConfig of a multiscale_anchor_generator config."""
+  config = anchor_generator_config.multiscale_anchor_generator
+  return AnchorConfig(config.min_level, config.max_level, config.anchor_scale,
+                      config.scales_per_octave, list(config.aspect_ratios))
+
+
+def update_model_config(model_config, anchor_config):
+  """Sets the anchors and the FPN levels of an SSD model config.
+
+  Args:
+    model_config: A model_pb2.DetectionModel with an ssd model, updated in
+      place.
+    anchor_config: An AnchorConfig.
+  """
+  anchor_generator = model_config.ssd.anchor_generator
+  multiscale_anchor_generator = anchor_generator.multiscale_anchor_generator
+  multiscale_anchor_generator.min_level = anchor_config.min_level
+  multiscale_anchor_generator.max_level = anchor_config.max_level
+  multiscale_anchor_generator.anchor_scale = anchor_config.anchor_scale
+  multiscale_anchor_generator.scales_per_octave = (
+      anchor_config.scales_per_octave)
+  del multiscale_anchor_generator.aspect_ratios[:]
+  multiscale_anchor_generator.aspect_ratios.extend(anchor_config.aspect_ratios)
+  if model_config.ssd.feature_extractor.HasField('fpn'):
+    fpn = model_config.ssd.feature_extractor.fpn
+    fpn.min_level = anchor_config.min_level
+    fpn.max_level = anchor_config.max_level
+
+
+def _log_evaluation(name, anchor_config, evaluation, matched_threshold):
+  logging.info('%s anchors: %s', name, anchor_config)
+  logging.info('  recall@%.2f: %.4f, mean best IoU: %.4f, anchors per image: '
+               '%d', matched_threshold, evaluation['recall'],
+               evaluation['mean_iou'], evaluation['anchors_per_image'])
+  logging.info('  boxes matched best per level: %s', ', '.join(
+      '{}: {:.3f}'.format(level, fraction)
+      for level, fraction in evaluation['level_fractions'].items()))
+
+
+def main(unused_argv):
+  flags.mark_flag_as_required('pipeline_config_path')
+  configs = config_util.get_configs_from_pipeline_file(
+      FLAGS.pipeline_config_path)
+  model_config = configs['model']
+  if (model_config.WhichOneof('model') != 'ssd' or
+      model_config.ssd.anchor_generator.WhichOneof('anchor_generator_oneof') !=
+      'multiscale_anchor_generator'):
+    raise ValueError('Only SSD models with a multiscale_anchor_generator are '
+                     'supported.')
+  image_height, image_width = config_util.get_spatial_image_size(
+      config_util.get_image_resizer_config(model_config))
+  image_height = FLAGS.image_height or image_height
+  image_width = FLAGS.image_width or image_width
+  if image_height <= 0 or image_width <= 0:
+    raise ValueError('The image size of the model is not fixed, set '
+                     '--image_height and --image_width.')
+  matched_threshold = model_config.ssd.matcher.argmax_matcher.matched_threshold
+  input_path = FLAGS.input_path or list(
+      configs['train_input_config'].tf_record_input_reader.input_path)
+
+  boxes, num_images = read_boxes(input_path, image_height, image_width,
+                                 max_boxes=FLAGS.max_boxes)
+  logging.info('Read %d boxes of %d images.', len(boxes), num_images)
+  sizes = np.stack([boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]],
+                   axis=1)
+  centers, mean_iou = iou_kmeans(sizes, min(FLAGS.num_clusters, len(sizes)))
+  logging.info('IoU k-means clusters (height x width, mean IoU %.4f): %s',
+               mean_iou, ', '.join('{:.1f}x{:.1f}'.format(height, width)
+                                   for height, width in centers))
+
+  current_anchor_config = anchor_config_from_proto(
+      model_config.ssd.anchor_generator)
+  if model_config.ssd.feature_extractor.HasField('fpn'):
+    min_level = model_config.ssd.feature_extractor.fpn.min_level
+    max_level = model_config.ssd.feature_extractor.fpn.max_level
+  else:
+    min_level = current_anchor_config.min_level
+    max_level = current_anchor_config.max_level
+  anchor_config = optimize_anchors(
+      boxes, image_height, image_width, min_level, max_level,
+      matched_threshold=matched_threshold,
+      max_aspect_ratios=FLAGS.max_aspect_ratios,
+      recall_tolerance=FLAGS.recall_tolerance)
+
+  _log_evaluation('Current', current_anchor_config,
+                  evaluate_anchors(boxes, current_anchor_config, image_height,
+                                   image_width, matched_threshold),
+                  matched_threshold)
+  _log_evaluation('Optimized', anchor_config,
+                  evaluate_anchors(boxes, anchor_config, image_height,
+                                   image_width, matched_threshold),
+                  matched_threshold)
+
+  if FLAGS.output_directory:
+    update_model_config(model_config, anchor_config)
+    config_util.save_pipeline_config(
+        config_util.create_pipeline_proto_from_configs(configs),
+        FLAGS.output_directory)
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,114 @@
+# Copyright 2020 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for optimize_anchors.py."""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+import numpy as np
+import tensorflow.compat.v1 as tf
+
+from object_detection import optimize_anchors
+from object_detection.anchor_generators import multiscale_grid_anchor_generator
+from object_detection.utils import dataset_util
+from object_detection.utils import np_box_ops
+from object_detection.utils import test_case
+
+AnchorConfig = optimize_anchors.AnchorConfig
+
+
+def _random_boxes(num_boxes, image_size, min_size, max_size, seed=0):
+  random_state = np.random.RandomState(seed)
+  sizes = random_state.uniform(min_size, max_size, size=(num_boxes, 2))
+  centers = random_state.uniform(0, image_size, size=(num_boxes, 2))
+  return np.concatenate([centers - sizes / 2, centers + sizes / 2], axis=1)
+
+
+class OptimizeAnchorsTest(test_case.TestCase):
+
+  def test_read_boxes(self):
+    path = os.path.join(self.get_temp_dir(), 'boxes.record')
+    writer = tf.python_io.TFRecordWriter(path)
+    for ymin, ymax in (([0.25], [0.5]), ([], []), ([0.5, 0.5], [1.0, 0.5])):
+      writer.write(tf.train.Example(features=tf.train.Features(feature={
+          'image/object/bbox/ymin': dataset_util.float_list_feature(ymin),
+          'image/object/bbox/xmin': dataset_util.float_list_feature(ymin),
+          'image/object/bbox/ymax': dataset_util.float_list_feature(ymax),
+          'image/object/bbox/xmax': dataset_util.float_list_feature(ymax),
+      })).SerializeToString())
+    writer.close()
+
+    boxes, num_images = optimize_anchors.read_boxes([path], 100, 200)
+
+    self.assertEqual(num_images, 3)
+    self.assertAllClose(boxes, [[25, 50, 50, 100], [50, 100, 100, 200]])
+
+  def test_iou_kmeans(self):
+    sizes = np.array([[10, 10], [11, 9], [9, 11], [40, 80], [42, 78]],
+                     np.float64)
+
+    centers, mean_iou = optimize_anchors.iou_kmeans(sizes, 2)
+
+    self.assertAllClose(centers, [[10, 10], [41, 79]])
+    self.assertGreater(mean_iou, 0.8)
+
+  def test_best_anchor_iou_matches_anchor_generator(self):
+    boxes = _random_boxes(200, 320, 4, 120)
+    anchor_config = AnchorConfig(3, 7, 1.5, 2, [0.5, 1.0, 2.0])
+
+    def graph_fn():
+      anchor_generator = (
+          multiscale_grid_anchor_generator.MultiscaleGridAnchorGenerator(
+              anchor_config.min_level, anchor_config.max_level,
+              anchor_config.anchor_scale, anchor_config.aspect_ratios,
+              anchor_config.scales_per_octave, normalize_coordinates=False))
+      anchors = anchor_generator.generate(
+          [(40, 40), (20, 20), (10, 10), (5, 5), (3, 3)],
+          im_height=320, im_width=320)
+      return [anchor_list.get() for anchor_list in anchors]
+
+    anchors = self.execute(graph_fn, [])
+    evaluation = optimize_anchors.evaluate_anchors(
+        boxes, anchor_config, 320, 320, matched_threshold=0.5)
+    expected_ious = np.max(
+        np_box_ops.iou(boxes, np.concatenate(anchors)), axis=1)
+
+    self.assertEqual(evaluation['anchors_per_image'],
+                     sum(len(level_anchors) for level_anchors in anchors))
+    self.assertAllClose(evaluation['mean_iou'], np.mean(expected_ious))
+    self.assertAllClose(evaluation['recall'], np.mean(expected_ious >= 0.5))
+
+  def test_optimize_anchors_for_small_boxes(self):
+    boxes = _random_boxes(500, 320, 12, 30)
+    default_config = AnchorConfig(3, 7, 4.0, 2, [1.0, 2.0, 0.5])
+
+    anchor_config = optimize_anchors.optimize_anchors(boxes, 320, 320, 3, 7)
+    evaluation = optimize_anchors.evaluate_anchors(boxes, anchor_config, 320,
+                                                   320)
+    default_evaluation = optimize_anchors.evaluate_anchors(
+        boxes, default_config, 320, 320)
+
+    self.assertEqual(anchor_config.min_level, 3)
+    self.assertLess(anchor_config.max_level, 7)
+    self.assertLess(anchor_config.anchor_scale, 4.0)
+    self.assertGreater(evaluation['recall'], default_evaluation['recall'])
+    self.assertLess(evaluation['anchors_per_image'],
+                    default_evaluation['anchors_per_image'])
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -257,6 +257,7 @@ class ObjectDetectionEvaluator(DetectionEvaluator):
         logging.warning('Image with id %s already added.', image_id)
 
     self._evaluation.merge_internal_state(state_tuple)
+    self._image_ids.update(image_ids)
 
   def _build_metric_names(self):
     """Builds a list with metric names."""
@@ -996,6 +997,76 @@ ObjectDetectionEvaluationState = collections.namedtuple(
     ])
 
 
+class _SegmentedArray(object):
+  """A growable 1-D numpy array built from appended segments.
+
+  It replaces the per-class lists of small per-image arrays. Indexing, len()
+  and iteration work on the appended segments, like they did on the lists, but
+  all values are kept in one preallocated buffer that doubles in size when it
+  is full, so that they don't have to be concatenated on every evaluation.
+  """
+
+  def __init__(self, initial_capacity=64):
+    self._buffer = None
+    self._initial_capacity = initial_capacity
+    self._size = 0
+    self._segment_ends = []
+
+  def _reserve(self, size, dtype):
+    """Makes sure the buffer can hold `size` values of type `dtype`."""
+    if self._buffer is None:
+      self._buffer = np.empty(max(size, self._initial_capacity), dtype=dtype)
+      return
+    dtype = np.result_type(self._buffer.dtype, dtype)
+    if size > self._buffer.shape[0] or dtype != self._buffer.dtype:
+      capacity = self._buffer.shape[0]
+      while capacity < size:
+        capacity *= 2
+      buffer = np.empty(capacity, dtype=dtype)
+      buffer[:self._size] = self._buffer[:self._size]
+      self._buffer = buffer
+
+  def append(self, values):
+    """Appends a segment of values."""
+    values = np.asarray(values).ravel()
+    self._reserve(self._size + values.shape[0], values.dtype)
+    self._buffer[self._size:self._size + values.shape[0]] = values
+    self._size += values.shape[0]
+    self._segment_ends.append(self._size)
+
+  def extend(self, segments):
+    """Appends all segments of a list of arrays or of a _SegmentedArray."""
+    if isinstance(segments, _SegmentedArray):
+      if not segments:
+        return
+      offset = self._size
+      self._reserve(self._size + segments._size, segments._buffer.dtype)
+      self._buffer[self._size:self._size + segments._size] = segments.values()
+      self._size += segments._size
+      self._segment_ends.extend(end + offset for end in segments._segment_ends)
+    else:
+      for values in segments:
+        self.append(values)
+
+  def values(self):
+    """Returns a view of all the values of all segments."""
+    if self._buffer is None:
+      return np.array([], dtype=float)
+    return self._buffer[:self._size]
+
+  def __len__(self):
+    return len(self._segment_ends)
+
+  def __getitem__(self, index):
+    end = self._segment_ends[index]
+    start = self._segment_ends[index - 1] if index % len(self) else 0
+    return self._buffer[start:end]
+
+  def __iter__(self):
+    for index in range(len(self)):
+      yield self[index]
+
+
 class ObjectDetectionEvaluation(object):
   """Internal implementation of Pascal object detection metrics."""
 
@@ -1066,8 +1137,10 @@ class ObjectDetectionEvaluation(object):
   def _initialize_detections(self):
     """Initializes internal data structures."""
     self.detection_keys = set()
-    self.scores_per_class = [[] for _ in range(self.num_class)]
-    self.tp_fp_labels_per_class = [[] for _ in range(self.num_class)]
+    self.scores_per_class = [_SegmentedArray() for _ in range(self.num_class)]
+    self.tp_fp_labels_per_class = [
+        _SegmentedArray() for _ in range(self.num_class)
+    ]
     self.num_images_correctly_detected_per_class = np.zeros(self.num_class)
     self.average_precision_per_class = np.empty(self.num_class, dtype=float)
     self.average_precision_per_class.fill(np.nan)
@@ -1312,8 +1385,8 @@ class ObjectDetectionEvaluation(object):
         scores = np.array([], dtype=float)
         tp_fp_labels = np.array([], dtype=float)
       else:
-        scores = np.concatenate(self.scores_per_class[class_index])
-        tp_fp_labels = np.concatenate(self.tp_fp_labels_per_class[class_index])
+        scores = self.scores_per_class[class_index].values()
+        tp_fp_labels = self.tp_fp_labels_per_class[class_index].values()
       if self.use_weighted_mean_ap:
         all_scores = np.append(all_scores, scores)
         all_tp_fp_labels = np.append(all_tp_fp_labels, tp_fp_labels)
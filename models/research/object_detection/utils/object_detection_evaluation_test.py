@@ -901,6 +901,75 @@ class ObjectDetectionEvaluationTest(tf.test.TestCase):
     self.assertAlmostEqual(copy_mean_ap, mean_ap)
     self.assertAlmostEqual(copy_mean_corloc, mean_corloc)
 
+  def test_merge_internal_state_of_shards(self):
+    # Test that evaluating the images in shards and merging the states of the
+    # shards in order gives the same results as evaluating all images at once.
+    groundtruth_boxes = np.array([[0, 0, 1, 1], [0, 0, 2, 2]], dtype=float)
+    groundtruth_class_labels = np.array([0, 1], dtype=int)
+    detected_boxes = np.array([[0, 0, 1, 1], [0, 0, 2, 2], [5, 5, 6, 6]],
+                              dtype=float)
+    detected_class_labels = np.array([0, 1, 0], dtype=int)
+    all_images = object_detection_evaluation.ObjectDetectionEvaluation(2)
+    shards = [object_detection_evaluation.ObjectDetectionEvaluation(2)
+              for _ in range(3)]
+    for image_index in range(90):
+      detected_scores = np.array(
+          [0.9, 0.5, 0.1 * (image_index % 10)], dtype=float)
+      for od_eval in [all_images, shards[image_index // 30]]:
+        od_eval.add_single_ground_truth_image_info(
+            image_index, groundtruth_boxes, groundtruth_class_labels)
+        od_eval.add_single_detected_image_info(
+            image_index, detected_boxes, detected_scores,
+            detected_class_labels)
+
+    merged = object_detection_evaluation.ObjectDetectionEvaluation(2)
+    for shard in shards:
+      merged.merge_internal_state(shard.get_internal_state())
+
+    self.assertEqual(len(merged.scores_per_class[0]), 90)
+    for i in range(2):
+      self.assertAllEqual(all_images.scores_per_class[i].values(),
+                          merged.scores_per_class[i].values())
+    (average_precision_per_class, mean_ap, _, _, corloc_per_class,
+     mean_corloc) = all_images.evaluate()
+    (merged_average_precision_per_class, merged_mean_ap, _, _,
+     merged_corloc_per_class, merged_mean_corloc) = merged.evaluate()
+    self.assertAllEqual(merged_average_precision_per_class,
+                        average_precision_per_class)
+    self.assertAllEqual(merged_corloc_per_class, corloc_per_class)
+    self.assertEqual(merged_mean_ap, mean_ap)
+    self.assertEqual(merged_mean_corloc, mean_corloc)
+
+
+class SegmentedArrayTest(tf.test.TestCase):
+
+  def test_append_grows_buffer(self):
+    segmented_array = object_detection_evaluation._SegmentedArray(
+        initial_capacity=2)
+    self.assertEqual(len(segmented_array), 0)
+    self.assertAllEqual(segmented_array.values(), [])
+    segmented_array.append(np.array([0.1, 0.2], dtype=float))
+    segmented_array.append(np.array([], dtype=float))
+    segmented_array.append(np.array([0.3, 0.4, 0.5], dtype=float))
+    self.assertEqual(len(segmented_array), 3)
+    self.assertAllClose(segmented_array[0], [0.1, 0.2])
+    self.assertAllClose(segmented_array[1], [])
+    self.assertAllClose(segmented_array[2], [0.3, 0.4, 0.5])
+    self.assertAllClose(segmented_array[-1], [0.3, 0.4, 0.5])
+    self.assertAllClose(segmented_array.values(), [0.1, 0.2, 0.3, 0.4, 0.5])
+
+  def test_extend_keeps_order_and_upcasts(self):
+    segmented_array = object_detection_evaluation._SegmentedArray()
+    segmented_array.append(np.array([True, False], dtype=bool))
+    self.assertEqual(segmented_array.values().dtype, bool)
+    other = object_detection_evaluation._SegmentedArray()
+    other.append(np.array([0.5], dtype=float))
+    segmented_array.extend(other)
+    segmented_array.extend([np.array([1.0], dtype=float)])
+    self.assertEqual(segmented_array.values().dtype, float)
+    self.assertAllClose(segmented_array.values(), [1.0, 0.0, 0.5, 1.0])
+    self.assertEqual([len(segment) for segment in segmented_array], [2, 1, 1])
+
 
 @unittest.skipIf(tf_version.is_tf2(), 'Eval Metrics ops are supported in TF1.X '
                  'only.')
@@ -31,6 +31,10 @@ from object_detection.utils import np_box_list
 from object_detection.utils import np_box_list_ops
 from object_detection.utils import np_box_mask_list
 from object_detection.utils import np_box_mask_list_ops
+from object_detection.utils import np_box_ops
+
+# Score threshold of np_box_list_ops.non_max_suppression.
+_NMS_SCORE_THRESHOLD = -10.0
 
 
 class PerImageEvaluation(object):
@@ -111,6 +115,25 @@ class PerImageEvaluation(object):
     detected_boxes, detected_scores, detected_class_labels, detected_masks = (
         self._remove_invalid_boxes(detected_boxes, detected_scores,
                                    detected_class_labels, detected_masks))
+    if self._can_compute_box_metrics_vectorized(
+        detected_boxes=detected_boxes,
+        detected_scores=detected_scores,
+        detected_class_labels=detected_class_labels,
+        groundtruth_boxes=groundtruth_boxes,
+        groundtruth_class_labels=groundtruth_class_labels,
+        groundtruth_is_difficult_list=groundtruth_is_difficult_list,
+        groundtruth_is_group_of_list=groundtruth_is_group_of_list,
+        detected_masks=detected_masks,
+        groundtruth_masks=groundtruth_masks):
+      return self._compute_box_metrics_vectorized(
+          detected_boxes=detected_boxes,
+          detected_scores=detected_scores,
+          detected_class_labels=detected_class_labels,
+          groundtruth_boxes=groundtruth_boxes,
+          groundtruth_class_labels=groundtruth_class_labels,
+          groundtruth_is_difficult_list=groundtruth_is_difficult_list,
+          groundtruth_is_group_of_list=groundtruth_is_group_of_list)
+
     scores, tp_fp_labels = self._compute_tp_fp(
         detected_boxes=detected_boxes,
         detected_scores=detected_scores,
@@ -133,6 +156,284 @@ class PerImageEvaluation(object):
 
     return scores, tp_fp_labels, is_class_correctly_detected_in_image
 
+  def _can_compute_box_metrics_vectorized(self,
+                                          detected_boxes,
+                                          detected_scores,
+                                          detected_class_labels,
+                                          groundtruth_boxes,
+                                          groundtruth_class_labels,
+                                          groundtruth_is_difficult_list,
+                                          groundtruth_is_group_of_list,
+                                          detected_masks=None,
+                                          groundtruth_masks=None):
+    """Returns whether the inputs can be evaluated by the vectorized path.
+
+    The vectorized path gives the same results as the per class evaluation
+    for box inputs of the documented types. Masks, other types, non-finite
+    values, invalid groundtruth boxes and invalid NMS parameters are left to
+    the per class evaluation, which also raises the errors for them.
+
+    Args:
+      detected_boxes: A float numpy array of shape [N, 4].
+      detected_scores: A float numpy array of shape [N].
+      detected_class_labels: An integer numpy array of shape [N].
+      groundtruth_boxes: A float numpy array of shape [M, 4].
+      groundtruth_class_labels: An integer numpy array of shape [M].
+      groundtruth_is_difficult_list: A boolean numpy array of length M.
+      groundtruth_is_group_of_list: A boolean numpy array of length M.
+      detected_masks: (optional) A uint8 numpy array of shape [N, height,
+        width].
+      groundtruth_masks: (optional) A uint8 numpy array of shape [M, height,
+        width].
+
+    Returns:
+      A boolean.
+    """
+    if detected_masks is not None or groundtruth_masks is not None:
+      return False
+    if not (0.0 <= self.nms_iou_threshold <= 1.0 and
+            self.nms_max_output_boxes >= 1):
+      return False
+    arrays = [detected_boxes, detected_scores, detected_class_labels,
+              groundtruth_boxes, groundtruth_class_labels,
+              groundtruth_is_difficult_list, groundtruth_is_group_of_list]
+    if not all(isinstance(array, np.ndarray) for array in arrays):
+      return False
+    for boxes in (detected_boxes, groundtruth_boxes):
+      if (boxes.ndim != 2 or boxes.shape[1] != 4 or
+          boxes.dtype not in (np.float32, np.float64)):
+        return False
+    num_detections = detected_boxes.shape[0]
+    num_groundtruth = groundtruth_boxes.shape[0]
+    if (detected_scores.shape != (num_detections,) or
+        detected_class_labels.shape != (num_detections,) or
+        groundtruth_class_labels.shape != (num_groundtruth,) or
+        groundtruth_is_difficult_list.shape != (num_groundtruth,) or
+        groundtruth_is_group_of_list.shape != (num_groundtruth,)):
+      return False
+    if (not np.issubdtype(detected_scores.dtype, np.floating) or
+        not np.issubdtype(detected_class_labels.dtype, np.integer) or
+        not np.issubdtype(groundtruth_class_labels.dtype, np.integer) or
+        groundtruth_is_difficult_list.dtype != bool or
+        groundtruth_is_group_of_list.dtype != bool):
+      return False
+    if not (np.all(np.isfinite(detected_boxes)) and
+            np.all(np.isfinite(detected_scores)) and
+            np.all(np.isfinite(groundtruth_boxes))):
+      return False
+    return bool(
+        np.all(groundtruth_boxes[:, 0] <= groundtruth_boxes[:, 2]) and
+        np.all(groundtruth_boxes[:, 1] <= groundtruth_boxes[:, 3]))
+
+  def _compute_box_metrics_vectorized(self,
+                                      detected_boxes,
+                                      detected_scores,
+                                      detected_class_labels,
+                                      groundtruth_boxes,
+                                      groundtruth_class_labels,
+                                      groundtruth_is_difficult_list,
+                                      groundtruth_is_group_of_list):
+    """Evaluates the detections of all classes of an image at once.
+
+    Computes the same scores, tp/fp labels and CorLoc as `_compute_tp_fp` and
+    `_compute_cor_loc` in box mode, bit for bit, without looping over the
+    detections:
+     1. The detections are sorted by class and by descending score (with the
+        tie order of np_box_list_ops.sort_by_field). The greedy NMS of all
+        classes is computed as the fixed point of the suppressions between
+        the boxes of the same class.
+     2. The IOU (IOA) of all remaining detections with all non group-of
+        (group-of) groundtruth boxes is computed as a single matrix, masked
+        to the pairs of the same class. Every detection is matched to its
+        best groundtruth box of the same class. A groundtruth box is detected
+        by the highest scoring detection matched to it.
+
+    Args:
+      detected_boxes: A float numpy array of shape [N, 4], representing N
+        regions of detected object regions. Each row is of the format [y_min,
+        x_min, y_max, x_max]
+      detected_scores: A float numpy array of shape [N], representing the
+        confidence scores of the detected N object instances.
+      detected_class_labels: A integer numpy array of shape [N], representing
+        the class labels of the detected N object instances.
+      groundtruth_boxes: A float numpy array of shape [M, 4], representing M
+        regions of object instances in ground truth
+      groundtruth_class_labels: An integer numpy array of shape [M],
+        representing M class labels of object instances in ground truth
+      groundtruth_is_difficult_list: A boolean numpy array of length M denoting
+        whether a ground truth box is a difficult instance or not
+      groundtruth_is_group_of_list: A boolean numpy array of length M denoting
+        whether a ground truth box has group-of tag
+
+    Returns:
+      scores: A list of C float numpy arrays, see
+        compute_object_detection_metrics.
+      tp_fp_labels: A list of C float numpy arrays, see
+        compute_object_detection_metrics.
+      is_class_correctly_detected_in_image: a numpy integer array of
+          shape [C].
+    """
+    num_classes = self.num_groundtruth_classes
+    class_indices = np.arange(num_classes + 1)
+
+    selected_groundtruth = ((groundtruth_class_labels >= 0) &
+                            (groundtruth_class_labels < num_classes))
+    gt_boxes = groundtruth_boxes[selected_groundtruth]
+    gt_classes = groundtruth_class_labels[selected_groundtruth].astype(np.int64)
+    gt_is_difficult = groundtruth_is_difficult_list[selected_groundtruth]
+    gt_is_group_of = groundtruth_is_group_of_list[selected_groundtruth]
+    num_gt_per_class = np.bincount(gt_classes, minlength=num_classes)
+
+    selected_detections = ((detected_class_labels >= 0) &
+                           (detected_class_labels < num_classes))
+    boxes = detected_boxes[selected_detections]
+    scores = detected_scores[selected_detections]
+    classes = detected_class_labels[selected_detections].astype(np.int64)
+    num_detections_per_class = np.bincount(classes, minlength=num_classes)
+
+    # CorLoc: the highest scoring detection of every class (the first one on
+    # ties, like np.argmax) against all groundtruth boxes of the class.
+    is_class_correctly_detected_in_image = np.zeros(num_classes, dtype=int)
+    if boxes.shape[0] and gt_boxes.shape[0]:
+      order = np.lexsort((-scores, classes))
+      is_first_of_class = np.ones(order.size, dtype=bool)
+      is_first_of_class[1:] = classes[order[1:]] != classes[order[:-1]]
+      top_detections = order[is_first_of_class]
+      top_classes = classes[top_detections]
+      iou = np_box_ops.iou(boxes[top_detections], gt_boxes)
+      is_correct = np.any(
+          (top_classes[:, np.newaxis] == gt_classes[np.newaxis, :]) &
+          (iou >= self.matching_iou_threshold), axis=1)
+      is_class_correctly_detected_in_image[top_classes[is_correct]] = 1
+
+    # Sorts the detections by class and descending score. Detections with the
+    # same class and score are ordered like np.argsort(scores)[::-1] orders the
+    # detections of the class in the per class evaluation.
+    candidates = np.flatnonzero(scores > _NMS_SCORE_THRESHOLD)
+    order = candidates[np.lexsort((-scores[candidates], classes[candidates]))]
+    sorted_classes = classes[order]
+    class_bounds = np.searchsorted(sorted_classes, class_indices)
+    sorted_scores = scores[order]
+    is_tied = ((sorted_classes[1:] == sorted_classes[:-1]) &
+               (sorted_scores[1:] == sorted_scores[:-1]))
+    for class_index in np.unique(sorted_classes[1:][is_tied]):
+      class_candidates = candidates[classes[candidates] == class_index]
+      order[class_bounds[class_index]:class_bounds[class_index + 1]] = (
+          class_candidates[np.argsort(scores[class_candidates])[::-1]])
+    sorted_boxes = boxes[order]
+
+    is_selected = np.ones(order.size, dtype=bool)
+    if self.nms_iou_threshold < 1.0:
+      suppressing = []
+      suppressed = []
+      for class_index in np.flatnonzero(np.diff(class_bounds) > 1):
+        start, end = class_bounds[class_index], class_bounds[class_index + 1]
+        class_iou = np_box_ops.iou(sorted_boxes[start:end],
+                                   sorted_boxes[start:end])
+        rows, cols = np.nonzero(
+            np.triu(~(class_iou <= self.nms_iou_threshold), k=1))
+        suppressing.append(rows + start)
+        suppressed.append(cols + start)
+      if suppressing:
+        suppressing = np.concatenate(suppressing)
+        suppressed = np.concatenate(suppressed)
+        # A box is kept iff no kept box of higher score suppresses it. Starting
+        # from all boxes, the fixed point is reached after at most as many
+        # iterations as the longest chain of suppressions.
+        while True:
+          is_suppressed = np.zeros(order.size, dtype=bool)
+          is_suppressed[suppressed[is_selected[suppressing]]] = True
+          if np.array_equal(is_selected, ~is_suppressed):
+            break
+          is_selected = ~is_suppressed
+    selected_count = np.cumsum(is_selected)
+    selected_count_before_class = np.concatenate(([0], selected_count))[
+        class_bounds[:-1]]
+    is_selected &= (
+        selected_count - selected_count_before_class[sorted_classes] <=
+        self.nms_max_output_boxes)
+
+    selected = order[is_selected]
+    selected_boxes = boxes[selected]
+    selected_scores = scores[selected]
+    selected_classes = classes[selected]
+    selected_bounds = np.searchsorted(selected_classes, class_indices)
+    num_selected = selected.size
+
+    tp_fp_labels = np.zeros(num_selected, dtype=bool)
+    is_matched_to_difficult = np.zeros(num_selected, dtype=bool)
+    is_matched_to_group_of = np.zeros(num_selected, dtype=bool)
+
+    non_group_of = np.flatnonzero(~gt_is_group_of)
+    if num_selected and non_group_of.size:
+      iou = np_box_ops.iou(selected_boxes, gt_boxes[non_group_of])
+      iou[selected_classes[:, np.newaxis] !=
+          gt_classes[non_group_of][np.newaxis, :]] = -np.inf
+      max_overlap_gt_ids = np.argmax(iou, axis=1)
+      is_matched = (iou[np.arange(num_selected), max_overlap_gt_ids] >=
+                    self.matching_iou_threshold)
+      is_difficult = gt_is_difficult[non_group_of][max_overlap_gt_ids]
+      is_matched_to_difficult = is_matched & is_difficult
+      matched = np.flatnonzero(is_matched & ~is_difficult)
+      _, first_matches = np.unique(max_overlap_gt_ids[matched],
+                                   return_index=True)
+      tp_fp_labels[matched[first_matches]] = True
+
+    group_of = np.flatnonzero(gt_is_group_of)
+    scores_group_of = np.zeros(group_of.size, dtype=float)
+    if num_selected and group_of.size:
+      ioa = np.transpose(
+          np_box_ops.ioa(gt_boxes[group_of], selected_boxes))
+      ioa[selected_classes[:, np.newaxis] !=
+          gt_classes[group_of][np.newaxis, :]] = -np.inf
+      max_overlap_group_of_gt_ids = np.argmax(ioa, axis=1)
+      is_matched_to_group_of = (
+          ~tp_fp_labels & ~is_matched_to_difficult &
+          (ioa[np.arange(num_selected), max_overlap_group_of_gt_ids] >=
+           self.matching_iou_threshold))
+      np.maximum.at(scores_group_of,
+                    max_overlap_group_of_gt_ids[is_matched_to_group_of],
+                    selected_scores[is_matched_to_group_of])
+    group_of_order = np.argsort(gt_classes[group_of], kind='stable')
+    scores_group_of = scores_group_of[group_of_order]
+    group_of_bounds = np.searchsorted(gt_classes[group_of][group_of_order],
+                                      class_indices)
+    valid_entries = ~is_matched_to_difficult & ~is_matched_to_group_of
+
+    result_scores = []
+    result_tp_fp_labels = []
+    for i in range(num_classes):
+      if not num_detections_per_class[i]:
+        result_scores.append(np.array([], dtype=float))
+        result_tp_fp_labels.append(np.array([], dtype=bool))
+        continue
+      start, end = selected_bounds[i], selected_bounds[i + 1]
+      if not num_gt_per_class[i]:
+        result_scores.append(selected_scores[start:end])
+        result_tp_fp_labels.append(np.zeros(end - start, dtype=bool))
+        continue
+      group_of_start, group_of_end = group_of_bounds[i], group_of_bounds[i + 1]
+      if group_of_end > group_of_start:
+        class_scores_group_of = scores_group_of[group_of_start:group_of_end]
+        class_tp_fp_labels_group_of = self.group_of_weight * np.ones(
+            group_of_end - group_of_start, dtype=float)
+        selector = np.where((class_scores_group_of > 0) &
+                            (class_tp_fp_labels_group_of > 0))
+        class_scores_group_of = class_scores_group_of[selector]
+        class_tp_fp_labels_group_of = class_tp_fp_labels_group_of[selector]
+      else:
+        class_scores_group_of = np.ndarray([0], dtype=float)
+        class_tp_fp_labels_group_of = np.ndarray([0], dtype=float)
+      class_valid_entries = valid_entries[start:end]
+      result_scores.append(np.concatenate(
+          (selected_scores[start:end][class_valid_entries],
+           class_scores_group_of)))
+      result_tp_fp_labels.append(np.concatenate(
+          (tp_fp_labels[start:end][class_valid_entries].astype(float),
+           class_tp_fp_labels_group_of)))
+    return (result_scores, result_tp_fp_labels,
+            is_class_correctly_detected_in_image)
+
   def _compute_cor_loc(self,
                        detected_boxes,
                        detected_scores,
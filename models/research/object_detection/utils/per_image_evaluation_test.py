@@ -714,5 +714,88 @@ class CorLocTest(tf.test.TestCase):
                                    is_class_correctly_detected_in_image))
 
 
+class VectorizedBoxEvaluationTest(tf.test.TestCase):
+
+  def _random_boxes(self, num_boxes, random_state):
+    # Boxes on a coarse grid, to have identical and empty boxes.
+    corners = random_state.randint(0, 6, size=(num_boxes, 2))
+    sizes = random_state.randint(0, 4, size=(num_boxes, 2))
+    return np.concatenate([corners, corners + sizes], axis=1).astype(float)
+
+  def _evaluate_per_class(self, eval1, detected_boxes, detected_scores,
+                          detected_class_labels, groundtruth_boxes,
+                          groundtruth_class_labels,
+                          groundtruth_is_difficult_list,
+                          groundtruth_is_group_of_list):
+    detected_boxes, detected_scores, detected_class_labels, _ = (
+        eval1._remove_invalid_boxes(detected_boxes, detected_scores,
+                                    detected_class_labels))
+    scores, tp_fp_labels = eval1._compute_tp_fp(
+        detected_boxes, detected_scores, detected_class_labels,
+        groundtruth_boxes, groundtruth_class_labels,
+        groundtruth_is_difficult_list, groundtruth_is_group_of_list)
+    is_class_correctly_detected_in_image = eval1._compute_cor_loc(
+        detected_boxes, detected_scores, detected_class_labels,
+        groundtruth_boxes, groundtruth_class_labels)
+    return scores, tp_fp_labels, is_class_correctly_detected_in_image
+
+  def _assert_identical(self, expected, actual):
+    self.assertEqual(expected.dtype, actual.dtype)
+    self.assertEqual(expected.shape, actual.shape)
+    self.assertEqual(expected.tobytes(), actual.tobytes())
+
+  def test_same_results_as_per_class_evaluation(self):
+    random_state = np.random.RandomState(0)
+    for nms_iou_threshold, nms_max_output_boxes, group_of_weight in [
+        (0.3, 50, 0.0), (0.6, 2, 0.5), (1.0, 3, 1.0), (0.0, 50, 1.0)]:
+      eval1 = per_image_evaluation.PerImageEvaluation(
+          num_groundtruth_classes=3,
+          matching_iou_threshold=0.5,
+          nms_iou_threshold=nms_iou_threshold,
+          nms_max_output_boxes=nms_max_output_boxes,
+          group_of_weight=group_of_weight)
+      for _ in range(50):
+        num_detections = random_state.randint(0, 40)
+        num_groundtruth = random_state.randint(0, 10)
+        detected_boxes = self._random_boxes(num_detections, random_state)
+        # Few distinct scores, to have ties.
+        detected_scores = random_state.randint(0, 4, num_detections) / 4.0
+        detected_class_labels = random_state.randint(0, 3, num_detections)
+        groundtruth_boxes = self._random_boxes(num_groundtruth, random_state)
+        groundtruth_class_labels = random_state.randint(0, 3, num_groundtruth)
+        groundtruth_is_difficult_list = random_state.rand(num_groundtruth) < 0.2
+        groundtruth_is_group_of_list = random_state.rand(num_groundtruth) < 0.3
+        self.assertTrue(eval1._can_compute_box_metrics_vectorized(
+            detected_boxes, detected_scores, detected_class_labels,
+            groundtruth_boxes, groundtruth_class_labels,
+            groundtruth_is_difficult_list, groundtruth_is_group_of_list))
+
+        scores, tp_fp_labels, is_class_correctly_detected_in_image = (
+            eval1.compute_object_detection_metrics(
+                detected_boxes, detected_scores, detected_class_labels,
+                groundtruth_boxes, groundtruth_class_labels,
+                groundtruth_is_difficult_list, groundtruth_is_group_of_list))
+        (expected_scores, expected_tp_fp_labels,
+         expected_is_class_correctly_detected_in_image) = (
+             self._evaluate_per_class(
+                 eval1, detected_boxes, detected_scores,
+                 detected_class_labels, groundtruth_boxes,
+                 groundtruth_class_labels, groundtruth_is_difficult_list,
+                 groundtruth_is_group_of_list))
+        for i in range(3):
+          self._assert_identical(expected_scores[i], scores[i])
+          self._assert_identical(expected_tp_fp_labels[i], tp_fp_labels[i])
+        self._assert_identical(expected_is_class_correctly_detected_in_image,
+                               is_class_correctly_detected_in_image)
+
+  def test_masks_are_evaluated_per_class(self):
+    eval1 = per_image_evaluation.PerImageEvaluation(num_groundtruth_classes=1)
+    boxes = np.array([[0, 0, 1, 1]], dtype=float)
+    masks = np.ones((1, 2, 2), dtype=np.uint8)
+    self.assertFalse(eval1._can_compute_box_metrics_vectorized(
+        boxes, np.array([0.5]), np.array([0]), boxes, np.array([0]),
+        np.array([False]), np.array([False]), masks, masks))
+
+
 if __name__ == "__main__":
   tf.test.main()
@@ -44,6 +44,12 @@ from object_detection.utils import shape_utils
 
 _TITLE_LEFT_MARGIN = 10
 _TITLE_TOP_MARGIN = 10
+_FONT_NAME = 'arial.ttf'
+_FONT_SIZE = 24
+# Loaded fonts and measured text sizes are cached so that drawing labels on
+# every frame of a video does not reload the font file or re-measure strings.
+_FONT_CACHE = {}
+_TEXT_SIZE_CACHE = {}
 STANDARD_COLORS = [
     'AliceBlue', 'Chartreuse', 'Aqua', 'Aquamarine', 'Azure', 'Beige', 'Bisque',
     'BlanchedAlmond', 'BlueViolet', 'BurlyWood', 'CadetBlue', 'AntiqueWhite',
@@ -99,6 +105,38 @@ def _get_multiplier_for_color_randomness():
   return prime_candidates[inds[0]]
 
 
+def _get_font(font_name=_FONT_NAME, font_size=_FONT_SIZE):
+  """Returns a (cached) font used to draw display strings.
+
+  Args:
+    font_name: name of the truetype font file to load.
+    font_size: font size in points.
+
+  Returns:
+    A PIL.ImageFont object. Falls back to the default PIL font if the truetype
+    font cannot be loaded.
+  """
+  key = (font_name, font_size)
+  font = _FONT_CACHE.get(key)
+  if font is None:
+    try:
+      font = ImageFont.truetype(font_name, font_size)
+    except IOError:
+      font = ImageFont.load_default()
+    _FONT_CACHE[key] = font
+  return font
+
+
+def _get_text_size(font, text):
+  """Returns the (cached) (width, height) of `text` rendered with `font`."""
+  key = (font, text)
+  size = _TEXT_SIZE_CACHE.get(key)
+  if size is None:
+    size = font.getsize(text)
+    _TEXT_SIZE_CACHE[key] = size
+  return size
+
+
 def save_image_array_as_png(image, output_path):
   """Saves an image (represented as a numpy array) to PNG.
 
@@ -208,15 +246,12 @@ def draw_bounding_box_on_image(image,
                (left, top)],
               width=thickness,
               fill=color)
-  try:
-    font = ImageFont.truetype('arial.ttf', 24)
-  except IOError:
-    font = ImageFont.load_default()
+  font = _get_font()
 
   # If the total height of the display strings added to the top of the bounding
   # box exceeds the top of the image, stack the strings below the bounding box
   # instead of above.
-  display_str_heights = [font.getsize(ds)[1] for ds in display_str_list]
+  display_str_heights = [_get_text_size(font, ds)[1] for ds in display_str_list]
   # Each display_str has a top and bottom margin of 0.05x.
   total_display_str_height = (1 + 2 * 0.05) * sum(display_str_heights)
 
@@ -226,7 +261,7 @@ def draw_bounding_box_on_image(image,
     text_bottom = bottom + total_display_str_height
   # Reverse list and print from bottom to top.
   for display_str in display_str_list[::-1]:
-    text_width, text_height = font.getsize(display_str)
+    text_width, text_height = _get_text_size(font, display_str)
     margin = np.ceil(0.05 * text_height)
     draw.rectangle(
         [(left, text_bottom - text_height - 2 * margin), (left + text_width,
@@ -993,6 +1028,17 @@ def draw_keypoints_on_image(image,
           edge_coordinates, fill=keypoint_edge_color, width=keypoint_edge_width)
 
 
+def _check_mask_for_image_array(image, mask):
+  """Raises a ValueError if `mask` cannot be drawn on the `image` array."""
+  if image.dtype != np.uint8:
+    raise ValueError('`image` not of type np.uint8')
+  if mask.dtype != np.uint8:
+    raise ValueError('`mask` not of type np.uint8')
+  if image.shape[:2] != mask.shape:
+    raise ValueError('The image has spatial dimensions %s but the mask has '
+                     'dimensions %s' % (image.shape[:2], mask.shape))
+
+
 def draw_mask_on_image_array(image, mask, color='red', alpha=0.4):
   """Draws mask on an image.
 
@@ -1006,22 +1052,34 @@ def draw_mask_on_image_array(image, mask, color='red', alpha=0.4):
   Raises:
     ValueError: On incorrect data type for image or masks.
   """
-  if image.dtype != np.uint8:
-    raise ValueError('`image` not of type np.uint8')
-  if mask.dtype != np.uint8:
-    raise ValueError('`mask` not of type np.uint8')
-  if image.shape[:2] != mask.shape:
-    raise ValueError('The image has spatial dimensions %s but the mask has '
-                     'dimensions %s' % (image.shape[:2], mask.shape))
-  rgb = ImageColor.getrgb(color)
+  _check_mask_for_image_array(image, mask)
   pil_image = Image.fromarray(image)
+  draw_mask_on_image(pil_image, mask, color=color, alpha=alpha)
+  np.copyto(image, np.array(pil_image.convert('RGB')))
+
 
-  solid_color = np.expand_dims(
-      np.ones_like(mask), axis=2) * np.reshape(list(rgb), [1, 1, 3])
-  pil_solid_color = Image.fromarray(np.uint8(solid_color)).convert('RGBA')
+def draw_mask_on_image(image, mask, color='red', alpha=0.4):
+  """Draws mask on an image.
+
+  Args:
+    image: a PIL.Image object.
+    mask: a uint8 numpy array of shape (img_height, img_height) with
+      values between either 0 or 1.
+    color: color to draw the keypoints with. Default is red.
+    alpha: transparency value between 0 and 1. (default: 0.4)
+  """
+  rgb = ImageColor.getrgb(color)
+  # Only the region spanned by the mask is touched, which keeps the cost of
+  # drawing small masks on large frames proportional to the mask size.
+  rows = np.flatnonzero(np.any(mask, axis=1))
+  cols = np.flatnonzero(np.any(mask, axis=0))
+  if not rows.size:
+    return
+  mask = mask[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
   pil_mask = Image.fromarray(np.uint8(255.0*alpha*(mask > 0))).convert('L')
-  pil_image = Image.composite(pil_solid_color, pil_image, pil_mask)
-  np.copyto(image, np.array(pil_image.convert('RGB')))
+  # Pasting a solid color through the mask is what Image.composite does with a
+  # solid color image, without allocating that image.
+  image.paste(rgb, (int(cols[0]), int(rows[0])), pil_mask)
 
 
 def draw_part_mask_on_image_array(image, mask, alpha=0.4, num_parts=24):
@@ -1171,6 +1229,9 @@ def visualize_boxes_and_labels_on_image_array(
 
   Returns:
     uint8 numpy array with shape (img_height, img_width, 3) with overlaid boxes.
+
+  Raises:
+    ValueError: On incorrect data type for image or masks.
   """
   # Create a display string (and color) for every box location, group any boxes
   # that correspond to the same location.
@@ -1230,25 +1291,32 @@ def visualize_boxes_and_labels_on_image_array(
           box_to_color_map[box] = STANDARD_COLORS[
               classes[i] % len(STANDARD_COLORS)]
 
-  # Draw all boxes onto image.
+  if not box_to_color_map:
+    return image
+
+  # Draw all boxes onto a single PIL image, so that the numpy image is only
+  # converted once and copied back once regardless of the number of boxes.
+  image_pil = Image.fromarray(np.uint8(image)).convert('RGB')
   for box, color in box_to_color_map.items():
     ymin, xmin, ymax, xmax = box
     if instance_masks is not None:
-      draw_mask_on_image_array(
-          image,
+      _check_mask_for_image_array(image, box_to_instance_masks_map[box])
+      draw_mask_on_image(
+          image_pil,
           box_to_instance_masks_map[box],
           color=color,
           alpha=mask_alpha
       )
     if instance_boundaries is not None:
-      draw_mask_on_image_array(
-          image,
+      _check_mask_for_image_array(image, box_to_instance_boundaries_map[box])
+      draw_mask_on_image(
+          image_pil,
           box_to_instance_boundaries_map[box],
           color='red',
           alpha=1.0
       )
-    draw_bounding_box_on_image_array(
-        image,
+    draw_bounding_box_on_image(
+        image_pil,
         ymin,
         xmin,
         ymax,
@@ -1261,8 +1329,8 @@ def visualize_boxes_and_labels_on_image_array(
       keypoint_scores_for_box = None
       if box_to_keypoint_scores_map:
         keypoint_scores_for_box = box_to_keypoint_scores_map[box]
-      draw_keypoints_on_image_array(
-          image,
+      draw_keypoints_on_image(
+          image_pil,
           box_to_keypoints_map[box],
           keypoint_scores_for_box,
           min_score_thresh=min_score_thresh,
@@ -1272,6 +1340,7 @@ def visualize_boxes_and_labels_on_image_array(
           keypoint_edges=keypoint_edges,
           keypoint_edge_color=color,
           keypoint_edge_width=line_thickness // 2)
+  np.copyto(image, np.array(image_pil))
 
   return image
 
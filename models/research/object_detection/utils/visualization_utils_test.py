@@ -613,6 +613,42 @@ class VisualizationUtilsTest(test_case.TestCase):
         line_thickness=8)
     self.assertGreater(np.abs(np.sum(test_image - ori_image)), 0)
 
+  def test_visualize_boxes_and_labels_on_image_array_matches_per_box(self):
+    test_image = self.create_colorful_test_image()
+    expected_image = test_image.copy()
+    boxes = np.array([[0.1, 0.1, 0.6, 0.5],
+                      [0.4, 0.3, 0.9, 0.9]])
+    classes = np.array([1, 2], dtype=np.int32)
+    scores = np.array([0.9, 0.6])
+    masks = np.zeros([2, 200, 400], dtype=np.uint8)
+    masks[0, 20:120, 40:200] = 1
+    masks[1, 80:180, 120:360] = 1
+    labelmap = {1: {'id': 1, 'name': 'cat'}, 2: {'id': 2, 'name': 'dog'}}
+    visualization_utils.visualize_boxes_and_labels_on_image_array(
+        test_image,
+        boxes,
+        classes,
+        scores,
+        labelmap,
+        instance_masks=masks,
+        use_normalized_coordinates=True,
+        min_score_thresh=0.5)
+
+    for i in range(2):
+      color = visualization_utils.STANDARD_COLORS[classes[i]]
+      display_str = '{}: {}%'.format(labelmap[classes[i]]['name'],
+                                     round(100 * scores[i]))
+      visualization_utils.draw_mask_on_image_array(
+          expected_image, masks[i], color=color, alpha=0.4)
+      visualization_utils.draw_bounding_box_on_image_array(
+          expected_image, *boxes[i], color=color,
+          display_str_list=[display_str])
+    self.assertAllEqual(expected_image, test_image)
+
+  def test_get_font_is_cached(self):
+    self.assertIs(visualization_utils._get_font(),
+                  visualization_utils._get_font())
+
 
 if __name__ == '__main__':
   tf.test.main()
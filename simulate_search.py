@@ -0,0 +1,120 @@
+####### WRITTEN TO MEASURE THE TIME TO REACQUIRE A LOST OBJECT WITH THE PTU SEARCH PATTERNS #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# SIMULATES A LOST DRONE AND THE PTU, WITHOUT A CAMERA OR A PTU:
+# - THE DRONE IS LOST WHERE IT LEAVES THE FRAME, IT KEEPS FLYING WITH A RANDOM ANGULAR VELOCITY THAT CHANGES
+#   SLOWLY (RANDOM WALK), INSIDE THE SEARCH AREA
+# - THE PTU MOVES WITH ITS SPEED TO THE POINTS OF THE SearchScheduler, FRAMES ARE SHARP AFTER THE SETTLE TIME
+# - THE DETECTOR TAKES --detector SECONDS PER PASS AND FINDS THE DRONE WITH PROBABILITY --probability IF IT IS
+#   INSIDE THE FRAME
+# THE SAME TRIALS (SAME RANDOM SEED) ARE RUN WITH EVERY SET OF PATTERNS AND WITH THE PTU STANDING STILL ("hold"),
+# AND THE TIME TO REACQUIRE FROM THE MOMENT THE DRONE WAS LOST IS PRINTED, FOUND IS THE FRACTION OF THE TRIALS FOUND BEFORE THE TIMEOUT.
+# THE FLIGHT OF THE DRONE AND THE DETECTIONS ARE DRAWN FROM TWO GENERATORS SEEDED PER TRIAL, SO A DRONE FLIES THE
+# SAME WAY WITH EVERY SET OF PATTERNS, ALTHOUGH THE DETECTOR RUNS A DIFFERENT NUMBER OF TIMES WITH EACH.
+
+from SearchScheduler import SearchScheduler, PATTERNS
+from argparse import ArgumentParser
+import numpy as np
+
+# drone_rng: draws the flight of the drone, detection_rng: draws whether a detector pass finds it
+def simulate(search, drone_rng, detection_rng, args):
+    # DRONE, IN DEGREES AND DEGREES PER SECOND, THE PTU POINTS AT (0, 0) WHEN THE DRONE IS LOST
+    fov = np.array(args["fov"])
+    # ON THE EDGE OF THE FRAME, FLYING OUT OF IT
+    angle = drone_rng.uniform(0, 2 * np.pi)
+    direction = np.array([np.cos(angle), np.sin(angle)])
+    drone = direction / np.max(np.abs(direction) / (fov / 2))
+    angle += drone_rng.uniform(-np.pi / 3, np.pi / 3)
+    velocity = drone_rng.uniform(0.2, 1.0) * args["rate"] * np.array([np.cos(angle), np.sin(angle)])
+    # LAST SEEN VELOCITY, MEASURED WITH SOME NOISE
+    seen_velocity = velocity + drone_rng.normal(0, 0.2 * args["rate"] + 1e-9, 2)
+    seen_bearing = drone.copy()
+    pan_min, pan_max, tilt_min, tilt_max = args["area"]
+
+    ptu = np.zeros(2)
+    target = ptu.copy()
+    settled_time = 0.0
+
+    now = 0.0
+    next_pass = 0.0
+    dt = 1.0 / args["fps"]
+    while now < args["timeout"]:
+        now += dt
+        # THE SEARCH STARTS --delay SECONDS AFTER THE DRONE WAS LOST
+        if search is not None and not search.searching and now >= args["delay"]:
+            target = np.array(search.start(now, seen_bearing, seen_velocity, ptu))
+
+        # DRONE
+        velocity += drone_rng.normal(0, args["turn"] * np.sqrt(dt), 2)
+        drone += velocity * dt
+        for axis, (low, high) in enumerate([(pan_min, pan_max), (tilt_min, tilt_max)]):
+            if not low <= drone[axis] <= high:
+                velocity[axis] = -velocity[axis]
+                drone[axis] = np.clip(drone[axis], low, high)
+
+        # PTU, BOTH AXES MOVE AT THE SAME TIME
+        if np.any(ptu != target):
+            move = target - ptu
+            distance = np.max(np.abs(move))
+            ptu = target.copy() if distance <= args["speed"] * dt else ptu + move / distance * args["speed"] * dt
+            if np.all(ptu == target):
+                settled_time = now + args["settle"]
+
+        # DETECTOR
+        if now < next_pass:
+            continue
+        if search is not None and search.searching and not search.settled(now):
+            continue
+        next_pass = now + args["detector"]
+        sharp = np.all(ptu == target) and now >= settled_time
+        if sharp and np.all(np.abs(drone - ptu) < fov / 2) and detection_rng.random() < args["probability"]:
+            if search is not None:
+                search.found(now)
+            return now
+        if search is not None and search.searching:
+            point = search.searched(now)
+            if point is not None:
+                target = np.array(point)
+    if search is not None:
+        search.stop(now)
+    return None
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("-n", "--trials", default=500, type=int, help="Number of lost drones simulated.")
+    parser.add_argument("-p", "--patterns", default=["predicted,spiral,raster", "spiral,raster", "raster"], nargs="+", help="Sets of patterns compared, comma separated, from {}.".format(PATTERNS))
+    parser.add_argument("-f", "--fov", default=[60.0, 40.0], nargs=2, type=float, help="Horizontal and vertical field of view of the camera in degrees.")
+    parser.add_argument("-a", "--area", default=[-90.0, 90.0, -40.0, 10.0], nargs=4, type=float, help="Search area, pan min and max, tilt min and max in degrees of the PTU, a positive tilt points the camera down.")
+    parser.add_argument("-s", "--speed", default=60.0, type=float, help="Speed of the PTU in degrees per second.")
+    parser.add_argument("-S", "--settle", default=0.2, type=float, help="Seconds until the frames are sharp after a movement.")
+    parser.add_argument("-d", "--detector", default=0.1, type=float, help="Seconds per detector pass.")
+    parser.add_argument("-P", "--probability", default=0.9, type=float, help="Probability of detecting the drone if it is inside the frame.")
+    parser.add_argument("-r", "--rate", default=20.0, type=float, help="Maximum angular speed of the drone in degrees per second.")
+    parser.add_argument("-u", "--turn", default=10.0, type=float, help="Random change of the angular velocity of the drone, degrees per second per square root of a second.")
+    parser.add_argument("-D", "--delay", default=0.5, type=float, help="Seconds the object has to be lost before searching.")
+    parser.add_argument("-t", "--timeout", default=60.0, type=float, help="Seconds until a trial is given up.")
+    parser.add_argument("--fps", default=30.0, type=float, help="Frames per second of the camera.")
+    parser.add_argument("--seed", default=0, type=int, help="Random seed.")
+
+    args = vars(parser.parse_args())
+
+    print("{:>26} {:>7} {:>8} {:>8} {:>8} {:>8} {:>10}".format("", "found", "mean s", "median s", "p90 s", "max s", "deg2/s"))
+    for patterns in ["hold"] + args["patterns"]:
+        search = None
+        if patterns != "hold":
+            search = SearchScheduler(args["fov"], patterns.split(","), speed=args["speed"], settle_time=args["settle"],
+                                     search_area=args["area"])
+        # THE SAME DRONES FOR EVERY SET OF PATTERNS
+        times = [simulate(search, np.random.default_rng([args["seed"], trial, 0]), np.random.default_rng([args["seed"], trial, 1]), args)
+                 for trial in range(args["trials"])]
+        found = np.array([t for t in times if t is not None])
+        coverage = search.stats()["coverage_rate"] if search is not None else 0.0
+        if len(found):
+            print("{:>26} {:>7.2f} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f} {:>10.0f}".format(
+                patterns, len(found) / len(times), found.mean(), np.median(found), np.percentile(found, 90), found.max(), coverage))
+        else:
+            print("{:>26} {:>7.2f}".format(patterns, 0.0))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+####### WRITTEN TO COMPARE THE POINTING ERROR OF THE 2D BEARING TRACK AND THE 3D TRAJECTORY #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# SIMULATES A DRONE FLYING PAST THE PTU AND THE TRACKING LOOP, WITHOUT A CAMERA OR A PTU:
+# - THE DRONE FLIES ON A STRAIGHT LINE WITH --speed METERS PER SECOND, --distance METERS FROM THE PTU AT ITS CLOSEST,
+#   WITH A RANDOM ACCELERATION OF --maneuver METERS PER SECOND SQUARED
+# - A FRAME IS CAPTURED --fps TIMES PER SECOND, THE DRONE IS DETECTED WITH PROBABILITY --probability IF IT IS INSIDE
+#   THE FRAME, AND THE DETECTION REACHES THE TRACKER --latency SECONDS AFTER THE CAPTURE
+# - THE PTU IS SENT --rate TIMES PER SECOND TO THE TARGET PREDICTED --lead SECONDS AHEAD AND GETS THERE IN --lead SECONDS
+# - WITH RANGES, THE LASER MEASURES EVERY --interval SECONDS WHILE THE DRONE IS WITHIN --centered DEGREES OF THE CENTER
+# THE SAME DRONES (SAME RANDOM SEED) ARE TRACKED BY EVERY TRACKER, AND THE MEAN, MEDIAN AND 90TH PERCENTILE OF THE
+# ANGLE BETWEEN THE CAMERA AND THE DRONE ARE PRINTED, CENTERED IS THE FRACTION OF THE TIME IT IS WITHIN --centered
+# DEGREES AND LOST THE FRACTION OF THE DRONES OUT OF THE FRAME AT THE END.
+
+from BearingTracker import BearingTracker, CameraModel, ptu_to_bearing
+from Trajectory import Trajectory, bearing_to_position, position_to_bearing, MODELS
+from argparse import ArgumentParser
+import numpy as np
+
+def angle(a, b):
+    return np.degrees(np.arccos(np.clip(a @ b / np.linalg.norm(a) / np.linalg.norm(b), -1, 1)))
+
+def simulate(tracker, ranges, rng, args):
+    camera = CameraModel.from_fov(640, 480, args["fov"])
+
+    # DRONE, CROSSING IN FRONT OF THE PTU FROM THE LEFT OR THE RIGHT, SOME METERS UP
+    side = rng.choice([-1, 1])
+    heading = side * np.array([1.0, rng.uniform(-0.3, 0.3), rng.uniform(-0.1, 0.1)])
+    velocity = args["speed"] * heading / np.linalg.norm(heading)
+    drone = np.array([-side * args["length"] / 2, args["distance"], rng.uniform(5, 30)])
+
+    # THE TRACK STARTS ON A DETECTION WITH THE PTU POINTING AT THE DRONE
+    azimuth, elevation, _ = position_to_bearing(drone)
+    pan, tilt = azimuth, -elevation
+    commanded = np.array([pan, tilt])
+
+    dt = 1.0 / args["rate"]
+    num_of_steps = int(args["length"] / args["speed"] / dt)
+    capture_every = max(int(round(args["rate"] / args["fps"])), 1)
+    # (ARRIVAL TIME, CAPTURE TIME, AZIMUTH, ELEVATION) OF DETECTIONS AND (ARRIVAL TIME, MEASURED TIME, DISTANCE) OF RANGES
+    pending = []
+    pending_ranges = []
+    next_range = 0.0
+    errors = []
+    last_inside = 0.0
+    tracker.reset()
+    for step in range(num_of_steps):
+        now = step * dt
+        velocity += rng.normal(0, args["maneuver"] * np.sqrt(dt), 3)
+        drone = drone + velocity * dt
+        # THE PTU MOVES TO THE COMMANDED POSITION IN lead SECONDS
+        pan, tilt = np.array([pan, tilt]) + (commanded - np.array([pan, tilt])) * min(dt / args["lead"], 1.0)
+        azimuth, elevation = ptu_to_bearing(pan, tilt)
+        error = angle(bearing_to_position(azimuth, elevation, 1.0), drone)
+        errors.append(error)
+
+        # CAPTURE
+        drone_azimuth, drone_elevation, distance = position_to_bearing(drone)
+        if step % capture_every == 0:
+            x, y = camera.bearing_to_pixel(drone_azimuth, drone_elevation, azimuth, elevation)
+            inside = 0 <= x < camera.width and 0 <= y < camera.height and error < 90
+            if inside:
+                last_inside = now
+            if inside and rng.random() < args["probability"]:
+                x, y = x + rng.normal(0, 3), y + rng.normal(0, 3)
+                measured = camera.pixel_to_bearing(x, y, azimuth, elevation)
+                pending.append((now + args["latency"], now, measured, (pan, tilt), (x, y)))
+        # LASER RANGER, A MEASUREMENT TAKES 0.3 SECONDS
+        if ranges and error < args["centered"] and now >= next_range:
+            next_range = now + args["interval"]
+            pending_ranges.append((now + 0.3, now + 0.15, distance + rng.normal(0, 0.5)))
+
+        # DETECTIONS AND RANGES THAT REACHED THE TRACKER
+        while pending and pending[0][0] <= now:
+            _, t, measured, (capture_pan, capture_tilt), (x, y) = pending.pop(0)
+            if isinstance(tracker, Trajectory):
+                tracker.update_bearing(t, *measured)
+            else:
+                tracker.update(t, [(y, x, y, x)], capture_pan, capture_tilt)
+        while pending_ranges and pending_ranges[0][0] <= now:
+            _, t, measured_distance = pending_ranges.pop(0)
+            tracker.update_range(t, measured_distance)
+
+        target = tracker.ptu_target(now + args["lead"])
+        if target is not None:
+            commanded = np.array(target)
+    # THE DRONE WAS OUT OF THE FRAME FOR THE LAST SECOND
+    return np.array(errors), now - last_inside > 1.0
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("-n", "--trials", default=200, type=int, help="Number of drones simulated.")
+    parser.add_argument("-s", "--speed", default=25.0, type=float, help="Speed of the drone in meters per second.")
+    parser.add_argument("-d", "--distance", default=40.0, type=float, help="Closest distance of the drone to the PTU in meters.")
+    parser.add_argument("-L", "--length", default=200.0, type=float, help="Meters flown by the drone in a trial.")
+    parser.add_argument("-m", "--maneuver", default=3.0, type=float, help="Random acceleration of the drone, meters per second squared per square root of a second.")
+    parser.add_argument("-f", "--fov", default=60.0, type=float, help="Horizontal field of view of the camera in degrees.")
+    parser.add_argument("--fps", default=10.0, type=float, help="Frames per second the detector runs at.")
+    parser.add_argument("-P", "--probability", default=0.5, type=float, help="Probability of detecting the drone if it is inside the frame.")
+    parser.add_argument("-l", "--latency", default=0.15, type=float, help="Seconds from the capture of a frame until its detection reaches the tracker.")
+    parser.add_argument("-r", "--rate", default=50.0, type=float, help="Rate of the PTU commands in Hz.")
+    parser.add_argument("-a", "--lead", default=0.1, type=float, help="Seconds the PTU needs to get to a commanded position, the target is predicted this far ahead.")
+    parser.add_argument("-c", "--centered", default=1.0, type=float, help="Degrees between the camera and the drone below which it is centered and the range is measured.")
+    parser.add_argument("-i", "--interval", default=0.5, type=float, help="Seconds between two ranges.")
+    parser.add_argument("--seed", default=0, type=int, help="Random seed.")
+
+    args = vars(parser.parse_args())
+
+    camera = CameraModel.from_fov(640, 480, args["fov"])
+    trackers = [("bearing", BearingTracker(camera), False)]
+    for model in MODELS:
+        bearing_noise = np.degrees(3.0 / camera.focal_length)
+        trackers.append(("trajectory " + model, Trajectory(model, bearing_noise = bearing_noise), False))
+        trackers.append(("trajectory " + model + " + range", Trajectory(model, bearing_noise = bearing_noise), True))
+
+    print("{:>24} {:>8} {:>9} {:>8} {:>9} {:>6}".format("", "mean deg", "median", "p90", "centered", "lost"))
+    for name, tracker, ranges in trackers:
+        # THE SAME DRONES FOR EVERY TRACKER
+        results = [simulate(tracker, ranges, np.random.default_rng([args["seed"], trial]), args) for trial in range(args["trials"])]
+        errors = np.concatenate([errors for errors, _ in results])
+        print("{:>24} {:>8.2f} {:>9.2f} {:>8.2f} {:>9.2f} {:>6.2f}".format(
+            name, errors.mean(), np.median(errors), np.percentile(errors, 90), np.mean(errors < args["centered"]),
+            np.mean([lost for _, lost in results])))
+
+if __name__ == "__main__":
+    main()
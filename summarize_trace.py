@@ -0,0 +1,89 @@
+####### WRITTEN TO SUMMARIZE THE TELEMETRY TRACES OF THE TRACKING LOOP #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# READS A TRACE FILE WRITTEN BY Telemetry.py AND REPORTS FOR EVERY STAGE
+# THE LATENCY PERCENTILES, THE JITTER AND A LATENCY HISTOGRAM.
+# THE FRAME PERIOD (TIME BETWEEN TWO CAPTURES) AND THE LATENCY OF A WHOLE FRAME ARE REPORTED AS WELL.
+
+from argparse import ArgumentParser
+from collections import defaultdict
+import numpy as np
+import json
+import sys
+import os
+
+def load_trace(trace_path):
+    durations = defaultdict(list)
+    starts = defaultdict(list)
+    frame_spans = {}
+    with open(trace_path) as trace_file:
+        for line in trace_file:
+            record = json.loads(line)
+            if record["d"] == 0:
+                # EVENTS HAVE NO DURATION
+                continue
+            durations[record["stage"]].append(record["d"])
+            starts[record["stage"]].append(record["t"])
+
+            # FIRST START AND LAST END OF EACH FRAME
+            span = frame_spans.get(record["frame"])
+            end = record["t"] + record["d"]
+            if span is None:
+                frame_spans[record["frame"]] = [record["t"], end]
+            else:
+                span[0] = min(span[0], record["t"])
+                span[1] = max(span[1], end)
+
+    # NANOSECONDS TO MILLISECONDS
+    durations = {stage: np.array(values, dtype=np.float64) / 1e6 for stage, values in durations.items()}
+    starts = {stage: np.sort(np.array(values, dtype=np.float64)) / 1e6 for stage, values in starts.items()}
+    frame_latencies = np.array([end - start for start, end in frame_spans.values()], dtype=np.float64) / 1e6
+    return durations, starts, frame_latencies
+
+def print_stats(name, values_ms):
+    if values_ms.size == 0:
+        return
+    p50, p90, p99 = np.percentile(values_ms, [50, 90, 99])
+    # JITTER: STANDARD DEVIATION AND THE MEAN ABSOLUTE DIFFERENCE BETWEEN CONSECUTIVE VALUES
+    consecutive = np.abs(np.diff(values_ms)).mean() if values_ms.size > 1 else 0.0
+    print("{:<16} {:>7} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f}".format(
+        name, values_ms.size, values_ms.mean(), p50, p90, p99, values_ms.max(), values_ms.std(), consecutive))
+
+def print_histogram(name, values_ms, bins, width=50):
+    if values_ms.size == 0:
+        return
+    counts, edges = np.histogram(values_ms, bins=bins)
+    print("\n{} (ms)".format(name))
+    for count, low, high in zip(counts, edges[:-1], edges[1:]):
+        bar = "#" * int(round(width * count / counts.max())) if counts.max() > 0 else ""
+        print("{:>9.2f} - {:>9.2f} {:>7} {}".format(low, high, count, bar))
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("-t", "--trace", required=True, help="Path to the trace file (.jsonl) written by the tracking loop.")
+    parser.add_argument("-b", "--bins", default=10, type=int, help="Number of bins of the latency histograms.")
+    parser.add_argument("-p", "--period_stage", default="capture", help="Stage whose start times define the frame period.")
+
+    args = vars(parser.parse_args())
+
+    if not os.path.exists(args["trace"]):
+        sys.exit("{} does not exist. Exiting the program!".format(args["trace"]))
+
+    durations, starts, frame_latencies = load_trace(args["trace"])
+
+    stats = dict(durations)
+    stats["frame"] = frame_latencies
+    if args["period_stage"] in starts:
+        stats["frame period"] = np.diff(starts[args["period_stage"]])
+
+    print("{:<16} {:>7} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}".format(
+        "stage (ms)", "count", "mean", "p50", "p90", "p99", "max", "std", "jitter"))
+    for name, values_ms in stats.items():
+        print_stats(name, values_ms)
+
+    for name, values_ms in stats.items():
+        print_histogram(name, values_ms, args["bins"])
+
+if __name__ == "__main__":
+    main()
@@ -2,20 +2,54 @@
 
 ##### IMPORTANT ######
 # FEEL FREE TO PLAY AROUND WITH THE PID VARIABLES TO TUNE IT
+# OR TUNE THEM FOR YOUR CAMERA WITH autotune_PID.py AND LOAD THEM WITH -k [profile]
 # https://www.csimn.com/CSI_pages/PIDforDummies.html
 
 ##### REFERENCES ######
 # PID CONTROLLER - https://pidexplained.com/pid-controller-explained/
 import cv2
+import time
+import numpy as np
 from argparse import ArgumentParser
+from collections import deque
+from threading import Event, Thread
 from os import sys
 from PTU import PTU
+from PIDTuner import GAINS_PATH, load_gains
 from Detector import Detector
+from DetectorProcess import DetectorProcess
+from MotionGate import MotionGate, METHODS
+from SearchScheduler import SearchScheduler, PATTERNS
+from BearingTracker import BearingTracker, CameraModel, bearing_to_ptu
+from Trajectory import Trajectory, MODELS
+from Ranger import Ranger
+from Telemetry import Telemetry
 
 # CHECK IF THE TRACKER IS VALID
 # RETURN THE TRACKER NAME IF VALID
 # OTHERWISE RETURN NONE
 
+# SENDS THE PTU TO THE PREDICTED TARGETS OF THE TRAJECTORY AT THE CONTROL RATE, IN ITS OWN THREAD
+# THE MOVEMENTS ARE APPENDED TO moves FOR THE MOTION GATE, NOTHING IS SENT WHILE paused() IS TRUE
+# THE MAIN LOOP MOVES THE PTU AS WELL (THE SEARCH), THE COMMAND LOCK OF THE PTU KEEPS BOTH MOVES OF AN UPDATE AND
+# THE MOVEMENT MEASURED FROM THE COMMANDED POSITIONS TOGETHER
+def follow_trajectory(trajectory, ptu, rate, lead, deadband, paused, moves, stop):
+    for _, pan, tilt in trajectory.stream(rate, lead, stop):
+        if pan is None:
+            continue
+        with ptu.command_lock:
+            # THE SEARCH MAY HAVE STARTED WHILE WAITING FOR THE LOCK
+            if paused():
+                continue
+            commanded_pan, commanded_tilt = ptu.commanded_degrees()
+            if abs(pan - commanded_pan) > deadband:
+                ptu.move_x_to_degrees(pan)
+            if abs(tilt - commanded_tilt) > deadband:
+                ptu.move_y_to_degrees(tilt)
+            new_pan, new_tilt = ptu.commanded_degrees()
+        if new_pan != commanded_pan or new_tilt != commanded_tilt:
+            moves.append((new_pan - commanded_pan, new_tilt - commanded_tilt))
+
 def main():
     parser = ArgumentParser()
 
@@ -23,10 +57,35 @@ def main():
     parser.add_argument("-o", "--object_detection_model", required=True, help='Path to the saved object detection model folder.', type=str)
     parser.add_argument("-l", "--labelmap", required=True, help="Path to the label map file (.pbtxt).")
     parser.add_argument("-s", "--serial", required=False, help="Serial port to communicate with the PTU. To find out issue 'ls /dev/tty*' command on the terminal")
+    parser.add_argument("-p", "--processes", default=0, type=int, help="Run the detector in this many separate processes instead of the main process.")
+    parser.add_argument("-g", "--gate", required=False, choices=METHODS, help="Run the detector only on frames with motion, found by frame differencing or a MOG2 background subtractor.")
+    parser.add_argument("--roi", action="store_true", help="Run the detector only on the region around the motion, the boxes are mapped back to the frame. Needs -g, not for models exported with fixed_shape_image_tensor, they only accept frames of their fixed input shape.")
+    parser.add_argument("--min_roi_size", default=320, type=int, help="Minimum width and height of the region around the motion in pixels, about the input size of the model.")
+    parser.add_argument("-f", "--fov", required=False, type=float, help="Horizontal field of view of the camera in degrees, the gate then compensates the PTU movements.")
+    parser.add_argument("-S", "--search", default=None, nargs="+", choices=PATTERNS, help="Search for the lost object with the PTU using these patterns, one after the other. Needs -f.")
+    parser.add_argument("-q", "--poll", default=0, type=float, help="Query the pan and tilt positions of the PTU this many times per second, every frame is then tagged with the position of the PTU at its capture time.")
+    parser.add_argument("-b", "--bearing", action="store_true", help="Track the azimuth and elevation of the object and send absolute positions to the PTU instead of the PID. Needs -f, use it with -q.")
+    parser.add_argument("-e", "--trajectory", required=False, choices=list(MODELS), help="Estimate the 3D trajectory of the object from its bearing and range with a constant velocity or acceleration model, the PTU is sent to the predicted target at the control rate. Needs -b.")
+    parser.add_argument("-c", "--control_rate", default=50, type=float, help="Rate of the PTU commands with -e in Hz.")
+    parser.add_argument("-r", "--ranger", required=False, help="Serial port or Bluetooth address of the laser ranger, or 'emulator'. The range is measured when the object is centered.")
+    parser.add_argument("-R", "--range_error", default=10, type=float, help="Distance in pixels between the object and the center of the frame below which the range is measured.")
+    parser.add_argument("-k", "--profile", required=False, help="Camera profile with the PID gains tuned by autotune_PID.py.", type=str)
+    parser.add_argument("-G", "--gains", default=GAINS_PATH, help="Path to the JSON file of the tuned PID gains.", type=str)
+    parser.add_argument("-T", "--trace", required=False, help="Path to the telemetry trace file (.jsonl). Summarize it with summarize_trace.py")
 
     args = vars(parser.parse_args())
 
-    detector = Detector(args["object_detection_model"], args["labelmap"], 0.5)
+    if args["search"] != None and (args["serial"] == None or args["fov"] == None):
+        sys.exit("Searching for the object needs the PTU (-s) and the field of view of the camera (-f). Exiting the program!")
+    if args["bearing"] and (args["serial"] == None or args["fov"] == None):
+        sys.exit("Tracking the bearing needs the PTU (-s) and the field of view of the camera (-f). Exiting the program!")
+    if args["trajectory"] != None and not args["bearing"]:
+        sys.exit("Estimating the trajectory needs the bearing tracking (-b). Exiting the program!")
+    if args["roi"] and args["gate"] == None:
+        sys.exit("Detecting on the region around the motion needs the motion gate (-g). Exiting the program!")
+
+    # TIMES EVERY STAGE OF THE LOOP, DISABLED IF NO TRACE FILE IS GIVEN
+    telemetry = Telemetry(args["trace"])
 
     # IF SERIAL PORT IS GIVEN, PTU WILL BE USED
     # OTHERWISE PTU IS NOT GONNA BE USED
@@ -36,13 +95,21 @@ def main():
         # kP kI kD
         x_PID = [0.02, 0, 0]
         y_PID = [0.02, 0, 0]
+        # GAINS TUNED FOR THE CAMERA
+        if args["profile"] != None:
+            gains = load_gains(args["gains"], args["profile"])
+            if gains is None:
+                sys.exit("No PID gains for the camera profile {} in {}, tune them with autotune_PID.py. Exiting the program!".format(args["profile"], args["gains"]))
+            x_PID = gains.get("x", x_PID)
+            y_PID = gains.get("y", y_PID)
+            print("PID gains of {}: x {} y {}".format(args["profile"], x_PID, y_PID))
         prev_error_x = 0
         prev_error_y = 0
         integral_x = 0
         integral_y = 0
 
         # CONFIGURE PTU
-        ptu = PTU(args["serial"])
+        ptu = PTU(args["serial"], telemetry)
         # START THE COMMUNICATION OVER SOCKET
         ptu.start_socket()
         # NO NEED TO USE THE SERIAL ANYMORE SINCE, SOCKER HAS BEEN CREATED
@@ -52,46 +119,123 @@ def main():
         # MOVE X AND Y TO 0, 0 COORDINATE
         ptu.move_x_to_degrees(0)
         ptu.move_y_to_degrees(0)
+        # READ THE POSITION OF THE PTU BACK IN THE BACKGROUND
+        if args["poll"] > 0:
+            ptu.start_polling(args["poll"])
     else:
         print("You did not choose to activate the PTU!")
     
     # CONFIGURE THE DETECTOR
-    detector = Detector(args["object_detection_model"], args["labelmap"], 0.5)
+    if args["processes"] > 0:
+        detector = DetectorProcess(args["object_detection_model"], args["labelmap"], 0.5, args["processes"], telemetry = telemetry)
+    else:
+        detector = Detector(args["object_detection_model"], args["labelmap"], 0.5, telemetry)
 
     # VIDEO CAPTURE VIA THE VIDEO PATH
     video_capture = cv2.VideoCapture(args["video"])
 
+    # SKIP THE DETECTOR ON FRAMES WITHOUT MOTION
+    if args["gate"] != None:
+        pixels_per_degree = None
+        if args["fov"] != None:
+            pixels_per_degree = video_capture.get(cv2.CAP_PROP_FRAME_WIDTH) / args["fov"]
+        detector = MotionGate(detector, args["gate"], roi = args["roi"], min_roi_size = args["min_roi_size"], pixels_per_degree = pixels_per_degree)
+
+    # MOVE THE PTU OVER THE SEARCH PATTERNS WHEN THE OBJECT IS LOST FOR search_delay SECONDS
+    search = None
+    if args["search"] != None:
+        W = video_capture.get(cv2.CAP_PROP_FRAME_WIDTH)
+        H = video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        pixels_per_degree = W / args["fov"]
+        search = SearchScheduler((args["fov"], H / pixels_per_degree), args["search"])
+        search_delay = 0.5
+        # BEARING (PAN, TILT) AND ANGULAR VELOCITY OF THE OBJECT WHEN IT WAS LAST SEEN
+        last_seen = None
+        last_bearing = None
+        last_rate = (0, 0)
+
+    # TRACK THE AZIMUTH AND ELEVATION OF THE OBJECT, THE PTU IS SENT TO THE PREDICTED BEARING
+    bearing_tracker = None
+    if args["bearing"]:
+        camera = CameraModel.from_fov(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH), video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT), args["fov"])
+        bearing_tracker = BearingTracker(camera)
+        # THE PTU IS SENT TO WHERE THE OBJECT WILL BE THIS MANY SECONDS FROM NOW, ABOUT THE TIME THE PTU NEEDS TO GET THERE
+        command_lead = 0.1
+        # SMALLER CHANGES OF THE TARGET ARE NOT SENT TO THE PTU, IN DEGREES
+        deadband = 0.05
+
+    # THE 3D TRAJECTORY IS FED WITH THE BEARINGS OF THE TRACK AND THE RANGES, A THREAD SENDS THE PTU TO ITS TARGETS
+    trajectory = None
+    if args["trajectory"] != None:
+        trajectory = Trajectory(args["trajectory"], bearing_noise = np.degrees(5.0 / camera.focal_length))
+        trajectory_moves = deque()
+        stop_following = Event()
+        following = Thread(target = follow_trajectory, name = "trajectory", daemon = True,
+                           args = (trajectory, ptu, args["control_rate"], command_lead, deadband,
+                                   lambda: search is not None and search.searching, trajectory_moves, stop_following))
+        following.start()
+
+    # MEASURE THE RANGE OF THE OBJECT WHEN IT IS CENTERED, THE LASER POINTS AT THE CENTER OF THE FRAME
+    ranger = None
+    if args["ranger"] != None:
+        ranger = Ranger(args["ranger"], telemetry = telemetry)
+        last_range = None
+
     # RUN CONTINOUSLY UNTIL USER PRESSES Q TO QUIT!
     while(True):
-        ret, frame = video_capture.read()
+        telemetry.new_frame()
+        with telemetry.stage("capture"):
+            ret, frame = video_capture.read()
+        # CAPTURE TIME OF THE FRAME
+        now = time.monotonic()
 
         if ret is False:
             print("Could not read a frame over {}".format(args["video"]))
             break
 
+        # WHERE THE PTU WAS POINTING WHEN THE FRAME WAS CAPTURED
+        if args["serial"] != None and args["poll"] > 0:
+            pan, tilt = ptu.position_at(now)
+            telemetry.event("pointing", pan = pan, tilt = tilt)
+
         # HEIGHT AND WIDTH OF THE FRAME
         (H, W) = frame.shape[:2]
 
         # CREATE A RED CIRCLE ON THE CENTER OF THE FRAME
         frame_center_x = W // 2
         frame_center_y = H // 2
-        print("frame-center-x: {}, frame-center-y: {}".format(frame_center_x, frame_center_y))
         cv2.circle(frame, (frame_center_x, frame_center_y), 3, (0,0,255), 3)
 
-        detector.get_detections(frame)
+        # THE FRAMES ARE BLURRED WHILE THE PTU MOVES TO THE NEXT SEARCH POINT
+        if search is None or not search.searching or search.settled(now):
+            detector.get_detections(frame)
 
-        if(detector.object_detected):
-            print("An object detected!")
+            if search is not None:
+                point = None
+                if search.searching and detector.object_detected:
+                    telemetry.event("search", found = True, time = search.found(now))
+                elif search.searching:
+                    point = search.searched(now)
+                elif last_seen is not None and not detector.object_detected and now - last_seen > search_delay:
+                    point = search.start(now, last_bearing, last_rate, ptu.commanded_degrees())
+                if point is not None:
+                    with ptu.command_lock:
+                        pan, tilt = ptu.commanded_degrees()
+                        ptu.move_x_to_degrees(point[0])
+                        ptu.move_y_to_degrees(point[1])
+                    telemetry.event("search", found = False, point = point)
+                    if args["gate"] != None:
+                        detector.ptu_moved(point[0] - pan, point[1] - tilt)
 
+        if(detector.object_detected):
             # Go through all the detected objects!
             for bounding_box, detections_score, detection_classes_name in zip(detector.detections["bounding_box"], detector.detections["detection_scores"], detector.detections["detection_classes_names"]):
                 ymin, xmin, ymax, xmax = bounding_box
-                print("{} -> ymin: {}, xmin: {}, ymax: {}, xmax: {}".format(detection_classes_name, ymin, xmin, ymax, xmax))
                 obj_center_x = int((xmax + xmin) // 2.0)
                 obj_center_y = int((ymax + ymin) // 2.0)
+                telemetry.event("detection", label = detection_classes_name, score = detections_score, box = [ymin, xmin, ymax, xmax], center = [obj_center_x, obj_center_y])
 
                 # GREEN CIRCLE ON THE OBJECT
-                print("{} -> obj_center_x: {}, obj_center_y: {}".format(detection_classes_name, obj_center_x, obj_center_y))
                 cv2.circle(frame, (obj_center_x, obj_center_y), 3, (0, 255, 0), 3)
 
                 # GREEN RECTANGLE ON THE OBJECT
@@ -103,39 +247,123 @@ def main():
             # SO CONTROL THE PTU
             # TO BRING THE CENTER OF THE OBJECT TO THE
             # CENTER OF THE FRAME
-            if args["serial"] != None:
-                # distance(aka. error) between frame_center and object_center
-                # ERROR IN THE X AXIS
-                error_x = obj_center_x - frame_center_x
-                # ERROR IN THE Y AXIS
-                error_y = frame_center_y - obj_center_y
-
-                print("Error in x: {}, in y: {}".format(error_x, error_y))
-
-                # PID for x
-                proportional_x = error_x
-                integral_x = integral_x + error_x
-                differential_x = abs(prev_error_x - error_x)
-                u_x = round(x_PID[0] * proportional_x + x_PID[1] * integral_x + x_PID[2] * differential_x, 3)
-
-                # PID for y
-                proportional_y = error_y
-                integral_y = integral_y + error_y
-                differential_y = abs(prev_error_y - error_y)
-                u_y = round(x_PID[0] * proportional_y + x_PID[1] * integral_y + x_PID[2] * differential_y, 3)
-
-                prev_error_x = error_x
-                prev_error_y = error_y
-
-                print("u_x(t): {}, u_y(t): {}".format(u_x, u_y))
+            if args["serial"] != None and bearing_tracker is None:
+                with telemetry.stage("control") as stage:
+                    # distance(aka. error) between frame_center and object_center
+                    # ERROR IN THE X AXIS
+                    error_x = obj_center_x - frame_center_x
+                    # ERROR IN THE Y AXIS
+                    error_y = frame_center_y - obj_center_y
+
+                    # BEARING OF THE OBJECT, WHERE THE SEARCH STARTS IF IT IS LOST
+                    if search is not None:
+                        pan, tilt = ptu.position_at(now)
+                        bearing = (pan + error_x / pixels_per_degree, tilt - error_y / pixels_per_degree)
+                        if last_seen is not None and now - last_seen < search_delay:
+                            last_rate = tuple((b - l) / max(now - last_seen, 1e-3) for b, l in zip(bearing, last_bearing))
+                        last_seen = now
+                        last_bearing = bearing
+
+                    # PID for x
+                    proportional_x = error_x
+                    integral_x = integral_x + error_x
+                    differential_x = error_x - prev_error_x
+                    u_x = round(x_PID[0] * proportional_x + x_PID[1] * integral_x + x_PID[2] * differential_x, 3)
+
+                    # PID for y
+                    proportional_y = error_y
+                    integral_y = integral_y + error_y
+                    differential_y = error_y - prev_error_y
+                    u_y = round(y_PID[0] * proportional_y + y_PID[1] * integral_y + y_PID[2] * differential_y, 3)
+
+                    prev_error_x = error_x
+                    prev_error_y = error_y
+                    stage.fields.update(error_x = error_x, error_y = error_y, u_x = u_x, u_y = u_y)
                 
                 # IGNORE SMALL ERRORS!
+                pan_degrees = 0
+                tilt_degrees = 0
                 if error_x**2 > 100:
-                    ptu.move_x_by_degrees(u_x)
+                    pan_degrees = u_x
+                    ptu.move_x_by_degrees(pan_degrees)
             
                 if error_y**2 > 100:
-                    ptu.move_y_by_degrees(-u_y)
+                    tilt_degrees = -u_y
+                    ptu.move_y_by_degrees(tilt_degrees)
+
+                # THE SCENE MOVES WITH THE PTU, IT IS NOT MOTION
+                if args["gate"] != None:
+                    detector.ptu_moved(pan_degrees, tilt_degrees)
         
+        # BEARING TRACKING, ALSO WITHOUT A DETECTION THE TRACK IS PREDICTED FOR A WHILE
+        if bearing_tracker is not None:
+            with telemetry.stage("control") as stage:
+                pan, tilt = ptu.position_at(now)
+                boxes = detector.detections["bounding_box"] if detector.object_detected else None
+                bearing = bearing_tracker.update(now, boxes, pan, tilt)
+                if trajectory is not None:
+                    # THE FOLLOWING THREAD MOVES THE PTU
+                    if bearing is not None:
+                        trajectory.update_bearing(now, *bearing)
+                    target = None
+                else:
+                    target = bearing_tracker.ptu_target(time.monotonic() + command_lead)
+                stage.fields.update(bearing = bearing, target = target)
+
+            if bearing is not None and search is not None:
+                if trajectory is not None and trajectory.tracking:
+                    azimuth, elevation, azimuth_rate, elevation_rate, _ = trajectory.bearing(now)
+                else:
+                    azimuth, elevation, azimuth_rate, elevation_rate = bearing_tracker.predict(now)
+                last_seen = now
+                last_bearing = bearing_to_ptu(azimuth, elevation)
+                last_rate = bearing_to_ptu(azimuth_rate, elevation_rate)
+
+            # THE SEARCH MOVES THE PTU WHILE IT IS RUNNING
+            if target is not None and (search is None or not search.searching):
+                with ptu.command_lock:
+                    commanded_pan, commanded_tilt = ptu.commanded_degrees()
+                    if abs(target[0] - commanded_pan) > deadband:
+                        ptu.move_x_to_degrees(target[0])
+                    if abs(target[1] - commanded_tilt) > deadband:
+                        ptu.move_y_to_degrees(target[1])
+                    new_pan, new_tilt = ptu.commanded_degrees()
+                if args["gate"] != None:
+                    detector.ptu_moved(new_pan - commanded_pan, new_tilt - commanded_tilt)
+
+            # MOVEMENTS OF THE FOLLOWING THREAD SINCE THE LAST FRAME
+            if trajectory is not None:
+                while trajectory_moves:
+                    pan_degrees, tilt_degrees = trajectory_moves.popleft()
+                    if args["gate"] != None:
+                        detector.ptu_moved(pan_degrees, tilt_degrees)
+
+        if ranger is not None:
+            # FIRE THE LASER WHEN AN OBJECT IS CLOSE TO THE CENTER, DOES NOT WAIT FOR THE MEASUREMENT
+            # bounding_box ONLY HOLDS THE DETECTIONS SCORED ABOVE min_score, THE LASER IS NOT FIRED AT A LOW SCORED BOX
+            if detector.object_detected:
+                centering_error = min(np.hypot((xmin + xmax) / 2 - frame_center_x, (ymin + ymax) / 2 - frame_center_y)
+                                      for ymin, xmin, ymax, xmax in detector.detections["bounding_box"])
+                if centering_error < args["range_error"]:
+                    pan, tilt = None, None
+                    if args["serial"] != None:
+                        pan, tilt = ptu.position_at(now)
+                    ranger.trigger(now, pan, tilt, telemetry.frame)
+
+            # MEASUREMENTS FINISHED SINCE THE LAST FRAME
+            for reading in ranger.readings():
+                telemetry.event("range", distance = reading.distance, time = reading.time, request_time = reading.request_time,
+                                request_frame = reading.frame, pan = reading.pan, tilt = reading.tilt)
+                if reading.distance is not None:
+                    last_range = reading
+                    if bearing_tracker is not None:
+                        bearing_tracker.add_range(reading.time, reading.distance)
+                    if trajectory is not None:
+                        trajectory.update_range(reading.time, reading.distance)
+
+            if last_range is not None:
+                cv2.putText(frame, "{:.2f} m ({:.1f} s ago)".format(last_range.distance, now - last_range.time), (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+
         cv2.imshow("Frame", frame)
 
         # get the user input
@@ -146,12 +374,32 @@ def main():
             video_capture.release()
             cv2.destroyAllWindows()
 
+            if trajectory is not None:
+                stop_following.set()
+                following.join()
+
             if args["serial"] != None:
                 ptu.move_x_to(0)
                 ptu.move_y_to(0)
                 ptu.socket_close()
 
+            if args["processes"] > 0:
+                detector.close()
+            if search is not None:
+                print("Search statistics: {}".format(search.stats()))
+            if ranger is not None:
+                ranger.close()
+            telemetry.close()
             sys.exit("Exiting the program.")
 
+    if trajectory is not None:
+        stop_following.set()
+        following.join()
+    if args["processes"] > 0:
+        detector.close()
+    if ranger is not None:
+        ranger.close()
+    telemetry.close()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,6 +2,7 @@
 
 ##### IMPORTANT ######
 # FEEL FREE TO PLAY AROUND WITH THE PID VARIABLES TO TUNE IT
+# OR TUNE THEM FOR YOUR CAMERA WITH autotune_PID.py AND LOAD THEM WITH -k [profile]
 # https://www.csimn.com/CSI_pages/PIDforDummies.html
 
 ##### REFERENCES ######
@@ -11,6 +12,8 @@ from argparse import ArgumentParser
 from os import sys
 from Tracker import Tracker
 from PTU import PTU
+from PIDTuner import GAINS_PATH, load_gains
+from Telemetry import Telemetry
 
 # CHECK IF THE TRACKER IS VALID
 # RETURN THE TRACKER NAME IF VALID
@@ -32,8 +35,14 @@ def main():
     parser.add_argument("-v", "--video", required=True, help="video path, to find out the webcam path issue 'ls /dev/video*' command on the terminal", type=str)
     parser.add_argument("-t", "--tracker", required=True, help='Tracker algorithm. Available tracking algorithms: ["csrt","kcf","mil"]', type=str)
     parser.add_argument("-s", "--serial", required=False, help="Serial port to communicate with the PTU. To find out issue 'ls /dev/tty*' command on the terminal", type=str)
+    parser.add_argument("-k", "--profile", required=False, help="Camera profile with the PID gains tuned by autotune_PID.py.", type=str)
+    parser.add_argument("-G", "--gains", default=GAINS_PATH, help="Path to the JSON file of the tuned PID gains.", type=str)
+    parser.add_argument("-T", "--trace", required=False, help="Path to the telemetry trace file (.jsonl). Summarize it with summarize_trace.py", type=str)
 
     args = vars(parser.parse_args())
+
+    # TIMES EVERY STAGE OF THE LOOP, DISABLED IF NO TRACE FILE IS GIVEN
+    telemetry = Telemetry(args["trace"])
     
     tracker = None
     initial_bounding_box = None
@@ -51,13 +60,21 @@ def main():
         # kP kI kD
         x_PID = [0.02, 0, 0]
         y_PID = [0.02, 0, 0]
+        # GAINS TUNED FOR THE CAMERA
+        if args["profile"] != None:
+            gains = load_gains(args["gains"], args["profile"])
+            if gains is None:
+                sys.exit("No PID gains for the camera profile {} in {}, tune them with autotune_PID.py. Exiting the program!".format(args["profile"], args["gains"]))
+            x_PID = gains.get("x", x_PID)
+            y_PID = gains.get("y", y_PID)
+            print("PID gains of {}: x {} y {}".format(args["profile"], x_PID, y_PID))
         prev_error_x = 0
         prev_error_y = 0
         integral_x = 0
         integral_y = 0
 
         # CONFIGURE PTU
-        ptu = PTU(args["serial"])
+        ptu = PTU(args["serial"], telemetry)
         # START THE COMMUNICATION OVER SOCKET
         ptu.start_socket()
         # NO NEED TO USE THE SERIAL ANYMORE SINCE, SOCKER HAS BEEN CREATED
@@ -71,7 +88,7 @@ def main():
         print("You did not choose to activate the PTU!")
     
     # CONFIGURE THE TRACKER
-    tracker = Tracker(tracker_name)
+    tracker = Tracker(tracker_name, telemetry)
     tracker.initialize_tracker()
 
     # VIDEO CAPTURE VIA THE VIDEO PATH
@@ -79,7 +96,9 @@ def main():
 
     # RUN CONTINOUSLY UNTIL USER PRESSES Q TO QUIT!
     while(True):
-        ret, frame = video_capture.read()
+        telemetry.new_frame()
+        with telemetry.stage("capture"):
+            ret, frame = video_capture.read()
 
         # HEIGHT AND WIDTH OF THE FRAME
         (H, W) = frame.shape[:2]
@@ -109,10 +128,8 @@ def main():
             last_bb = tracker.get_last_bounding_box()
 
             # CHECK IF THE OBJECT IS LOST
-            if tracker.lost:
-                print("object is lost - last center: {}, {} - last bounding box(x, y, w, h): {}, {}, {}, {}".format(last_oc[0], last_oc[1], last_bb[0], last_bb[1], last_bb[2], last_bb[3]))
+            telemetry.event("tracking_state", lost = tracker.lost, center = last_oc, box = last_bb)
             if (not tracker.lost) and (len(last_oc) > 0) and (len(last_bb) > 0):
-                print("tracking the object - current center: {}, {} - current bounding box(x, y, w, h): {}, {}, {}, {}".format(last_oc[0], last_oc[1], last_bb[0], last_bb[1], last_bb[2], last_bb[3]))
 
                 # CREATE A GREEN CIRCLE ON THE CENTER OF THE OBJECT
                 cv2.circle(frame, (last_oc[0], last_oc[1]), 3, (0, 255, 0), 3)
@@ -126,30 +143,28 @@ def main():
             # TO BRING THE CENTER OF THE OBJECT TO THE
             # CENTER OF THE FRAME
             if args["serial"] != None:
-                # distance(aka. error) between frame_center and object_center
-                # ERROR IN THE X AXIS
-                error_x = last_oc[0] - frame_center_x
-                # ERROR IN THE Y AXIS
-                error_y = frame_center_y - last_oc[1]
-
-                print("Error in x: {}, in y: {}".format(error_x, error_y))
-
-                # PID for x
-                proportional_x = error_x
-                integral_x = integral_x + error_x
-                differential_x = abs(prev_error_x - error_x)
-                u_x = round(x_PID[0] * proportional_x + x_PID[1] * integral_x + x_PID[2] * differential_x, 3)
-
-                # PID for y
-                proportional_y = error_y
-                integral_y = integral_y + error_y
-                differential_y = abs(prev_error_y - error_y)
-                u_y = round(x_PID[0] * proportional_y + x_PID[1] * integral_y + x_PID[2] * differential_y, 3)
-
-                prev_error_x = error_x
-                prev_error_y = error_y
-
-                print("u_x(t): {}, u_y(t): {}".format(u_x, u_y))
+                with telemetry.stage("control") as stage:
+                    # distance(aka. error) between frame_center and object_center
+                    # ERROR IN THE X AXIS
+                    error_x = last_oc[0] - frame_center_x
+                    # ERROR IN THE Y AXIS
+                    error_y = frame_center_y - last_oc[1]
+
+                    # PID for x
+                    proportional_x = error_x
+                    integral_x = integral_x + error_x
+                    differential_x = error_x - prev_error_x
+                    u_x = round(x_PID[0] * proportional_x + x_PID[1] * integral_x + x_PID[2] * differential_x, 3)
+
+                    # PID for y
+                    proportional_y = error_y
+                    integral_y = integral_y + error_y
+                    differential_y = error_y - prev_error_y
+                    u_y = round(y_PID[0] * proportional_y + y_PID[1] * integral_y + y_PID[2] * differential_y, 3)
+
+                    prev_error_x = error_x
+                    prev_error_y = error_y
+                    stage.fields.update(error_x = error_x, error_y = error_y, u_x = u_x, u_y = u_y)
                 
                 # IGNORE SMALL ERRORS!
                 if error_x**2 > 100:
@@ -181,7 +196,10 @@ def main():
                 ptu.move_y_to(0)
                 ptu.socket_close()
 
+            telemetry.close()
             sys.exit("Exiting the program.")
 
+    telemetry.close()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
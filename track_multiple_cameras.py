@@ -0,0 +1,39 @@
+####### WRITTEN TO TRACK WITH SEVERAL CAMERA AND PTU PAIRS ON ONE HOST #######
+
+####### MAINTAINER: DENIZ KARTAL ######
+
+# THE CHANNELS (CAMERA AND PTU PAIRS) ARE DEFINED IN A CONFIG FILE, SEE Supervisor.py FOR THE FORMAT
+# PRESS CTRL+C TO STOP ALL THE CHANNELS
+
+from argparse import ArgumentParser
+from Supervisor import Supervisor
+import time
+import sys
+import os
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("-c", "--config", required=True, help="Path to the config file (.json) of the channels.")
+    parser.add_argument("-r", "--report_interval", default=5.0, type=float, help="Seconds between two throughput reports.")
+
+    args = vars(parser.parse_args())
+
+    if not os.path.exists(args["config"]):
+        sys.exit("{} does not exist. Exiting the program!".format(args["config"]))
+
+    supervisor = Supervisor(args["config"])
+    supervisor.start()
+
+    try:
+        while supervisor.running():
+            time.sleep(args["report_interval"])
+            supervisor.report()
+    except KeyboardInterrupt:
+        print("Stopping the channels!")
+
+    supervisor.stop()
+    supervisor.report()
+    sys.exit("Exiting the program.")
+
+if __name__ == "__main__":
+    main()